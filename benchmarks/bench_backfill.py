@@ -0,0 +1,102 @@
+"""
+Compare the bulk backfill with one insert_summary_tool-style upsert per day.
+
+    python benchmarks/bench_backfill.py --rows 100000
+    python benchmarks/bench_backfill.py --rows 100000 --dsn postgresql://localhost/gym_bench
+
+Without --dsn both run against the SQLite stand-in (fakes/postgres.py). With --dsn they run
+against that Postgres database, where the backfill uses COPY into a staging table and a merge;
+the workout_summaries table there is created if missing and emptied first. The per-row baseline
+loads --per-row-sample rows (one transaction each, like the tool) and is extrapolated.
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.gym_manager.backfill import COLUMNS, backfill, validate_rows
+from src.gym_manager.fakes.postgres import SQLitePool
+from src.gym_manager.fakes.sheets import FakeSheetsService, make_form_rows
+from src.gym_manager.tools.pg_pool import PgPool
+from src.gym_manager.tools.sheets_fetch import GoogleSheetsFetchTool
+
+PG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS workout_summaries (
+    member TEXT NOT NULL DEFAULT '',
+    date DATE NOT NULL,
+    gym BOOLEAN,
+    muscle_trained TEXT,
+    summary TEXT,
+    pain_experienced BOOLEAN,
+    pain_details TEXT,
+    PRIMARY KEY (member, date)
+)
+"""
+
+
+def _pool(dsn, tmp: str, name: str) -> PgPool:
+    if not dsn:
+        return SQLitePool(f"{tmp}/{name}.sqlite")
+    import psycopg2
+
+    pool = PgPool(lambda: psycopg2.connect(dsn))
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(PG_SCHEMA)
+            cur.execute("TRUNCATE workout_summaries")
+    return pool
+
+
+def bench(rows: int, batch_rows: int, per_row_sample: int, dsn=None) -> dict:
+    # One response a day from 1900 on keeps every date distinct, so every row is loaded.
+    data = make_form_rows(rows, start=datetime(1900, 1, 1, 19, 0, 0))
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = _pool(dsn, tmp, "per_row")
+        sample = validate_rows(data[1:per_row_sample + 1], 2, [])
+        started = time.perf_counter()
+        for row in sample:
+            with pool.connection() as conn:
+                with conn.cursor() as cur:
+                    pool.execute(cur, "upsert_summary", ("", *(row[c] for c in COLUMNS)))
+        elapsed = time.perf_counter() - started
+        pool.close()
+        results["per_row"] = {
+            "rows": len(sample),
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(len(sample) / elapsed),
+            "estimated_seconds_for_all": round(elapsed / len(sample) * rows, 1),
+        }
+
+        pool = _pool(dsn, tmp, "backfill")
+        tool = GoogleSheetsFetchTool(service=FakeSheetsService(data), sheet_id="bench", incremental=False)
+        started = time.perf_counter()
+        report = backfill(tool, pool, checkpoint_path=f"{tmp}/checkpoint.json", batch_rows=batch_rows)
+        elapsed = time.perf_counter() - started
+        # A finished backfill restarted from its checkpoint has nothing left to load.
+        replay = backfill(tool, pool, checkpoint_path=f"{tmp}/checkpoint.json", batch_rows=batch_rows)
+        pool.close()
+        results["backfill"] = {
+            "rows": report["rows_loaded"],
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(report["rows_loaded"] / elapsed),
+            "restart_rows_loaded": replay["rows_loaded"] - report["rows_loaded"],
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-rows", type=int, default=5000)
+    parser.add_argument("--per-row-sample", type=int, default=2000)
+    parser.add_argument("--dsn", help="Postgres DSN; the SQLite stand-in is used without it")
+    args = parser.parse_args()
+    results = bench(args.rows, args.batch_rows, args.per_row_sample, args.dsn)
+    for mode, stats in results.items():
+        print(f"{mode:<10} {stats['rows']:>8} rows  {stats['seconds']:>9.3f}s  {stats['rows_per_second']:>8} rows/s")
+    print(f"per-row upserts would take ~{results['per_row']['estimated_seconds_for_all']}s for {args.rows} rows; "
+          f"restarting the finished backfill loaded {results['backfill']['restart_rows_loaded']} rows")
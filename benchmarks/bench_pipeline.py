@@ -0,0 +1,284 @@
+"""
+Run the real GymManagerCrew task graph offline against deterministic local stand-ins
+(scripted LLM, fake Sheets, SQLite in place of Postgres, fake Gmail, local Serper, fake embedder)
+and record per-task wall time, tool calls, LLM calls, memory and total latency.
+
+    python benchmarks/bench_pipeline.py --llm-latency 0.05 --workers 1
+    python benchmarks/bench_pipeline.py --baseline benchmarks/results/pipeline.json
+
+Results are written as JSON to --output (and appended to benchmarks/results/history.jsonl),
+so runs on different commits can be compared; --baseline fails the run when total latency
+regressed by more than --tolerance.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+# Everything a run touches must stay local: no telemetry, no real credentials.
+BENCH_ENV = {
+    "CREWAI_DISABLE_TELEMETRY": "true",
+    "OTEL_SDK_DISABLED": "true",
+    "GOOGLE_SHEET_ID": "bench-sheet",
+    "SERPER_API_KEY": "bench-key",
+    "LLM_CACHE": "false",
+}
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_pipeline(llm_latency: float = 0.0, tool_latency: float = 0.0, rows: int = 200,
+                 workers: int = 1, include_survey: bool = True, verbose: bool = False) -> dict:
+    """One kickoff of the crew against fresh stand-ins; returns the measurements."""
+    with tempfile.TemporaryDirectory() as tmp:
+        # XDG_DATA_HOME keeps crewai's own memory stores in the temporary directory too.
+        env = {**BENCH_ENV, "XDG_DATA_HOME": tmp, "TASK_WORKERS": str(workers)}
+        saved = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        console = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        try:
+            with console:
+                return _run(Path(tmp), llm_latency, tool_latency, rows, include_survey)
+        finally:
+            os.chdir(cwd)
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+
+def _run(tmp: Path, llm_latency: float, tool_latency: float, rows: int, include_survey: bool) -> dict:
+    from crewai.utilities.events import (
+        TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent, ToolUsageErrorEvent, ToolUsageFinishedEvent,
+        crewai_event_bus,
+    )
+    from crewai.memory import LongTermMemory
+    from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
+    from src.gym_manager import crew as crew_module, resources
+    from src.gym_manager.embeddings import EmbeddingService, EmbeddingStore, get_embedding_service
+    from src.gym_manager.fakes.gmail import FakeGmailSender
+    from src.gym_manager.fakes.llm import ScriptedLLM, gym_pipeline_scripts
+    from src.gym_manager.fakes.postgres import SQLitePool
+    from src.gym_manager.fakes.serper import FakeSerperServer
+    from src.gym_manager.fakes.sheets import FakeSheetsService, make_form_rows
+    from src.gym_manager.outputs import assign_output_files
+    from src.gym_manager.telemetry import Telemetry, get_telemetry
+    from src.gym_manager.timetable import TIMETABLE_PDF, build_index, get_timetable_index
+    from src.gym_manager.tool_memo import ToolMemo
+    from src.gym_manager.tools import youtube_search_tool as yt
+    from src.gym_manager.tools.pg_pool import get_pool
+    from src.gym_manager.ttl_cache import SQLiteTTLCache
+    from src.gym_manager.vector_store import VectorStore, get_vector_store
+
+    def fake_embed(texts):
+        time.sleep(tool_latency)
+        return [[float(len(t)), float(sum(map(ord, t)) % 997), 1.0] for t in texts]
+
+    recipient = "member@example.com"
+    sheets = FakeSheetsService(make_form_rows(rows))
+    gmail = FakeGmailSender(latency=tool_latency)
+    pool = SQLitePool(str(tmp / "summaries.sqlite"), latency=tool_latency)
+    embeddings = EmbeddingService(fake_embed, EmbeddingStore(str(tmp / "embeddings")), model="bench")
+    llm = ScriptedLLM(gym_pipeline_scripts(recipient), latency=llm_latency)
+
+    tasks = defaultdict(lambda: {"seconds": None, "tool_calls": Counter(), "tool_errors": 0})
+    started = {}
+
+    with FakeSerperServer(latency=tool_latency) as serper, crewai_event_bus.scoped_handlers():
+        built_before = {name for name in resources._RESOURCES if resources.is_built(name)}
+        crew_module.get_week_memory.override(
+            LongTermMemory(storage=LTMSQLiteStorage(db_path=str(tmp / "week_memory.db"))))
+        get_pool.override(pool)
+        crew_module.get_gmail_send_tool.override(gmail)
+        get_embedding_service.override(embeddings)
+        get_vector_store.override(VectorStore(str(tmp / "vectors")))
+        get_timetable_index.override(build_index(TIMETABLE_PDF, str(tmp / "timetable.json")))
+        yt.get_search_cache.override(SQLiteTTLCache(str(tmp / "youtube.db"), table="youtube_search"))
+        get_telemetry.override(Telemetry(str(tmp / "telemetry.jsonl")).install())
+        yt.get_session.reset()
+        serper_url, yt.SERPER_URL = yt.SERPER_URL, serper.url
+
+        @crewai_event_bus.on(TaskStartedEvent)
+        def on_start(source, event):
+            started[event.task.name] = (time.perf_counter(), _rss_mb())
+
+        @crewai_event_bus.on(TaskCompletedEvent)
+        def on_done(source, event):
+            t0, rss0 = started[event.task.name]
+            entry = tasks[event.task.name]
+            entry["seconds"] = round(time.perf_counter() - t0, 4)
+            entry["rss_mb_delta"] = round(_rss_mb() - rss0, 2)
+
+        @crewai_event_bus.on(TaskFailedEvent)
+        def on_failed(source, event):
+            tasks[event.task.name]["error"] = event.error
+
+        @crewai_event_bus.on(ToolUsageFinishedEvent)
+        def on_tool(source, event):
+            tasks[getattr(source.task, "name", "unknown")]["tool_calls"][event.tool_name] += 1
+
+        @crewai_event_bus.on(ToolUsageErrorEvent)
+        def on_tool_error(source, event):
+            tasks[getattr(source.task, "name", "unknown")]["tool_errors"] += 1
+
+        rss_before = _rss_mb()
+        build_started = time.perf_counter()
+        crew = crew_module.GymManagerCrew(
+            goal="bulking", recipient_email=recipient, state_dir=str(tmp), include_survey=include_survey,
+            llm=llm, sheets_service=sheets,
+        ).crew()
+        for task in crew.tasks:
+            task.human_input = False  # the survey task asks for confirmation on the console
+        assign_output_files(crew, str(tmp / "outputs"))
+        build_seconds = time.perf_counter() - build_started
+
+        kickoff_started = time.perf_counter()
+        crew.kickoff()
+        total = time.perf_counter() - kickoff_started
+        memo = ToolMemo.of(crew)
+
+        for name, getter in resources._RESOURCES.items():
+            if name not in built_before:
+                getter.reset()
+        yt.SERPER_URL = serper_url
+        summary_rows = len(pool.rows())
+        pool.close()
+
+    report = {
+        "tasks": {},
+        "build_seconds": round(build_seconds, 4),
+        "total_seconds": round(total, 4),
+        "llm": {"calls": llm.calls, "prompt_tokens": llm.prompt_tokens, "completion_tokens": llm.completion_tokens},
+        "tool_calls": 0,
+        "tool_memo": memo.stats() if memo is not None else {},
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_mb_delta": round(_rss_mb() - rss_before, 2),
+        "stand_ins": {
+            "sheets_requests": sheets.requests,
+            "serper_requests": serper.requests,
+            "emails_sent": len(gmail.sent),
+            "summary_rows": summary_rows,
+            "embeddings": embeddings.stats(),
+        },
+    }
+    for task in crew.tasks:
+        entry = tasks[task.name]
+        entry["tool_calls"] = dict(entry["tool_calls"])
+        entry["llm_calls"] = llm.calls_by_task.get(task.name, 0)
+        report["tasks"][task.name] = entry
+        report["tool_calls"] += sum(entry["tool_calls"].values())
+    return report
+
+
+def summarize(runs: list) -> dict:
+    """Median per-task seconds and total latency over repeated runs."""
+    def median(values):
+        values = sorted(v for v in values if v is not None)
+        return values[len(values) // 2] if values else None
+
+    last = runs[-1]
+    return {
+        "total_seconds": median(r["total_seconds"] for r in runs),
+        "tasks": {name: median(r["tasks"][name]["seconds"] for r in runs) for name in last["tasks"]},
+        "tool_calls": last["tool_calls"],
+        "llm_calls": last["llm"]["calls"],
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> bool:
+    ok = True
+    base, now = baseline["summary"], current["summary"]
+    print(f"\nvs baseline {baseline.get('commit', '?')}:")
+    for name, seconds in now["tasks"].items():
+        before = base["tasks"].get(name)
+        if before and seconds is not None:
+            print(f"  {name:<30} {before:>8.3f}s -> {seconds:>8.3f}s ({(seconds - before) / before:+.0%})")
+    change = (now["total_seconds"] - base["total_seconds"]) / base["total_seconds"]
+    print(f"  {'total':<30} {base['total_seconds']:>8.3f}s -> {now['total_seconds']:>8.3f}s ({change:+.0%})")
+    if change > tolerance:
+        print(f"❌ Total latency regressed by more than {tolerance:.0%}")
+        ok = False
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per scripted LLM call")
+    parser.add_argument("--tool-latency", type=float, default=0.01, help="seconds per Gmail/DB/search/embedding call")
+    parser.add_argument("--rows", type=int, default=200, help="form responses in the fake sheet")
+    parser.add_argument("--workers", type=int, default=1, help="TASK_WORKERS for the run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-survey", action="store_true", help="skip the survey task, as batch runs do")
+    parser.add_argument("--verbose", action="store_true", help="show the agents' console output")
+    parser.add_argument("--output", default=str(RESULTS_DIR / "pipeline.json"))
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    runs = [
+        run_pipeline(args.llm_latency, args.tool_latency, args.rows, args.workers, not args.no_survey, args.verbose)
+        for _ in range(args.repeat)
+    ]
+    result = {
+        "commit": _git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "tolerance", "verbose")},
+        "summary": summarize(runs),
+        "runs": runs,
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    with open(output.parent / "history.jsonl", "a") as f:
+        f.write(json.dumps({k: result[k] for k in ("commit", "created_at", "params", "summary")}) + "\n")
+
+    summary = result["summary"]
+    print(f"{'task':<30} {'seconds':>9} {'tools':>6} {'llm':>5}")
+    for name, seconds in summary["tasks"].items():
+        task = runs[-1]["tasks"][name]
+        print(f"{name:<30} {seconds if seconds is not None else float('nan'):>9.3f} "
+              f"{sum(task['tool_calls'].values()):>6} {task['llm_calls']:>5}")
+    print(f"{'total':<30} {summary['total_seconds']:>9.3f} {summary['tool_calls']:>6} {summary['llm_calls']:>5}")
+    print(f"peak RSS {summary['peak_rss_mb']} MB; results in {output}")
+
+    if args.baseline:
+        return 0 if compare(result, json.loads(Path(args.baseline).read_text()), args.tolerance) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
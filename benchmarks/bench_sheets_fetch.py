@@ -0,0 +1,52 @@
+"""
+Compare full-sheet and incremental form response fetching against the fake Sheets backend.
+
+    python benchmarks/bench_sheets_fetch.py --rows 100000 --new 5
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.gym_manager.fakes.sheets import FakeSheetsService, make_form_rows
+from src.gym_manager.tools.sheets_fetch import GoogleSheetsFetchTool
+
+
+def bench(rows: int, new: int, repeat: int) -> dict:
+    data = make_form_rows(rows + new)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("full", "incremental"):
+            service = FakeSheetsService(data[:-new])
+            tool = GoogleSheetsFetchTool(
+                service=service,
+                sheet_id="bench",
+                incremental=mode == "incremental",
+                watermark_path=f"{tmp}/{mode}.json",
+            )
+            if mode == "incremental":
+                tool.save_watermark(tool.fetch_new_rows()["watermark"])  # establish the watermark
+            for row in data[-new:]:
+                service.append(row)
+            service.rows_served = 0
+            started = time.perf_counter()
+            for _ in range(repeat):
+                if mode == "incremental":
+                    tool.fetch_new_rows()
+                else:
+                    tool._get_values("Form Responses 1!A:Z")
+            elapsed = (time.perf_counter() - started) / repeat
+            results[mode] = {"seconds_per_fetch": round(elapsed, 6), "rows_downloaded": service.rows_served // repeat}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--new", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for mode, stats in bench(args.rows, args.new, args.repeat).items():
+        print(f"{mode:<12} {stats['seconds_per_fetch'] * 1000:>10.3f} ms/fetch  {stats['rows_downloaded']:>8} rows downloaded")
@@ -0,0 +1,150 @@
+"""
+Compare the three separate Chroma stores with the shared vector store.
+
+    python benchmarks/bench_vector_store.py --items 2000 --repeats 0.3
+
+"before" lays the stores out as they were: ./db (knowledge), ./memory (short-term) and crewai's
+entity store, each its own Chroma database. "after" is the shared store built from them by
+vector_store.migrate, which drops the `--repeats` share of each store's items that repeat an
+earlier one (crewai saved every memory under a fresh uuid, so reruns stored the same text
+again). Each layout is measured in a fresh process: the time to open the stores and answer the
+first round of queries, query latency for a round (one query per store or namespace, as a
+crew step makes) and resident memory. Vectors are random, so no embedding API is called.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+
+from src.gym_manager.vector_store import ENTITIES, KNOWLEDGE, NAMESPACES, SHORT_TERM, VectorStore, migrate
+
+LEGACY = {KNOWLEDGE: ("db", "embedchain_store"), SHORT_TERM: ("memory", "short_term"), ENTITIES: ("entities", "entities")}
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class _NoEmbedding:
+    """Every vector in the benchmark is given; calling the embedder would be a bug."""
+
+    def __call__(self, input):
+        raise AssertionError("the benchmark should not embed anything")
+
+
+def build(root: str, items: int, dim: int, repeats: float, seed: int = 7) -> dict:
+    """Write the legacy stores, then migrate them into a shared store; returns the migration report."""
+    import chromadb
+
+    rng = np.random.default_rng(seed)
+    unique = items - int(items * repeats)
+    texts = {}
+    for namespace in LEGACY:
+        docs = [f"{namespace} item {i}" for i in range(unique)]
+        texts[namespace] = docs + [docs[i] for i in rng.integers(0, unique, items - unique)]
+    vectors = {text: rng.standard_normal(dim).astype(np.float32).tolist() for docs in texts.values() for text in docs}
+    sources = []
+    for namespace, (folder, name) in LEGACY.items():
+        path = os.path.join(root, "before", folder)
+        collection = chromadb.PersistentClient(path=path).create_collection(name, embedding_function=None)
+        docs = texts[namespace]
+        for start in range(0, len(docs), 500):
+            batch = docs[start:start + 500]
+            collection.add(ids=[f"{namespace}-{start + i}" for i in range(len(batch))], documents=batch,
+                           embeddings=[vectors[t] for t in batch], metadatas=[{"source": namespace}] * len(batch))
+        sources.append((path, name, namespace))
+    store = VectorStore(os.path.join(root, "after"), _NoEmbedding())
+    return migrate(store, sources)
+
+
+def measure(layout: str, root: str, dim: int, queries: int) -> dict:
+    """Run in a fresh process: open the layout's stores and time rounds of queries."""
+    import chromadb
+
+    baseline = _rss_mb()
+    started = time.perf_counter()
+    if layout == "before":
+        collections = [chromadb.PersistentClient(path=os.path.join(root, "before", folder)).get_collection(
+            name, embedding_function=None) for folder, name in LEGACY.values()]
+    else:
+        store = VectorStore(os.path.join(root, "after"), _NoEmbedding())
+        collections = [store.collection(namespace) for namespace in NAMESPACES]
+    rng = np.random.default_rng(11)
+    probes = rng.standard_normal((queries + 1, dim)).astype(np.float32).tolist()
+
+    def round_trip(probe):
+        for collection in collections:
+            collection.query(query_embeddings=[probe], n_results=3)
+
+    round_trip(probes[0])
+    cold = time.perf_counter() - started
+    timings = []
+    for probe in probes[1:]:
+        began = time.perf_counter()
+        round_trip(probe)
+        timings.append(time.perf_counter() - began)
+    timings.sort()
+    return {
+        "databases": 3 if layout == "before" else 1,
+        "vectors": sum(c.count() for c in collections),
+        "open_and_first_round_ms": round(cold * 1000, 1),
+        "round_p50_ms": round(statistics.median(timings) * 1000, 3),
+        "round_p95_ms": round(timings[int(0.95 * (len(timings) - 1))] * 1000, 3),
+        "rss_mb": round(_rss_mb(), 1),
+        "rss_growth_mb": round(_rss_mb() - baseline, 1),
+    }
+
+
+def bench(items: int, dim: int, repeats: float, queries: int) -> dict:
+    with tempfile.TemporaryDirectory() as root:
+        migration = build(root, items, dim, repeats)
+        results = {"migration": {e["namespace"]: {k: e[k] for k in ("read", "added", "duplicates")}
+                                 for e in migration["sources"]}}
+        for layout in ("before", "after"):
+            out = subprocess.run(
+                [sys.executable, __file__, "--measure", layout, "--root", root, "--dim", str(dim),
+                 "--queries", str(queries)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results[layout] = json.loads(out.strip().splitlines()[-1])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=2000, help="items per legacy store")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--repeats", type=float, default=0.3, help="share of each store's items that repeat an earlier one")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--measure", choices=("before", "after"), help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.root, args.dim, args.queries)))
+        sys.exit(0)
+    results = bench(args.items, args.dim, args.repeats, args.queries)
+    for namespace, counts in results["migration"].items():
+        print(f"migrated {namespace:<11} {counts['read']:>6} read {counts['added']:>6} added "
+              f"{counts['duplicates']:>6} duplicates")
+    for layout in ("before", "after"):
+        r = results[layout]
+        print(f"{layout:<7} {r['databases']} db  {r['vectors']:>6} vectors  open+first {r['open_and_first_round_ms']:>8}ms  "
+              f"round p50 {r['round_p50_ms']:>7}ms p95 {r['round_p95_ms']:>7}ms  rss {r['rss_mb']:>7}MB "
+              f"(+{r['rss_growth_mb']}MB)")
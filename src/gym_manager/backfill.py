@@ -0,0 +1,211 @@
+"""
+Bulk backfill of workout_summaries from every row of the form response sheet.
+
+    python -m src.gym_manager.backfill [--batch-rows 5000] [--restart] [--respondent EMAIL] [--member EMAIL]
+
+The sheet is streamed in ranges of --batch-rows rows. Each row is mapped onto the summary
+model (ingest.summary_from_response) and validated; rows that fail are counted and reported,
+not loaded. Each batch is loaded in one transaction: on Postgres it is COPYed into a temporary
+staging table and merged with one INSERT ... ON CONFLICT, elsewhere (the SQLite stand-in) it
+falls back to the prepared upsert. After every committed batch the next sheet row is saved to
+a checkpoint, so an interrupted backfill resumes where it stopped; batches are upserts keyed by
+member and date, so replaying one is harmless. Rows are stored under --member (by default the
+--respondent whose rows are read), with a checkpoint per member.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from psycopg2.extras import DictCursor
+from pydantic import ValidationError
+
+from .crew import summary
+from .ingest import summary_from_response, to_db_row
+from .members import current_member, member_key, member_slug
+from .tools.pg_pool import PgPool, get_pool
+from .tools.pg_tool import create_history_schema, refresh_exercise_log, refresh_pain_index, refresh_weekly_rollups
+from .tools.sheets_fetch import STORAGE_DIR, GoogleSheetsFetchTool, structure_response
+
+COLUMNS = ("date", "gym", "muscle_trained", "summary", "pain_experienced", "pain_details")
+MAX_REJECTS_REPORTED = 20
+
+# ON COMMIT DELETE ROWS keeps one staging table per pooled connection, emptied by every commit.
+STAGING_TABLE = """
+    CREATE TEMP TABLE IF NOT EXISTS workout_summaries_staging
+    (LIKE workout_summaries INCLUDING DEFAULTS) ON COMMIT DELETE ROWS
+"""
+COPY_STAGING = f"COPY workout_summaries_staging (member, {', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+# Unchanged rows are skipped, so replaying a batch after a restart writes nothing.
+MERGE_STAGING = f"""
+    INSERT INTO workout_summaries (member, {', '.join(COLUMNS)})
+    SELECT member, {', '.join(COLUMNS)} FROM workout_summaries_staging
+    ON CONFLICT (member, date) DO UPDATE
+    SET {', '.join(f"{c} = EXCLUDED.{c}" for c in COLUMNS[1:])}
+    WHERE ({', '.join(f"workout_summaries.{c}" for c in COLUMNS[1:])})
+        IS DISTINCT FROM ({', '.join(f"EXCLUDED.{c}" for c in COLUMNS[1:])})
+"""
+
+
+def checkpoint_path_for(sheet_id: str, member: str = "") -> str:
+    suffix = f"_{member_slug(member)}" if member else ""
+    return os.path.join(STORAGE_DIR, f"backfill_{sheet_id}{suffix}.json")
+
+
+def _load_checkpoint(path: str, sheet_id: str, member: str) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if checkpoint.get("sheet_id") != sheet_id or checkpoint.get("member", "") != member:
+        return {}
+    return checkpoint
+
+
+def _save_checkpoint(path: str, checkpoint: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def validate_rows(rows: List[List[str]], first_row: int, rejects: List[dict]) -> List[Dict[str, Any]]:
+    """
+    Map sheet rows onto workout_summaries rows, one per day (the day's last response wins).
+    Rows that do not fit the summary model are appended to `rejects` with their row number.
+    """
+    by_day: Dict[str, Dict[str, Any]] = {}
+    for offset, row in enumerate(rows):
+        if not row:
+            continue
+        mapped = summary_from_response(structure_response(row))
+        if mapped is None:
+            rejects.append({"row": first_row + offset, "error": f"unreadable timestamp {row[0]!r}"})
+            continue
+        try:
+            summary.model_validate(mapped)
+        except ValidationError as e:
+            rejects.append({"row": first_row + offset, "error": str(e).splitlines()[0]})
+            continue
+        db_row = to_db_row(mapped)
+        by_day[db_row["date"]] = db_row
+    return list(by_day.values())
+
+
+def copy_merge(cur, rows: List[Dict[str, Any]], member: str = "") -> None:
+    """COPY rows into the session's staging table and merge them into workout_summaries (Postgres)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+    for row in rows:
+        writer.writerow([member] + [str(row[c]).lower() if isinstance(row[c], bool) else row[c] for c in COLUMNS])
+    buffer.seek(0)
+    cur.execute(STAGING_TABLE)
+    cur.copy_expert(COPY_STAGING, buffer)
+    cur.execute(MERGE_STAGING)
+
+
+def load_batch(pool: PgPool, rows: List[Dict[str, Any]], member: str = "") -> None:
+    """
+    Load one batch of a member's rows in a single transaction, by COPY and merge where the
+    driver supports it, and refresh the weekly rollups, the pain index and the exercise log of
+    the days it touched.
+    """
+    with pool.connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cur:
+            if hasattr(cur, "copy_expert"):
+                copy_merge(cur, rows, member)
+            else:
+                for row in rows:
+                    pool.execute(cur, "upsert_summary", (member, *(row[c] for c in COLUMNS)))
+            refresh_weekly_rollups(pool, cur, [row["date"] for row in rows], member)
+            refresh_pain_index(pool, cur, [row["date"] for row in rows], member)
+            refresh_exercise_log(pool, cur, rows, member)
+
+
+def backfill(
+    sheets_tool: GoogleSheetsFetchTool,
+    pool: Optional[PgPool] = None,
+    checkpoint_path: Optional[str] = None,
+    batch_rows: int = 5000,
+    restart: bool = False,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    member: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Load every sheet row past the checkpoint into workout_summaries, under `member` (by default
+    the current one, see members.py), and return the final checkpoint: next_row, rows_read,
+    rows_loaded, rows_rejected, the first rejects and timing. `progress` is called with the
+    checkpoint after each committed batch.
+    """
+    pool = pool or get_pool()
+    member = current_member() if member is None else member_key(member)
+    create_history_schema(pool)
+    checkpoint_path = checkpoint_path or checkpoint_path_for(sheets_tool.sheet_id, member)
+    checkpoint = {} if restart else _load_checkpoint(checkpoint_path, sheets_tool.sheet_id, member)
+    checkpoint = {
+        "sheet_id": sheets_tool.sheet_id,
+        "member": member,
+        "next_row": 2,
+        "rows_read": 0,
+        "rows_loaded": 0,
+        "rows_rejected": 0,
+        "rejects": [],
+        "seconds": 0.0,
+        **checkpoint,
+        "done": False,
+    }
+    started = time.perf_counter() - checkpoint["seconds"]
+    for first_row, rows in sheets_tool.iter_rows(checkpoint["next_row"], batch_rows):
+        rejects: List[dict] = []
+        db_rows = validate_rows([r for r in rows if sheets_tool._matches(r)], first_row, rejects)
+        if db_rows:
+            load_batch(pool, db_rows, member)
+        checkpoint.update(
+            next_row=first_row + len(rows),
+            rows_read=checkpoint["rows_read"] + len(rows),
+            rows_loaded=checkpoint["rows_loaded"] + len(db_rows),
+            rows_rejected=checkpoint["rows_rejected"] + len(rejects),
+            rejects=(checkpoint["rejects"] + rejects)[:MAX_REJECTS_REPORTED],
+            seconds=round(time.perf_counter() - started, 3),
+            updated=datetime.now().isoformat(timespec="seconds"),
+        )
+        _save_checkpoint(checkpoint_path, checkpoint)
+        if progress:
+            progress(checkpoint)
+    checkpoint.update(done=True, seconds=round(time.perf_counter() - started, 3))
+    _save_checkpoint(checkpoint_path, checkpoint)
+    return checkpoint
+
+
+def _print_progress(checkpoint: Dict[str, Any]) -> None:
+    rate = checkpoint["rows_read"] / checkpoint["seconds"] if checkpoint["seconds"] else 0.0
+    print(f"row {checkpoint['next_row'] - 1:>9}  loaded {checkpoint['rows_loaded']:>9}  "
+          f"rejected {checkpoint['rows_rejected']:>6}  {rate:>9.0f} rows/s", flush=True)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Backfill workout_summaries from the whole form response sheet.")
+    parser.add_argument("--batch-rows", type=int, default=5000, help="sheet rows per range request and transaction")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first row")
+    parser.add_argument("--checkpoint", help="checkpoint file (default storage/backfill_<sheet id>.json)")
+    parser.add_argument("--respondent", help="only load this respondent's rows")
+    parser.add_argument("--member", help="store the rows under this member's email (default: --respondent)")
+    args = parser.parse_args(argv)
+
+    sheets_tool = GoogleSheetsFetchTool(respondent_email=args.respondent)
+    result = backfill(sheets_tool, checkpoint_path=args.checkpoint, batch_rows=args.batch_rows,
+                      restart=args.restart, progress=_print_progress, member=args.member or args.respondent or "")
+    print(f"Done: {result['rows_loaded']} days loaded from {result['rows_read']} rows "
+          f"in {result['seconds']}s, {result['rows_rejected']} rejected.")
+    for reject in result["rejects"]:
+        print(f"  row {reject['row']}: {reject['error']}")
+
+
+if __name__ == "__main__":
+    main()
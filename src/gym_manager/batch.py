@@ -0,0 +1,202 @@
+"""
+Run the daily pipeline for a roster of gym members.
+
+    python -m src.gym_manager.batch roster.csv --concurrency 8 --rate gemini=120
+
+The roster is a CSV or JSON list with `email`, `goal` and optionally `sheet_email`
+(the address the member uses on the Google Form, when it differs from `email`).
+Each member gets an isolated crew and their own reports directory under outputs/; their
+state lives in storage/members/, and their workout history, pain index and memories are keyed
+by their email (see members.py). A failed member
+is retried up to --attempts times, waiting a jittered, doubling --backoff between tries.
+Progress is appended to outputs/batch/<run_id>.jsonl, so rerunning with the same run id
+skips members that already finished.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from .gateway import BATCH, get_gateway
+from .members import member_scope, member_slug
+from .outputs import OUTPUT_DIR, assign_output_files
+
+
+class Member(BaseModel):
+    email: str
+    goal: str
+    sheet_email: Optional[str] = None
+
+    @property
+    def slug(self) -> str:
+        return member_slug(self.email)
+
+
+def load_roster(path: str) -> List[Member]:
+    """Read members from a CSV (with a header row) or a JSON list."""
+    with open(path, newline="") as f:
+        if path.endswith(".json"):
+            rows = json.load(f)
+        else:
+            rows = [{k: v for k, v in row.items() if v} for row in csv.DictReader(f)]
+    return [Member(**row) for row in rows]
+
+
+def run_member(member: Member, output_dir: str):
+    """
+    Build a crew for one member and run it, writing reports into `output_dir`. The member's
+    state (memories, sheet watermark) stays in storage/members/<member>, the crew's default.
+    """
+    from .crew import GymManagerCrew
+
+    crew = GymManagerCrew(
+        goal=member.goal,
+        recipient_email=member.email,
+        respondent_email=member.sheet_email or member.email,
+        include_survey=False,
+        priority=BATCH,  # interactive runs go first at the LLM gateway
+        member=member.email,
+    ).crew()
+    assign_output_files(crew, output_dir)
+    # The tools read and write the history of the member in scope.
+    with member_scope(member.email):
+        return crew.kickoff()
+
+
+class BatchRunner:
+    """Runs `run_member` for every member with bounded concurrency, isolating failures."""
+
+    def __init__(
+        self,
+        members: List[Member],
+        run_member: Callable[[Member, str], object] = run_member,
+        max_concurrency: int = 4,
+        provider_limits: Optional[Dict[str, float]] = None,
+        output_root: str = OUTPUT_DIR,
+        run_id: Optional[str] = None,
+        max_attempts: int = 1,
+        backoff: float = 10.0,
+        max_backoff: float = 300.0,
+    ):
+        self.members = members
+        self.run_member = run_member
+        self.max_concurrency = max(1, max_concurrency)
+        self.output_root = output_root
+        self.run_id = run_id or datetime.now().strftime("%Y-%m-%d")
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.state_path = os.path.join(output_root, "batch", f"{self.run_id}.jsonl")
+        self._state_lock = threading.Lock()
+        for provider, per_minute in (provider_limits or {}).items():
+            get_gateway().set_provider_limit(provider, per_minute)
+
+    def completed(self) -> set:
+        """Emails of members that already finished in this run."""
+        done = set()
+        if not os.path.exists(self.state_path):
+            return done
+        with open(self.state_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if entry.get("status") == "done":
+                    done.add(entry["member"])
+        return done
+
+    def _retry_delay(self, attempt: int) -> float:
+        """Seconds to wait after failed attempt number `attempt`, so a struggling provider can recover."""
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _record(self, entry: dict) -> None:
+        with self._state_lock:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            with open(self.state_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def _run_one(self, member: Member) -> dict:
+        output_dir = os.path.join(self.output_root, member.slug)
+        os.makedirs(output_dir, exist_ok=True)
+        error = None
+        for attempt in range(1, self.max_attempts + 1):
+            started = time.perf_counter()
+            try:
+                self.run_member(member, output_dir)
+                entry = {"member": member.email, "status": "done", "attempt": attempt}
+                break
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                entry = {"member": member.email, "status": "failed", "attempt": attempt, "error": error}
+                if attempt < self.max_attempts:
+                    time.sleep(self._retry_delay(attempt))
+        entry["seconds"] = round(time.perf_counter() - started, 3)
+        entry["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        self._record(entry)
+        return entry
+
+    def run(self) -> dict:
+        done = self.completed()
+        pending = [m for m in self.members if m.email not in done]
+        results = []
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            futures = [pool.submit(self._run_one, member) for member in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                mark = "✅" if result["status"] == "done" else "❌"
+                print(f"{mark} {result['member']} ({result['seconds']}s){' - ' + result['error'] if result.get('error') else ''}")
+        elapsed = time.perf_counter() - started
+        succeeded = sum(r["status"] == "done" for r in results)
+        return {
+            "run_id": self.run_id,
+            "members": len(self.members),
+            "skipped": len(done),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "seconds": round(elapsed, 3),
+            "members_per_minute": round(len(results) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        }
+
+
+def _parse_rates(values: List[str]) -> Dict[str, float]:
+    rates = {}
+    for value in values or []:
+        provider, _, per_minute = value.partition("=")
+        rates[provider] = float(per_minute)
+    return rates
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the daily pipeline for every member in a roster.")
+    parser.add_argument("roster", help="CSV or JSON file with email, goal and optional sheet_email")
+    parser.add_argument("--concurrency", type=int, default=4, help="members processed at once")
+    parser.add_argument("--rate", action="append", metavar="PROVIDER=PER_MINUTE",
+                        help="LLM calls per minute for a provider, e.g. gemini=120 (repeatable)")
+    parser.add_argument("--run-id", help="resume this run (defaults to today's date)")
+    parser.add_argument("--attempts", type=int, default=1, help="tries per member before giving up")
+    parser.add_argument("--backoff", type=float, default=10.0,
+                        help="seconds before the first retry, doubling per retry (up to 300)")
+    args = parser.parse_args()
+
+    report = BatchRunner(
+        load_roster(args.roster),
+        max_concurrency=args.concurrency,
+        provider_limits=_parse_rates(args.rate),
+        run_id=args.run_id,
+        max_attempts=args.attempts,
+        backoff=args.backoff,
+    ).run()
+    print(f"🏁 {report['succeeded']} succeeded, {report['failed']} failed, {report['skipped']} already done "
+          f"in {report['seconds']}s ({report['members_per_minute']} members/min)")
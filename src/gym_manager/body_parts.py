@@ -0,0 +1,14 @@
+"""
+Body locations recognised in free-text pain and injury reports, shared by memory maintenance
+(pruning notes on resolved injuries) and the pain index. Plain data, so either can import it
+without pulling in the other's dependencies.
+"""
+import re
+
+BODY_PARTS = (
+    "neck", "shoulder", "elbow", "wrist", "hand", "finger", "chest", "upper back", "lower back", "back",
+    "hip", "glute", "groin", "hamstring", "quad", "thigh", "knee", "shin", "calf", "ankle", "foot", "heel",
+    "bicep", "tricep", "forearm", "abs", "core", "rib",
+)
+# Longest first, so "lower back" wins over "back"; a plural "s" is allowed.
+BODY_PART_PATTERN = "(" + "|".join(sorted(BODY_PARTS, key=len, reverse=True)) + r")s?\b"
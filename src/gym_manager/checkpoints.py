@@ -0,0 +1,196 @@
+"""
+Per-task checkpoints for pipeline runs.
+
+    python -m src.gym_manager.main --pipeline                     # reuse what is still valid
+    python -m src.gym_manager.main --pipeline --from-task chef_meal_plan_task
+    python -m src.gym_manager.main --pipeline --force             # rerun every task
+
+Each finished task's output is saved to storage/checkpoints/<task>.json under a key hashed from
+everything that went into it: the task's description and expected output, its output model,
+the agent's role, goal, backstory and model, the tool names, the upstream outputs it received as
+context and the day. When the pipeline is run again, a task whose key still matches returns its
+saved output without calling the agent. So a failed run resumes at the task that failed, and
+editing one agent in agents.yaml reruns that agent's tasks and whatever their new output feeds.
+The key does not cover what a task's tools read, so tasks whose tools fetch new data are built
+with `checkpoint=False` (the summarizer, which reads today's form responses). They always run,
+and their fresh output decides what downstream reuses.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from crewai import Task
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.events import TaskCompletedEvent, crewai_event_bus
+from pydantic import Field, PrivateAttr
+
+from .telemetry import record
+
+STORAGE_DIR = os.path.join(os.path.dirname(__file__), "storage")
+CHECKPOINT_DIR = os.path.join(STORAGE_DIR, "checkpoints")
+# Bump when the key or file layout changes, so old checkpoints stop matching.
+CHECKPOINT_VERSION = 1
+
+
+def checkpoints_enabled() -> bool:
+    return os.getenv("PIPELINE_CHECKPOINTS", "true").lower() not in ("0", "false", "no")
+
+
+def task_key(task: Task, agent: Any, context: Optional[str], tools: Optional[Iterable[Any]]) -> str:
+    """Hash of the inputs, upstream outputs and configuration a task's output depends on."""
+    llm = getattr(agent, "llm", None)
+    payload = {
+        "version": CHECKPOINT_VERSION,
+        "day": date.today().isoformat(),
+        "task": {
+            "description": task.description,
+            "expected_output": task.expected_output,
+            "output_pydantic": task.output_pydantic.model_json_schema() if task.output_pydantic else None,
+            "output_json": task.output_json.model_json_schema() if task.output_json else None,
+        },
+        "agent": {
+            "role": getattr(agent, "role", None),
+            "goal": getattr(agent, "goal", None),
+            "backstory": getattr(agent, "backstory", None),
+            "llm": getattr(llm, "model", None) or (str(llm) if llm is not None else None),
+        },
+        "tools": sorted(getattr(t, "name", str(t)) for t in tools or []),
+        "context": context or "",
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class CheckpointStore:
+    """
+    One JSON file per task in `path`, holding the key and output of its last successful run.
+    `forced` names tasks that must run even when their checkpoint matches (see `plan`).
+    """
+
+    def __init__(self, path: str = CHECKPOINT_DIR):
+        self.path = path
+        self.forced: set = set()
+        self.stats: Dict[str, List[str]] = {"reused": [], "ran": []}
+        self._lock = threading.Lock()
+
+    def _file(self, task_name: str) -> str:
+        return os.path.join(self.path, f"{task_name}.json")
+
+    def plan(self, task_names: List[str], from_task: Optional[str] = None, force: bool = False) -> None:
+        """
+        Prepare for a run over `task_names` (in crew order): with `force` every task runs, with
+        `from_task` that task and every one after it do. Resets the reused/ran stats.
+        """
+        if from_task is not None and from_task not in task_names:
+            raise ValueError(f"Unknown task {from_task!r}; expected one of {', '.join(task_names)}.")
+        if force:
+            self.forced = set(task_names)
+        elif from_task is not None:
+            self.forced = set(task_names[task_names.index(from_task):])
+        else:
+            self.forced = set()
+        self.stats = {"reused": [], "ran": []}
+
+    def load(self, task_name: str, key: str) -> Optional[Dict[str, Any]]:
+        if task_name in self.forced:
+            return None
+        try:
+            with open(self._file(task_name)) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return saved if saved.get("key") == key else None
+
+    def save(self, task_name: str, key: str, output: TaskOutput) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        path = self._file(task_name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "key": key,
+                "task": task_name,
+                "raw": output.raw,
+                "json_dict": output.json_dict,
+                "saved": datetime.now().isoformat(timespec="seconds"),
+            }, f)
+        os.replace(tmp_path, path)
+
+    def note(self, outcome: str, task_name: str) -> None:
+        with self._lock:
+            self.stats[outcome].append(task_name)
+
+    def clear(self) -> None:
+        """Delete every checkpoint in the store."""
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.path, name))
+
+
+class CheckpointedTask(Task):
+    """
+    Task that returns its checkpointed output instead of running when its key still matches
+    (see task_key). Without a store attached (`use_checkpoints`) it behaves like Task.
+    """
+
+    checkpoint: bool = Field(default=True, description="Whether this task's output may be reused.")
+    _checkpoints: Optional[CheckpointStore] = PrivateAttr(default=None)
+
+    def use_checkpoints(self, store: Optional[CheckpointStore]) -> "CheckpointedTask":
+        self._checkpoints = store
+        return self
+
+    def execute_sync(self, agent=None, context: Optional[str] = None, tools=None) -> TaskOutput:
+        store = self._checkpoints
+        if store is None or not self.checkpoint:
+            return super().execute_sync(agent, context, tools)
+        agent = agent or self.agent
+        key = task_key(self, agent, context, tools or self.tools)
+        saved = store.load(self.name, key)
+        if saved is not None:
+            store.note("reused", self.name)
+            record("checkpoint", self.name, 0.0, "hit")
+            return self._restore(agent, context, saved)
+        output = super().execute_sync(agent, context, tools)
+        store.save(self.name, key, output)
+        store.note("ran", self.name)
+        return output
+
+    def _restore(self, agent, context: Optional[str], saved: Dict[str, Any]) -> TaskOutput:
+        """Finish the task with a saved output, as Task._execute_core does with a fresh one."""
+        self.agent = agent
+        self.prompt_context = context
+        self.start_time = self.end_time = datetime.now()
+        raw, json_output = saved["raw"], saved.get("json_dict")
+        pydantic_output = None
+        if self.output_pydantic and json_output is not None:
+            pydantic_output = self.output_pydantic.model_validate(json_output)
+        elif self.output_pydantic or self.output_json:
+            pydantic_output, json_output = self._export_output(raw)
+        self.output = TaskOutput(
+            name=self.name,
+            description=self.description,
+            expected_output=self.expected_output,
+            raw=raw,
+            pydantic=pydantic_output,
+            json_dict=json_output,
+            agent=agent.role,
+            output_format=self._get_output_format(),
+        )
+        if self.callback:
+            self.callback(self.output)
+        crew = getattr(agent, "crew", None)
+        if crew and crew.task_callback and crew.task_callback != self.callback:
+            crew.task_callback(self.output)
+        if self.output_file:
+            self._save_file(json_output if json_output else (pydantic_output.model_dump_json() if pydantic_output else raw))
+        crewai_event_bus.emit(self, TaskCompletedEvent(output=self.output, task=self))
+        return self.output
+
+
+def format_stats(store: CheckpointStore) -> str:
+    reused, ran = store.stats["reused"], store.stats["ran"]
+    text = f"{len(reused)} reused, {len(ran)} ran"
+    return f"{text} (reused: {', '.join(reused)})" if reused else text
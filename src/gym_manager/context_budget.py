@@ -0,0 +1,244 @@
+"""
+Token-budgeted context for agents.
+
+crewai gives an agent every upstream task output plus whatever its crew memory recalls,
+however large those get. A BudgetedAgent (context_budget set, e.g. from agents.yaml) gets
+its context from the ContextAssembler instead:
+
+1. The agent's standing guidance and the upstream outputs come first. If they take more than
+   UPSTREAM_SHARE of the budget, each output is compacted to its share: link lists are
+   dropped from structured outputs and long text is cut at a sentence boundary.
+2. Memory candidates from short-term, long-term and entity memory are ranked by relevance
+   and recency. Each is clipped to MEMORY_ITEM_TOKENS, so the chef gets a line per past dish
+   and not the whole meal plan, and they are added in rank order while they fit.
+   The rest are dropped.
+
+Tokens are estimated at four characters each. Every assembly is recorded to telemetry (kind
+"context") with the tokens crewai would have sent, the tokens sent and the difference.
+"""
+import json
+import math
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from crewai import Agent
+from pydantic import Field, PrivateAttr
+
+from .resources import lazy_resource
+from .telemetry import record
+
+# How crewai joins upstream outputs (crewai.utilities.formatter) and introduces memory.
+DIVIDER = "\n\n----------\n\n"
+MEMORY_HEADER = "# Useful context:"
+
+UPSTREAM_SHARE = 0.7
+MEMORY_ITEM_TOKENS = int(os.getenv("MEMORY_ITEM_TOKENS", "60"))
+MEMORY_CANDIDATES = 8
+RELEVANCE_WEIGHT = 0.6
+RECENCY_HALF_LIFE_DAYS = 3.0
+# What crewai itself recalls per store (ContextualMemory): 3 short-term, 2 long-term, 3 entities.
+CREWAI_LIMITS = {"short_term": 3, "long_term": 2, "entity": 3}
+
+_URL = re.compile(r"https?://\S+")
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    return math.ceil(len(text or "") / 4)
+
+
+def clip(text: str, tokens: int) -> str:
+    """`text` cut to about `tokens`, at the last sentence or line end that fits."""
+    text = text.strip()
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    head = text[:limit]
+    end = max(head.rfind(". "), head.rfind("\n"))
+    return (head[:end + 1] if end > limit // 2 else head).rstrip() + " …"
+
+
+def compact_output(text: str, tokens: int) -> str:
+    """An upstream output cut to about `tokens`; JSON outputs keep their keys."""
+    if estimate_tokens(text) <= tokens:
+        return text
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return clip(text, tokens)
+    if not isinstance(data, dict):
+        return clip(text, tokens)
+    # Links are for the member, not for the next agent.
+    data = {k: v for k, v in data.items()
+            if not (isinstance(v, list) and v and all(isinstance(i, str) and _URL.fullmatch(i.strip()) for i in v))}
+    fixed = estimate_tokens(json.dumps({k: v for k, v in data.items() if not isinstance(v, str)}))
+    strings = {k: v for k, v in data.items() if isinstance(v, str)}
+    share = max(8, (tokens - fixed) // max(1, len(strings)))
+    return json.dumps({k: clip(v, share) if k in strings else v for k, v in data.items()}, ensure_ascii=False)
+
+
+class MemoryItem:
+    def __init__(self, text: str, source: str, relevance: float, when: Optional[datetime] = None, row: int = 0):
+        self.text = text
+        self.source = source
+        self.relevance = relevance
+        self.when = when
+        self.row = row  # which stored entry it came from; a long-term entry holds several suggestions
+
+    def rank(self, now: datetime) -> float:
+        if self.when is None:
+            recency = 0.5
+        else:
+            age_days = max(0.0, (now - self.when).total_seconds() / 86400)
+            recency = 0.5 ** (age_days / RECENCY_HALF_LIFE_DAYS)
+        return RELEVANCE_WEIGHT * self.relevance + (1 - RELEVANCE_WEIGHT) * recency
+
+
+def _when(value: Any) -> Optional[datetime]:
+    if value in (None, ""):
+        return None
+    try:
+        return datetime.fromtimestamp(float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def recall(crew, task, query: str, limit: int = MEMORY_CANDIDATES) -> List[MemoryItem]:
+    """Memory candidates from the crew's stores, in each store's own order."""
+    items: List[MemoryItem] = []
+    stm = getattr(crew, "_short_term_memory", None)
+    if stm is not None:
+        for result in stm.search(query, limit=limit) or []:
+            # Chroma returns a distance; closer is more relevant.
+            metadata = result.get("metadata") or {}
+            items.append(MemoryItem(result["context"], "short_term", 1 / (1 + abs(result.get("score") or 0)),
+                                    _when(metadata.get("timestamp") or metadata.get("created_at"))))
+    ltm = getattr(crew, "_long_term_memory", None)
+    if ltm is not None:
+        for row, result in enumerate(ltm.search(task.description, latest_n=limit) or []):
+            for suggestion in (result.get("metadata") or {}).get("suggestions", []):
+                items.append(MemoryItem(suggestion, "long_term", 1.0, _when(result.get("datetime")), row))
+    em = getattr(crew, "_entity_memory", None)
+    if em is not None:
+        for result in em.search(query, limit=limit) or []:
+            items.append(MemoryItem(result["context"], "entity", 1 / (1 + abs(result.get("score") or 0))))
+    return items
+
+
+def _crewai_memory_tokens(items: List[MemoryItem]) -> int:
+    """What crewai would have added for these candidates with its own per-store limits."""
+    seen: Dict[str, int] = {}
+    texts = []
+    for item in items:
+        if item.source == "long_term":
+            if item.row < CREWAI_LIMITS["long_term"]:
+                texts.append(f"- {item.text}")
+            continue
+        seen[item.source] = seen.get(item.source, 0) + 1
+        if seen[item.source] <= CREWAI_LIMITS[item.source]:
+            texts.append(f"- {item.text}")
+    return estimate_tokens("\n".join(texts)) + (estimate_tokens(MEMORY_HEADER) if texts else 0)
+
+
+class ContextAssembler:
+    """Builds budgeted context for BudgetedAgents and keeps totals of what that saved."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = {"assemblies": 0, "tokens_before": 0, "tokens_after": 0, "memory_dropped": 0}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "tokens_saved": self._stats["tokens_before"] - self._stats["tokens_after"]}
+
+    def assemble(self, budget: int, guidance: Optional[str], context: Optional[str],
+                 memory: List[MemoryItem], agent: str = "agent", task: Optional[str] = None) -> str:
+        """Context for one task: guidance, upstream outputs and ranked memory within `budget` tokens."""
+        started = time.perf_counter()
+        outputs = [part for part in (context or "").split(DIVIDER) if part.strip()]
+        before = estimate_tokens(guidance) + estimate_tokens(context) + _crewai_memory_tokens(memory)
+
+        upstream_budget = int(budget * UPSTREAM_SHARE) - estimate_tokens(guidance)
+        if sum(estimate_tokens(o) for o in outputs) > upstream_budget:
+            share = max(16, upstream_budget // max(1, len(outputs)))
+            outputs = [compact_output(o, share) for o in outputs]
+        parts = ([guidance.strip()] if guidance else []) + outputs
+        used = sum(estimate_tokens(p) for p in parts)
+
+        now = datetime.now()
+        lines: List[str] = []
+        seen = set()
+        ranked = sorted(memory, key=lambda item: item.rank(now), reverse=True)
+        room = budget - used - estimate_tokens(MEMORY_HEADER)
+        for item in ranked:
+            line = f"- {clip(item.text, MEMORY_ITEM_TOKENS)}"
+            key = line.lower()
+            if key in seen:
+                continue
+            cost = estimate_tokens(line) + 1
+            if cost > room:
+                continue
+            seen.add(key)
+            lines.append(line)
+            room -= cost
+        if lines:
+            parts.append(MEMORY_HEADER + "\n" + "\n".join(lines))
+
+        assembled = DIVIDER.join(parts)
+        after = estimate_tokens(assembled)
+        dropped = len(ranked) - len(lines)
+        with self._lock:
+            self._stats["assemblies"] += 1
+            self._stats["tokens_before"] += before
+            self._stats["tokens_after"] += after
+            self._stats["memory_dropped"] += dropped
+        record("context", agent, time.perf_counter() - started, task=task, budget=budget, tokens_before=before,
+               tokens_after=after, tokens_saved=before - after, memory_kept=len(lines), memory_dropped=dropped)
+        return assembled
+
+
+@lazy_resource("context_assembler")
+def get_context_assembler() -> ContextAssembler:
+    return ContextAssembler()
+
+
+class BudgetedAgent(Agent):
+    """
+    Agent whose upstream context and recalled memory are assembled within `context_budget`
+    tokens (see ContextAssembler) instead of passed in whole. `guidance` is standing context
+    that always goes first. Without a budget it behaves like Agent.
+    """
+
+    context_budget: Optional[int] = Field(default=None, description="Token budget for context and memory.")
+    guidance: Optional[str] = Field(default=None, description="Standing context given with every task.")
+    _assembling: bool = PrivateAttr(default=False)
+
+    def _is_any_available_memory(self) -> bool:
+        # Memory is already in the assembled context.
+        return False if self._assembling else super()._is_any_available_memory()
+
+    def execute_task(self, task, context: Optional[str] = None, tools=None) -> str:
+        # crewai retries by calling execute_task again with the context it was given.
+        if not self.context_budget or self._assembling:
+            return super().execute_task(task, context, tools)
+        memory: List[MemoryItem] = []
+        if super()._is_any_available_memory():
+            memory = recall(self.crew, task, f"{task.description} {clip(context or '', 200)}".strip())
+        assembled = get_context_assembler().assemble(
+            self.context_budget, self.guidance, context, memory, agent=self.role.strip(), task=task.name)
+        self._assembling = True
+        try:
+            return super().execute_task(task, assembled or None, tools)
+        finally:
+            self._assembling = False
@@ -3,12 +3,9 @@ from dotenv import load_dotenv
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, task, crew
 from crewai.tools import tool
-from crewai_tools import PDFSearchTool
 from crewai import LLM
-from crewai.memory import LongTermMemory, ShortTermMemory
-from crewai.memory.storage.rag_storage import RAGStorage
+from crewai.memory import EntityMemory, LongTermMemory, ShortTermMemory
 from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
-from google import genai
 from pydantic import BaseModel
 from datetime import datetime as DateTime
 
@@ -17,57 +14,116 @@ load_dotenv()
 # --- Set up memory storage ---
 STORAGE_DIR = os.path.join(os.path.dirname(__file__), "storage")
 os.makedirs(STORAGE_DIR, exist_ok=True)
-llma = LLM(
-    api_key=os.getenv("GEMINI_API_KEY"),
-    model="gemini/gemini-1.5-flash",
-)
 gapi = os.getenv("GEMINI_API_KEY")
 
-WEEK_MEMORY = LongTermMemory(
-    storage=LTMSQLiteStorage(
-        db_path=f"{STORAGE_DIR}/week_memory.db"
-    )
-)
-
-emconfig = {
-            "provider": "google",
-            "config": {
-                "api_key": gapi,
-                "model": "models/gemini-embedding-001" 
-            }
-        }
-rag_tool = PDFSearchTool(config = dict(llm = dict(
-    provider = "google",
-    config = dict(model = "gemini/gemini-2.5-flash"),
-), embedder = dict(
-    provider = "google",
-    config = dict(
-        model = "models/gemini-embedding-001"
-    ),
-),),pdf="./knowledge/gym_timetable.pdf")
-
-SHORT_TERM_MEMORY=ShortTermMemory(
-                storage=RAGStorage(
-                    embedder_config= emconfig,
-                    type="short_term",
-                    path="./memory/"
-                )
-            )
-from .tools.youtube_search_tool import youtube_search_tool
-from .tools.pg_tool import insert_summary_tool, fetch_latest_summary_tool
+from .resources import LazyTool, lazy_resource
+from .embeddings import embedder_config, use_cached_embeddings
+from .vector_store import ENTITIES, SHORT_TERM, SharedRAGStorage, embedchain_config, member_namespace, use_shared_store
+
+# Every embedding (memories, crew embedder, PDF search) goes through the shared cached service
+# in embeddings.py, which still calls models/gemini-embedding-001 for texts it has not seen.
+emconfig = embedder_config()
+from .gateway import INTERACTIVE
+from .llm import GymLLM, build_llm, use_gateway_llm
+from .tools.timetable_tool import timetable_lookup_tool
+from .tools.youtube_search_tool import youtube_batch_search_tool, youtube_search_tool
+from .tools.pg_tool import insert_summary_tool, fetch_latest_summary_tool, fetch_workout_history_tool
+from .tools.pain_tool import pain_history_tool
+from .tools.training_tool import training_analytics_tool
 from .tools.survey_email_template import get_survey_email
 from .tools.form_response import FormResponseFetchTool
+from .tools.sheets_fetch import GoogleSheetsFetchTool
+from .task_graph import ParallelCrew
+from .checkpoints import CheckpointStore, CheckpointedTask
+from .ingest import SummaryIngestAgent
+from .context_budget import BudgetedAgent
+from .members import member_key, member_slug
+from .telemetry import get_telemetry, telemetry_enabled
+from .tool_memo import ToolMemo, memo_policy, tool_memo_enabled
+
+# --- Lazily built resources ---
+# Each one is created the first time an agent (or tool call) needs it, not at import.
+
+@lazy_resource("llm")
+def get_llm() -> LLM:
+    return GymLLM(
+        api_key=gapi,
+        model="gemini/gemini-1.5-flash",
+    )
 
-# --- Composio Gmail integration ---
-from composio import Composio
-from composio_gemini import GeminiProvider
-
-COMPOSIO_USER_ID = os.getenv("COMPOSIO_USER_ID")
-composio = Composio(provider=GeminiProvider())
-bdy = get_survey_email()
+@lazy_resource("week_memory")
+def get_week_memory() -> LongTermMemory:
+    return LongTermMemory(
+        storage=LTMSQLiteStorage(
+            db_path=f"{STORAGE_DIR}/week_memory.db"
+        )
+    )
 
-gmail_tools = composio.tools.get(user_id=COMPOSIO_USER_ID, tools=["GMAIL_SEND_EMAIL"])
-gmail_send_tool = gmail_tools[0] if gmail_tools else None
+# Short-term and entity memories and the PDF chunks share one vector store (see vector_store.py).
+@lazy_resource("short_term_memory")
+def get_short_term_memory() -> ShortTermMemory:
+    return ShortTermMemory(storage=SharedRAGStorage(SHORT_TERM))
+
+@lazy_resource("entity_memory")
+def get_entity_memory() -> EntityMemory:
+    return EntityMemory(storage=SharedRAGStorage(ENTITIES))
+
+@lazy_resource("pdf_search_tool")
+def get_pdf_search_tool():
+    # Chunks and embeds the timetable PDF, so it is only built once a search actually runs.
+    from crewai_tools import PDFSearchTool
+    from crewai_tools.tools.pdf_search_tool.pdf_search_tool import FixedPDFSearchToolSchema
+    pdf = "./knowledge/gym_timetable.pdf"
+    pdf_tool = PDFSearchTool(config = dict(llm = dict(
+        provider = "google",
+        config = dict(model = "gemini/gemini-2.5-flash"),
+    ), embedder = dict(
+        provider = "google",
+        config = dict(
+            model = "models/gemini-embedding-001"
+        ),
+    ), vectordb = embedchain_config(),))
+    # Swap in the cached embedder, the shared store and the gateway before the PDF is chunked,
+    # then add it as PDFSearchTool(pdf=...) would.
+    use_cached_embeddings(pdf_tool.adapter.embedchain_app)
+    use_shared_store(pdf_tool.adapter.embedchain_app)
+    use_gateway_llm(pdf_tool.adapter.embedchain_app, "gemini/gemini-2.5-flash")
+    pdf_tool.add(pdf)
+    pdf_tool.description = f"A tool that can be used to semantic search a query the {pdf} PDF's content."
+    pdf_tool.args_schema = FixedPDFSearchToolSchema
+    pdf_tool._generate_description()
+    return pdf_tool
+
+@lazy_resource("gmail_send_tool")
+def get_gmail_send_tool():
+    # --- Composio Gmail integration ---
+    from composio import Composio
+    from composio_gemini import GeminiProvider
+
+    composio = Composio(provider=GeminiProvider())
+    gmail_tools = composio.tools.get(user_id=os.getenv("COMPOSIO_USER_ID"), tools=["GMAIL_SEND_EMAIL"])
+    return gmail_tools[0] if gmail_tools else None
+
+# Agents read the timetable through timetable_lookup_tool (a precompiled index, no embeddings);
+# the trainer also gets the semantic PDF search for questions the index does not cover.
+rag_tool = memo_policy(safe=True)(LazyTool(
+    name="Search a PDF's content",
+    description="A tool that can be used to semantic search a query the ./knowledge/gym_timetable.pdf PDF's content.",
+    factory=get_pdf_search_tool,
+))
+
+_LEGACY_GLOBALS = {
+    "llma": get_llm,
+    "WEEK_MEMORY": get_week_memory,
+    "SHORT_TERM_MEMORY": get_short_term_memory,
+    "gmail_send_tool": get_gmail_send_tool,
+}
+
+def __getattr__(name):
+    """Keep the old module-level names working; they now build on first access."""
+    if name in _LEGACY_GLOBALS:
+        return _LEGACY_GLOBALS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 ##Pydantic output objects:
 class summary(BaseModel):
@@ -107,13 +163,19 @@ class gym_knowledge(BaseModel):
     user_goals: str
     weekly_timetable: list[list[str]]
 
+@memo_policy(safe=False)
 @tool("gmail_send_email")
 def gmail_send_email(recipient_email: str, subject: str = "Daily Gym Feedback", body: str = None) -> str:
     """Send an email using Gmail via Composio."""
+    try:
+        gmail_send_tool = get_gmail_send_tool()
+    except Exception as e:
+        return f"Error: Gmail tool not initialized: {e}"
     if not gmail_send_tool:
         return "Error: Gmail tool not initialized."
     try:
-        email_body = get_survey_email()
+        # A body from the caller wins; otherwise the survey, rendered once per process.
+        email_body = body or get_survey_email()
         # Send the email with HTML enabled
         result = gmail_send_tool(
             recipient_email=recipient_email,
@@ -139,71 +201,152 @@ class GymManagerCrew:
     agents_config = "config/agents.yaml"
     tasks_config = "config/tasks.yaml"
 
+    def __init__(self, goal: str = None, recipient_email: str = None, respondent_email: str = None,
+                 state_dir: str = None, include_survey: bool = True, llm: LLM = None, sheets_service=None,
+                 checkpoints: CheckpointStore = None, priority: str = INTERACTIVE, member: str = None):
+        # Defaults come from the environment so the single-member setup keeps working.
+        self.goal = goal or os.getenv("goal")
+        self.recipient_email = recipient_email or os.getenv("RECIPIENT_EMAIL")
+        self.respondent_email = respondent_email  # only read this member's form responses
+        # A member's crew keeps its own memories; their history is chosen by members.member_scope.
+        self.member = member_key(member) if member else ""
+        if self.member and not state_dir:
+            state_dir = os.path.join(STORAGE_DIR, "members", member_slug(self.member))
+        self.state_dir = state_dir  # where per-member state such as the sheet watermark lives
+        self._memories = {}
+        self.include_survey = include_survey  # the daemon and batch runs send it through dispatch's queue
+        self.llm = llm  # one model for every agent instead of the per-agent models in agents.yaml
+        self.sheets_service = sheets_service  # e.g. fakes.sheets.FakeSheetsService for offline runs
+        self.priority = priority  # gateway priority class of this crew's model calls (see gateway.py)
+        self.checkpoints = checkpoints  # reuse task outputs whose inputs have not changed (see checkpoints.py)
+        # Identical tool calls within one kickoff share a result (see tool_memo.py); TOOL_MEMO=false disables it.
+        self.tool_memo = ToolMemo() if tool_memo_enabled() else None
+        # Form rows are mapped onto summaries without the ReAct loop; SUMMARIZER_FAST_PATH=false restores it.
+        self.summarizer_fast_path = os.getenv("SUMMARIZER_FAST_PATH", "true").lower() not in ("0", "false", "no")
+
+    def _llm(self, agent_name: str) -> LLM:
+        if self.llm is not None:
+            return self.llm
+        return build_llm(self.agents_config[agent_name]["llm"], priority=self.priority)
+
+    # Memories: the process-wide ones for the single-member setup, otherwise the member's own,
+    # built once per crew.
+
+    def _member_memory(self, name: str, build):
+        if name not in self._memories:
+            self._memories[name] = build()
+        return self._memories[name]
+
+    def _week_memory(self) -> LongTermMemory:
+        if not self.member:
+            return get_week_memory()
+        os.makedirs(self.state_dir, exist_ok=True)
+        return self._member_memory("week", lambda: LongTermMemory(
+            storage=LTMSQLiteStorage(db_path=f"{self.state_dir}/week_memory.db")))
+
+    def _short_term_memory(self) -> ShortTermMemory:
+        if not self.member:
+            return get_short_term_memory()
+        return self._member_memory("short_term", lambda: ShortTermMemory(
+            storage=SharedRAGStorage(member_namespace(SHORT_TERM, self.member))))
+
+    def _entity_memory(self) -> EntityMemory:
+        if not self.member:
+            return get_entity_memory()
+        return self._member_memory("entities", lambda: EntityMemory(
+            storage=SharedRAGStorage(member_namespace(ENTITIES, self.member))))
+
+    def _form_response_tool(self, defer_watermark: bool = False) -> FormResponseFetchTool:
+        sheets_kwargs = {"defer_watermark": defer_watermark}
+        if self.respondent_email:
+            sheets_kwargs["respondent_email"] = self.respondent_email
+        if self.state_dir:
+            sheets_kwargs["watermark_path"] = os.path.join(self.state_dir, "sheets_watermark.json")
+        if self.sheets_service is not None:
+            sheets_kwargs["service"] = self.sheets_service
+        return FormResponseFetchTool(sheets_tool=GoogleSheetsFetchTool(**sheets_kwargs))
     
     # --- Agents ---
     
     @agent
     def summarizer(self) -> Agent:
+        if self.summarizer_fast_path:
+            # The LLM is only called to condense unusually long exercise lists.
+            return SummaryIngestAgent(
+                config=self.agents_config["Summarizer"],
+                llm=self._llm("Summarizer"),
+                verbose=True,
+                fetch_tool=self._form_response_tool(defer_watermark=True),
+            )
         return Agent(
             config=self.agents_config["Summarizer"],
+            llm=self._llm("Summarizer"),
             verbose=True,
-            tools=[FormResponseFetchTool(), insert_summary_tool],
+            tools=[self._form_response_tool(), insert_summary_tool],
         )
 
     @agent
     def trainer(self) -> Agent:
-        return Agent(
+        return BudgetedAgent(
             config=self.agents_config["Gym Trainer"],
+            llm=self._llm("Gym Trainer"),
             verbose=True,
-            tools=[fetch_latest_summary_tool, youtube_search_tool,rag_tool],
-            memory=WEEK_MEMORY,  # Week-long memory to track exercise variety
-            context="You have access to past workout plans. Avoid repeating exercises from the last week unless specifically needed for progression."
+            tools=[fetch_latest_summary_tool, fetch_workout_history_tool, training_analytics_tool, youtube_search_tool,
+                   youtube_batch_search_tool, timetable_lookup_tool, rag_tool],
+            memory=self._week_memory(),  # Week-long memory to track exercise variety
+            guidance="You have access to past workout plans. Avoid repeating exercises from the last week unless specifically needed for progression."
         )
     
     @agent
     def planner(self) -> Agent:
-        return Agent(
+        return BudgetedAgent(
             config=self.agents_config["Personal Assistant"],
+            llm=self._llm("Personal Assistant"),
             verbose=True,
-            tools=[rag_tool],
-            memory=WEEK_MEMORY,  # Week-long memory to track exercise variety
-            context="You have access to past workout plans. Avoid repeating exercises from the last week unless specifically needed for progression."
+            tools=[timetable_lookup_tool],
+            memory=self._week_memory(),  # Week-long memory to track exercise variety
+            guidance="You have access to past workout plans. Avoid repeating exercises from the last week unless specifically needed for progression."
         )
 
     @agent
     def doctor(self) -> Agent:
-        return Agent(
+        return BudgetedAgent(
             config=self.agents_config["Doctor"],
+            llm=self._llm("Doctor"),
             verbose=True,
-            tools=[fetch_latest_summary_tool, youtube_search_tool, rag_tool],
-            memory=SHORT_TERM_MEMORY,  # Short-term memory to track injury progress
-            context="You have access to recent pain and injury reports. Use this to track improvement or deterioration over time."
+            tools=[fetch_latest_summary_tool, pain_history_tool, fetch_workout_history_tool, youtube_search_tool,
+                   youtube_batch_search_tool, timetable_lookup_tool],
+            memory=self._short_term_memory(),  # Short-term memory to track injury progress
+            guidance="You have access to recent pain and injury reports. Use this to track improvement or deterioration over time."
         )
 
     @agent
     def nutritionist(self) -> Agent:
-        return Agent(
+        return BudgetedAgent(
             config=self.agents_config["Nutritionist"],
+            llm=self._llm("Nutritionist"),
             verbose=True,
-            tools = [rag_tool],
-            memory=SHORT_TERM_MEMORY,  # Short-term memory to track dietary adjustments
-            context="You have access to recent nutrition recommendations. Use this to track effectiveness and make adjustments."
+            tools=[timetable_lookup_tool],
+            memory=self._short_term_memory(),  # Short-term memory to track dietary adjustments
+            guidance="You have access to recent nutrition recommendations. Use this to track effectiveness and make adjustments."
         )
 
     @agent
     def chef(self) -> Agent:
-        return Agent(
+        return BudgetedAgent(
             config=self.agents_config["Chef"],
+            llm=self._llm("Chef"),
             verbose=True,
-            tools=[youtube_search_tool,rag_tool],
-            memory=WEEK_MEMORY,  # Week-long memory to avoid repetitive dishes
-            context="You have access to past meal suggestions. Avoid repeating dishes from the last week."
+            tools=[youtube_search_tool, youtube_batch_search_tool, timetable_lookup_tool],
+            memory=self._week_memory(),  # Week-long memory to avoid repetitive dishes
+            guidance="You have access to past meal suggestions. Avoid repeating dishes from the last week."
         )
 
     @agent
     def survey_agent(self) -> Agent:
         return Agent(
             config=self.agents_config["Survey Agent"],
+            llm=self._llm("Survey Agent"),
             verbose=True,
             tools=[gmail_send_email],
             memory=None  # Survey agent doesn't need memory
@@ -214,42 +357,47 @@ class GymManagerCrew:
     # --- Tasks ---
     @task
     def user_goal_task(self) -> Task:
-        return Task(config=self.tasks_config["check_gym_plans_task"],
-                    output_pydantic=gym_knowledge)
+        return CheckpointedTask(config=self.tasks_config["check_gym_plans_task"],
+                                output_pydantic=gym_knowledge)
     
     @task
     def summarize_responses_task(self) -> Task:
-        return Task(config=self.tasks_config["summarize_responses_task"])
+        # Never checkpointed: its key cannot see the new form responses its tools read, so a
+        # reused output would hide them. It always runs and its output decides which downstream
+        # checkpoints still match.
+        return CheckpointedTask(config=self.tasks_config["summarize_responses_task"],
+                                output_pydantic=summary if self.summarizer_fast_path else None,
+                                checkpoint=False)
 
     @task
     def generate_workout_plan_task(self) -> Task:
-        goal = os.getenv("goal")
+        goal = self.goal
         if not goal:
             raise ValueError("Goal environment variable not set.")
         task_config = self.tasks_config["generate_workout_plan_task"].copy()
         task_config['description'] = task_config['description'].format(goal=goal)
-        return Task(config=task_config,
-                    output_pydantic=tomorrow_workout_plan)
+        return CheckpointedTask(config=task_config,
+                                output_pydantic=tomorrow_workout_plan)
 
     @task
     def review_pain_task(self) -> Task:
-        return Task(config=self.tasks_config["review_pain_task"],
-                    output_pydantic=review_pain)
+        return CheckpointedTask(config=self.tasks_config["review_pain_task"],
+                                output_pydantic=review_pain)
 
     @task
     def nutrition_plan_task(self) -> Task:
-        goal = os.getenv("goal")
+        goal = self.goal
         if not goal:
             raise ValueError("Goal environment variable not set.")
         task_config = self.tasks_config["nutrition_plan_task"].copy()
         task_config['description'] = task_config['description'].format(goal=goal)
-        return Task(config=task_config,
-                    output_pydantic=nutrition)
+        return CheckpointedTask(config=task_config,
+                                output_pydantic=nutrition)
 
     @task
     def chef_meal_plan_task(self) -> Task:
-        return Task(config=self.tasks_config["chef_meal_plan_task"],
-                    output_pydantic=meal_plan)
+        return CheckpointedTask(config=self.tasks_config["chef_meal_plan_task"],
+                                output_pydantic=meal_plan)
 
     # Tasks
     @task
@@ -257,8 +405,8 @@ class GymManagerCrew:
         # Get the task configuration
         task_config = self.tasks_config["send_daily_survey_task"].copy()
         
-        # Get recipient email from environment variables
-        recipient_email = os.getenv("RECIPIENT_EMAIL")
+        # Get recipient email (defaults to the RECIPIENT_EMAIL environment variable)
+        recipient_email = self.recipient_email
         if not recipient_email:
             raise ValueError("RECIPIENT_EMAIL environment variable not set.")
 
@@ -267,7 +415,7 @@ class GymManagerCrew:
             recipient_email=recipient_email
         )
         
-        return Task(
+        return CheckpointedTask(
             config=task_config,
             tools=[gmail_send_email],
         )
@@ -275,7 +423,13 @@ class GymManagerCrew:
     # --- Crew Assembly ---
     @crew
     def crew(self) -> Crew:
-        return Crew(
+        if telemetry_enabled():
+            get_telemetry()  # spans for every task, agent, LLM call and tool go to storage/telemetry.jsonl
+        # TASK_WORKERS > 1 runs independent tasks (see `context:` in tasks.yaml) in parallel.
+        task_workers = int(os.getenv("TASK_WORKERS", "1"))
+        crew_class = ParallelCrew if task_workers > 1 else Crew
+        extra = {"max_workers": task_workers} if task_workers > 1 else {}
+        crew = crew_class(
             agents=[
                 self.survey_agent(),    # First: Send survey
                 self.summarizer(),      # Second: Summarize responses
@@ -283,30 +437,30 @@ class GymManagerCrew:
                 self.doctor(),
                 self.nutritionist(),
                 self.chef(),
-            ],
+            ][0 if self.include_survey else 1:],
             tasks=[
-                self.send_daily_survey_task(),
-                self.summarize_responses_task(),
-                self.review_pain_task(), 
-                self.generate_workout_plan_task(),   
-                self.nutrition_plan_task(),
-                self.chef_meal_plan_task(),
+                task.use_checkpoints(self.checkpoints) for task in [
+                    self.send_daily_survey_task(),
+                    self.summarize_responses_task(),
+                    self.review_pain_task(),
+                    self.generate_workout_plan_task(),
+                    self.nutrition_plan_task(),
+                    self.chef_meal_plan_task(),
+                ][0 if self.include_survey else 1:]
             ],
             process=Process.sequential,
             memory=True,
             long_term_memory=LongTermMemory(
                 storage=LTMSQLiteStorage(
-                    db_path=f"{STORAGE_DIR}/crew_memory.db"
+                    db_path=f"{self.state_dir or STORAGE_DIR}/crew_memory.db"
                 )
             ),
-            embedder={
-            "provider": "google",
-            "config": {
-                "api_key": gapi,
-                "model": "models/gemini-embedding-001"
-            }
-        },
-            llm=llma
+            embedder=emconfig,
+            short_term_memory=self._short_term_memory(),
+            entity_memory=self._entity_memory(),
+            llm=self.llm or get_llm(),
+            **extra
         )
+        return self.tool_memo.attach(crew) if self.tool_memo is not None else crew
 
 
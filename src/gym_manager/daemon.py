@@ -0,0 +1,297 @@
+"""
+Asyncio daemon that runs the app's jobs from one queue.
+
+    python -m src.gym_manager.main                      # start the daemon
+    python -m src.gym_manager.daemon trigger pipeline   # queue a manual run
+    python -m src.gym_manager.daemon status             # queue depth, running jobs, latencies
+
+Scheduled jobs (the 18:00 survey, nightly maintenance) and manual triggers all go into the same
+queue. Each run executes in a background thread, so the scheduler and the trigger endpoint stay
+responsive. Different jobs run side by side, so a long pipeline run does not hold up the survey;
+runs of the same job never overlap (a second one waits its turn), and neither do jobs declared
+`exclusive` of each other. A job that is already waiting in the queue is not queued twice. The
+endpoint is HTTP over a Unix socket (storage/daemon.sock, DAEMON_SOCKET) or, with DAEMON_PORT
+set, over TCP on localhost:
+
+    POST /run/<job>     queue a run; 202 with the run, 404 for an unknown job
+    GET  /runs/<id>     one run
+    GET  /status        queue depth, the running jobs, recent runs and per-job latency
+"""
+import argparse
+import asyncio
+import http.client
+import itertools
+import json
+import os
+import socket
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, Set
+
+import schedule
+
+from .telemetry import percentile, record
+
+STORAGE_DIR = os.path.join(os.path.dirname(__file__), "storage")
+SOCKET_PATH = os.getenv("DAEMON_SOCKET", os.path.join(STORAGE_DIR, "daemon.sock"))
+RECENT_RUNS = 50
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts).isoformat(timespec="seconds") if ts else None
+
+
+class Run:
+    """One queued execution of a job."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, job: str, source: str):
+        self.id = next(self._ids)
+        self.job = job
+        self.source = source
+        self.status = "queued"
+        self.enqueued = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def wait_seconds(self) -> Optional[float]:
+        return round(self.started - self.enqueued, 3) if self.started else None
+
+    @property
+    def run_seconds(self) -> Optional[float]:
+        return round(self.finished - self.started, 3) if self.finished and self.started else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "job": self.job,
+            "source": self.source,
+            "status": self.status,
+            "enqueued": _iso(self.enqueued),
+            "started": _iso(self.started),
+            "finished": _iso(self.finished),
+            "wait_seconds": self.wait_seconds,
+            "run_seconds": self.run_seconds,
+            **({"error": self.error} if self.error else {}),
+        }
+
+
+class Daemon:
+    """
+    Job queue, daily scheduler and trigger endpoint on one event loop.
+    `jobs` maps names to blocking callables; `schedule_at` maps job names to daily "HH:MM" times.
+    Each group of job names in `exclusive` runs one job at a time.
+    """
+
+    def __init__(self, jobs: Dict[str, Callable[[], Any]], schedule_at: Optional[Dict[str, str]] = None,
+                 socket_path: Optional[str] = SOCKET_PATH, port: Optional[int] = None,
+                 exclusive: Iterable[Iterable[str]] = ()):
+        self.jobs = jobs
+        self.socket_path = socket_path
+        self.port = port
+        self.scheduler = schedule.Scheduler()
+        for job, at in (schedule_at or {}).items():
+            self.scheduler.every().day.at(at).do(self.submit, job, "schedule")
+        self.exclusive = [set(group) for group in exclusive]
+        self.pending: Deque[Run] = deque()
+        self.running: Dict[str, Run] = {}  # job -> its run in progress
+        self.runs: Dict[int, Run] = {}
+        self.finished: Deque[Run] = deque(maxlen=RECENT_RUNS)
+        self.max_depth = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._executions: Set[asyncio.Task] = set()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(jobs)), thread_name_prefix="gym-job")
+
+    # --- queue ---
+
+    def submit(self, job: str, source: str = "manual") -> Run:
+        """Queue a run of `job`, or return the run of it that is already waiting."""
+        if job not in self.jobs:
+            raise KeyError(job)
+        for run in self.pending:
+            if run.job == job:
+                return run
+        run = Run(job, source)
+        self.pending.append(run)
+        self.runs[run.id] = run
+        self.max_depth = max(self.max_depth, len(self.pending))
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return run
+
+    def _can_start(self, job: str) -> bool:
+        if job in self.running:
+            return False
+        return not any(job in group and group & self.running.keys() for group in self.exclusive)
+
+    async def _dispatcher(self) -> None:
+        """Start every queued run whose job is free, oldest first; wake up on submits and finishes."""
+        while True:
+            for run in list(self.pending):
+                if self._can_start(run.job):
+                    self.pending.remove(run)
+                    self.running[run.job] = run
+                    run.status, run.started = "running", time.time()
+                    execution = asyncio.create_task(self._execute(run))
+                    self._executions.add(execution)
+                    execution.add_done_callback(self._executions.discard)
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def _execute(self, run: Run) -> None:
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self.jobs[run.job])
+            run.status = "ok"
+        except Exception as e:
+            run.status, run.error = "error", str(e)
+        run.finished = time.time()
+        del self.running[run.job]
+        self.finished.append(run)
+        # Keep the id lookup bounded to queued, running and recent runs.
+        live = {r.id for r in itertools.chain(self.pending, self.running.values(), self.finished)}
+        self.runs = {i: r for i, r in self.runs.items() if i in live}
+        record("daemon", run.job, run.run_seconds or 0.0, run.status,
+               source=run.source, wait_seconds=run.wait_seconds, error=run.error)
+        self._wakeup.set()
+
+    async def _tick(self) -> None:
+        while True:
+            self.scheduler.run_pending()
+            await asyncio.sleep(1)
+
+    def status(self) -> Dict[str, Any]:
+        latency: Dict[str, Dict[str, Any]] = {}
+        for job in self.jobs:
+            done = [r for r in self.finished if r.job == job]
+            waits = [r.wait_seconds for r in done]
+            runs = [r.run_seconds for r in done]
+            latency[job] = {
+                "runs": len(done),
+                "errors": sum(1 for r in done if r.status == "error"),
+                **({
+                    "wait_p50": percentile(waits, 50), "wait_p95": percentile(waits, 95),
+                    "run_p50": percentile(runs, 50), "run_p95": percentile(runs, 95),
+                } if done else {}),
+            }
+        return {
+            "queue_depth": len(self.pending),
+            "max_queue_depth": self.max_depth,
+            "running": [r.to_dict() for r in self.running.values()],
+            "queued": [r.to_dict() for r in self.pending],
+            "recent": [r.to_dict() for r in list(self.finished)[-10:]],
+            "jobs": latency,
+            "next_scheduled": {
+                next(iter(j.job_func.args)): _iso(j.next_run.timestamp()) for j in self.scheduler.jobs
+            },
+        }
+
+    # --- endpoint ---
+
+    def _route(self, method: str, path: str):
+        parts = [p for p in path.split("?")[0].split("/") if p]
+        if method == "GET" and parts == ["status"]:
+            return 200, self.status()
+        if method == "POST" and len(parts) == 2 and parts[0] == "run":
+            if parts[1] not in self.jobs:
+                return 404, {"error": f"unknown job {parts[1]!r}", "jobs": sorted(self.jobs)}
+            return 202, self.submit(parts[1]).to_dict()
+        if method == "GET" and len(parts) == 2 and parts[0] == "runs" and parts[1].isdigit():
+            run = self.runs.get(int(parts[1]))
+            return (200, run.to_dict()) if run else (404, {"error": "unknown run"})
+        return 404, {"error": "not found"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # headers; requests carry no body
+            if len(request_line) < 2:
+                return
+            status, payload = self._route(request_line[0].upper(), request_line[1])
+            body = json.dumps(payload).encode()
+            writer.write(
+                f"HTTP/1.1 {status} {http.client.responses.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, stop: Optional[asyncio.Event] = None) -> None:
+        """Run the dispatcher, scheduler and endpoint until `stop` is set (or forever)."""
+        self._wakeup = asyncio.Event()
+        if self.pending:
+            self._wakeup.set()
+        if self.port:
+            server = await asyncio.start_server(self._handle, "127.0.0.1", self.port)
+        else:
+            os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)  # left over from a daemon that did not shut down cleanly
+            server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        tasks = [asyncio.create_task(self._dispatcher()), asyncio.create_task(self._tick())]
+        try:
+            async with server:
+                await (stop.wait() if stop else asyncio.Event().wait())
+        finally:
+            tasks += self._executions
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if not self.port and os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self._executor.shutdown(wait=False)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float = 10.0):
+        super().__init__("localhost", timeout=timeout)
+        self.path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.path)
+
+
+def request(method: str, path: str, socket_path: Optional[str] = SOCKET_PATH, port: Optional[int] = None) -> tuple:
+    """Call a running daemon; returns (HTTP status, decoded JSON)."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10) if port else _UnixHTTPConnection(socket_path)
+    try:
+        conn.request(method, path)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+    finally:
+        conn.close()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Talk to a running Gym Manager daemon.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    trigger = sub.add_parser("trigger", help="queue a job (survey, pipeline, maintenance)")
+    trigger.add_argument("job")
+    sub.add_parser("status", help="queue depth, running jobs and latencies")
+    run = sub.add_parser("run", help="show one run")
+    run.add_argument("id", type=int)
+    args = parser.parse_args(argv)
+
+    port = int(os.environ["DAEMON_PORT"]) if os.getenv("DAEMON_PORT") else None
+    if args.command == "trigger":
+        status, payload = request("POST", f"/run/{args.job}", port=port)
+    elif args.command == "run":
+        status, payload = request("GET", f"/runs/{args.id}", port=port)
+    else:
+        status, payload = request("GET", "/status", port=port)
+    print(json.dumps(payload, indent=2))
+    if status >= 400:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Daily survey dispatch for a whole roster, without an LLM.
+
+    python -m src.gym_manager.dispatch roster.csv --rate 5 --concurrency 8
+
+Each member's survey HTML is rendered once, with their own pre-filled form link, when it is
+queued. Sends go through a persistent SQLite outbox (storage/survey_queue.db). A (day, email)
+pair can only be queued once, so nobody gets the survey twice on the same day, even when
+dispatch runs again. Workers send with bounded concurrency behind a token bucket. Failed sends
+are retried with jittered exponential backoff until --max-attempts. Rows being sent hold a
+short lease, so a crashed dispatcher's rows are picked up by the next one. That gives
+at-least-once delivery for the rare send that succeeded just before a crash.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .rate_limit import TokenBucket
+from .telemetry import record
+from .tools.survey_email_template import render_survey_email
+
+STORAGE_DIR = os.path.join(os.path.dirname(__file__), "storage")
+QUEUE_PATH = os.path.join(STORAGE_DIR, "survey_queue.db")
+SUBJECT = "Daily Gym Feedback"
+LEASE_SECONDS = 120
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS survey_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    day TEXT NOT NULL,
+    email TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    lease_until REAL,
+    last_error TEXT,
+    message_id TEXT,
+    created REAL NOT NULL,
+    sent_at REAL,
+    UNIQUE (day, email)
+);
+CREATE INDEX IF NOT EXISTS survey_outbox_due ON survey_outbox (status, next_attempt);
+"""
+
+# (recipient email, form email or None, display name or None)
+Recipient = Tuple[str, Optional[str], Optional[str]]
+Sender = Callable[..., Dict[str, Any]]
+
+
+class SurveyQueue:
+    """The persistent outbox. Safe to share between the dispatcher's worker threads."""
+
+    def __init__(self, path: str = QUEUE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def enqueue(self, recipients: Iterable[Recipient], day: Optional[str] = None, subject: str = SUBJECT) -> Dict[str, int]:
+        """Render and queue one survey per recipient for `day` (default today); repeats are skipped."""
+        day = day or date.today().isoformat()
+        now = time.time()
+        rows = []
+        for email, form_email, name in recipients:
+            rows.append((day, email.strip().lower(), subject,
+                         render_survey_email(form_email or email, name), now, now))
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO survey_outbox (day, email, subject, body, next_attempt, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute("COMMIT")
+            queued = self._conn.total_changes - before
+        return {"queued": queued, "duplicates": len(rows) - queued}
+
+    def claim(self, limit: int, now: Optional[float] = None, lease: float = LEASE_SECONDS) -> List[sqlite3.Row]:
+        """Lease up to `limit` due rows (pending, or sending with an expired lease) for sending."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows = self._conn.execute(
+                "SELECT * FROM survey_outbox WHERE (status = 'pending' AND next_attempt <= ?) "
+                "OR (status = 'sending' AND lease_until < ?) ORDER BY next_attempt, id LIMIT ?",
+                (now, now, limit)).fetchall()
+            self._conn.executemany(
+                "UPDATE survey_outbox SET status = 'sending', lease_until = ? WHERE id = ?",
+                [(now + lease, row["id"]) for row in rows])
+            self._conn.execute("COMMIT")
+        return rows
+
+    def mark_sent(self, row_id: int, message_id: Optional[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE survey_outbox SET status = 'sent', attempts = attempts + 1, message_id = ?, "
+                "sent_at = ?, lease_until = NULL, last_error = NULL WHERE id = ?", (message_id, time.time(), row_id))
+
+    def mark_failed(self, row_id: int, error: str, retry_at: Optional[float]) -> None:
+        """Record a failed attempt; retry at `retry_at`, or give up when it is None."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE survey_outbox SET status = ?, attempts = attempts + 1, next_attempt = COALESCE(?, next_attempt), "
+                "lease_until = NULL, last_error = ? WHERE id = ?",
+                ("pending" if retry_at is not None else "failed", retry_at, error, row_id))
+
+    def next_due(self) -> Optional[float]:
+        """When the earliest row still to be sent becomes due, or None when nothing is left."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(CASE status WHEN 'pending' THEN next_attempt ELSE lease_until END) FROM survey_outbox "
+                "WHERE status IN ('pending', 'sending')").fetchone()
+        return row[0]
+
+    def counts(self, day: Optional[str] = None) -> Dict[str, int]:
+        query = "SELECT status, COUNT(*) FROM survey_outbox" + (" WHERE day = ?" if day else "") + " GROUP BY status"
+        with self._lock:
+            return {status: n for status, n in self._conn.execute(query, (day,) if day else ())}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class SurveyDispatcher:
+    """
+    Sends queued surveys with `sender` (the Composio GMAIL_SEND_EMAIL tool, or
+    fakes.gmail.FakeGmailSender), at most `concurrency` at a time and `rate_per_second` overall.
+    """
+
+    def __init__(self, queue: SurveyQueue, sender: Sender, rate_per_second: float = 5.0, concurrency: int = 4,
+                 max_attempts: int = 5, backoff: float = 2.0, max_backoff: float = 300.0):
+        self.queue = queue
+        self.sender = sender
+        self.bucket = TokenBucket(rate_per_second, capacity=max(1.0, min(rate_per_second, concurrency)))
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = {"sent": 0, "retries": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+    def _retry_at(self, attempts: int) -> Optional[float]:
+        if attempts >= self.max_attempts:
+            return None
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempts - 1))
+        return time.time() + delay * random.uniform(0.5, 1.0)
+
+    def _send(self, row: sqlite3.Row) -> None:
+        self.bucket.acquire()
+        try:
+            result = self.sender(recipient_email=row["email"], subject=row["subject"], body=row["body"], is_html=True)
+            error = None if result.get("successful") else str(result.get("error") or "send failed")
+        except Exception as e:
+            result, error = {}, str(e)
+        if error is None:
+            self.queue.mark_sent(row["id"], (result.get("data") or {}).get("id"))
+            outcome = "sent"
+        else:
+            retry_at = self._retry_at(row["attempts"] + 1)
+            self.queue.mark_failed(row["id"], error, retry_at)
+            outcome = "retries" if retry_at is not None else "failed"
+        with self._stats_lock:
+            self.stats[outcome] += 1
+
+    def run(self, deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Send until nothing is left to send (or `deadline`, a time.time() value, passes)."""
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="survey-send") as pool:
+            while deadline is None or time.time() < deadline:
+                rows = self.queue.claim(self.concurrency * 4)
+                if rows:
+                    list(pool.map(self._send, rows))
+                    continue
+                due = self.queue.next_due()
+                if due is None:
+                    break
+                wait = due - time.time()
+                if deadline is not None:
+                    wait = min(wait, deadline - time.time())
+                time.sleep(max(0.01, wait))
+        seconds = time.perf_counter() - started
+        report = {
+            **self.stats,
+            "seconds": round(seconds, 3),
+            "sends_per_second": round(self.stats["sent"] / seconds, 2) if seconds else 0.0,
+            "rate_limited_seconds": round(self.bucket.waited_seconds, 3),
+        }
+        record("dispatch", "surveys", seconds, "ok" if not self.stats["failed"] else "error",
+               sent=self.stats["sent"], retries=self.stats["retries"], failed=self.stats["failed"])
+        return report
+
+
+def dispatch_surveys(recipients: Iterable[Recipient], sender: Sender, day: Optional[str] = None,
+                     queue_path: str = QUEUE_PATH, **dispatcher_kwargs) -> Dict[str, Any]:
+    """Queue today's surveys for `recipients` and send everything due; returns queue and send stats."""
+    queue = SurveyQueue(queue_path)
+    try:
+        enqueued = queue.enqueue(recipients, day)
+        report = SurveyDispatcher(queue, sender, **dispatcher_kwargs).run()
+        return {**enqueued, **report, "status": queue.counts(day or date.today().isoformat())}
+    finally:
+        queue.close()
+
+
+def gmail_sender() -> Sender:
+    """The Composio Gmail tool the crew uses."""
+    from .crew import get_gmail_send_tool
+
+    sender = get_gmail_send_tool()
+    if sender is None:
+        raise RuntimeError("Gmail tool not initialized.")
+    return sender
+
+
+def main(argv=None) -> None:
+    from .batch import load_roster
+
+    parser = argparse.ArgumentParser(description="Send today's survey to every member of a roster.")
+    parser.add_argument("roster", help="CSV or JSON roster (email, goal, optional sheet_email)")
+    parser.add_argument("--rate", type=float, default=5.0, help="sends per second")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-attempts", type=int, default=5)
+    parser.add_argument("--day", help="survey day (default today); a member gets one survey per day")
+    args = parser.parse_args(argv)
+
+    members = load_roster(args.roster)
+    report = dispatch_surveys(
+        [(m.email, m.sheet_email, None) for m in members], gmail_sender(), day=args.day,
+        rate_per_second=args.rate, concurrency=args.concurrency, max_attempts=args.max_attempts,
+    )
+    print(f"Queued {report['queued']} ({report['duplicates']} already queued today); sent {report['sent']}, "
+          f"retried {report['retries']}, failed {report['failed']} in {report['seconds']}s "
+          f"({report['sends_per_second']}/s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import fcntl
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from chromadb import Documents, EmbeddingFunction, Embeddings
+
+from .resources import lazy_resource
+
+STORAGE_DIR = os.path.join(os.path.dirname(__file__), "storage")
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+TASK_TYPE = "RETRIEVAL_DOCUMENT"
+
+
+def text_hash(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk vector cache, shared by every process of the app.
+    `vectors.f32` holds the float32 rows back to back and is read through a memory map;
+    `keys.txt` holds one text hash per row, in the same order, and `dim` the vector size.
+    Appends hold an exclusive lock on `lock` and first pick up the rows other handles
+    appended, so row numbers agree across processes; lookups of unknown keys do the same.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.keys_path = os.path.join(directory, "keys.txt")
+        self.dim_path = os.path.join(directory, "dim")
+        self.lock_path = os.path.join(directory, "lock")
+        self.dim: Optional[int] = None
+        self._rows: Dict[str, int] = {}
+        self._count = 0  # rows in the files, duplicates included
+        self._keys_bytes = 0  # how much of keys.txt has been read
+        self._matrix: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        with self._lock, self._file_lock():
+            self._sync()
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.lock_path, "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            yield  # closing the file releases the lock
+
+    def _sync(self) -> None:
+        """Read the rows appended since the last sync. Call with both locks held."""
+        if self.dim is None:
+            if not os.path.exists(self.dim_path):
+                return
+            with open(self.dim_path) as f:
+                self.dim = int(f.read().strip())
+        row_bytes = 4 * self.dim
+        keys_size = os.path.getsize(self.keys_path) if os.path.exists(self.keys_path) else 0
+        vectors_size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if keys_size == self._keys_bytes and vectors_size == self._count * row_bytes:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_bytes)
+            tail = f.read()
+        lines = tail[:tail.rfind(b"\n") + 1].splitlines(keepends=True)
+        # A write cut short by a crash can leave one file ahead of the other; keep the rows both agree on.
+        lines = lines[:max(0, vectors_size // row_bytes - self._count)]
+        keys_bytes = self._keys_bytes + sum(map(len, lines))
+        if keys_bytes < keys_size:
+            with open(self.keys_path, "r+b") as f:
+                f.truncate(keys_bytes)
+        if (self._count + len(lines)) * row_bytes < vectors_size:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate((self._count + len(lines)) * row_bytes)
+        for line in lines:
+            self._rows.setdefault(line.decode().strip(), self._count)
+            self._count += 1
+        self._keys_bytes = keys_bytes
+        self._matrix = None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _view(self) -> np.memmap:
+        if self._matrix is None or self._matrix.shape[0] != self._count:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(self._count, self.dim))
+        return self._matrix
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        with self._lock:
+            if any(key not in self._rows for key in keys):
+                with self._file_lock():
+                    self._sync()
+            found = [(key, self._rows[key]) for key in keys if key in self._rows]
+            if not found:
+                return {}
+            matrix = self._view()
+            return {key: matrix[row].tolist() for key, row in found}
+
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        with self._lock, self._file_lock():
+            self._sync()
+            new = {key: vec for key, vec in items.items() if key not in self._rows}
+            if not new:
+                return
+            block = np.asarray(list(new.values()), dtype=np.float32)
+            if self.dim is None:
+                self.dim = block.shape[1]
+                with open(self.dim_path, "w") as f:
+                    f.write(str(self.dim))
+            if block.shape[1] != self.dim:
+                raise ValueError(f"Embedding size {block.shape[1]} does not match the store's {self.dim}")
+            keys = "".join(f"{key}\n" for key in new).encode()
+            with open(self.vectors_path, "ab") as f:
+                f.write(block.tobytes())
+            with open(self.keys_path, "ab") as f:
+                f.write(keys)
+            for key in new:
+                self._rows[key] = self._count
+                self._count += 1
+            self._keys_bytes += len(keys)
+            self._matrix = None
+
+
+class EmbeddingService:
+    """
+    Shared, cached and batched embeddings.
+    Texts already in the store cost nothing. Misses from concurrent callers that arrive within
+    `batch_window` seconds are deduplicated and sent together, `batch_size` texts per call.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[List[str]], List[List[float]]],
+        store: EmbeddingStore,
+        model: str = EMBEDDING_MODEL,
+        batch_size: int = 100,
+        batch_window: float = 0.02,
+    ):
+        self.embed_batch = embed_batch
+        self.store = store
+        self.model = model
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._pending: Dict[str, "tuple[str, Future]"] = {}
+        self._leader = False
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self) -> None:
+        self.texts_requested = 0
+        self.cache_hits = 0
+        self.api_calls = 0
+        self.texts_embedded = 0
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        texts = list(texts)
+        keys = [text_hash(self.model, text) for text in texts]
+        found = self.store.get_many(keys)
+
+        futures: Dict[str, Future] = {}
+        lead = False
+        with self._lock:
+            self.texts_requested += len(texts)
+            self.cache_hits += sum(1 for key in keys if key in found)
+            for key, text in zip(keys, texts):
+                if key in found or key in futures:
+                    continue
+                if key not in self._pending:
+                    self._pending[key] = (text, Future())
+                futures[key] = self._pending[key][1]
+            if futures and not self._leader:
+                self._leader = lead = True
+
+        if lead:
+            self._flush()
+        for key, future in futures.items():
+            found[key] = future.result()
+        return [found[key] for key in keys]
+
+    def _flush(self) -> None:
+        time.sleep(self.batch_window)  # let concurrent callers join this batch
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            self._leader = False
+        items = list(batch.items())
+        for start in range(0, len(items), self.batch_size):
+            chunk = items[start:start + self.batch_size]
+            try:
+                vectors = self.embed_batch([text for _, (text, _) in chunk])
+                with self._lock:
+                    self.api_calls += 1
+                    self.texts_embedded += len(chunk)
+                self.store.put_many({key: vec for (key, _), vec in zip(chunk, vectors)})
+            except Exception as e:
+                for _, (_, future) in chunk:
+                    future.set_exception(e)
+                continue
+            for (_, (_, future)), vec in zip(chunk, vectors):
+                future.set_result([float(x) for x in vec])
+
+    def stats(self) -> Dict[str, int]:
+        """`calls_saved` compares against the old behaviour of one embedding call per text."""
+        return {
+            "texts_requested": self.texts_requested,
+            "cache_hits": self.cache_hits,
+            "api_calls": self.api_calls,
+            "texts_embedded": self.texts_embedded,
+            "calls_saved": self.texts_requested - self.api_calls,
+            "stored_vectors": len(self.store),
+        }
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """chromadb/embedchain embedding function backed by the shared EmbeddingService."""
+
+    def __init__(self, service: Optional[EmbeddingService] = None):
+        self._service = service
+
+    def __call__(self, input: Documents) -> Embeddings:
+        service = self._service or get_embedding_service()
+        return service.embed([input] if isinstance(input, str) else input)
+
+
+def google_embed_batch(model: str = EMBEDDING_MODEL, task_type: str = TASK_TYPE) -> Callable[[List[str]], List[List[float]]]:
+    """One Gemini embed_content call for a whole list of texts, through the LLM gateway."""
+    import google.generativeai as genai
+    from .gateway import get_gateway
+
+    genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+    lane = "gemini/" + model.split("/")[-1]  # "models/gemini-embedding-001" shares the gemini provider limit
+
+    def embed(texts: List[str]) -> List[List[float]]:
+        return get_gateway().call(
+            lane, lambda: genai.embed_content(model=model, content=texts, task_type=task_type)["embedding"],
+            tokens=sum(len(text) for text in texts) // 4,
+        )
+
+    return embed
+
+
+@lazy_resource("embedding_service")
+def get_embedding_service() -> EmbeddingService:
+    """EMBEDDING_CACHE_DIR moves the vector store; one sub-directory per model and task type."""
+    model = os.getenv("EMBEDDING_MODEL", EMBEDDING_MODEL)
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{model}-{TASK_TYPE}")
+    root = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(STORAGE_DIR, "embeddings"))
+    return EmbeddingService(google_embed_batch(model), EmbeddingStore(os.path.join(root, name)), model=model)
+
+
+def embedder_config() -> dict:
+    """crewai `embedder`/`embedder_config` value that routes through the shared service."""
+    return {"provider": "custom", "config": {"embedder": CachedEmbeddingFunction()}}
+
+
+def use_cached_embeddings(app) -> None:
+    """Point an embedchain App (e.g. PDFSearchTool's) at the shared service before anything is added."""
+    app.embedding_model.set_embedding_fn(CachedEmbeddingFunction())
+    app.db._get_or_create_collection(app.db.config.collection_name)
@@ -0,0 +1,32 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+class FakeGmailSender:
+    """
+    Stand-in for the Composio GMAIL_SEND_EMAIL tool.
+    Records every message in `sent` and reports success after `latency` seconds.
+    `fail_times` maps recipients to how many sends to them fail (as a provider error) first.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_times: Optional[Dict[str, int]] = None):
+        self.latency = latency
+        self.fail_times = dict(fail_times or {})
+        self.sent: List[Dict[str, Any]] = []
+        self.attempts = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, recipient_email: str, subject: str, body: str, is_html: bool = False) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.attempts += 1
+            if self.fail_times.get(recipient_email, 0) > 0:
+                self.fail_times[recipient_email] -= 1
+                return {"successful": False, "data": None, "error": "429 Too Many Requests"}
+        message = {"recipient_email": recipient_email, "subject": subject, "body": body, "is_html": is_html}
+        with self._lock:
+            self.sent.append(message)
+            message_id = f"fake-{len(self.sent)}"
+        return {"successful": True, "data": {"id": message_id}, "error": None}
@@ -0,0 +1,161 @@
+import json
+import re
+import threading
+import time
+from datetime import date
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai.llms.base_llm import BaseLLM
+from crewai.utilities.events import LLMCallCompletedEvent, LLMCallStartedEvent, LLMStreamChunkEvent, crewai_event_bus
+from crewai.utilities.events.llm_events import LLMCallType
+
+# (tool name, tool input) steps, then the final answer
+Script = Tuple[List[Tuple[str, Dict[str, Any]]], str]
+
+
+class ScriptedLLM(BaseLLM):
+    """
+    Deterministic LLM for offline runs of the crew.
+    For each task it replays the scripted tool calls in the ReAct format crewai parses, one per call,
+    then gives the scripted final answer. Every call sleeps `latency` seconds first.
+    Token counts are estimated at four characters per token and reported to crewai's token
+    callbacks, and calls emit the same LLM events as crewai's own LLM. With `stream`, responses
+    are also emitted word by word as stream chunks, `chunk_latency` seconds apart.
+    """
+
+    def __init__(self, scripts: Dict[str, Script], latency: float = 0.0, model: str = "scripted/gym",
+                 stream: bool = False, chunk_latency: float = 0.0):
+        super().__init__(model=model)
+        self.scripts = scripts
+        self.latency = latency
+        self.stream = stream
+        self.chunk_latency = chunk_latency
+        self.calls = 0
+        self.calls_by_task: Dict[str, int] = {}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        crewai_event_bus.emit(self, event=LLMCallStartedEvent(messages=messages, from_task=from_task, from_agent=from_agent))
+        started = time.time()
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        task_name = getattr(from_task, "name", None) or "unscripted"
+        response = self._respond(task_name, messages) if from_task is not None else self._convert(messages)
+        if self.stream:
+            for chunk in re.findall(r"\s*\S+", response):
+                if self.chunk_latency:
+                    time.sleep(self.chunk_latency)
+                crewai_event_bus.emit(self, event=LLMStreamChunkEvent(chunk=chunk, from_task=from_task, from_agent=from_agent))
+        usage = SimpleNamespace(
+            prompt_tokens=sum(len(str(m.get("content", ""))) for m in messages) // 4,
+            completion_tokens=len(response) // 4,
+            prompt_tokens_details=None,
+        )
+        with self._lock:
+            self.calls += 1
+            self.calls_by_task[task_name] = self.calls_by_task.get(task_name, 0) + 1
+            self.prompt_tokens += usage.prompt_tokens
+            self.completion_tokens += usage.completion_tokens
+        for callback in callbacks or []:
+            if hasattr(callback, "log_success_event"):
+                callback.log_success_event({}, {"usage": usage}, started, time.time())
+        crewai_event_bus.emit(self, event=LLMCallCompletedEvent(
+            messages=messages, response=response, call_type=LLMCallType.LLM_CALL,
+            from_task=from_task, from_agent=from_agent,
+        ))
+        return response
+
+    def _respond(self, task_name: str, messages: List[Dict[str, str]]) -> str:
+        steps, final = self.scripts.get(task_name, ([], f"{task_name} done."))
+        # Each tool round trip leaves one assistant message ending in an observation.
+        step = sum(1 for m in messages if m.get("role") == "assistant" and "Observation:" in str(m.get("content", "")))
+        if step < len(steps):
+            tool, tool_input = steps[step]
+            return f"Thought: I should use {tool}.\nAction: {tool}\nAction Input: {json.dumps(tool_input)}"
+        return f"Thought: I now know the final answer\nFinal Answer: {final}"
+
+    def _convert(self, messages: List[Dict[str, str]]) -> str:
+        # Converter calls (e.g. the long-term memory evaluation) ask for JSON matching a schema.
+        prompt = " ".join(str(m.get("content", "")) for m in messages)
+        if "entities" in prompt and "quality" in prompt:
+            return json.dumps({
+                "suggestions": ["Keep outputs structured."],
+                "quality": 8,
+                "entities": [{"name": "Member", "type": "person", "description": "Gym member", "relationships": []}],
+            })
+        return "{}"
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 1_000_000
+
+
+def gym_pipeline_scripts(recipient_email: str = "member@example.com", today: Optional[date] = None) -> Dict[str, Script]:
+    """Scripts for GymManagerCrew's tasks that touch the same tools a real run does."""
+    day = (today or date.today()).isoformat()
+    summary = {
+        "date": day,
+        "gym": True,
+        "muscle_trained": "Legs",
+        "summary": "Squats and lunges, moderate intensity.",
+        "pain_experienced": True,
+        "pain_details": "Mild ache in the left knee after squats",
+    }
+
+    def final(**fields) -> str:
+        return json.dumps({"date": f"{day}T00:00:00", **fields})
+
+    return {
+        "send_daily_survey_task": (
+            [("gmail_send_email", {"recipient_email": recipient_email, "subject": "Daily Gym Feedback", "body": ""})],
+            "Survey email sent.",
+        ),
+        "summarize_responses_task": (
+            [("fetch_form_response", {}), ("insert_summary_tool", {"summary": summary})],
+            json.dumps(summary),
+        ),
+        "review_pain_task": (
+            [
+                ("fetch_latest_summary_tool", {"placeholder": ""}),
+                ("YouTubeBatchSearchTool", {"queries": ["knee pain stretches", "knee friendly leg workout"]}),
+            ],
+            final(
+                muscle_trained="Legs",
+                pain_details=summary["pain_details"],
+                treatment_recommendations="Ice, rest and mobility work; avoid deep squats tomorrow.",
+                youtube_links=["https://www.youtube.com/watch?v=knee-pain-stretches-1"],
+            ),
+        ),
+        "generate_workout_plan_task": (
+            [
+                ("fetch_latest_summary_tool", {"placeholder": ""}),
+                ("GymTimetableLookup", {"day": "tomorrow"}),
+                ("YouTubeBatchSearchTool", {"queries": ["incline bench press form", "cable fly form"]}),
+            ],
+            final(
+                comments_on_progress="Consistent training this week.",
+                muscle_to_train="Chest",
+                workout_plan="Incline bench 4x8, cable fly 3x12, push-ups 3x15.",
+                youtube_links_for_proper_form=["https://www.youtube.com/watch?v=incline-bench-press-form-1"],
+            ),
+        ),
+        "nutrition_plan_task": (
+            [("GymTimetableLookup", {"day": ""})],
+            final(dietary_restrictions="None", nutrition_plan="3000 kcal, 160 g protein, anti-inflammatory foods."),
+        ),
+        "chef_meal_plan_task": (
+            [("YouTubeBatchSearchTool", {"queries": ["salmon rice bowl recipe", "oats protein shake recipe"]})],
+            final(
+                dietary_restrictions="None",
+                meal_plan="Breakfast: oats shake. Lunch: salmon rice bowl. Dinner: chicken and sweet potato.",
+                youtube_links_for_recipes=["https://www.youtube.com/watch?v=salmon-rice-bowl-recipe-1"],
+            ),
+        ),
+    }
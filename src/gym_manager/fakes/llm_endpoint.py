@@ -0,0 +1,126 @@
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Optional
+
+
+class FakeLLMEndpoint:
+    """
+    Local OpenAI-compatible chat endpoint that enforces a quota the way a provider does.
+    More than `rpm` requests in any `window` seconds, or more than `max_concurrent` at once,
+    get a 429 with a Retry-After header (when `retry_after` is set). Accepted requests answer
+    after `latency` seconds with `answer`, streamed as server-sent events when asked to.
+    Use as a context manager; point an LLM at `base_url` (model "openai/<anything>").
+    """
+
+    def __init__(self, rpm: int = 60, window: float = 60.0, max_concurrent: Optional[int] = None,
+                 latency: float = 0.0, retry_after: Optional[float] = None, answer: str = "Final Answer: ok"):
+        self.rpm = rpm
+        self.window = window
+        self.max_concurrent = max_concurrent
+        self.latency = latency
+        self.retry_after = retry_after
+        self.answer = answer
+        self.requests = 0
+        self.served = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._accepted: Deque[float] = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _admit(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            while self._accepted and now - self._accepted[0] >= self.window:
+                self._accepted.popleft()
+            if len(self._accepted) >= self.rpm or (self.max_concurrent and self.in_flight >= self.max_concurrent):
+                self.throttled += 1
+                return False
+            self._accepted.append(now)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return True
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not fake._admit():
+                    headers = {"Retry-After": f"{fake.retry_after:g}"} if fake.retry_after is not None else {}
+                    self._send(429, {"error": {"message": "Resource has been exhausted (e.g. check quota).",
+                                               "type": "rate_limit_exceeded", "code": 429}}, headers)
+                    return
+                try:
+                    if fake.latency:
+                        time.sleep(fake.latency)
+                    prompt = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4
+                    if body.get("stream"):
+                        self._stream(body.get("model", "fake"))
+                    else:
+                        self._send(200, {
+                            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                            "model": body.get("model", "fake"),
+                            "choices": [{"index": 0, "finish_reason": "stop",
+                                         "message": {"role": "assistant", "content": fake.answer}}],
+                            "usage": {"prompt_tokens": prompt, "completion_tokens": len(fake.answer) // 4,
+                                      "total_tokens": prompt + len(fake.answer) // 4},
+                        })
+                finally:
+                    with fake._lock:
+                        fake.in_flight -= 1
+                        fake.served += 1
+
+            def _stream(self, model):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                words = fake.answer.split(" ")
+                for i, word in enumerate(words):
+                    chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": model, "choices": [{"index": 0, "delta": {"content": word + (" " if i < len(words) - 1 else "")},
+                                                          "finish_reason": None}]}
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                done = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+                self.wfile.write(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode())
+                self.close_connection = True
+
+            def _send(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "FakeLLMEndpoint":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,102 @@
+import re
+import sqlite3
+import time
+from typing import Any, Dict, List, Sequence
+
+from ..tools.pg_pool import STATEMENTS, PgPool
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS workout_summaries (
+    member TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL,
+    gym BOOLEAN,
+    muscle_trained TEXT,
+    summary TEXT,
+    pain_experienced BOOLEAN,
+    pain_details TEXT,
+    PRIMARY KEY (member, date)
+)
+"""
+
+
+def to_sqlite(statement: str) -> str:
+    """Postgres `$1` placeholders become SQLite `?` (each parameter is used once, in order)."""
+    return re.sub(r"\$\d+", "?", statement)
+
+
+class _Cursor:
+    def __init__(self, connection: "SQLiteConnection"):
+        self.connection = connection
+        self._cur = connection.raw.cursor()
+
+    def __enter__(self) -> "_Cursor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._cur.close()
+
+    def execute(self, sql: str, params: Sequence[Any] = ()) -> None:
+        if self.connection.latency:
+            time.sleep(self.connection.latency)
+        self.connection.statements_run += 1
+        self._cur.execute(sql, tuple(params))
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        return dict(row) if row is not None else None
+
+    def fetchall(self):
+        return [dict(row) for row in self._cur.fetchall()]
+
+    @property
+    def rowcount(self) -> int:
+        return self._cur.rowcount
+
+
+class SQLiteConnection:
+    """The slice of a psycopg2 connection the tools use, over SQLite, with optional per-statement latency."""
+
+    def __init__(self, path: str, latency: float = 0.0):
+        self.raw = sqlite3.connect(path, check_same_thread=False)
+        self.raw.row_factory = sqlite3.Row
+        self.latency = latency
+        self.statements_run = 0
+        self.closed = False
+
+    def cursor(self, cursor_factory=None) -> _Cursor:
+        return _Cursor(self)
+
+    def commit(self) -> None:
+        self.raw.commit()
+
+    def rollback(self) -> None:
+        self.raw.rollback()
+
+    def close(self) -> None:
+        self.raw.close()
+        self.closed = True
+
+
+class SQLitePool(PgPool):
+    """
+    PgPool over a local SQLite file, for benchmarks and tests without Postgres.
+    Named statements run directly instead of through PREPARE/EXECUTE.
+    """
+
+    dialect = "sqlite"
+
+    def __init__(self, path: str, latency: float = 0.0, schema: str = SCHEMA, **kwargs):
+        statements = {name: to_sqlite(sql) for name, sql in kwargs.pop("statements", STATEMENTS).items()}
+        setup = sqlite3.connect(path)
+        setup.executescript(schema)
+        setup.close()
+        super().__init__(connect=lambda: SQLiteConnection(path, latency), statements=statements, **kwargs)
+
+    def execute(self, cur, name: str, params: Sequence[Any] = ()) -> None:
+        cur.execute(self.statements[name], params)
+
+    def rows(self, table: str = "workout_summaries") -> List[Dict[str, Any]]:
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"SELECT * FROM {table}")
+                return cur.fetchall()
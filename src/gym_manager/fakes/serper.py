@@ -0,0 +1,70 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Set
+
+
+class FakeSerperServer:
+    """
+    Local HTTP stand-in for the Serper search endpoint.
+    Answers every POST with three youtube links derived from the query, after `latency` seconds.
+    Queries listed in `fail_queries` get a 500. Use as a context manager; `url` is the search URL.
+    """
+
+    def __init__(self, latency: float = 0.0, fail_queries: Optional[Set[str]] = None):
+        self.latency = latency
+        self.fail_queries = set(fail_queries or ())
+        self.requests = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/search"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                query = body.get("q", "").replace("site:youtube.com ", "", 1)
+                with fake._lock:
+                    fake.requests += 1
+                    fake.connections.add(self.client_address)
+                if fake.latency:
+                    time.sleep(fake.latency)
+                if query in fake.fail_queries:
+                    self._send(500, {"message": "upstream error"})
+                    return
+                slug = "-".join(query.lower().split())
+                organic = [{"link": f"https://www.youtube.com/watch?v={slug}-{i}"} for i in range(1, 5)]
+                self._send(200, {"organic": organic})
+
+            def _send(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "FakeSerperServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,79 @@
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+HEADERS = [
+    "Timestamp", "Name", "Email Address", "Did you go to the gym today?",
+    "What muscle did you train?", "Did you do cardio?", "List exercises and sets",
+    "Did you experience any pain?", "If yes, describe when and where it occurred",
+]
+MUSCLES = ["Chest", "Back", "Legs", "Shoulders", "Arms", "Core"]
+
+_A1_RANGE = re.compile(r"^(?:(?P<sheet>[^!]+)!)?[A-Z]+(?P<start>\d*)(?::[A-Z]+(?P<end>\d*))?$")
+
+
+def make_form_rows(count: int, start: Optional[datetime] = None) -> List[List[str]]:
+    """Build `count` deterministic form responses, one per day, header row included."""
+    start = start or datetime(2024, 1, 1, 19, 0, 0)
+    rows = [list(HEADERS)]
+    for i in range(count):
+        went = i % 7 != 6
+        pain = went and i % 5 == 0
+        rows.append([
+            (start + timedelta(days=i)).strftime("%m/%d/%Y %H:%M:%S"),
+            "Member",
+            "member@example.com",
+            "Yes" if went else "No",
+            MUSCLES[i % len(MUSCLES)] if went else "",
+            "Yes" if i % 3 == 0 else "No",
+            "Bench 4x8 @60kg, Row 3x10 @50kg" if went else "",
+            "Yes" if pain else "No",
+            "Mild ache in the left knee after squats" if pain else "",
+        ])
+    return rows
+
+
+class _Request:
+    def __init__(self, fn):
+        self._fn = fn
+
+    def execute(self) -> Dict[str, Any]:
+        return self._fn()
+
+
+class FakeSheetsService:
+    """
+    In-memory stand-in for the object returned by build('sheets', 'v4', ...).
+    Supports spreadsheets().values().get(spreadsheetId=..., range=...).execute() with A1 ranges
+    like 'Sheet!A:Z' and 'Sheet!A5:Z', and counts requests and rows served.
+    """
+
+    def __init__(self, rows: Optional[List[List[str]]] = None):
+        self.rows = rows if rows is not None else [list(HEADERS)]
+        self.requests = 0
+        self.rows_served = 0
+
+    def append(self, row: List[str]) -> None:
+        self.rows.append(row)
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def get(self, spreadsheetId: str, range: str) -> _Request:
+        return _Request(lambda: self._get(range))
+
+    def _get(self, range_name: str) -> Dict[str, Any]:
+        match = _A1_RANGE.match(range_name)
+        if not match:
+            raise ValueError(f"Unable to parse range: {range_name}")
+        start = int(match.group("start") or 1)
+        end = int(match.group("end")) if match.group("end") else len(self.rows)
+        values = [list(r) for r in self.rows[start - 1:end]]
+        while values and not values[-1]:
+            values.pop()
+        self.requests += 1
+        self.rows_served += len(values)
+        return {"range": range_name, "values": values} if values else {"range": range_name}
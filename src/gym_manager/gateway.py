@@ -0,0 +1,369 @@
+"""
+One gateway for every model call.
+
+Every model call goes through the process-wide LLMGateway: GymLLM (the per-agent models from
+agents.yaml, the crew model and the summary condenser), the PDF search's answer model
+(llm.use_gateway_llm) and the embedding calls (embeddings.google_embed_batch). Parallel tasks
+and batch members share one view of each model's limits instead of each finding the 429s on
+their own:
+
+- Quotas: each model can have a requests-per-minute and a tokens-per-minute token bucket
+  (LLM_QUOTAS, e.g. '{"gemini/gemini-2.5-flash": {"rpm": 1000, "tpm": 1000000}}', or LLM_RPM for
+  every model). Prompt tokens are estimated at four characters each. A provider (the part of
+  the model id before "/") can also have a requests-per-minute limit shared by all its models
+  (set_provider_limit, e.g. the batch runner's --rate gemini=120).
+- AIMD concurrency: each model starts at INITIAL_CONCURRENCY calls in flight. The limit grows by
+  about one per round of calls that succeed within LATENCY_TARGET seconds, and halves on a 429
+  or a slower call. Calls sent before the last halving do not halve it again, so one burst of
+  429s counts once. A 429 with Retry-After also holds back the model's whole lane until then.
+- Retries: 429s, 5xx answers, timeouts and dropped connections are retried with full-jitter
+  exponential backoff until the call's deadline. Other errors are raised at once.
+- Priorities: calls wait in priority order, INTERACTIVE (manual and daemon runs) before BATCH
+  (roster runs). Each class has its own default deadline. A call that cannot start before its
+  deadline raises GatewayTimeout.
+
+`metrics()` reports, per model, what was achieved (requests and tokens per minute) against the
+quota, along with 429s, retries, the concurrency limit, queue waits and latency percentiles.
+Every call is recorded to telemetry (kind "gateway").
+"""
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .rate_limit import TokenBucket
+from .resources import lazy_resource
+from .telemetry import percentile, record
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+# Seconds a call may take in total (waiting, attempts and backoff), by priority.
+DEADLINES = {INTERACTIVE: 120.0, BATCH: 900.0}
+
+INITIAL_CONCURRENCY = 4
+MAX_CONCURRENCY = 16
+LATENCY_TARGET = float(os.getenv("LLM_LATENCY_TARGET", "30"))
+DECREASE = 0.5
+BASE_DELAY = 1.0
+MAX_DELAY = 30.0
+MAX_ATTEMPTS = 8
+# Throughput is measured over this many trailing seconds.
+WINDOW_SECONDS = 60.0
+
+_TRANSIENT_STATUS = {408, 500, 502, 503, 504}
+_TRANSIENT_NAMES = ("Timeout", "APIConnectionError", "ServiceUnavailable", "InternalServerError", "ConnectionError")
+
+
+class GatewayTimeout(TimeoutError):
+    """A model call could not finish before its deadline."""
+
+
+class Quota:
+    """Limits for one model; None means no limit of that kind."""
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 concurrency: int = MAX_CONCURRENCY):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.concurrency = concurrency
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"rpm": self.rpm, "tpm": self.tpm, "concurrency": self.concurrency}
+
+
+def quotas_from_env() -> Tuple[Dict[str, Quota], Quota]:
+    """Per-model quotas from LLM_QUOTAS, and the default from LLM_RPM / LLM_TPM."""
+    default = Quota(rpm=float(os.getenv("LLM_RPM")) if os.getenv("LLM_RPM") else None,
+                    tpm=float(os.getenv("LLM_TPM")) if os.getenv("LLM_TPM") else None)
+    quotas = {model: Quota(**limits) for model, limits in json.loads(os.getenv("LLM_QUOTAS") or "{}").items()}
+    return quotas, default
+
+
+def _status(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    # ResourceExhausted is how the Gemini SDK (embeddings) reports a 429.
+    return _status(error) == 429 or any(name in type(error).__name__ for name in ("RateLimit", "ResourceExhausted"))
+
+
+def is_transient(error: BaseException) -> bool:
+    return _status(error) in _TRANSIENT_STATUS or any(name in type(error).__name__ for name in _TRANSIENT_NAMES)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """The Retry-After the provider sent with `error`, in seconds."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return max(0.0, float(value)) if value is not None else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def provider_of(model: str) -> str:
+    return model.split("/", 1)[0] if "/" in model else model
+
+
+class _Lane:
+    """Admission, AIMD state and counters for one model."""
+
+    def __init__(self, model: str, quota: Quota, initial: int, latency_target: float,
+                 provider: Optional[TokenBucket] = None):
+        self.model = model
+        self.quota = quota
+        self.provider = provider  # requests bucket shared with the provider's other models
+        self.latency_target = latency_target
+        self.limit = float(min(initial, quota.concurrency))
+        self.in_flight = 0
+        self.requests = TokenBucket(quota.rpm / 60.0, capacity=max(1.0, quota.rpm / 60.0)) if quota.rpm else None
+        self.tokens = TokenBucket(quota.tpm / 60.0, capacity=max(1.0, quota.tpm / 60.0)) if quota.tpm else None
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.cond = threading.Condition()
+        self.waiting: List[Tuple[int, int]] = []  # (priority, ticket) heap
+        self.cancelled: set = set()
+        self.started = time.monotonic()
+        self.completions: Deque[Tuple[float, int]] = deque()  # (monotonic time, tokens) of answered requests
+        self.latencies: Deque[float] = deque(maxlen=500)
+        self.queue_seconds: Deque[float] = deque(maxlen=500)
+        self.stats = {"calls": 0, "requests": 0, "succeeded": 0, "failed": 0, "throttled": 0, "retries": 0,
+                      "timeouts": 0, "tokens": 0, "limit_increases": 0, "limit_decreases": 0}
+
+    def _head(self) -> Optional[int]:
+        while self.waiting and self.waiting[0][1] in self.cancelled:
+            self.cancelled.discard(heapq.heappop(self.waiting)[1])
+        return self.waiting[0][1] if self.waiting else None
+
+    def _delay(self, tokens: int) -> float:
+        """Seconds until a request of `tokens` fits the lane; 0 when it can start now."""
+        now = time.monotonic()
+        delay = max(0.0, self.paused_until - now)
+        if self.in_flight >= int(self.limit):
+            return max(delay, 0.05)  # woken by release before then
+        if self.requests is not None:
+            delay = max(delay, self.requests.wait_time(1))
+        if self.tokens is not None and tokens:
+            delay = max(delay, self.tokens.wait_time(tokens))
+        if self.provider is not None:
+            delay = max(delay, self.provider.wait_time(1))
+        return delay
+
+    def admit(self, priority: int, ticket: int, tokens: int, deadline: float) -> float:
+        """Wait for this request's turn and capacity; returns the seconds waited."""
+        started = time.monotonic()
+        with self.cond:
+            heapq.heappush(self.waiting, (priority, ticket))
+            while True:
+                delay = self._delay(tokens) if self._head() == ticket else None
+                if delay == 0.0 and self.provider is not None:
+                    # Another model of the provider may have taken the token since.
+                    delay = self.provider.try_acquire(1)
+                if delay == 0.0:
+                    heapq.heappop(self.waiting)
+                    if self.requests is not None:
+                        self.requests.try_acquire(1)
+                    if self.tokens is not None and tokens:
+                        self.tokens.try_acquire(min(tokens, self.tokens.capacity))
+                    self.in_flight += 1
+                    self.stats["requests"] += 1
+                    self.cond.notify_all()  # the next in line may fit too
+                    waited = time.monotonic() - started
+                    self.queue_seconds.append(waited)
+                    return waited
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (delay is not None and delay > remaining):
+                    self.cancelled.add(ticket)
+                    self.stats["timeouts"] += 1
+                    self.cond.notify_all()
+                    raise GatewayTimeout(f"{self.model}: no capacity before the call's deadline")
+                self.cond.wait(min(remaining, delay if delay is not None else remaining))
+
+    def release(self, sent: float, ok: bool, throttled: bool, tokens: int = 0,
+                pause: Optional[float] = None) -> None:
+        """Finish a request sent at `sent` (monotonic) and adjust the concurrency limit."""
+        with self.cond:
+            now = time.monotonic()
+            latency = now - sent
+            self.in_flight -= 1
+            if ok:
+                self.completions.append((now, tokens))
+                self.latencies.append(latency)
+            if throttled or (ok and latency > self.latency_target):
+                # Requests sent before the last decrease saw the old limit; they do not count again.
+                if sent >= self.last_decrease:
+                    self.limit = max(1.0, self.limit * DECREASE)
+                    self.last_decrease = now
+                    self.stats["limit_decreases"] += 1
+                if pause:
+                    self.paused_until = max(self.paused_until, now + pause)
+            elif ok and self.limit < self.quota.concurrency:
+                before = int(self.limit)
+                self.limit = min(float(self.quota.concurrency), self.limit + 1.0 / self.limit)
+                self.stats["limit_increases"] += int(self.limit) > before
+            self.cond.notify_all()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self.cond:
+            now = time.monotonic()
+            while self.completions and now - self.completions[0][0] > WINDOW_SECONDS:
+                self.completions.popleft()
+            window = max(1e-9, min(WINDOW_SECONDS, now - self.started))
+            rpm = len(self.completions) / window * 60.0
+            tpm = sum(t for _, t in self.completions) / window * 60.0
+            latencies, waits = list(self.latencies), list(self.queue_seconds)
+            return {
+                **self.stats,
+                "quota": self.quota.to_dict(),
+                "achieved_rpm": round(rpm, 1),
+                "achieved_tpm": round(tpm, 1),
+                "rpm_utilization": round(rpm / self.quota.rpm, 3) if self.quota.rpm else None,
+                "tpm_utilization": round(tpm / self.quota.tpm, 3) if self.quota.tpm else None,
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "queued": len(self.waiting) - len(self.cancelled),
+                "queue_seconds_p95": round(percentile(waits, 95), 3) if waits else 0.0,
+                "latency_p50": round(percentile(latencies, 50), 3) if latencies else None,
+                "latency_p95": round(percentile(latencies, 95), 3) if latencies else None,
+            }
+
+
+class LLMGateway:
+    """Shared admission, retries and metrics for model calls (see the module docstring)."""
+
+    def __init__(self, quotas: Optional[Dict[str, Quota]] = None, default_quota: Optional[Quota] = None,
+                 initial_concurrency: int = INITIAL_CONCURRENCY, latency_target: float = LATENCY_TARGET,
+                 max_attempts: int = MAX_ATTEMPTS, base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY,
+                 deadlines: Optional[Dict[str, float]] = None, provider_limits: Optional[Dict[str, float]] = None):
+        self.quotas = dict(quotas or {})
+        self.default_quota = default_quota or Quota()
+        self.initial_concurrency = initial_concurrency
+        self.latency_target = latency_target
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadlines = {**DEADLINES, **(deadlines or {})}
+        self._lanes: Dict[str, _Lane] = {}
+        self._providers: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._tickets = itertools.count()
+        for provider, per_minute in (provider_limits or {}).items():
+            self.set_provider_limit(provider, per_minute)
+
+    def lane(self, model: str) -> _Lane:
+        with self._lock:
+            if model not in self._lanes:
+                self._lanes[model] = _Lane(model, self.quotas.get(model, self.default_quota),
+                                           self.initial_concurrency, self.latency_target,
+                                           self._providers.get(provider_of(model)))
+            return self._lanes[model]
+
+    def set_provider_limit(self, provider: str, per_minute: Optional[float]) -> None:
+        """Limit requests to all of `provider`'s models to `per_minute` together (None removes the limit)."""
+        bucket = TokenBucket(per_minute / 60.0, capacity=max(1.0, per_minute / 60.0)) if per_minute else None
+        with self._lock:
+            if bucket is None:
+                self._providers.pop(provider, None)
+            else:
+                self._providers[provider] = bucket
+            lanes = [lane for lane in self._lanes.values() if provider_of(lane.model) == provider]
+        for lane in lanes:
+            with lane.cond:
+                lane.provider = bucket
+                lane.cond.notify_all()
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        hinted = retry_after(error)
+        if hinted is not None:
+            return hinted + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, model: str, fn: Callable[[], Any], priority: str = INTERACTIVE, tokens: int = 0,
+             deadline: Optional[float] = None, task: Optional[str] = None) -> Any:
+        """
+        Run `fn` (one request to `model`) once the model's lane admits it, retrying throttled and
+        transient failures until `deadline` seconds (default by priority) have passed.
+        """
+        lane = self.lane(model)
+        rank = PRIORITIES.get(priority, PRIORITIES[BATCH])
+        started = time.monotonic()
+        deadline_at = started + (deadline if deadline is not None else self.deadlines.get(priority, DEADLINES[BATCH]))
+        with lane.cond:
+            lane.stats["calls"] += 1
+        ticket = next(self._tickets)  # retries keep their place in line
+        attempt = 0
+        queued = 0.0
+        while True:
+            attempt += 1
+            try:
+                queued += lane.admit(rank, ticket, tokens, deadline_at)
+            except GatewayTimeout:
+                self._record(model, started, "timeout", attempt - 1, queued, priority, task)
+                raise
+            sent = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                throttled = is_rate_limited(e)
+                pause = retry_after(e) if throttled else None
+                lane.release(sent, ok=False, throttled=throttled, pause=pause)
+                retryable = throttled or is_transient(e)
+                delay = self._backoff(attempt, e) if retryable else 0.0
+                with lane.cond:
+                    lane.stats["throttled"] += throttled
+                    if retryable and attempt < self.max_attempts and time.monotonic() + delay < deadline_at:
+                        lane.stats["retries"] += 1
+                        retry = True
+                    else:
+                        lane.stats["failed"] += 1
+                        retry = False
+                if not retry:
+                    self._record(model, started, "error", attempt, queued, priority, task, error=str(e)[:200])
+                    if retryable and attempt < self.max_attempts:
+                        raise GatewayTimeout(f"{model}: still failing at the call's deadline: {e}") from e
+                    raise
+                time.sleep(delay)
+                continue
+            lane.release(sent, ok=True, throttled=False, tokens=tokens)
+            with lane.cond:
+                lane.stats["succeeded"] += 1
+                lane.stats["tokens"] += tokens
+            self._record(model, started, "ok", attempt, queued, priority, task)
+            return result
+
+    def _record(self, model: str, started: float, status: str, attempts: int, queued: float,
+                priority: str, task: Optional[str], **fields) -> None:
+        record("gateway", model, time.monotonic() - started, status, attempts=attempts,
+               queued_seconds=round(queued, 3), priority=priority, task=task, **fields)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            lanes = list(self._lanes.values())
+        return {lane.model: lane.metrics() for lane in lanes}
+
+
+@lazy_resource("llm_gateway")
+def get_gateway() -> LLMGateway:
+    quotas, default = quotas_from_env()
+    return LLMGateway(quotas, default)
+
+
+def format_metrics(metrics: Dict[str, Dict[str, Any]]) -> str:
+    lines = []
+    for model, m in metrics.items():
+        quota = m["quota"]
+        rpm = f"{m['achieved_rpm']}/{quota['rpm']:g} rpm" if quota["rpm"] else f"{m['achieved_rpm']} rpm"
+        lines.append(f"{model}: {m['succeeded']}/{m['calls']} calls, {rpm}, {m['throttled']} throttled, "
+                     f"{m['retries']} retries, concurrency {m['concurrency_limit']}, p95 {m['latency_p95']}s")
+    return "; ".join(lines)
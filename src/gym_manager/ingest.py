@@ -0,0 +1,168 @@
+"""
+Deterministic ingestion of Google Form responses into workout summaries.
+
+The form already gives structured answers (see sheets_fetch.structure_response), so each
+response is mapped straight onto the fields of crew.summary and upserted into
+workout_summaries without a ReAct loop. A model is only asked for the free-text `summary`
+field, and only when the exercise list is too long to use as it is (SUMMARY_TEXT_LIMIT).
+"""
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from crewai import Agent
+from pydantic import Field
+
+from .telemetry import span
+from .tools.pg_tool import upsert_summaries
+from .tools.sheets_fetch import FORM_TIMESTAMP_FORMAT
+
+# Exercise lists longer than this are condensed by the model instead of copied into the summary.
+SUMMARY_TEXT_LIMIT = int(os.getenv("SUMMARY_TEXT_LIMIT", "300"))
+
+_YES = {"yes", "y", "true", "1"}
+
+SUMMARY_PROMPT = (
+    "Summarize this gym session in one or two sentences for a training log. "
+    "Keep exercise names, sets, reps and loads; leave out anything else.\n\n{details}"
+)
+
+
+def _yes(value: Any) -> bool:
+    return str(value or "").strip().lower() in _YES
+
+
+def parse_form_timestamp(value: str) -> Optional[datetime]:
+    """Form timestamps look like 01/31/2024 19:00:00; ISO strings are accepted too."""
+    for parse in (lambda v: datetime.strptime(v, FORM_TIMESTAMP_FORMAT), datetime.fromisoformat):
+        try:
+            return parse(value.strip())
+        except (AttributeError, TypeError, ValueError):
+            continue
+    return None
+
+
+def summary_text(workout: Dict[str, Any]) -> str:
+    """The free-text summary assembled from the form answers."""
+    cardio = _yes(workout.get("did_cardio"))
+    if not _yes(workout.get("did_workout")):
+        return "Rest day, with cardio." if cardio else "Rest day, no gym session."
+    muscles = (workout.get("muscles_trained") or "").strip() or "Gym"
+    exercises = (workout.get("exercises") or "").strip().rstrip(".")
+    text = f"{muscles} session: {exercises}." if exercises else f"{muscles} session."
+    if cardio:
+        text += " Cardio done."
+    return text
+
+
+def summary_from_response(response: Dict[str, Any],
+                          condense: Optional[Callable[[str], str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Map one structured form response onto the `summary` model's fields, or None when its
+    timestamp cannot be read. `condense` shortens summaries longer than SUMMARY_TEXT_LIMIT.
+    """
+    date = parse_form_timestamp(response.get("timestamp", ""))
+    if date is None:
+        return None
+    workout = response.get("workout_data", {})
+    went = _yes(workout.get("did_workout"))
+    pain = _yes(workout.get("experienced_pain"))
+    text = summary_text(workout)
+    if len(text) > SUMMARY_TEXT_LIMIT:
+        text = condense(text) if condense else text[:SUMMARY_TEXT_LIMIT - 3].rstrip() + "..."
+    return {
+        "date": date,
+        "went_to_gym": went,
+        "muscle_trained": (workout.get("muscles_trained") or "").strip() if went else "None",
+        "summary": text,
+        "pain_experienced": pain,
+        "pain_details": (workout.get("pain_details") or "").strip() if pain else "",
+        # The raw answer, uncut, for the exercise log (the summary may be truncated or condensed).
+        "exercises": (workout.get("exercises") or "").strip() if went else "",
+    }
+
+
+def to_db_row(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    workout_summaries keeps one row per day, with `gym` for the model's went_to_gym; `exercises`
+    goes to the day's exercise_log (pg_tool.refresh_exercise_log).
+    """
+    return {
+        "date": summary["date"].date().isoformat(),
+        "gym": summary["went_to_gym"],
+        "muscle_trained": summary["muscle_trained"],
+        "summary": summary["summary"],
+        "pain_experienced": summary["pain_experienced"],
+        "pain_details": summary["pain_details"],
+        "exercises": summary.get("exercises", ""),
+    }
+
+
+def llm_condenser(llm) -> Callable[[str], str]:
+    """Condense a long summary with one model call, keeping the assembled text if the call fails."""
+    def condense(text: str) -> str:
+        try:
+            answer = llm.call([{"role": "user", "content": SUMMARY_PROMPT.format(details=text)}])
+        except Exception:
+            answer = None
+        answer = str(answer or "").strip()
+        return answer or text[:SUMMARY_TEXT_LIMIT - 3].rstrip() + "..."
+    return condense
+
+
+def ingest_responses(fetch_tool, llm=None, upsert: Callable[[List[dict]], int] = upsert_summaries) -> Dict[str, Any]:
+    """
+    Fetch form responses with `fetch_tool` (a FormResponseFetchTool), map every new one and the
+    latest one onto summaries, and upsert them, one row per day with the day's last response.
+    The sheet watermark is saved only after the upsert commits, so a failed run fetches the
+    same responses again. Returns the latest summary together with how many rows were written,
+    skipped and condensed.
+    """
+    with span("ingest", "summaries") as record:
+        fetched = fetch_tool._run()
+        if fetched.get("status") != "success":
+            raise ValueError(fetched.get("error", "Could not fetch form responses"))
+
+        condensed = 0
+        condenser = llm_condenser(llm) if llm is not None else None
+
+        def condense(text: str) -> str:
+            nonlocal condensed
+            condensed += 1
+            return condenser(text)
+
+        by_day: Dict[str, Dict[str, Any]] = {}
+        mapped: Dict[str, Optional[Dict[str, Any]]] = {}  # the latest response is usually also the last new one
+        skipped = 0
+        for response in [*fetched.get("new_responses", []), fetched["data"]]:
+            key = json.dumps(response, sort_keys=True)
+            if key not in mapped:
+                mapped[key] = summary_from_response(response, condense if condenser else None)
+                skipped += mapped[key] is None
+            if mapped[key] is not None:
+                by_day[mapped[key]["date"].date().isoformat()] = mapped[key]
+        latest = mapped[key]
+        if latest is None:
+            raise ValueError(f"Unreadable timestamp on the latest response: {fetched['data'].get('timestamp')!r}")
+        written = upsert([to_db_row(s) for s in by_day.values()])
+        if fetched.get("watermark"):
+            fetch_tool.save_watermark(fetched["watermark"])
+        record.update(rows_written=written, skipped=skipped, llm_summaries=condensed)
+    return {"summary": latest, "rows_written": written, "skipped": skipped, "llm_summaries": condensed}
+
+
+class SummaryIngestAgent(Agent):
+    """
+    The Summarizer without the ReAct loop: its task runs ingest_responses, and the agent's LLM
+    is used only to condense long free-text summaries. The task's output is the latest summary
+    as JSON, so downstream tasks see the same context as before.
+    """
+
+    fetch_tool: Any = Field(default=None, exclude=True, description="FormResponseFetchTool to read responses with.")
+
+    def execute_task(self, task, context: Optional[str] = None, tools: Optional[list] = None) -> str:
+        result = ingest_responses(self.fetch_tool, llm=self.llm)
+        latest = {**result["summary"], "date": result["summary"]["date"].isoformat()}
+        latest.pop("exercises", None)  # stored in the exercise log; the summary model has no such field
+        return json.dumps(latest)
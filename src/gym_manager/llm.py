@@ -0,0 +1,97 @@
+from typing import Any, Dict, List, Optional, Union
+
+from crewai import LLM
+from crewai.utilities.events import LLMStreamChunkEvent, crewai_event_bus
+
+from .context_budget import estimate_tokens
+from .gateway import INTERACTIVE, get_gateway
+from .llm_cache import LLMResponseCache, cache_enabled, cache_key, get_llm_cache
+from .outputs import output_stream_enabled
+from .telemetry import record
+
+
+class GymLLM(LLM):
+    """
+    crewai LLM used by every agent in the crew.
+    Calls go through the shared LLM gateway (see gateway.py) at this LLM's `priority`, which also
+    applies the provider's rate limit (LLMGateway.set_provider_limit).
+    With LLM_CACHE=true (or an explicit `cache`), plain text completions are served from
+    the on-disk response cache when the model, messages, tools and temperature match.
+    """
+
+    def __init__(self, model: str, cache: Optional[LLMResponseCache] = None, priority: str = INTERACTIVE, **kwargs):
+        kwargs.setdefault("max_retries", 0)  # the gateway retries; client-side retries would hide its 429s
+        super().__init__(model=model, **kwargs)
+        self.cache = cache
+        self.priority = priority
+
+    def _response_cache(self) -> Optional[LLMResponseCache]:
+        if self.cache is not None:
+            return self.cache
+        return get_llm_cache() if cache_enabled() else None
+
+    def call(
+        self,
+        messages: Union[str, List[Dict[str, str]]],
+        tools: Optional[List[dict]] = None,
+        callbacks: Optional[List[Any]] = None,
+        available_functions: Optional[Dict[str, Any]] = None,
+        from_task: Optional[Any] = None,
+        from_agent: Optional[Any] = None,
+    ) -> Union[str, Any]:
+        # Native function calls run the tool as part of the call, so they are never replayed.
+        cache = self._response_cache() if not available_functions else None
+        key = None
+        if cache is not None:
+            key = cache_key(self.model, messages, tools, self.temperature, self.stop)
+            cached = cache.get(key)
+            if cached is not None:
+                record("llm", self.model, cached=True, task=getattr(from_task, "name", None))
+                if self.stream:
+                    # Output streaming still sees the answer, in one chunk.
+                    crewai_event_bus.emit(self, event=LLMStreamChunkEvent(chunk=cached, from_task=from_task,
+                                                                          from_agent=from_agent))
+                return cached
+
+        def send():
+            return super(GymLLM, self).call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+            )
+
+        response = get_gateway().call(self.model, send, priority=self.priority, tokens=estimate_tokens(str(messages)),
+                                      task=getattr(from_task, "name", None))
+
+        if key is not None and isinstance(response, str) and response:
+            cache.put(key, response, label=self.model)
+        return response
+
+
+def build_llm(model: Union[str, LLM], **kwargs) -> LLM:
+    """
+    Turn a model id from agents.yaml (e.g. 'gemini/gemini-2.5-flash') into a GymLLM.
+    Responses are streamed token by token while OUTPUT_STREAM is on (see outputs.OutputStream).
+    """
+    if isinstance(model, LLM):
+        return model
+    kwargs.setdefault("stream", output_stream_enabled())
+    return GymLLM(model=model, **kwargs)
+
+
+def use_gateway_llm(app, model: str, priority: str = INTERACTIVE) -> None:
+    """
+    Send an embedchain App's answer calls (e.g. PDFSearchTool's, when it summarizes) through
+    the gateway as `model`, like every GymLLM call.
+    """
+    llm = app.llm
+    answer = llm.get_llm_model_answer
+
+    def gated(prompt, *args, **kwargs):
+        return get_gateway().call(model, lambda: answer(prompt, *args, **kwargs), priority=priority,
+                                  tokens=estimate_tokens(str(prompt)))
+
+    llm.get_llm_model_answer = gated
@@ -0,0 +1,50 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Union
+
+from .resources import lazy_resource
+from .ttl_cache import SQLiteTTLCache
+
+STORAGE_DIR = os.path.join(os.path.dirname(__file__), "storage")
+CACHE_PATH = os.path.join(STORAGE_DIR, "llm_cache.db")
+
+
+def cache_key(
+    model: str,
+    messages: Union[str, List[Dict[str, str]]],
+    tools: Optional[List[dict]] = None,
+    temperature: Optional[float] = None,
+    stop: Optional[List[str]] = None,
+) -> str:
+    """Content hash of everything that decides what the model answers."""
+    payload = json.dumps(
+        {"model": model, "messages": messages, "tools": tools, "temperature": temperature, "stop": stop},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class LLMResponseCache(SQLiteTTLCache):
+    """
+    SQLite-backed cache of LLM responses keyed by `cache_key`.
+    Entries expire after `ttl_seconds`; beyond `max_entries` the least recently used are evicted.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 5000):
+        super().__init__(path, table="llm_cache", ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+
+def cache_enabled() -> bool:
+    return os.getenv("LLM_CACHE", "false").lower() in ("1", "true", "yes")
+
+
+@lazy_resource("llm_cache")
+def get_llm_cache() -> LLMResponseCache:
+    """Shared response cache; LLM_CACHE_TTL (seconds) and LLM_CACHE_MAX_ENTRIES tune it."""
+    return LLMResponseCache(
+        path=os.getenv("LLM_CACHE_PATH", CACHE_PATH),
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+    )
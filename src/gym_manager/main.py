@@ -1,58 +1,169 @@
+import argparse
+import asyncio
 import os
+import sys
 import time
-import schedule
-from datetime import datetime
+_import_started = time.perf_counter()
 from dotenv import load_dotenv
 from .crew import GymManagerCrew
+from .checkpoints import CheckpointStore, checkpoints_enabled, format_stats
+from .context_budget import get_context_assembler
+from .daemon import Daemon
+from .resources import is_built, lazy_resource, startup_profile
+from .embeddings import get_embedding_service
+from .gateway import format_metrics, get_gateway
+from .vector_store import get_vector_store
+from .llm_cache import cache_enabled, get_llm_cache
+from .tool_memo import ToolMemo, format_stats as format_tool_stats
+from .outputs import OUTPUT_DIR, assign_output_files as _assign_output_files, get_output_stream, output_stream_enabled
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 # Load env vars
 load_dotenv()
 
-# Initialize crew from CrewBase
-crew_instance = GymManagerCrew()
-crew = crew_instance.crew()
+@lazy_resource("checkpoints")
+def get_checkpoints():
+    return CheckpointStore()
+
+# Initialize crew from CrewBase on first use
+@lazy_resource("crew")
+def get_crew():
+    # PIPELINE_CHECKPOINTS=false runs every task on every pipeline run. The survey goes out through
+    # the `survey` job's queue (run_daily_survey), so the pipeline only processes the responses.
+    return GymManagerCrew(
+        include_survey=False,
+        checkpoints=get_checkpoints() if checkpoints_enabled() else None,
+    ).crew()
 
 import warnings
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
-OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "outputs")
-
 def assign_output_files():
-    """Assign timestamped output files for each task dynamically."""
-    today = datetime.now().strftime("%Y-%m-%d")
-    file_map = {
-        "summarize_responses_task": f"summarizer_output_{today}.md",
-        "review_pain_task": f"doctor_recommendations_{today}.md",
-        "generate_workout_plan_task": f"trainer_plan_{today}.md",
-        "nutrition_plan_task": f"nutrition_plan_{today}.md",
-        "chef_meal_plan_task": f"chef_meals_{today}.md",
-    }
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    for task in crew.tasks:
-        if task.id in file_map:
-            task.output_file = os.path.join(OUTPUT_DIR, file_map[task.id])
+    """
+    Assign timestamped output files for each task dynamically. With OUTPUT_STREAM on, the output
+    stream writes them instead, as the answers are generated.
+    """
+    if output_stream_enabled():
+        get_output_stream().attach(get_crew())
+    else:
+        _assign_output_files(get_crew(), OUTPUT_DIR)
 
 def run_daily_survey():
-    """Triggers the Survey Agent's Gmail task at 6 PM daily."""
+    """
+    Sends today's survey at 6 PM daily through the dispatch queue (no LLM involved).
+    Goes to every member of SURVEY_ROSTER when set, otherwise to RECIPIENT_EMAIL.
+    """
+    from .batch import load_roster
+    from .dispatch import dispatch_surveys, gmail_sender
+
     print("📨 Sending daily survey form via Gmail...")
-    crew.kickoff(inputs={"task": "send_daily_survey_task"})
+    roster = os.getenv("SURVEY_ROSTER")
+    if roster:
+        recipients = [(m.email, m.sheet_email, None) for m in load_roster(roster)]
+    elif os.getenv("RECIPIENT_EMAIL"):
+        recipients = [(os.environ["RECIPIENT_EMAIL"], None, None)]
+    else:
+        raise ValueError("RECIPIENT_EMAIL environment variable not set.")
+    report = dispatch_surveys(recipients, gmail_sender(), rate_per_second=float(os.getenv("SURVEY_RATE", "5")))
+    print(f"📬 Survey: {report['sent']} sent, {report['duplicates']} already sent today, "
+          f"{report['failed']} failed ({report['retries']} retries).")
 
-def run_full_pipeline():
-    """Runs the entire workflow in sequence."""
+def run_full_pipeline(from_task: str = None, force: bool = False):
+    """
+    Runs the entire workflow in sequence. Tasks whose checkpoint still matches their inputs are
+    reused; `from_task` reruns that task and everything after it, `force` reruns every task.
+    """
     print("🔄 Running the full gym workflow...")
     assign_output_files()
+    crew = get_crew()
+    if checkpoints_enabled():
+        get_checkpoints().plan([task.name for task in crew.tasks], from_task=from_task, force=force)
+    if is_built("embedding_service"):
+        get_embedding_service().reset_stats()
+    get_context_assembler().reset_stats()
     result = crew.kickoff()
     print("✅ Workflow complete.\n")
     print(result)
+    report = getattr(crew, "execution_report", None)
+    if report:
+        print(f"⏱️ Critical path: {' -> '.join(report['critical_path'])} "
+              f"({report['critical_path_seconds']}s of {report['sequential_seconds']}s task time, "
+              f"{report['wall_seconds']}s wall)")
+    if checkpoints_enabled():
+        print(f"♻️ Checkpoints: {format_stats(get_checkpoints())}")
+    memo = ToolMemo.of(crew)
+    if memo is not None and memo.stats():
+        print(f"🔁 Tools: {format_tool_stats(memo.stats())}")
+    stats = get_context_assembler().stats()
+    if stats["assemblies"]:
+        print(f"🧩 Context: {stats['tokens_saved']} tokens saved ({stats['tokens_before']} -> {stats['tokens_after']}), "
+              f"{stats['memory_dropped']} memory items dropped")
+    if is_built("llm_gateway") and get_gateway().metrics():
+        print(f"🚦 LLM gateway: {format_metrics(get_gateway().metrics())}")
+    if cache_enabled():
+        stats = get_llm_cache().stats()
+        print(f"🗄️ LLM cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+    if is_built("embedding_service"):
+        stats = get_embedding_service().stats()
+        print(f"🧮 Embeddings: {stats['texts_requested']} texts, {stats['api_calls']} API calls "
+              f"({stats['calls_saved']} calls saved, {stats['cache_hits']} cache hits)")
+    if is_built("vector_store"):
+        stats = get_vector_store().stats()
+        print(f"🗃️ Vector store: {sum(s['rows'] for s in stats.values())} vectors, "
+              f"{sum(s['duplicates'] for s in stats.values())} duplicate writes skipped")
+
+def run_memory_maintenance():
+    """Apply retention to the memory stores, compact them and print the size/latency report."""
+    from .maintenance import format_report, run_maintenance
+
+    print("🧹 Running memory store maintenance...")
+    print(format_report(run_maintenance()))
+
+def print_startup_profile():
+    """Print what importing the app and building each lazy resource costs."""
+    print(f"{'import gym_manager':<24}{IMPORT_SECONDS:>9.3f}s")
+    for entry in startup_profile():
+        cost = f"{entry['seconds']:>9.3f}s" if entry["seconds"] is not None else f"{'-':>10}"
+        note = f"  (failed: {entry['error']})" if entry["error"] else ""
+        print(f"{entry['resource']:<24}{cost}{note}")
 
 if __name__ == "__main__":
-    # Schedule the survey task for 6 PM daily
-    schedule.every().day.at("18:00").do(run_daily_survey)
-    print("🤖 Gym Manager running. Survey scheduled for 6 PM daily.")
-    print("Press Ctrl+C to exit.")
-    while True:
-        schedule.run_pending()
-        cmd = input("Type 'run' to execute full pipeline manually, or Enter to wait:\n")
-        if cmd.strip().lower() == "run":
-            run_full_pipeline()
-        time.sleep(60)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gym Manager daemon; the flags run one job and exit.")
+    parser.add_argument("--startup-profile", action="store_true", help="print import and resource build costs")
+    parser.add_argument("--maintenance", action="store_true", help="run memory store maintenance")
+    parser.add_argument("--pipeline", action="store_true", help="run the pipeline, reusing valid checkpoints")
+    parser.add_argument("--from-task", help="with --pipeline, rerun this task and every task after it")
+    parser.add_argument("--force", action="store_true", help="with --pipeline, rerun every task")
+    args = parser.parse_args()
+    if args.startup_profile:
+        print_startup_profile()
+        sys.exit(0)
+    if args.maintenance:
+        run_memory_maintenance()
+        sys.exit(0)
+    if args.pipeline or args.from_task or args.force:
+        run_full_pipeline(from_task=args.from_task, force=args.force)
+        sys.exit(0)
+    # Survey at 6 PM and maintenance at night are queued by the daemon's scheduler; manual runs
+    # come in with `python -m src.gym_manager.daemon trigger pipeline`.
+    daemon = Daemon(
+        jobs={
+            "survey": run_daily_survey,
+            "pipeline": run_full_pipeline,
+            "maintenance": run_memory_maintenance,
+        },
+        schedule_at={
+            "survey": os.getenv("SURVEY_AT", "18:00"),
+            "maintenance": os.getenv("MAINTENANCE_AT", "03:00"),
+        },
+        port=int(os.environ["DAEMON_PORT"]) if os.getenv("DAEMON_PORT") else None,
+        # Maintenance rewrites the memory stores the pipeline writes to; the survey runs alongside either.
+        exclusive=[("pipeline", "maintenance")],
+    )
+    where = f"http://127.0.0.1:{daemon.port}" if daemon.port else daemon.socket_path
+    print(f"🤖 Gym Manager running. Survey scheduled daily at {os.getenv('SURVEY_AT', '18:00')}; triggers on {where}.")
+    print("Run `python -m src.gym_manager.daemon trigger pipeline` to execute the full pipeline. Press Ctrl+C to exit.")
+    try:
+        asyncio.run(daemon.serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,400 @@
+"""
+Retention, compaction and size reporting for the crew's memory stores.
+
+    python -m src.gym_manager.maintenance [--dry-run] [--rebuild] [--json]
+
+Each store has a retention policy (maximum age and/or row count, plus optional pruning of
+short-term injury notes once the pain they describe is no longer reported). After retention
+the SQLite stores get a recall index and VACUUM; the Chroma stores get their HNSW index rebuilt
+when rows were removed (deleted vectors otherwise stay in link_lists.bin) and their SQLite file
+vacuumed. The report lists size, row count and recall latency for every store before and after.
+main.py runs this daily (MAINTENANCE_AT, default 03:00).
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import sqlite3
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from .body_parts import BODY_PART_PATTERN
+from .telemetry import record
+from .vector_store import (
+    ENTITIES, KNOWLEDGE, SHORT_TERM, VECTOR_DIR, chroma_settings, collections_replaced, member_namespace,
+)
+
+STORAGE_DIR = os.path.join(os.path.dirname(__file__), "storage")
+REPORT_PATH = os.path.join(STORAGE_DIR, "maintenance_report.json")
+
+INJURY_TERMS = ("pain", "ache", "injur", "sore", "strain", "sprain", "hurt", "tender", "swell")
+_BODY_PART = re.compile(r"\b" + BODY_PART_PATTERN, re.IGNORECASE)
+RECALL_SAMPLES = 5
+
+
+def body_parts(text: str) -> set:
+    """Body locations mentioned in free text ("left knee", "lower back" ...), lower-cased."""
+    return {match.lower() for match in _BODY_PART.findall(text or "")}
+
+
+def _files_size(path: str) -> int:
+    if os.path.isfile(path):
+        return sum(os.path.getsize(p) for p in (path, f"{path}-wal", f"{path}-journal") if os.path.exists(p))
+    total = 0
+    for folder, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(folder, f)) for f in files)
+    return total
+
+
+def _median_ms(fn: Callable[[], Any]) -> float:
+    timings = []
+    for _ in range(RECALL_SAMPLES):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+class LTMStore:
+    """A crewai LTMSQLiteStorage file (long_term_memories: task_description, metadata, datetime, score)."""
+
+    def __init__(self, name: str, path: str, max_age_days: Optional[float] = None, max_rows: Optional[int] = None):
+        self.name = name
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_rows = max_rows
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM long_term_memories").fetchone()[0]
+            top = conn.execute(
+                "SELECT task_description FROM long_term_memories GROUP BY task_description ORDER BY COUNT(*) DESC LIMIT 1"
+            ).fetchone()
+        recall_ms = None
+        if top:
+            # The query crewai's LongTermMemory.search runs before every task.
+            def recall():
+                with self._connect() as conn:
+                    conn.execute(
+                        "SELECT metadata, datetime, score FROM long_term_memories WHERE task_description = ? "
+                        "ORDER BY datetime DESC, score ASC LIMIT 3", (top[0],),
+                    ).fetchall()
+            recall_ms = _median_ms(recall)
+        return {"bytes": _files_size(self.path), "rows": rows, "recall_ms": recall_ms}
+
+    def apply_retention(self, now: float, dry_run: bool = False) -> int:
+        """Delete rows older than max_age_days, then all but the newest max_rows; returns rows removed."""
+        with self._connect() as conn:
+            doomed = set()
+            if self.max_age_days is not None:
+                cutoff = now - self.max_age_days * 86400
+                doomed.update(r[0] for r in conn.execute(
+                    "SELECT id FROM long_term_memories WHERE CAST(datetime AS REAL) < ?", (cutoff,)))
+            if self.max_rows is not None:
+                doomed.update(r[0] for r in conn.execute(
+                    "SELECT id FROM long_term_memories ORDER BY CAST(datetime AS REAL) DESC LIMIT -1 OFFSET ?",
+                    (self.max_rows,)))
+            if doomed and not dry_run:
+                conn.executemany("DELETE FROM long_term_memories WHERE id = ?", [(i,) for i in doomed])
+        return len(doomed)
+
+    def compact(self, rebuild: bool = False) -> None:
+        with self._connect() as conn:
+            conn.execute("CREATE INDEX IF NOT EXISTS long_term_memories_recall_idx "
+                         "ON long_term_memories (task_description, datetime)")
+        conn = self._connect()
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+
+class ChromaStore:
+    """
+    A persistent Chroma collection (crewai's short-term RAGStorage, embedchain's PDF store).
+    Age comes from Chroma's own created_at; `prune` picks further documents to delete.
+    """
+
+    def __init__(self, name: str, path: str, collection: str, max_age_days: Optional[float] = None,
+                 max_items: Optional[int] = None, prune: Optional[Callable[[str], bool]] = None, settings=None):
+        self.name = name
+        self.path = path
+        self.collection = collection
+        self.max_age_days = max_age_days
+        self.max_items = max_items
+        self.prune = prune
+        self.settings = settings  # what the app opens `path` with, if it is not open yet
+        self._client = None
+
+    @property
+    def sqlite_path(self) -> str:
+        return os.path.join(self.path, "chroma.sqlite3")
+
+    def exists(self) -> bool:
+        return os.path.exists(self.sqlite_path)
+
+    def _get_collection(self):
+        if self._client is None:
+            import chromadb
+            from chromadb.api.shared_system_client import SharedSystemClient
+
+            # Chroma allows one set of settings per path and process; reuse the app's if it opened this store.
+            existing = SharedSystemClient._identifier_to_system.get(self.path)
+            settings = existing.settings if existing else self.settings
+            self._client = chromadb.PersistentClient(path=self.path, **({"settings": settings} if settings else {}))
+        try:
+            return self._client.get_collection(self.collection, embedding_function=None)
+        except Exception:
+            pass
+        # A rebuild that stopped between dropping the old collection and renaming the copy.
+        try:
+            copy = self._client.get_collection(self._rebuild_name, embedding_function=None)
+        except Exception:
+            return None
+        copy.modify(name=self.collection)
+        collections_replaced(self.path)
+        return self._client.get_collection(self.collection, embedding_function=None)
+
+    @property
+    def _rebuild_name(self) -> str:
+        return f"{self.collection}__rebuild"
+
+    def stats(self) -> Dict[str, Any]:
+        collection = self._get_collection()
+        rows = collection.count() if collection else 0
+        recall_ms = None
+        if rows:
+            probe = collection.get(limit=1, include=["embeddings"])["embeddings"][0]
+            recall_ms = _median_ms(lambda: collection.query(query_embeddings=[probe], n_results=min(3, rows)))
+        return {"bytes": _files_size(self.path), "rows": rows, "recall_ms": recall_ms}
+
+    def _created(self) -> List[tuple]:
+        """(id, created_at as epoch seconds) for every item, oldest first."""
+        with sqlite3.connect(self.sqlite_path) as conn:
+            rows = conn.execute(
+                "SELECT e.embedding_id, e.created_at FROM embeddings e "
+                "JOIN segments s ON s.id = e.segment_id JOIN collections c ON c.id = s.collection "
+                "WHERE c.name = ? ORDER BY e.created_at, e.id", (self.collection,),
+            ).fetchall()
+        # SQLite's CURRENT_TIMESTAMP is UTC.
+        return [(i, datetime.fromisoformat(str(ts)).replace(tzinfo=timezone.utc).timestamp()) for i, ts in rows]
+
+    def apply_retention(self, now: float, dry_run: bool = False) -> int:
+        collection = self._get_collection()
+        if collection is None:
+            return 0
+        created = self._created()
+        doomed = set()
+        if self.max_age_days is not None:
+            doomed.update(i for i, ts in created if ts < now - self.max_age_days * 86400)
+        if self.max_items is not None and len(created) > self.max_items:
+            doomed.update(i for i, _ in created[:len(created) - self.max_items])
+        if self.prune is not None:
+            items = collection.get(include=["documents"])
+            doomed.update(i for i, doc in zip(items["ids"], items["documents"]) if self.prune(doc or ""))
+        if doomed and not dry_run:
+            ids = sorted(doomed)
+            for start in range(0, len(ids), 500):
+                collection.delete(ids=ids[start:start + 500])
+        return len(doomed)
+
+    def compact(self, rebuild: bool = False) -> None:
+        collection = self._get_collection()
+        if collection is not None and rebuild:
+            self._rebuild(collection)
+        self._remove_orphan_segments()
+        conn = sqlite3.connect(self.sqlite_path)
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+    def _remove_orphan_segments(self) -> None:
+        """Delete HNSW segment directories no collection refers to (Chroma leaves them behind)."""
+        with sqlite3.connect(self.sqlite_path) as conn:
+            live = {row[0] for row in conn.execute("SELECT id FROM segments")}
+        for entry in os.listdir(self.path):
+            folder = os.path.join(self.path, entry)
+            if os.path.isdir(folder) and entry not in live and os.path.exists(os.path.join(folder, "header.bin")):
+                shutil.rmtree(folder, ignore_errors=True)
+
+    def _rebuild(self, collection) -> None:
+        """
+        Copy the collection's stored vectors into a new collection, which writes a fresh HNSW
+        index, and swap it in by name. The old collection is only dropped once the copy is
+        complete, so a failed rebuild leaves it as it was.
+        """
+        items = collection.get(include=["embeddings", "documents", "metadatas"])
+        try:
+            self._client.delete_collection(self._rebuild_name)  # left over from an interrupted rebuild
+        except Exception:
+            pass
+        fresh = self._client.create_collection(self._rebuild_name, metadata=collection.metadata,
+                                               embedding_function=None)
+        try:
+            for start in range(0, len(items["ids"]), 500):
+                end = start + 500
+                fresh.add(
+                    ids=items["ids"][start:end],
+                    embeddings=items["embeddings"][start:end],
+                    documents=items["documents"][start:end],
+                    metadatas=items["metadatas"][start:end],
+                )
+            if fresh.count() != len(items["ids"]):
+                raise RuntimeError(f"rebuild of {self.collection} copied {fresh.count()} of {len(items['ids'])} items")
+        except Exception:
+            self._client.delete_collection(self._rebuild_name)
+            raise
+        self._client.delete_collection(self.collection)
+        fresh.modify(name=self.collection)
+        collections_replaced(self.path)  # the shared store's handles pointed at the dropped collection
+
+
+def resolved_injury_filter(recent_pain: List[str]) -> Callable[[str], bool]:
+    """
+    Prune predicate for short-term notes: true for a note about pain in body parts that none of
+    `recent_pain` (the pain reports still coming in) mention any more.
+    """
+    still_hurting = set().union(*(body_parts(text) for text in recent_pain)) if recent_pain else set()
+
+    def resolved(document: str) -> bool:
+        lowered = document.lower()
+        if not any(term in lowered for term in INJURY_TERMS):
+            return False
+        parts = body_parts(document)
+        return bool(parts) and not parts & still_hurting
+    return resolved
+
+
+def recent_pain_reports(days: int = 7, member: str = "") -> List[str]:
+    """Pain details from the last `days` days of a member's workout_summaries."""
+    from .tools.pg_tool import fetch_history
+
+    history = fetch_history(days=days, member=member)
+    return [day["pain"] for day in history.get("days", []) if day.get("pain")]
+
+
+def member_collections(path: str, namespace: str) -> List[str]:
+    """The members' own collections of a vector store namespace (see vector_store.member_namespace)."""
+    sqlite_path = os.path.join(path, "chroma.sqlite3")
+    if not os.path.exists(sqlite_path):
+        return []
+    with sqlite3.connect(sqlite_path) as conn:
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM collections WHERE name LIKE ? ORDER BY name", (f"{namespace}.%",))]
+    return [name for name in names if not name.endswith("__rebuild")]
+
+
+def default_stores(injury_window_days: int = 7) -> List[Any]:
+    """
+    The app's stores and their policies, including every batch member's memories. Injury
+    pruning is skipped when Postgres is unreachable.
+    """
+    prunes: Dict[str, Callable[[str], bool]] = {}
+    try:
+        from .tools.pg_tool import fetch_members
+
+        for member in {"", *fetch_members()}:
+            reports = recent_pain_reports(injury_window_days, member)
+            prunes[member_namespace(SHORT_TERM, member)] = resolved_injury_filter(reports)
+    except Exception:
+        prunes = {}
+    stores = [
+        LTMStore("crew_memory", os.path.join(STORAGE_DIR, "crew_memory.db"), max_age_days=90, max_rows=5000),
+        LTMStore("week_memory", os.path.join(STORAGE_DIR, "week_memory.db"), max_age_days=7),
+        LTMStore("short_term", os.path.join(STORAGE_DIR, "short_term.db"), max_age_days=3),
+    ]
+    # Members keep their long-term memories in their state directory, storage/members/<member>
+    # (crew.GymManagerCrew).
+    members_dir = os.path.join(STORAGE_DIR, "members")
+    for path in sorted(glob.glob(os.path.join(members_dir, "*", "crew_memory.db"))):
+        stores.append(LTMStore(f"crew_memory:{os.path.basename(os.path.dirname(path))}", path,
+                               max_age_days=90, max_rows=5000))
+    for path in sorted(glob.glob(os.path.join(members_dir, "*", "week_memory.db"))):
+        stores.append(LTMStore(f"week_memory:{os.path.basename(os.path.dirname(path))}", path, max_age_days=7))
+    # Namespaces of the shared vector store (vector_store.py).
+    for name in [SHORT_TERM] + member_collections(VECTOR_DIR, SHORT_TERM):
+        stores.append(ChromaStore(f"short_term_rag{name[len(SHORT_TERM):].replace('.', ':')}", VECTOR_DIR, name,
+                                  max_age_days=14, max_items=2000, prune=prunes.get(name),
+                                  settings=chroma_settings()))
+    # Entities and the PDF knowledge have no retention; they are only compacted.
+    for name in [ENTITIES] + member_collections(VECTOR_DIR, ENTITIES):
+        stores.append(ChromaStore(f"entity_rag{name[len(ENTITIES):].replace('.', ':')}", VECTOR_DIR, name,
+                                  settings=chroma_settings()))
+    stores.append(ChromaStore("knowledge_rag", VECTOR_DIR, KNOWLEDGE, settings=chroma_settings()))
+    return stores
+
+
+def run_maintenance(stores: Optional[List[Any]] = None, now: Optional[float] = None, dry_run: bool = False,
+                    rebuild: Optional[bool] = None, report_path: Optional[str] = REPORT_PATH) -> Dict[str, Any]:
+    """
+    Apply every store's retention, compact it and measure it before and after. `rebuild`
+    forces (True) or skips (False) Chroma index rebuilds; by default a store is rebuilt when
+    rows were removed from it. The report is also saved to `report_path` and to telemetry.
+    """
+    stores = default_stores() if stores is None else stores
+    now = time.time() if now is None else now
+    report = {"started": datetime.fromtimestamp(now).isoformat(timespec="seconds"), "dry_run": dry_run, "stores": []}
+    for store in stores:
+        entry: Dict[str, Any] = {"store": store.name, "path": store.path}
+        if not store.exists():
+            entry["status"] = "missing"
+            report["stores"].append(entry)
+            continue
+        started = time.perf_counter()
+        try:
+            entry["before"] = store.stats()
+            entry["removed"] = store.apply_retention(now, dry_run=dry_run)
+            if not dry_run:
+                store.compact(rebuild=entry["removed"] > 0 if rebuild is None else rebuild)
+            entry["after"] = store.stats()
+            entry["status"] = "ok"
+        except Exception as e:
+            entry.update(status="error", error=str(e))
+        entry["seconds"] = round(time.perf_counter() - started, 3)
+        record("maintenance", store.name, entry["seconds"], "error" if entry["status"] == "error" else "ok",
+               removed=entry.get("removed"), bytes_before=entry.get("before", {}).get("bytes"),
+               bytes_after=entry.get("after", {}).get("bytes"))
+        report["stores"].append(entry)
+    if report_path and not dry_run:
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [f"{'store':<16}{'removed':>9}{'size before':>14}{'size after':>13}{'rows':>14}{'recall ms':>18}"]
+    for entry in report["stores"]:
+        if entry["status"] != "ok":
+            lines.append(f"{entry['store']:<16}  {entry['status']}{': ' + entry['error'] if 'error' in entry else ''}")
+            continue
+        before, after = entry["before"], entry["after"]
+        recall = f"{before['recall_ms'] or '-'} -> {after['recall_ms'] or '-'}"
+        lines.append(f"{entry['store']:<16}{entry['removed']:>9}{before['bytes'] / 1024:>12.1f}KB"
+                     f"{after['bytes'] / 1024:>11.1f}KB{before['rows']:>7} -> {after['rows']:<4}{recall:>18}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Apply retention to the memory stores and compact them.")
+    parser.add_argument("--dry-run", action="store_true", help="only report what retention would remove")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild Chroma indexes even if nothing was removed")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    report = run_maintenance(dry_run=args.dry_run, rebuild=True if args.rebuild else None)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Which gym member the code on this thread is working for.
+
+Workout history, weekly rollups and the pain index are keyed by member, and the crew's tools
+read the member from here rather than from their arguments, so the model cannot mix members
+up. The batch runner wraps each member's kickoff in `member_scope`; a single-member setup
+never sets one and works on the "" member. The value is a context variable, so threads that
+run tasks for a crew (task_graph.ParallelCrew) must be started with `contextvars.copy_context()`.
+"""
+import hashlib
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_member: ContextVar[str] = ContextVar("gym_member", default="")
+
+
+def member_key(email: str) -> str:
+    """The key rows are stored under: the email, trimmed and lower-cased."""
+    return (email or "").strip().lower()
+
+
+def member_slug(email: str) -> str:
+    """Filesystem-safe name for a member's directories."""
+    return re.sub(r"[^a-z0-9]+", "_", member_key(email)).strip("_")
+
+
+def member_hash(email: str) -> str:
+    """Short stable id for names with a length limit, such as vector store collections."""
+    return hashlib.sha256(member_key(email).encode()).hexdigest()[:12]
+
+
+def current_member() -> str:
+    return _member.get()
+
+
+@contextmanager
+def member_scope(email: str):
+    """Run the enclosed code for the member with this email."""
+    token = _member.set(member_key(email))
+    try:
+        yield
+    finally:
+        _member.reset(token)
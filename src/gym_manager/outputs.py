@@ -0,0 +1,305 @@
+"""
+Where task results go.
+
+Without streaming, each task writes its markdown file (output_file_map) when it finishes.
+With OUTPUT_STREAM on (the default), an OutputStream follows crewai's events instead, so
+results show up while the agents are still generating them:
+
+- outputs/<file>_<day>.partial.md is the final answer so far, and
+  outputs/<file>_<day>.partial.json holds the fields parsed so far from a structured answer.
+  Both are rewritten atomically every FLUSH_SECONDS, so a reader never sees a torn file.
+- When the task finishes, outputs/<file>_<day>.md and .json are written atomically and the
+  partial files are removed.
+- outputs/progress_<day>.jsonl is a JSON-lines feed for a front end to tail: run_started,
+  task_started, delta (new answer text), partial (parsed fields), task_completed/task_failed
+  and run_completed/run_failed. outputs/progress.jsonl links to the current day's feed and is
+  swapped atomically when the day rolls over.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from .resources import lazy_resource
+
+OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "outputs")
+# How often streamed text is written out; chunks in between are coalesced.
+FLUSH_SECONDS = float(os.getenv("OUTPUT_FLUSH_SECONDS", "0.25"))
+FINAL_ANSWER = "Final Answer:"
+
+
+def output_stream_enabled() -> bool:
+    return os.getenv("OUTPUT_STREAM", "true").lower() not in ("0", "false", "no")
+
+
+def output_file_map(today: str = None) -> dict:
+    """Markdown file each task writes its result to, by task name."""
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    return {
+        "summarize_responses_task": f"summarizer_output_{today}.md",
+        "review_pain_task": f"doctor_recommendations_{today}.md",
+        "generate_workout_plan_task": f"trainer_plan_{today}.md",
+        "nutrition_plan_task": f"nutrition_plan_{today}.md",
+        "chef_meal_plan_task": f"chef_meals_{today}.md",
+    }
+
+
+def assign_output_files(crew, output_dir: str = OUTPUT_DIR) -> None:
+    """Point each task of `crew` at its timestamped output file inside `output_dir`."""
+    file_map = output_file_map()
+    os.makedirs(output_dir, exist_ok=True)
+    for task in crew.tasks:
+        if task.name in file_map:
+            task.output_file = os.path.join(output_dir, file_map[task.name])
+
+
+def atomic_write(path: str, text: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _close_json(text: str) -> str:
+    """`text` with its open string, objects and arrays closed."""
+    closers: List[str] = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]" and closers:
+            closers.pop()
+    if escaped:
+        text = text[:-1]
+    return text + ('"' if in_string else "") + "".join(reversed(closers))
+
+
+def partial_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    The fields of a JSON object that is still being generated, e.g. '{"plan": "Squat 5x5, be'
+    gives {"plan": "Squat 5x5, be"}. A trailing key without a value is left out.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    text = text[start:].rstrip().rstrip("`").rstrip()
+    while text:
+        try:
+            value = json.loads(_close_json(text))
+            return value if isinstance(value, dict) else None
+        except ValueError:
+            pass
+        cut = max(text.rfind(","), text.rfind("{", 1), text.rfind("[", 1))
+        if cut <= 0:
+            return None
+        text = text[:cut] if text[cut] == "," else text[:cut + 1]
+    return None
+
+
+class _TaskStream:
+    def __init__(self, name: str, stem: str, started: float):
+        self.name = name
+        self.stem = stem
+        self.started = started
+        self.call_text = ""  # everything the current LLM call has streamed
+        self.answer_sent = 0  # characters of the final answer already in the feed
+        self.fields: Optional[Dict[str, Any]] = None
+        self.last_flush = 0.0
+        self.dirty = False
+
+
+class OutputStream:
+    """
+    Streams task results into `output_dir` as they are generated (see the module docstring).
+    `attach(crew)` picks the tasks to stream and takes over their output files; `install()`
+    hooks the stream into crewai's event bus.
+    """
+
+    def __init__(self, output_dir: str = OUTPUT_DIR, flush_seconds: float = FLUSH_SECONDS,
+                 today: Optional[Callable[[], str]] = None):
+        self.output_dir = output_dir
+        self.flush_seconds = flush_seconds
+        self.today = today or (lambda: datetime.now().strftime("%Y-%m-%d"))
+        self.tasks: Dict[str, str] = {}  # task name -> file stem without the day
+        self._active: Dict[str, _TaskStream] = {}  # by task id, which crewai's LLM events carry
+        self._feed_day: Optional[str] = None
+        self._lock = threading.RLock()
+        self._installed = False
+
+    def attach(self, crew) -> None:
+        """Stream `crew`'s tasks that have an output file; crewai no longer writes those files."""
+        for task in crew.tasks:
+            file_name = output_file_map("{day}").get(task.name)
+            if file_name:
+                self.tasks[task.name] = file_name[:-len("_{day}.md")]
+                task.output_file = None
+
+    # --- files ---
+
+    def _path(self, stem: str, suffix: str) -> str:
+        return os.path.join(self.output_dir, f"{stem}{suffix}")
+
+    def feed_path(self, day: Optional[str] = None) -> str:
+        return os.path.join(self.output_dir, f"progress_{day or self.today()}.jsonl")
+
+    def emit(self, event: str, **fields) -> None:
+        """Append one line to today's progress feed, rotating to a new file when the day changes."""
+        day = self.today()
+        line = json.dumps({"ts": datetime.now().isoformat(timespec="milliseconds"), "event": event,
+                           **{k: v for k, v in fields.items() if v is not None}}, default=str)
+        with self._lock:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(self.feed_path(day), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            if day != self._feed_day:
+                self._feed_day = day
+                link = os.path.join(self.output_dir, "progress.jsonl")
+                try:
+                    if os.path.lexists(f"{link}.tmp"):
+                        os.remove(f"{link}.tmp")
+                    os.symlink(os.path.basename(self.feed_path(day)), f"{link}.tmp")
+                    os.replace(f"{link}.tmp", link)
+                except OSError:
+                    pass  # no symlinks here; readers use progress_<day>.jsonl
+
+    def _flush(self, stream: _TaskStream) -> None:
+        stream.last_flush = time.monotonic()
+        stream.dirty = False
+        # Thoughts and tool calls are not output; only the final answer is streamed.
+        index = stream.call_text.find(FINAL_ANSWER)
+        if index < 0:
+            return
+        answer = stream.call_text[index + len(FINAL_ANSWER):].lstrip()
+        if len(answer) > stream.answer_sent:
+            self.emit("delta", task=stream.name, text=answer[stream.answer_sent:], chars=len(answer))
+            stream.answer_sent = len(answer)
+            atomic_write(self._path(stream.stem, ".partial.md"), answer)
+        fields = partial_json(answer)
+        if fields and fields != stream.fields:
+            stream.fields = fields
+            self.emit("partial", task=stream.name, fields=fields)
+            atomic_write(self._path(stream.stem, ".partial.json"), json.dumps(fields, indent=2, ensure_ascii=False))
+
+    # --- crewai events ---
+
+    def task_started(self, task) -> None:
+        if task.name not in self.tasks:
+            return
+        stem = f"{self.tasks[task.name]}_{self.today()}"
+        with self._lock:
+            self._active[str(task.id)] = _TaskStream(task.name, stem, time.perf_counter())
+        role = getattr(task.agent, "role", None)
+        self.emit("task_started", task=task.name, agent=role.strip() if role else None,
+                  file=self._path(stem, ".md"))
+
+    def llm_started(self, task_id: Optional[str]) -> None:
+        with self._lock:
+            stream = self._active.get(str(task_id))
+            if stream is not None:
+                if stream.dirty:
+                    self._flush(stream)
+                stream.call_text, stream.answer_sent = "", 0
+
+    def chunk(self, task_id: Optional[str], text: str) -> None:
+        with self._lock:
+            stream = self._active.get(str(task_id))
+            if stream is None:
+                return
+            stream.call_text += text
+            stream.dirty = True
+            if time.monotonic() - stream.last_flush >= self.flush_seconds:
+                self._flush(stream)
+
+    def task_completed(self, task, output) -> None:
+        if task.name not in self.tasks:
+            return
+        with self._lock:
+            stream = self._active.pop(str(task.id), None)
+            if stream is not None and stream.dirty:
+                self._flush(stream)
+            stem = stream.stem if stream else f"{self.tasks[task.name]}_{self.today()}"
+            os.makedirs(self.output_dir, exist_ok=True)
+            structured = output.json_dict or (output.pydantic.model_dump(mode="json") if output.pydantic else None)
+            atomic_write(self._path(stem, ".md"), output.raw or "")
+            if structured is not None:
+                atomic_write(self._path(stem, ".json"), json.dumps(structured, indent=2, ensure_ascii=False, default=str))
+            for suffix in (".partial.md", ".partial.json"):
+                if os.path.exists(self._path(stem, suffix)):
+                    os.remove(self._path(stem, suffix))
+        self.emit("task_completed", task=task.name, output=structured if structured is not None else output.raw,
+                  seconds=round(time.perf_counter() - stream.started, 3) if stream else None,
+                  file=self._path(stem, ".md"))
+
+    def task_failed(self, task, error: str) -> None:
+        with self._lock:
+            stream = self._active.pop(str(task.id), None)
+        if stream is not None:
+            self.emit("task_failed", task=task.name, error=error)
+
+    def install(self) -> "OutputStream":
+        if self._installed:
+            return self
+        from crewai.utilities.events import (
+            CrewKickoffCompletedEvent, CrewKickoffFailedEvent, CrewKickoffStartedEvent,
+            LLMCallStartedEvent, LLMStreamChunkEvent, TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent,
+            crewai_event_bus,
+        )
+        on = crewai_event_bus.on
+
+        def streamed(source) -> bool:
+            return any(getattr(task, "name", None) in self.tasks for task in getattr(source, "tasks", []))
+
+        @on(CrewKickoffStartedEvent)
+        def crew_started(source, event):
+            if streamed(source):
+                self.emit("run_started", tasks=[t.name for t in source.tasks if t.name in self.tasks])
+
+        @on(CrewKickoffCompletedEvent)
+        def crew_completed(source, event):
+            if streamed(source):
+                self.emit("run_completed")
+
+        @on(CrewKickoffFailedEvent)
+        def crew_failed(source, event):
+            if streamed(source):
+                self.emit("run_failed", error=event.error)
+
+        @on(TaskStartedEvent)
+        def on_task_started(source, event):
+            self.task_started(event.task)
+
+        @on(TaskCompletedEvent)
+        def on_task_completed(source, event):
+            self.task_completed(event.task, event.output)
+
+        @on(TaskFailedEvent)
+        def on_task_failed(source, event):
+            self.task_failed(event.task, event.error)
+
+        @on(LLMCallStartedEvent)
+        def on_llm_started(source, event):
+            self.llm_started(event.task_id)
+
+        @on(LLMStreamChunkEvent)
+        def on_chunk(source, event):
+            self.chunk(event.task_id, event.chunk)
+
+        self._installed = True
+        return self
+
+
+@lazy_resource("output_stream")
+def get_output_stream() -> OutputStream:
+    """The stream writing into outputs/, hooked into crewai's events."""
+    return OutputStream(OUTPUT_DIR).install()
@@ -0,0 +1,203 @@
+"""
+Pain events and per-location trend counters, kept up to date as summaries are written.
+
+Each day's pain_details ("Sharp pain in the left knee, lower back a bit stiff") becomes one
+event per body location, with a severity from 1 to 10: an explicit "7/10" if given, otherwise
+estimated from the wording of the clause that names the location (or of the whole report).
+The words of the report go into a term index, so past reports can be found by full-text search.
+
+A PainCounter per location follows the member's logged days in order: how many of the last
+WINDOW logged days had pain there, the current and longest streak, first and last occurrence,
+and the severity trend over the window. Applying a new day only touches the counters, so the
+doctor's question "is this coming back?" is one indexed read ("left knee: 4 of last 6 days,
+worsening") instead of a memory recall. Rest days are logged days too, since pain reported on
+them counts. The tables and the refresh that maintains
+them live with the other history queries in pg_pool.py and tools/pg_tool.py.
+"""
+import json
+import re
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .body_parts import BODY_PART_PATTERN
+
+# Logged days the "n of the last WINDOW sessions" count and the trend look back over.
+WINDOW = 6
+# Mean severity of the later half of the window must differ from the earlier half by this much.
+TREND_DELTA = 1.0
+DEFAULT_SEVERITY = 4
+
+SIDES = ("left", "right", "both")
+_LOCATION = re.compile(r"\b(?:(left|right|both)\s+)?" + BODY_PART_PATTERN, re.IGNORECASE)
+_CLAUSES = re.compile(r"[.;,]|\band\b|\bbut\b", re.IGNORECASE)
+_SCORE = re.compile(r"\b(10|[1-9])\s*(?:/|out of)\s*10\b", re.IGNORECASE)
+# Wording cues, strongest first; the first group with a match sets the severity.
+SEVERITY_CUES = (
+    (8, ("excruciating", "unbearable", "can't", "cannot", "stabbing", "shooting", "severe", "swollen", "swelling")),
+    (6, ("sharp", "bad", "intense", "worse", "strong", "throbbing")),
+    (2, ("mild", "slight", "slightly", "minor", "little", "bit", "twinge", "tight", "stiff")),
+)
+_STOPWORDS = {
+    "the", "and", "but", "after", "before", "during", "with", "when", "while", "some", "from", "this", "that",
+    "was", "were", "had", "has", "have", "felt", "feel", "feeling", "got", "get", "very", "bit", "my", "in", "on",
+    "of", "a", "an", "at", "to", "it", "its", "is",
+}
+
+
+def _as_date(value: Any) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def severity(text: str) -> Optional[int]:
+    """Severity (1-10) the wording of `text` suggests, or None when it gives no cue."""
+    lowered = (text or "").lower()
+    score = _SCORE.search(lowered)
+    if score:
+        return int(score.group(1))
+    words = set(re.findall(r"[a-z']+", lowered))
+    for level, cues in SEVERITY_CUES:
+        if words & set(cues):
+            return level
+    return None
+
+
+def locations(text: str) -> Set[str]:
+    """Body locations named in `text`, with their side ("left knee", "lower back", "shoulder")."""
+    found = set()
+    for side, part in _LOCATION.findall(text or ""):
+        part, side = part.lower(), side.lower()
+        if side == "both":
+            found.update({f"left {part}", f"right {part}"})
+        else:
+            found.add(f"{side} {part}" if side else part)
+    # "left knee ... the knee" is one location.
+    sided = {part_of(loc) for loc in found if part_of(loc) != loc}
+    return found - sided
+
+
+def part_of(location: str) -> str:
+    """The body part of a location, without its side."""
+    first, _, rest = location.partition(" ")
+    return rest if first in SIDES and rest else location
+
+
+def extract_events(details: str) -> Dict[str, int]:
+    """location -> severity for one day's pain report."""
+    overall = severity(details) or DEFAULT_SEVERITY
+    named = locations(details)
+    events: Dict[str, int] = {}
+    for clause in _CLAUSES.split(details or ""):
+        cue = severity(clause)
+        # "the knee" in a later clause is the sided knee named elsewhere in the report.
+        for location in locations(clause) & named:
+            events[location] = max(events.get(location, 0), cue or overall)
+    for location in named:
+        events.setdefault(location, overall)
+    return events
+
+
+def stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def terms(text: str) -> Set[str]:
+    """Index terms of a report: lower-cased words without stopwords, plural "s" removed."""
+    return {stem(w) for w in re.findall(r"[a-z]+", (text or "").lower()) if len(w) > 2 and w not in _STOPWORDS}
+
+
+class PainCounter:
+    """Running counters for one location over the member's logged days."""
+
+    def __init__(self, location: str, recent: Optional[List[Tuple[str, int]]] = None, occurrences: int = 0,
+                 streak: int = 0, longest_streak: int = 0, first_seen: Optional[str] = None,
+                 last_seen: Optional[str] = None, as_of: Optional[str] = None):
+        self.location = location
+        self.recent = list(recent or [])  # (date, severity) of the last WINDOW logged days, 0 = no pain
+        self.occurrences = occurrences
+        self.streak = streak
+        self.longest_streak = longest_streak
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.as_of = as_of
+
+    def apply(self, day: date, level: int) -> None:
+        """Count one logged day, with `level` the pain there that day (0 for none)."""
+        day = day.isoformat()
+        self.recent = (self.recent + [(day, level)])[-WINDOW:]
+        if level:
+            self.occurrences += 1
+            self.streak += 1
+            self.longest_streak = max(self.longest_streak, self.streak)
+            self.first_seen = self.first_seen or day
+            self.last_seen = day
+        else:
+            self.streak = 0
+        self.as_of = day
+
+    @property
+    def days_with_pain(self) -> int:
+        return sum(1 for _, level in self.recent if level)
+
+    def trend(self) -> str:
+        """worsening / improving / steady over the window, new on a first occurrence, resolved when it had no pain."""
+        levels = [level for _, level in self.recent]
+        if not any(levels):
+            return "resolved"
+        half = len(levels) // 2
+        if not half or self.occurrences == 1:
+            return "new"
+        change = sum(levels[half:]) / (len(levels) - half) - sum(levels[:half]) / half
+        if change >= TREND_DELTA:
+            return "worsening"
+        if change <= -TREND_DELTA:
+            return "improving"
+        return "steady"
+
+    def summary(self) -> str:
+        text = f"{self.location}: {self.days_with_pain} of last {len(self.recent)} logged days, {self.trend()}"
+        if self.streak > 1:
+            text += f" ({self.streak} in a row)"
+        return text
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "location": self.location,
+            "summary": self.summary(),
+            "days_with_pain": self.days_with_pain,
+            "window": len(self.recent),
+            "trend": self.trend(),
+            "streak": self.streak,
+            "longest_streak": self.longest_streak,
+            "occurrences": self.occurrences,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "recent_severity": [level for _, level in self.recent],
+            "as_of": self.as_of,
+        }
+
+    def to_params(self) -> tuple:
+        """Parameters of the upsert_pain_trend statement."""
+        return (self.location, part_of(self.location), self.first_seen, self.last_seen, self.occurrences,
+                self.streak, self.longest_streak, json.dumps(self.recent), self.as_of)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "PainCounter":
+        as_text = lambda value: _as_date(value).isoformat() if value else None  # noqa: E731
+        return cls(row["location"], [tuple(r) for r in json.loads(row["recent"] or "[]")], row["occurrences"],
+                   row["streak"], row["longest_streak"], as_text(row["first_seen"]), as_text(row["last_seen"]),
+                   as_text(row["as_of"]))
+
+
+def advance(counters: Dict[str, PainCounter], days: Iterable[Tuple[date, Dict[str, int]]], seen: int) -> None:
+    """
+    Apply logged days (date, location -> severity), oldest first, to `counters`. `seen` is how
+    many pain-free logged days came just before (up to WINDOW): a location met for the first
+    time starts with those in its window, so "1 of last 6" reads the same as for older ones.
+    """
+    for day, events in days:
+        for location in events:
+            if location not in counters:
+                counters[location] = PainCounter(location, recent=[(None, 0)] * min(seen, WINDOW - 1))
+        for counter in counters.values():
+            counter.apply(day, events.get(counter.location, 0))
+        seen = min(WINDOW, seen + 1)
@@ -0,0 +1,90 @@
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+# name -> getter, in registration order
+_RESOURCES: Dict[str, Callable[[], Any]] = {}
+# name -> seconds it took to build
+_BUILD_SECONDS: Dict[str, float] = {}
+_LOCK = threading.RLock()
+
+
+def lazy_resource(name: str):
+    """
+    Turn a factory into a cached getter that builds the resource on first call.
+    The build time is recorded for `startup_profile()`.
+    """
+    def decorator(factory: Callable[[], Any]) -> Callable[[], Any]:
+        cache: Dict[str, Any] = {}
+
+        @wraps(factory)
+        def getter():
+            if name not in cache:
+                with _LOCK:
+                    if name not in cache:
+                        started = time.perf_counter()
+                        cache[name] = factory()
+                        _BUILD_SECONDS[name] = time.perf_counter() - started
+            return cache[name]
+
+        def override(value: Any) -> None:
+            """Install a ready-made resource (e.g. a local stand-in) instead of building one."""
+            with _LOCK:
+                cache[name] = value
+                _BUILD_SECONDS[name] = 0.0
+
+        def reset() -> None:
+            with _LOCK:
+                cache.clear()
+                _BUILD_SECONDS.pop(name, None)
+
+        getter.reset = reset
+        getter.override = override
+        _RESOURCES[name] = getter
+        return getter
+
+    return decorator
+
+
+def is_built(name: str) -> bool:
+    return name in _BUILD_SECONDS
+
+
+def startup_profile(build: bool = True) -> List[Dict[str, Any]]:
+    """
+    Report what each lazy resource costs to build.
+    With build=True, resources that were not needed yet are built now so they show up too.
+    """
+    report = []
+    # A build may import a module that registers more resources; those are left for the next call.
+    for name, getter in list(_RESOURCES.items()):
+        entry = {"resource": name, "seconds": None, "error": None}
+        if build and not is_built(name):
+            try:
+                getter()
+            except Exception as e:
+                entry["error"] = str(e)
+        if is_built(name):
+            entry["seconds"] = round(_BUILD_SECONDS[name], 3)
+        report.append(entry)
+    return report
+
+
+class LazyToolSchema(BaseModel):
+    query: str = Field(..., description="The search query.")
+
+
+class LazyTool(BaseTool):
+    """
+    Placeholder that agents can hold while the real tool is still unbuilt.
+    The real tool comes from `factory` and is built on the first call.
+    """
+    factory: Callable[[], BaseTool]
+    args_schema: Type[BaseModel] = LazyToolSchema
+
+    def _run(self, *args, **kwargs) -> Any:
+        return self.factory()._run(*args, **kwargs)
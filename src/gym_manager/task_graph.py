@@ -0,0 +1,155 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from crewai import Crew, Task
+from crewai.crews.crew_output import CrewOutput
+from crewai.tasks.task_output import TaskOutput
+from crewai.utilities.constants import NOT_SPECIFIED
+from pydantic import Field, PrivateAttr
+
+
+class TaskGraph:
+    """
+    Dependency graph over crew tasks.
+    A task depends on the tasks listed in its `context` (set with `context:` in tasks.yaml).
+    A task without an explicit context depends on every task before it, like Process.sequential.
+    """
+
+    def __init__(self, tasks: List[Task]):
+        self.tasks = list(tasks)
+        index = {id(task): i for i, task in enumerate(self.tasks)}
+        self.upstream: Dict[int, List[int]] = {}
+        for i, task in enumerate(self.tasks):
+            if task.context is NOT_SPECIFIED:
+                deps = list(range(i))
+            else:
+                # Like crewai, context tasks outside the crew are treated as already done.
+                deps = [index[id(dep)] for dep in task.context or [] if id(dep) in index]
+            self.upstream[i] = deps
+        self.downstream: Dict[int, List[int]] = {i: [] for i in range(len(self.tasks))}
+        for i, deps in self.upstream.items():
+            for dep in deps:
+                self.downstream[dep].append(i)
+        self.order = self._topological_order()
+
+    def name(self, i: int) -> str:
+        task = self.tasks[i]
+        return task.name or task.description.strip().splitlines()[0][:60]
+
+    def _topological_order(self) -> List[int]:
+        remaining = {i: len(deps) for i, deps in self.upstream.items()}
+        ready = [i for i, n in remaining.items() if n == 0]
+        order = []
+        while ready:
+            i = ready.pop(0)
+            order.append(i)
+            for child in self.downstream[i]:
+                remaining[child] -= 1
+                if remaining[child] == 0:
+                    ready.append(child)
+        if len(order) != len(self.tasks):
+            raise ValueError("Task dependencies contain a cycle.")
+        return order
+
+    def critical_path(self, durations: Dict[int, float]) -> Tuple[List[int], float]:
+        """Return the longest dependency chain and its total duration in seconds."""
+        finish: Dict[int, float] = {}
+        previous: Dict[int, Optional[int]] = {}
+        for i in self.order:
+            best = max(self.upstream[i], key=lambda dep: finish[dep], default=None)
+            finish[i] = (finish[best] if best is not None else 0.0) + durations.get(i, 0.0)
+            previous[i] = best
+        if not finish:
+            return [], 0.0
+        last = max(finish, key=finish.get)
+        path = [last]
+        while previous[path[-1]] is not None:
+            path.append(previous[path[-1]])
+        return path[::-1], finish[last]
+
+
+class ParallelCrew(Crew):
+    """
+    Crew that runs independent tasks at the same time on a bounded worker pool.
+    Each task receives the outputs of the tasks it depends on, as in Process.sequential.
+    """
+
+    max_workers: int = Field(default=3, description="Maximum number of tasks running at once.")
+    _execution_report: Dict = PrivateAttr(default_factory=dict)
+
+    @property
+    def execution_report(self) -> Dict:
+        """Per-task timings, the critical path and how long it took, from the last kickoff."""
+        return self._execution_report
+
+    def _execute_tasks(
+        self,
+        tasks: List[Task],
+        start_index: Optional[int] = 0,
+        was_replayed: bool = False,
+    ) -> CrewOutput:
+        graph = TaskGraph(tasks)
+        outputs: Dict[int, TaskOutput] = {}
+        durations: Dict[int, float] = {}
+        agent_locks: Dict[int, threading.Lock] = {}
+        remaining = {i: len(deps) for i, deps in graph.upstream.items()}
+
+        def run(i: int) -> TaskOutput:
+            task = tasks[i]
+            agent_to_use = self._get_agent_to_use(task)
+            if agent_to_use is None:
+                raise ValueError(
+                    f"No agent available for task: {task.description}. Ensure that either the task has an assigned agent or a manager agent is provided."
+                )
+            tools_for_task = self._prepare_tools(agent_to_use, task, task.tools or agent_to_use.tools or [])
+            context = self._get_context(task, [outputs[dep] for dep in graph.upstream[i]])
+            # An agent keeps per-run state in its executor, so its tasks never overlap.
+            with agent_locks.setdefault(id(agent_to_use), threading.Lock()):
+                self._log_task_start(task, agent_to_use.role)
+                started = time.perf_counter()
+                output = task.execute_sync(agent=agent_to_use, context=context, tools=tools_for_task)
+                durations[i] = time.perf_counter() - started
+            return output
+
+        def finish(i: int, output: TaskOutput) -> None:
+            outputs[i] = output
+            for child in graph.downstream[i]:
+                remaining[child] -= 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            running = {}
+            while len(outputs) < len(tasks):
+                for i in graph.order:
+                    if remaining[i] or i in outputs or i in running.values():
+                        continue
+                    if start_index and i < start_index and tasks[i].output:
+                        # Already finished in the run being replayed.
+                        durations[i] = 0.0
+                        finish(i, tasks[i].output)
+                    else:
+                        # Worker threads see the caller's context, e.g. the member (members.py).
+                        running[pool.submit(contextvars.copy_context().run, run, i)] = i
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = running.pop(future)
+                    output = future.result()
+                    self._process_task_result(tasks[i], output)
+                    self._store_execution_log(tasks[i], output, i, was_replayed)
+                    finish(i, output)
+        wall = time.perf_counter() - started
+
+        path, path_seconds = graph.critical_path(durations)
+        self._execution_report = {
+            "tasks": {graph.name(i): round(durations[i], 3) for i in graph.order},
+            "critical_path": [graph.name(i) for i in path],
+            "critical_path_seconds": round(path_seconds, 3),
+            "sequential_seconds": round(sum(durations.values()), 3),
+            "wall_seconds": round(wall, 3),
+        }
+        return self._create_crew_output([outputs[i] for i in range(len(tasks))])
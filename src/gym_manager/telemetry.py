@@ -0,0 +1,336 @@
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from .resources import lazy_resource
+
+STORAGE_DIR = os.path.join(os.path.dirname(__file__), "storage")
+TELEMETRY_PATH = os.path.join(STORAGE_DIR, "telemetry.jsonl")
+# The stream is rotated to telemetry.jsonl.1, .2, ... once it grows past this size; older files are dropped.
+TELEMETRY_MAX_BYTES = int(os.getenv("TELEMETRY_MAX_BYTES", str(10 * 1024 * 1024)))
+TELEMETRY_BACKUPS = int(os.getenv("TELEMETRY_BACKUPS", "3"))
+
+# Run of the task executing on this thread, so spans from tools and helpers can be attributed.
+_local = threading.local()
+
+
+def telemetry_enabled() -> bool:
+    return os.getenv("TELEMETRY", "true").lower() in ("1", "true", "yes")
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts).isoformat(timespec="milliseconds")
+
+
+class Telemetry:
+    """
+    Append-only JSONL stream of timed spans: crew runs, tasks, agent executions, LLM calls and tools.
+    Every line has run, kind, name, start, end, seconds and status; agent spans add token counts,
+    tool spans add attempts. Spans are collected from crewai's event bus once `install()` is called,
+    and from `span()` for code outside crewai. The file is rotated past `max_bytes`, keeping `backups`
+    older files.
+    """
+
+    def __init__(self, path: str = TELEMETRY_PATH, max_bytes: int = TELEMETRY_MAX_BYTES,
+                 backups: int = TELEMETRY_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+        self._starts: Dict[Any, tuple] = {}
+        self._task_runs: Dict[int, str] = {}
+        self._installed = False
+
+    # --- writing ---
+
+    def write(self, kind: str, name: str, started: float, ended: float, status: str = "ok", **fields) -> dict:
+        entry = {
+            "run": fields.pop("run", None) or getattr(_local, "run", None),
+            "kind": kind,
+            "name": name,
+            "start": _iso(started),
+            "end": _iso(ended),
+            "seconds": round(ended - started, 6),
+            "status": status,
+            **{k: v for k, v in fields.items() if v is not None},
+        }
+        line = json.dumps(entry, default=str)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+                size = f.tell()
+            if self.max_bytes and size > self.max_bytes:
+                self._rotate()
+        return entry
+
+    def _rotate(self) -> None:
+        """telemetry.jsonl -> .1 -> .2 ...; the file past `backups` is removed. Called with the lock held."""
+        for n in range(self.backups, 0, -1):
+            older = f"{self.path}.{n - 1}" if n > 1 else self.path
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{n}")
+        if not self.backups:
+            os.remove(self.path)
+
+    @contextmanager
+    def span(self, kind: str, name: str, **fields):
+        """Time a block; the yielded dict can be filled with extra fields for the record."""
+        started = time.time()
+        status = "ok"
+        try:
+            yield fields
+        except Exception as e:
+            status = "error"
+            fields["error"] = str(e)
+            raise
+        finally:
+            self.write(kind, name, started, time.time(), status, **fields)
+
+    # --- crewai events ---
+
+    def _start(self, key, **extra) -> None:
+        with self._lock:
+            self._starts[key] = (time.time(), extra)
+
+    def _finish(self, key, kind: str, name: str, status: str = "ok", **fields) -> None:
+        with self._lock:
+            started, extra = self._starts.pop(key, (None, {}))
+        if started is not None:
+            self.write(kind, name, started, time.time(), status, **extra, **fields)
+
+    def install(self) -> "Telemetry":
+        if self._installed:
+            return self
+        from crewai.utilities.events import (
+            AgentExecutionCompletedEvent, AgentExecutionErrorEvent, AgentExecutionStartedEvent,
+            CrewKickoffCompletedEvent, CrewKickoffFailedEvent, CrewKickoffStartedEvent,
+            LLMCallCompletedEvent, LLMCallFailedEvent, LLMCallStartedEvent,
+            TaskCompletedEvent, TaskFailedEvent, TaskStartedEvent,
+            ToolUsageErrorEvent, ToolUsageFinishedEvent, ToolUsageStartedEvent,
+            crewai_event_bus,
+        )
+        on = crewai_event_bus.on
+
+        @on(CrewKickoffStartedEvent)
+        def crew_started(source, event):
+            run = uuid.uuid4().hex[:12]
+            for task in getattr(source, "tasks", []):
+                self._task_runs[id(task)] = run
+            _local.run = run
+            self._start(("crew", id(source)), run=run)
+
+        def crew_finished(source) -> None:
+            # The run is over; a long-lived process (the daemon) would otherwise keep every task id.
+            with self._lock:
+                for task in getattr(source, "tasks", []):
+                    self._task_runs.pop(id(task), None)
+
+        @on(CrewKickoffCompletedEvent)
+        def crew_completed(source, event):
+            self._finish(("crew", id(source)), "crew", event.crew_name or "crew")
+            crew_finished(source)
+
+        @on(CrewKickoffFailedEvent)
+        def crew_failed(source, event):
+            self._finish(("crew", id(source)), "crew", event.crew_name or "crew", "error", error=event.error)
+            crew_finished(source)
+
+        @on(TaskStartedEvent)
+        def task_started(source, event):
+            run = self._task_runs.get(id(event.task))
+            _local.run = run
+            role = getattr(event.task.agent, "role", None)
+            self._start(("task", id(event.task)), run=run, agent=role.strip() if role else None)
+
+        @on(TaskCompletedEvent)
+        def task_completed(source, event):
+            self._finish(("task", id(event.task)), "task", event.task.name, retries=event.task.retry_count,
+                         output_chars=len(event.output.raw or ""))
+
+        @on(TaskFailedEvent)
+        def task_failed(source, event):
+            self._finish(("task", id(event.task)), "task", event.task.name, "error",
+                         retries=event.task.retry_count, error=event.error)
+
+        def _tokens(agent) -> dict:
+            process = getattr(agent, "_token_process", None)
+            return process.get_summary().model_dump() if process else {}
+
+        @on(AgentExecutionStartedEvent)
+        def agent_started(source, event):
+            self._start(("agent", id(event.agent), id(event.task)), run=self._task_runs.get(id(event.task)),
+                        task=event.task.name, tokens_before=_tokens(event.agent))
+
+        def agent_finished(event, status, **fields):
+            key = ("agent", id(event.agent), id(event.task))
+            with self._lock:
+                started, extra = self._starts.pop(key, (None, {}))
+            if started is None:
+                return
+            before, after = extra.pop("tokens_before", {}), _tokens(event.agent)
+            delta = {k: after.get(k, 0) - before.get(k, 0) for k in after}
+            self.write("agent", event.agent.role.strip(), started, time.time(), status, **extra,
+                       prompt_tokens=delta.get("prompt_tokens"),
+                       completion_tokens=delta.get("completion_tokens"),
+                       cached_prompt_tokens=delta.get("cached_prompt_tokens"),
+                       llm_requests=delta.get("successful_requests"), **fields)
+
+        @on(AgentExecutionCompletedEvent)
+        def agent_completed(source, event):
+            agent_finished(event, "ok")
+
+        @on(AgentExecutionErrorEvent)
+        def agent_error(source, event):
+            agent_finished(event, "error", error=event.error)
+
+        @on(LLMCallStartedEvent)
+        def llm_started(source, event):
+            self._start(("llm", threading.get_ident(), id(source)), task=event.task_name,
+                        agent=event.agent_role.strip() if event.agent_role else None)
+
+        @on(LLMCallCompletedEvent)
+        def llm_completed(source, event):
+            self._finish(("llm", threading.get_ident(), id(source)), "llm", getattr(source, "model", "llm"),
+                         call_type=event.call_type.value)
+
+        @on(LLMCallFailedEvent)
+        def llm_failed(source, event):
+            self._finish(("llm", threading.get_ident(), id(source)), "llm", getattr(source, "model", "llm"),
+                         "error", error=event.error)
+
+        @on(ToolUsageStartedEvent)
+        def tool_started(source, event):
+            self._start(("tool", threading.get_ident(), event.tool_name))
+
+        @on(ToolUsageFinishedEvent)
+        def tool_finished(source, event):
+            with self._lock:
+                self._starts.pop(("tool", threading.get_ident(), event.tool_name), None)
+            self.write("tool", event.tool_name, event.started_at.timestamp(), event.finished_at.timestamp(),
+                       task=getattr(getattr(source, "task", None), "name", None),
+                       agent=event.agent_role.strip() if event.agent_role else None,
+                       attempts=event.run_attempts, from_cache=event.from_cache)
+
+        @on(ToolUsageErrorEvent)
+        def tool_error(source, event):
+            self._finish(("tool", threading.get_ident(), event.tool_name), "tool", event.tool_name, "error",
+                         task=getattr(getattr(source, "task", None), "name", None),
+                         attempts=event.run_attempts, error=str(event.error))
+
+        self._installed = True
+        return self
+
+
+@lazy_resource("telemetry")
+def get_telemetry() -> Telemetry:
+    """Shared stream at TELEMETRY_PATH (storage/telemetry.jsonl by default), hooked into crewai's events."""
+    return Telemetry(os.getenv("TELEMETRY_PATH", TELEMETRY_PATH)).install()
+
+
+@contextmanager
+def span(kind: str, name: str, **fields):
+    """`Telemetry.span` on the shared stream; a no-op (still yielding a dict) when TELEMETRY is off."""
+    if not telemetry_enabled():
+        yield fields
+        return
+    with get_telemetry().span(kind, name, **fields) as extra:
+        yield extra
+
+
+def record(kind: str, name: str, seconds: float = 0.0, status: str = "ok", **fields) -> None:
+    """Write one span that just ended and took `seconds`, when TELEMETRY is on."""
+    if telemetry_enabled():
+        ended = time.time()
+        get_telemetry().write(kind, name, ended - seconds, ended, status, **fields)
+
+
+# --- reading ---
+
+def load(path: str = TELEMETRY_PATH) -> List[dict]:
+    """Records of the stream at `path`, oldest first, including its rotated files."""
+    records = []
+    rotated = []
+    n = 1
+    while os.path.exists(f"{path}.{n}"):
+        rotated.append(f"{path}.{n}")
+        n += 1
+    for name in [*reversed(rotated), path]:
+        if not os.path.exists(name):
+            continue
+        with open(name) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # a line cut short by a crash
+    return records
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(records: Iterable[dict], kinds: Optional[List[str]] = None, last_runs: Optional[int] = None) -> List[dict]:
+    """p50/p95 seconds (and mean tokens for agents) per kind:name, across runs."""
+    records = [r for r in records if not kinds or r.get("kind") in kinds]
+    if last_runs:
+        runs = list(dict.fromkeys(r["run"] for r in records if r.get("run")))[-last_runs:]
+        records = [r for r in records if r.get("run") in runs]
+    stages = defaultdict(list)
+    for r in records:
+        stages[(r["kind"], r["name"])].append(r)
+    rows = []
+    for (kind, name), entries in sorted(stages.items()):
+        seconds = [e["seconds"] for e in entries]
+        row = {
+            "stage": f"{kind}:{name}",
+            "count": len(entries),
+            "errors": sum(1 for e in entries if e.get("status") == "error"),
+            "p50": percentile(seconds, 50),
+            "p95": percentile(seconds, 95),
+            "max": max(seconds),
+        }
+        tokens = [e.get("prompt_tokens", 0) + e.get("completion_tokens", 0) for e in entries if "prompt_tokens" in e]
+        if tokens:
+            row["tokens_avg"] = round(sum(tokens) / len(tokens))
+        rows.append(row)
+    return rows
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Summarize the telemetry stream.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summary", help="p50/p95 seconds per stage across runs")
+    summary.add_argument("--path", default=os.getenv("TELEMETRY_PATH", TELEMETRY_PATH))
+    summary.add_argument("--kind", action="append", help="only these kinds (crew, task, agent, llm, tool, ...)")
+    summary.add_argument("--runs", type=int, help="only the last N runs")
+    summary.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+
+    rows = summarize(load(args.path), args.kind, args.runs)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print(f"No telemetry in {args.path}")
+        return
+    width = max(len(r["stage"]) for r in rows) + 2
+    print(f"{'stage':<{width}}{'count':>7}{'errors':>8}{'p50 s':>10}{'p95 s':>10}{'max s':>10}{'tokens':>9}")
+    for r in rows:
+        print(f"{r['stage']:<{width}}{r['count']:>7}{r['errors']:>8}{r['p50']:>10.3f}{r['p95']:>10.3f}"
+              f"{r['max']:>10.3f}{r.get('tokens_avg', ''):>9}")
+
+
+if __name__ == "__main__":
+    main()
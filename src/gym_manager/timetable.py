@@ -0,0 +1,171 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from .resources import lazy_resource
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+TIMETABLE_PDF = os.path.join(ROOT_DIR, "knowledge", "gym_timetable.pdf")
+INDEX_PATH = os.path.join(os.path.dirname(__file__), "storage", "timetable_index.json")
+INDEX_VERSION = 1
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+REST_DAY = "Rest"
+
+_DAY_LINE = re.compile(r"^\s*(?P<day>" + "|".join(DAYS) + r")\s*[:\-–]\s*(?P<rest>.+)$", re.IGNORECASE)
+_TIME = re.compile(
+    r"\(?\b\d{1,2}(?::\d{2})?\s*(?:[ap]\.?m\.?)?\s*[-–]\s*\d{1,2}(?::\d{2})?\s*(?:[ap]\.?m\.?)?\)?"
+    r"|\(?\b\d{1,2}:\d{2}\s*(?:[ap]\.?m\.?)?\)?"
+    r"|\(?\b\d{1,2}\s*[ap]\.?m\.?\)?",
+    re.IGNORECASE,
+)
+_FOCUS = re.compile(r"\(\s*focus\s*:\s*(?P<focus>[^)]*)\)", re.IGNORECASE)
+
+
+def pdf_hash(path: str = TIMETABLE_PDF) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def extract_text(path: str = TIMETABLE_PDF) -> str:
+    from pypdf import PdfReader
+    return "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+
+
+def parse_timetable(text: str) -> Dict[str, Any]:
+    """
+    Turn the timetable text into {title, days, notes}.
+    Each day is {day, session, time, muscle_groups, focus}; days missing from the PDF are rest days.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    title = ""
+    sessions: Dict[str, Dict[str, Any]] = {}
+    notes: List[str] = []
+    in_notes = False
+    for line in lines:
+        match = _DAY_LINE.match(line)
+        if match and not in_notes:
+            day = match.group("day").capitalize()
+            sessions[day] = _parse_session(day, match.group("rest"))
+        elif line.lower().rstrip(":") == "notes":
+            in_notes = True
+        elif in_notes:
+            notes.append(re.sub(r"^[^\w(]+", "", line))
+        elif not title and not sessions:
+            title = line
+
+    days = [sessions.get(day) or _rest_day(day) for day in DAYS]
+    return {"title": title, "days": days, "notes": notes}
+
+
+def _parse_session(day: str, text: str) -> Dict[str, Any]:
+    time_match = _TIME.search(text)
+    session_time = time_match.group(0).strip("() ") if time_match else None
+    if time_match:
+        text = (text[:time_match.start()] + text[time_match.end():])
+    session = " ".join(text.strip(" -–,").split())
+    focus = [m.group("focus").strip() for m in _FOCUS.finditer(session)]
+    groups = [_FOCUS.sub("", part).strip() for part in session.split("+")]
+    return {
+        "day": day,
+        "session": session,
+        "time": session_time,
+        "muscle_groups": [g for g in groups if g],
+        "focus": focus,
+    }
+
+
+def _rest_day(day: str) -> Dict[str, Any]:
+    return {"day": day, "session": REST_DAY, "time": None, "muscle_groups": [], "focus": []}
+
+
+class TimetableIndex:
+    """Structured view of the weekly timetable, built from the PDF and cached next to the other storage."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self._by_day = {entry["day"].lower(): entry for entry in data["days"]}
+
+    @property
+    def pdf_sha256(self) -> str:
+        return self.data["pdf_sha256"]
+
+    @property
+    def notes(self) -> List[str]:
+        return self.data["notes"]
+
+    def day(self, name: str, today: Optional[date] = None) -> Dict[str, Any]:
+        """Look up a weekday by name; 'today' and 'tomorrow' are resolved against `today`."""
+        key = name.strip().lower()
+        if key in ("today", "tomorrow"):
+            current = today or datetime.now().date()
+            if key == "tomorrow":
+                current += timedelta(days=1)
+            key = DAYS[current.weekday()].lower()
+        if key not in self._by_day:
+            raise KeyError(f"Unknown day: {name!r}")
+        return self._by_day[key]
+
+    def weekly_timetable(self) -> List[List[str]]:
+        """Rows in the shape of `gym_knowledge.weekly_timetable`: [day, session] plus the time when known."""
+        rows = []
+        for entry in self.data["days"]:
+            row = [entry["day"], entry["session"]]
+            if entry["time"]:
+                row.append(entry["time"])
+            rows.append(row)
+        return rows
+
+
+def build_index(pdf_path: str = TIMETABLE_PDF, index_path: str = INDEX_PATH, force: bool = False) -> TimetableIndex:
+    """
+    Load the index from `index_path`, re-parsing the PDF only when its hash changed (or `force`).
+    """
+    digest = pdf_hash(pdf_path)
+    if not force and os.path.exists(index_path):
+        try:
+            with open(index_path) as f:
+                data = json.load(f)
+            if data.get("pdf_sha256") == digest and data.get("version") == INDEX_VERSION:
+                return TimetableIndex(data)
+        except (OSError, ValueError):
+            pass  # unreadable index: rebuild it
+
+    data = parse_timetable(extract_text(pdf_path))
+    data.update({
+        "version": INDEX_VERSION,
+        "pdf_sha256": digest,
+        "source": os.path.basename(pdf_path),
+        "built_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, index_path)
+    return TimetableIndex(data)
+
+
+@lazy_resource("timetable_index")
+def get_timetable_index() -> TimetableIndex:
+    return build_index(os.getenv("TIMETABLE_PDF", TIMETABLE_PDF), os.getenv("TIMETABLE_INDEX", INDEX_PATH))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Build the structured timetable index from the gym timetable PDF.")
+    parser.add_argument("--pdf", default=TIMETABLE_PDF)
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the PDF is unchanged.")
+    args = parser.parse_args(argv)
+    index = build_index(args.pdf, args.index, force=args.force)
+    print(f"Timetable index {args.index} (pdf sha256 {index.pdf_sha256[:12]})")
+    for row in index.weekly_timetable():
+        print("  " + " | ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Run-scoped, single-flight memoization of tool calls.
+
+In one kickoff the trainer and the doctor both read the latest summary and the last week of
+history, several agents search for the same exercise videos, and an agent that retries its
+reasoning often repeats the tool call it just made. A ToolMemo attached to a crew
+(`attach`) wraps the agents' tools so that, for the length of one kickoff:
+
+- an identical call (same tool, same arguments after defaults are filled in and string
+  whitespace/case is normalized) returns the stored result instead of running again, and
+- concurrent identical calls (ParallelCrew runs independent tasks at once) wait for the one
+  already in flight and share its result.
+
+Only tools declared safe with `memo_policy(safe=True)` are memoized. Tools declared unsafe
+(inserts, sends) always run, and each call clears the run's stored results, since reads after
+a write may differ. Undeclared tools are left alone. Results that are error strings are shared
+with callers already waiting but not kept. crewai's own tool cache lives as long as the crew
+(across kickoffs of a reused crew) and caches writes too, so it is turned off for agents
+whose tools are memoized.
+
+Per-tool counts (calls, executed, deduped, shared in flight) are kept for the last run and
+recorded to telemetry (kind "tool_memo") when the run finishes.
+"""
+import inspect
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai.tools import BaseTool
+from pydantic import Field
+
+from .telemetry import record
+
+# tool name -> whether its results may be shared within a run
+_POLICY: Dict[str, bool] = {}
+
+
+def tool_memo_enabled() -> bool:
+    return os.getenv("TOOL_MEMO", "true").lower() not in ("0", "false", "no")
+
+
+def memo_policy(safe: bool):
+    """
+    Declare whether a tool's results may be shared within a run. Works on tool instances
+    (stack it on @tool) and on BaseTool subclasses.
+    """
+    def declare(tool):
+        name = tool.name if isinstance(tool, BaseTool) else tool.model_fields["name"].default
+        _POLICY[name] = safe
+        return tool
+    return declare
+
+
+def is_memo_safe(tool: BaseTool) -> Optional[bool]:
+    """True or False as declared with memo_policy, None when the tool declared nothing."""
+    return _POLICY.get(tool.name)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def _is_error(result: Any) -> bool:
+    return isinstance(result, str) and result.lstrip().lower().startswith("error")
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ToolMemo:
+    """Results of one crew's tool calls during its current kickoff (see the module docstring)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Tuple[str, str], _Flight] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self.active = False
+
+    # --- run scope ---
+
+    def start_run(self, inputs: Optional[dict] = None) -> Optional[dict]:
+        """Start a fresh run; a before_kickoff callback, so it hands `inputs` back."""
+        with self._lock:
+            self._flights.clear()
+            self._stats = {}
+            self.active = True
+        return inputs
+
+    def finish_run(self, output: Any = None) -> Any:
+        """End the run and record its counts; an after_kickoff callback, so it hands `output` back."""
+        with self._lock:
+            self._flights.clear()
+            self.active = False
+            stats = {name: dict(counts) for name, counts in self._stats.items()}
+        for name, counts in stats.items():
+            record("tool_memo", name, 0.0, **counts)
+        return output
+
+    def attach(self, crew):
+        """Scope memoization to each kickoff of `crew` and wrap its agents' declared tools."""
+        crew.before_kickoff_callbacks.append(self.start_run)
+        crew.after_kickoff_callbacks.append(self.finish_run)
+        # Tasks copy their agent's tools when they are built, so both lists are wrapped.
+        for holder in [*crew.agents, *crew.tasks]:
+            if holder.tools:
+                holder.tools = self.wrap(holder.tools)
+        for agent in crew.agents:
+            if any(isinstance(tool, MemoizedTool) for tool in agent.tools or []) and agent.tools_handler:
+                agent.tools_handler.cache = None  # the crew-lifetime cache would answer before the memo
+        return crew
+
+    def wrap(self, tools: List[BaseTool]) -> List[BaseTool]:
+        """`tools` with every declared tool routed through this memo."""
+        wrapped = []
+        for tool in tools:
+            safe = is_memo_safe(tool)
+            if safe is None or isinstance(tool, MemoizedTool):
+                wrapped.append(tool)
+            else:
+                wrapped.append(MemoizedTool(tool=tool, memo=self, safe=safe))
+        return wrapped
+
+    # --- calls ---
+
+    def _count(self, name: str, outcome: str) -> None:
+        counts = self._stats.setdefault(name, {"calls": 0, "executed": 0, "deduped": 0, "shared": 0})
+        counts["calls"] += 1
+        counts[outcome] += 1
+
+    def call(self, name: str, arguments: Dict[str, Any], run, safe: bool = True) -> Any:
+        """The result of `run()` for this call, shared with identical calls in the same run."""
+        if not self.active:
+            return run()
+        if not safe:
+            with self._lock:
+                self._count(name, "executed")
+                self._flights.clear()
+            return run()
+
+        key = (name, json.dumps(_normalize(arguments), sort_keys=True, default=str))
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self._count(name, "executed")
+                leader = True
+            else:
+                self._count(name, "deduped" if flight.done.is_set() else "shared")
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = run()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if (flight.error is not None or _is_error(flight.result)) and self._flights.get(key) is flight:
+                    del self._flights[key]  # failures are not kept for later calls
+            flight.done.set()
+        return flight.result
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-tool counts for the current or last run."""
+        with self._lock:
+            return {name: dict(counts) for name, counts in self._stats.items()}
+
+    @classmethod
+    def of(cls, crew) -> Optional["ToolMemo"]:
+        """The memo attached to `crew`, if any."""
+        for callback in getattr(crew, "before_kickoff_callbacks", []):
+            memo = getattr(callback, "__self__", None)
+            if isinstance(memo, cls):
+                return memo
+        return None
+
+
+class MemoizedTool(BaseTool):
+    """A tool whose calls go through a ToolMemo; it keeps the wrapped tool's name, arguments and description."""
+
+    tool: BaseTool = Field(exclude=True)
+    memo: Any = Field(exclude=True)
+    safe: bool = True
+
+    def __init__(self, tool: BaseTool, **kwargs):
+        super().__init__(tool=tool, name=tool.name, description=tool.description, args_schema=tool.args_schema,
+                         result_as_answer=tool.result_as_answer, **kwargs)
+        self.description = tool.description  # not wrapped a second time by _generate_description
+
+    def _run(self, *args, **kwargs) -> Any:
+        # Fill in defaults so a call that omits an argument matches one that passes its default.
+        try:
+            bound = inspect.signature(getattr(self.tool, "func", None) or self.tool._run).bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+        except (TypeError, ValueError):
+            arguments = {"args": list(args), **kwargs}
+        return self.memo.call(self.name, arguments, lambda: self.tool._run(*args, **kwargs), safe=self.safe)
+
+
+def format_stats(stats: Dict[str, Dict[str, int]]) -> str:
+    saved = {name: c["deduped"] + c["shared"] for name, c in stats.items() if c["deduped"] + c["shared"]}
+    total = sum(saved.values())
+    text = f"{total} of {sum(c['calls'] for c in stats.values())} tool calls deduplicated"
+    return f"{text} ({', '.join(f'{name}: {n}' for name, n in saved.items())})" if saved else text
@@ -1,8 +1,11 @@
 from typing import Dict, Any
 from crewai.tools import BaseTool
 from .sheets_fetch import GoogleSheetsFetchTool
+from ..tool_memo import memo_policy
 from pydantic import Field
 
+# A fetch can advance the sheet watermark, so repeating it gives a different answer.
+@memo_policy(safe=False)
 class FormResponseFetchTool(BaseTool):
     name: str = "fetch_form_response"
     description: str = """Fetch and structure the latest response from the Google Form's response sheet.
@@ -16,6 +19,7 @@ class FormResponseFetchTool(BaseTool):
         - exercises: list of exercises and sets
         - experienced_pain: whether they had pain (Yes/No)
         - pain_details: description of any pain experienced
+    Also returns new_responses: every response submitted since the previous fetch, in the same format.
     """
     sheets_tool: GoogleSheetsFetchTool = Field(default_factory=GoogleSheetsFetchTool)
     
@@ -26,7 +30,9 @@ class FormResponseFetchTool(BaseTool):
             if result.get("status") == "success":
                 return {
                     "status": "success",
-                    "data": result["response"]
+                    "data": result["response"],
+                    "new_responses": result.get("responses", [result["response"]]),
+                    "watermark": result.get("watermark"),
                 }
             else:
                 return {
@@ -38,3 +44,7 @@ class FormResponseFetchTool(BaseTool):
                 "status": "error",
                 "error": f"Error while fetching form response: {str(e)}"
             }
+
+    def save_watermark(self, watermark) -> None:
+        """Mark the fetched responses as ingested (for sheets tools with defer_watermark set)."""
+        self.sheets_tool.save_watermark(watermark)
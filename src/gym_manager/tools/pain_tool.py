@@ -0,0 +1,22 @@
+import json
+
+from crewai.tools import tool
+
+from ..tool_memo import memo_policy
+from .pg_tool import fetch_pain_history
+
+
+@memo_policy(safe=True)
+@tool("pain_history_tool")
+def pain_history_tool(location: str = "", query: str = "") -> str:
+    """
+    Pain and injury history from the pain index as JSON. Give a body location ("left knee",
+    "lower back") for its trend, e.g. "left knee: 4 of last 6 logged days, worsening (2 in a row)",
+    with streaks, severities (1-10) and its latest pain events. Give query words ("sharp
+    shoulder bench") to find past pain reports containing them. With neither, lists every
+    location with pain in the last 6 logged days.
+    """
+    try:
+        return json.dumps(fetch_pain_history(location, query))
+    except Exception as e:
+        return f"Error fetching pain history: {e}"
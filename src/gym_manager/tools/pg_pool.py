@@ -0,0 +1,396 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from dotenv import load_dotenv
+from ..resources import lazy_resource
+load_dotenv()  # Load environment variables from .env file
+
+DB_URL = os.getenv("DATABASE_URL")
+
+# Queries the tools run on every call. They are PREPAREd once per connection and then EXECUTEd.
+# Every row belongs to a member (see members.py), always the first parameter.
+STATEMENTS = {
+    "upsert_summary": """
+        INSERT INTO workout_summaries (member, date, gym, muscle_trained, summary, pain_experienced, pain_details)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        ON CONFLICT (member, date) DO UPDATE
+        SET gym = EXCLUDED.gym,
+            muscle_trained = EXCLUDED.muscle_trained,
+            summary = EXCLUDED.summary,
+            pain_experienced = EXCLUDED.pain_experienced,
+            pain_details = EXCLUDED.pain_details
+    """,
+    "latest_summary": "SELECT * FROM workout_summaries WHERE member = $1 ORDER BY date DESC LIMIT 1",
+    "members": "SELECT DISTINCT member FROM workout_summaries ORDER BY member",
+    # Date ranges are half-open: $2 <= date < $3.
+    "summaries_between": """
+        SELECT * FROM workout_summaries WHERE member = $1 AND date >= $2 AND date < $3 ORDER BY date
+    """,
+    "rollups_between": """
+        SELECT * FROM workout_weekly_rollups
+        WHERE member = $1 AND week_start >= $2 AND week_start < $3 ORDER BY week_start
+    """,
+    "upsert_rollup": """
+        INSERT INTO workout_weekly_rollups
+            (member, week_start, days_logged, sessions, muscle_groups, pain_days, pain_details)
+        VALUES ($1, $2, $3, $4, $5, $6, $7)
+        ON CONFLICT (member, week_start) DO UPDATE
+        SET days_logged = EXCLUDED.days_logged,
+            sessions = EXCLUDED.sessions,
+            muscle_groups = EXCLUDED.muscle_groups,
+            pain_days = EXCLUDED.pain_days,
+            pain_details = EXCLUDED.pain_details
+    """,
+    # Pain index (see pain_index.py): one event per day and body location, plus a term index.
+    "delete_pain_events": "DELETE FROM pain_events WHERE member = $1 AND date >= $2 AND date < $3",
+    "delete_pain_terms": "DELETE FROM pain_terms WHERE member = $1 AND date >= $2 AND date < $3",
+    "insert_pain_event": """
+        INSERT INTO pain_events (member, date, location, part, severity) VALUES ($1, $2, $3, $4, $5)
+    """,
+    "insert_pain_term": "INSERT INTO pain_terms (member, term, date) VALUES ($1, $2, $3)",
+    "first_pain_event": "SELECT MIN(date) AS date FROM pain_events WHERE member = $1",
+    "logged_days_before": """
+        SELECT date FROM workout_summaries WHERE member = $1 AND date < $2 ORDER BY date DESC LIMIT $3
+    """,
+    "pain_events_for_part": """
+        SELECT * FROM pain_events WHERE member = $1 AND part = $2 ORDER BY date DESC LIMIT $3
+    """,
+    "pain_term_days": """
+        SELECT s.date, s.pain_details FROM pain_terms t
+        JOIN workout_summaries s ON s.member = t.member AND s.date = t.date
+        WHERE t.member = $1 AND t.term = $2 ORDER BY s.date DESC
+    """,
+    # Exercise log (see training_log.py): the day's logged exercises, parsed from the form answer.
+    "delete_exercise_log": "DELETE FROM exercise_log WHERE member = $1 AND date = $2",
+    "insert_exercise_log": """
+        INSERT INTO exercise_log (member, date, position, exercise, muscle, sets, reps, load_kg)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+    """,
+    "exercise_log_between": """
+        SELECT * FROM exercise_log WHERE member = $1 AND date >= $2 AND date < $3 ORDER BY date, position
+    """,
+    "pain_trends": "SELECT * FROM pain_trends WHERE member = $1 ORDER BY location",
+    "pain_trends_for_part": "SELECT * FROM pain_trends WHERE member = $1 AND part = $2 ORDER BY location",
+    "clear_pain_trends": "DELETE FROM pain_trends WHERE member = $1",
+    "upsert_pain_trend": """
+        INSERT INTO pain_trends
+            (member, location, part, first_seen, last_seen, occurrences, streak, longest_streak, recent, as_of)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+        ON CONFLICT (member, location) DO UPDATE
+        SET part = EXCLUDED.part,
+            first_seen = EXCLUDED.first_seen,
+            last_seen = EXCLUDED.last_seen,
+            occurrences = EXCLUDED.occurrences,
+            streak = EXCLUDED.streak,
+            longest_streak = EXCLUDED.longest_streak,
+            recent = EXCLUDED.recent,
+            as_of = EXCLUDED.as_of
+    """,
+}
+
+# Tables created before rows were keyed by member: (table, its old primary key columns).
+MEMBER_KEYED = [
+    ("workout_summaries", "date"),
+    ("workout_weekly_rollups", "week_start"),
+    ("pain_events", "date, location"),
+    ("pain_terms", "term, date"),
+    ("pain_trends", "location"),
+]
+
+# Postgres-only migration run before HISTORY_SCHEMA: existing rows become the "" member's
+# (the single-member setup) and the primary keys gain the member column.
+MEMBER_MIGRATION = [
+    f"""
+    DO $$
+    BEGIN
+        IF to_regclass('{table}') IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = '{table}' AND column_name = 'member'
+        ) THEN
+            ALTER TABLE {table} ADD COLUMN member TEXT NOT NULL DEFAULT '';
+            ALTER TABLE {table} DROP CONSTRAINT {table}_pkey;
+            ALTER TABLE {table} ADD PRIMARY KEY (member, {key});
+        END IF;
+    END $$
+    """
+    for table, key in MEMBER_KEYED
+]
+
+# Tables and indexes the history queries rely on; created on first use (see pg_tool.ensure_history_schema).
+HISTORY_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS workout_weekly_rollups (
+        member TEXT NOT NULL DEFAULT '',
+        week_start DATE NOT NULL,
+        days_logged INTEGER NOT NULL,
+        sessions INTEGER NOT NULL,
+        muscle_groups TEXT,
+        pain_days INTEGER NOT NULL,
+        pain_details TEXT,
+        PRIMARY KEY (member, week_start)
+    )
+    """,
+    # The (member, date) primary key already serves range scans; pain lookups only touch the few pain days.
+    "DROP INDEX IF EXISTS workout_summaries_pain_idx",
+    """
+    CREATE INDEX IF NOT EXISTS workout_summaries_member_pain_idx
+    ON workout_summaries (member, date) WHERE pain_experienced
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS pain_events (
+        member TEXT NOT NULL DEFAULT '',
+        date DATE NOT NULL,
+        location TEXT NOT NULL,
+        part TEXT NOT NULL,
+        severity INTEGER NOT NULL,
+        PRIMARY KEY (member, date, location)
+    )
+    """,
+    "DROP INDEX IF EXISTS pain_events_part_idx",
+    "CREATE INDEX IF NOT EXISTS pain_events_member_part_idx ON pain_events (member, part, date)",
+    # A plain term index rather than tsvector, so the same search runs on the SQLite stand-in.
+    """
+    CREATE TABLE IF NOT EXISTS pain_terms (
+        member TEXT NOT NULL DEFAULT '',
+        term TEXT NOT NULL,
+        date DATE NOT NULL,
+        PRIMARY KEY (member, term, date)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS pain_trends (
+        member TEXT NOT NULL DEFAULT '',
+        location TEXT NOT NULL,
+        part TEXT NOT NULL,
+        first_seen DATE,
+        last_seen DATE,
+        occurrences INTEGER NOT NULL,
+        streak INTEGER NOT NULL,
+        longest_streak INTEGER NOT NULL,
+        recent TEXT NOT NULL,
+        as_of DATE NOT NULL,
+        PRIMARY KEY (member, location)
+    )
+    """,
+    "DROP INDEX IF EXISTS pain_trends_part_idx",
+    "CREATE INDEX IF NOT EXISTS pain_trends_member_part_idx ON pain_trends (member, part)",
+    """
+    CREATE TABLE IF NOT EXISTS exercise_log (
+        member TEXT NOT NULL DEFAULT '',
+        date DATE NOT NULL,
+        position INTEGER NOT NULL,
+        exercise TEXT NOT NULL,
+        muscle TEXT NOT NULL,
+        sets INTEGER NOT NULL,
+        reps INTEGER NOT NULL,
+        load_kg REAL NOT NULL,
+        PRIMARY KEY (member, date, position)
+    )
+    """,
+]
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection frees up within the pool timeout."""
+
+
+class PgPool:
+    """
+    Thread-safe Postgres connection pool.
+    Connections are health-checked on checkout, rolled back if returned mid-transaction,
+    and keep their prepared statements for as long as they live.
+    """
+
+    dialect = "postgres"
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 5,
+        timeout: float = 30.0,
+        health_check_interval: float = 30.0,
+        statements: Optional[Dict[str, str]] = None,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1.")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.statements = dict(STATEMENTS if statements is None else statements)
+        self._idle: List[tuple] = []  # (connection, last_used)
+        self._prepared: Dict[int, set] = {}
+        self._size = 0
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "connections_created": 0,
+            "connections_discarded": 0,
+            "health_checks": 0,
+            "statements_prepared": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "timeouts": 0,
+        }
+        for _ in range(min_size):
+            self._idle.append((self._new_connection(), time.monotonic()))
+
+    def _new_connection(self):
+        conn = self._connect()
+        self._size += 1
+        self._stats["connections_created"] += 1
+        return conn
+
+    def _discard(self, conn) -> None:
+        self._prepared.pop(id(conn), None)
+        self._size -= 1
+        self._stats["connections_discarded"] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn, last_used: float) -> bool:
+        if getattr(conn, "closed", False):
+            return False
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        self._stats["health_checks"] += 1
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _acquire(self):
+        started = time.monotonic()
+        while True:
+            create = False
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed.")
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        # Reserve the slot now, connect outside the lock.
+                        self._size += 1
+                        create = True
+                        break
+                    remaining = self.timeout - (time.monotonic() - started)
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(f"No Postgres connection available within {self.timeout}s.")
+                self._in_use += 1
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._healthy(conn, last_used):
+                with self._cond:
+                    self._in_use -= 1
+                    self._discard(conn)
+                continue
+
+            waited = time.monotonic() - started
+            with self._cond:
+                if create:
+                    self._stats["connections_created"] += 1
+                self._stats["checkouts"] += 1
+                self._stats["wait_seconds_total"] += waited
+                self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+            return conn
+
+    def _release(self, conn, broken: bool) -> None:
+        with self._cond:
+            self._in_use -= 1
+            if broken or self._closed or getattr(conn, "closed", False):
+                self._discard(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection; commit on success, roll back on error."""
+        conn = self._acquire()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            self._release(conn, broken)
+
+    def execute(self, cur, name: str, params: Sequence[Any] = ()) -> None:
+        """Run a named statement on `cur`, preparing it on the cursor's connection the first time."""
+        prepared = self._prepared.setdefault(id(cur.connection), set())
+        if name not in prepared:
+            cur.execute(f"PREPARE {name} AS {self.statements[name]}")
+            prepared.add(name)
+            self._stats["statements_prepared"] += 1
+        if params:
+            cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", tuple(params))
+        else:
+            cur.execute(f"EXECUTE {name}")
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            checkouts = self._stats["checkouts"]
+            return {
+                **self._stats,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "wait_seconds_avg": self._stats["wait_seconds_total"] / checkouts if checkouts else 0.0,
+            }
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+            self._cond.notify_all()
+
+
+def _connect():
+    """Establishes and returns a database connection."""
+    import psycopg2
+
+    if not DB_URL:
+        raise ValueError("DATABASE_URL environment variable not set.")
+    return psycopg2.connect(DB_URL)
+
+
+@lazy_resource("pg_pool")
+def get_pool() -> PgPool:
+    """Process-wide pool sized by PG_POOL_MIN / PG_POOL_MAX."""
+    return PgPool(
+        _connect,
+        min_size=int(os.getenv("PG_POOL_MIN", "1")),
+        max_size=int(os.getenv("PG_POOL_MAX", "5")),
+        timeout=float(os.getenv("PG_POOL_TIMEOUT", "30")),
+    )
@@ -1,61 +1,349 @@
-import os
-import psycopg2
+import json
+import threading
+import weakref
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
 from psycopg2.extras import DictCursor
 from crewai.tools import tool
-from dotenv import load_dotenv
-load_dotenv()  # Load environment variables from .env file
+from .pg_pool import HISTORY_SCHEMA, MEMBER_MIGRATION, PgPool, get_pool
+from ..members import current_member, member_key
+from ..pain_index import WINDOW, PainCounter, advance, extract_events, locations, part_of, terms
+from ..tool_memo import memo_policy
+from ..training_log import log_entries
 
-DB_URL = os.getenv("DATABASE_URL")
 
-def _get_db_connection():
-    """Establishes and returns a database connection."""
-    if not DB_URL:
-        raise ValueError("DATABASE_URL environment variable not set.")
-    return psycopg2.connect(DB_URL)
+def _as_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
 
+
+def week_start(day: date) -> date:
+    """Monday of the ISO week `day` falls in."""
+    return day - timedelta(days=day.weekday())
+
+
+def _member(member: Optional[str]) -> str:
+    return current_member() if member is None else member_key(member)
+
+
+def create_history_schema(pool: PgPool) -> None:
+    """
+    Create the weekly rollup and pain index tables and history indexes if they are missing,
+    after keying tables from before members by member (Postgres only).
+    """
+    migration = MEMBER_MIGRATION if pool.dialect == "postgres" else []
+    with pool.connection() as conn:
+        with conn.cursor() as cur:
+            for ddl in migration + HISTORY_SCHEMA:
+                cur.execute(ddl)
+
+
+# Pools whose database already has the history schema.
+_SCHEMA_READY: "weakref.WeakSet[PgPool]" = weakref.WeakSet()
+_SCHEMA_LOCK = threading.Lock()
+
+
+def ensure_history_schema() -> None:
+    """create_history_schema on the shared pool, once per pool."""
+    pool = get_pool()
+    with _SCHEMA_LOCK:
+        if pool not in _SCHEMA_READY:
+            create_history_schema(pool)
+            _SCHEMA_READY.add(pool)
+
+
+def _rollup_params(member: str, week: date, rows: List[dict]) -> tuple:
+    sessions = [r for r in rows if r["gym"]]
+    muscles = Counter(r["muscle_trained"] for r in sessions if r["muscle_trained"])
+    pain = [r for r in rows if r["pain_experienced"]]
+    return (
+        member,
+        week.isoformat(),
+        len(rows),
+        len(sessions),
+        json.dumps(dict(muscles.most_common())),
+        len(pain),
+        "; ".join(f"{_as_date(r['date']).isoformat()}: {r['pain_details']}" for r in pain),
+    )
+
+
+def refresh_weekly_rollups(pool: PgPool, cur, dates: Iterable[Any], member: str = "") -> int:
+    """
+    Recompute the member's rollups of the weeks containing `dates` from workout_summaries, with
+    one range query and one upsert per week. `cur` must return rows as dicts (DictCursor).
+    """
+    weeks = sorted({week_start(_as_date(d)) for d in dates})
+    if not weeks:
+        return 0
+    wanted = set(weeks)
+    pool.execute(cur, "summaries_between",
+                 (member, weeks[0].isoformat(), (weeks[-1] + timedelta(days=7)).isoformat()))
+    by_week = defaultdict(list)
+    for row in cur.fetchall():
+        week = week_start(_as_date(row["date"]))
+        if week in wanted:
+            by_week[week].append(row)
+    for week in weeks:
+        pool.execute(cur, "upsert_rollup", _rollup_params(member, week, by_week[week]))
+    return len(weeks)
+
+
+def _pain_days(rows: Iterable[dict]):
+    for row in rows:
+        yield _as_date(row["date"]), extract_events(row["pain_details"]) if row["pain_experienced"] else {}
+
+
+def refresh_pain_index(pool: PgPool, cur, dates: Iterable[Any], member: str = "") -> str:
+    """
+    Re-index the member's pain events and terms of the days from min(dates) to max(dates), then
+    bring their per-location trend counters up to date. Days after the counters' as_of date are just
+    applied to them; a change to an earlier day replays the history from the first pain event.
+    Returns "incremental", "rebuilt" or "" when nothing was touched.
+    """
+    days = sorted({_as_date(d) for d in dates})
+    if not days:
+        return ""
+    lo, hi = days[0].isoformat(), (days[-1] + timedelta(days=1)).isoformat()
+    pool.execute(cur, "summaries_between", (member, lo, hi))
+    rows = [dict(r) for r in cur.fetchall()]
+    pool.execute(cur, "delete_pain_events", (member, lo, hi))
+    pool.execute(cur, "delete_pain_terms", (member, lo, hi))
+    for day, events in _pain_days(rows):
+        for location, level in events.items():
+            pool.execute(cur, "insert_pain_event", (member, day.isoformat(), location, part_of(location), level))
+    for row in rows:
+        if row["pain_experienced"]:
+            for term in terms(row["pain_details"]):
+                pool.execute(cur, "insert_pain_term", (member, term, _as_date(row["date"]).isoformat()))
+
+    pool.execute(cur, "pain_trends", (member,))
+    counters = {c.location: c for c in map(PainCounter.from_row, cur.fetchall())}
+    as_of = max((c.as_of for c in counters.values()), default=None)
+    if counters and lo > as_of:
+        mode = "incremental"
+        pool.execute(cur, "summaries_between", (member, (_as_date(as_of) + timedelta(days=1)).isoformat(), hi))
+        seen = max(len(c.recent) for c in counters.values())
+    else:
+        mode = "rebuilt"
+        counters = {}
+        pool.execute(cur, "clear_pain_trends", (member,))
+        pool.execute(cur, "first_pain_event", (member,))
+        first = cur.fetchone()["date"]
+        if first is None:
+            return mode
+        first = _as_date(first).isoformat()
+        pool.execute(cur, "logged_days_before", (member, first, WINDOW))
+        seen = len(cur.fetchall())
+        pool.execute(cur, "summaries_between", (member, first, "9999-12-31"))
+    advance(counters, _pain_days(cur.fetchall()), seen)
+    for counter in counters.values():
+        pool.execute(cur, "upsert_pain_trend", (member, *counter.to_params()))
+    return mode
+
+
+def refresh_exercise_log(pool: PgPool, cur, rows: Iterable[dict], member: str = "") -> int:
+    """
+    Replace the member's exercise_log entries of each row's day with the entries parsed from the
+    row's raw `exercises` answer (ingest.to_db_row). Rows written without one (insert_summary_tool)
+    fall back to their summary text. Returns how many entries were written.
+    """
+    count = 0
+    for row in rows:
+        day = _as_date(row["date"]).isoformat()
+        pool.execute(cur, "delete_exercise_log", (member, day))
+        if not row.get("gym"):
+            continue
+        entries = log_entries(row.get("exercises", row.get("summary")) or "", row.get("muscle_trained"))
+        for position, (exercise, muscle, sets, reps, load) in enumerate(entries):
+            pool.execute(cur, "insert_exercise_log", (member, day, position, exercise, muscle, sets, reps, load))
+        count += len(entries)
+    return count
+
+
+def upsert_summaries(summaries: Iterable[dict], member: Optional[str] = None) -> int:
+    """
+    Upsert a member's workout summaries (keyed by date; by default the current member's, see
+    members.py) on one pooled connection, in one transaction, and refresh the weekly rollups
+    they fall in, the pain index and their days' exercise log.
+    """
+    member = _member(member)
+    ensure_history_schema()
+    pool = get_pool()
+    count = 0
+    dates = []
+    summaries = list(summaries)
+    with pool.connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cur:
+            for summary in summaries:
+                pool.execute(cur, "upsert_summary", (
+                    member,
+                    summary.get("date"),
+                    summary.get("gym"),
+                    summary.get("muscle_trained"),
+                    summary.get("summary"),
+                    summary.get("pain_experienced"),
+                    summary.get("pain_details"),
+                ))
+                dates.append(summary.get("date"))
+                count += 1
+            refresh_weekly_rollups(pool, cur, dates, member)
+            refresh_pain_index(pool, cur, dates, member)
+            refresh_exercise_log(pool, cur, summaries, member)
+    return count
+
+@memo_policy(safe=False)
 @tool("insert_summary_tool")
 def insert_summary_tool(summary: dict) -> str:
     """
     Insert a workout summary into the Postgres workout_summaries table.
     Expected keys: date, gym, muscle_trained, summary, pain_experienced, pain_details
     """
-    conn = _get_db_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO workout_summaries (date, gym, muscle_trained, summary, pain_experienced, pain_details)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT (date) DO UPDATE
-                SET gym = EXCLUDED.gym,
-                    muscle_trained = EXCLUDED.muscle_trained,
-                    summary = EXCLUDED.summary,
-                    pain_experienced = EXCLUDED.pain_experienced,
-                    pain_details = EXCLUDED.pain_details;
-            """, (
-                summary.get("date"),
-                summary.get("gym"),
-                summary.get("muscle_trained"),
-                summary.get("summary"),
-                summary.get("pain_experienced"),
-                summary.get("pain_details"),
-            ))
-            conn.commit()
-        return f"Inserted/Updated summary for {summary.get('date')}"
-    finally:
-        conn.close()
+    upsert_summaries([summary])
+    return f"Inserted/Updated summary for {summary.get('date')}"
 
+@memo_policy(safe=True)
 @tool("fetch_latest_summary_tool")
 def fetch_latest_summary_tool(placeholder: str = "") -> str:
     """
     Fetch the most recent workout summary from Postgres.
     """
-    conn = _get_db_connection()
-    try:
+    ensure_history_schema()  # a database from before members has no member column yet
+    pool = get_pool()
+    with pool.connection() as conn:
         with conn.cursor(cursor_factory=DictCursor) as cur:
-            cur.execute("SELECT * FROM workout_summaries ORDER BY date DESC LIMIT 1;")
+            pool.execute(cur, "latest_summary", (current_member(),))
             row = cur.fetchone()
             if not row:
                 return "No summaries found."
             return dict(row)
-    finally:
-        conn.close()
+
+
+def _compact_day(row: dict) -> Dict[str, Any]:
+    day = {"date": _as_date(row["date"]).isoformat(), "gym": bool(row["gym"])}
+    if row["gym"]:
+        day.update(muscle=row["muscle_trained"], summary=row["summary"])
+    if row["pain_experienced"]:
+        day["pain"] = row["pain_details"]
+    return day
+
+
+def fetch_history(days: int = 7, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                  include_days: bool = True, member: Optional[str] = None) -> Dict[str, Any]:
+    """
+    A member's summaries for a date range (inclusive), by default the last `days` days up to
+    today, plus the weekly rollups overlapping it. Both come from indexed range queries on one
+    connection.
+    """
+    member = _member(member)
+    end = _as_date(end_date) if end_date else date.today()
+    start = _as_date(start_date) if start_date else end - timedelta(days=max(1, days) - 1)
+    ensure_history_schema()
+    pool = get_pool()
+    with pool.connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cur:
+            rows = []
+            if include_days:
+                pool.execute(cur, "summaries_between",
+                             (member, start.isoformat(), (end + timedelta(days=1)).isoformat()))
+                rows = [dict(r) for r in cur.fetchall()]
+            pool.execute(cur, "rollups_between",
+                         (member, week_start(start).isoformat(), (end + timedelta(days=1)).isoformat()))
+            weeks = [dict(r) for r in cur.fetchall()]
+    history = {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "weeks": [{
+            "week_start": _as_date(w["week_start"]).isoformat(),
+            "days_logged": w["days_logged"],
+            "sessions": w["sessions"],
+            "muscle_groups": json.loads(w["muscle_groups"] or "{}"),
+            "pain_days": w["pain_days"],
+            **({"pain": w["pain_details"]} if w["pain_details"] else {}),
+        } for w in weeks],
+    }
+    if include_days:
+        history["days"] = [_compact_day(r) for r in rows]
+    return history
+
+def fetch_exercise_log(start_date: str, end_date: str, member: Optional[str] = None) -> List[Dict[str, Any]]:
+    """A member's exercise_log entries from start_date to end_date (YYYY-MM-DD, inclusive)."""
+    member = _member(member)
+    ensure_history_schema()
+    pool = get_pool()
+    end = (_as_date(end_date) + timedelta(days=1)).isoformat()
+    with pool.connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cur:
+            pool.execute(cur, "exercise_log_between", (member, _as_date(start_date).isoformat(), end))
+            return [dict(row) for row in cur.fetchall()]
+
+@memo_policy(safe=True)
+@tool("fetch_workout_history_tool")
+def fetch_workout_history_tool(days: int = 7, start_date: str = "", end_date: str = "", weeks_only: bool = False) -> str:
+    """
+    Fetch workout history from Postgres as compact JSON: each day's summary (date, gym, muscle,
+    summary, pain) for the last `days` days, or from start_date to end_date (YYYY-MM-DD,
+    inclusive), plus per-week rollups (sessions, muscle groups hit with counts, pain days).
+    Set weeks_only=true for just the weekly rollups, e.g. when looking back over many weeks.
+    """
+    return json.dumps(fetch_history(days, start_date or None, end_date or None, include_days=not weeks_only))
+
+
+def fetch_pain_history(location: str = "", query: str = "", limit: int = 10,
+                       member: Optional[str] = None) -> Dict[str, Any]:
+    """
+    A member's pain history from the pain index. With `location` ("left knee", "knee"): the trend counters
+    of that body part (both sides when no side is given) and its latest events. With `query`:
+    the latest days whose pain report contains every word of it. Otherwise: every location
+    that had pain in the recent window.
+    """
+    member = _member(member)
+    ensure_history_schema()
+    pool = get_pool()
+    with pool.connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cur:
+            if location:
+                wanted = locations(location)
+                if not wanted:
+                    return {"location": location, "error": "no body location recognised"}
+                trends, events = [], []
+                for part in sorted({part_of(loc) for loc in wanted}):
+                    # A bare part ("knee") matches both sides; a sided one also gets unsided reports.
+                    keep = lambda loc: loc in wanted or part_of(loc) in wanted or loc == part  # noqa: E731
+                    pool.execute(cur, "pain_trends_for_part", (member, part))
+                    trends += [PainCounter.from_row(r) for r in cur.fetchall() if keep(r["location"])]
+                    pool.execute(cur, "pain_events_for_part", (member, part, limit))
+                    events += [{"date": _as_date(r["date"]).isoformat(), "location": r["location"],
+                                "severity": r["severity"]} for r in cur.fetchall() if keep(r["location"])]
+                return {
+                    "location": location,
+                    "trends": [c.report() for c in trends],
+                    "summary": "; ".join(c.summary() for c in trends) or f"{location}: no pain logged",
+                    "events": sorted(events, key=lambda e: e["date"], reverse=True)[:limit],
+                }
+            if query:
+                wanted_terms = terms(query)
+                if not wanted_terms:
+                    return {"query": query, "days": []}
+                # The longest word is usually the rarest; the other words are checked on its days.
+                pool.execute(cur, "pain_term_days", (member, max(sorted(wanted_terms), key=len)))
+                days = [{"date": _as_date(r["date"]).isoformat(), "pain": r["pain_details"]}
+                        for r in cur.fetchall() if wanted_terms <= terms(r["pain_details"])]
+                return {"query": query, "days": days[:limit]}
+            pool.execute(cur, "pain_trends", (member,))
+            trends = [c for c in map(PainCounter.from_row, cur.fetchall()) if c.days_with_pain]
+    trends.sort(key=lambda c: (-c.days_with_pain, c.location))
+    return {"trends": [c.report() for c in trends], "summary": "; ".join(c.summary() for c in trends)}
+
+
+def fetch_members() -> List[str]:
+    """Every member with workout summaries ("" is the single-member setup)."""
+    ensure_history_schema()
+    pool = get_pool()
+    with pool.connection() as conn:
+        with conn.cursor(cursor_factory=DictCursor) as cur:
+            pool.execute(cur, "members")
+            return [row["member"] for row in cur.fetchall()]
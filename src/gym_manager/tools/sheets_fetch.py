@@ -1,11 +1,58 @@
 from crewai.tools import BaseTool
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import json
 import os
-from google.oauth2.credentials import Credentials
+import threading
+from datetime import datetime
 from typing import Any
 from googleapiclient.discovery import build
 from google.oauth2 import service_account
 
+from ..telemetry import span
+
+SHEET_NAME = "Form Responses 1"
+STORAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "storage")
+WATERMARK_PATH = os.path.join(STORAGE_DIR, "sheets_watermark.json")
+FORM_TIMESTAMP_FORMAT = "%m/%d/%Y %H:%M:%S"
+
+# One Sheets API client per credentials file, shared by every tool instance.
+_SERVICES: Dict[str, Any] = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+def _get_service(credentials, creds_path: str):
+    with _SERVICES_LOCK:
+        if creds_path not in _SERVICES:
+            _SERVICES[creds_path] = build('sheets', 'v4', credentials=credentials, cache_discovery=False)
+        return _SERVICES[creds_path]
+
+
+def structure_response(row: List[str]) -> Dict[str, Any]:
+    """Map a raw form response row onto the structured response dictionary."""
+    return {
+        "timestamp": row[0],  # Timestamp is always first column
+        "user_info": {
+            "name": row[1] if len(row) > 1 else "",
+            "email": row[2] if len(row) > 2 else "",
+        },
+        "workout_data": {
+            "did_workout": row[3] if len(row) > 3 else "No",
+            "muscles_trained": row[4] if len(row) > 4 else "",
+            "did_cardio": row[5] if len(row) > 5 else "No",
+            "exercises": row[6] if len(row) > 6 else "",
+            "experienced_pain": row[7] if len(row) > 7 else "No",
+            "pain_details": row[8] if len(row) > 8 else ""
+        }
+    }
+
+
+def _parse_timestamp(value: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value, FORM_TIMESTAMP_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
 class GoogleSheetsFetchTool(BaseTool):
     name: str = "google_sheets_fetch_tool"
     description: str = """Fetches responses from the Google Form's response sheet.
@@ -13,87 +60,182 @@ class GoogleSheetsFetchTool(BaseTool):
     No range_name parameter is needed as it's handled automatically."""
     sheet_id: str = ""
     credentials: Any = None
+    service: Any = None
+    incremental: bool = True
+    watermark_path: str = WATERMARK_PATH
+    respondent_email: Optional[str] = None
+    # Set when the caller saves the watermark itself once the rows are stored (see ingest.ingest_responses).
+    defer_watermark: bool = False
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
         # Get sheet ID from environment
-        self.sheet_id = os.getenv("GOOGLE_SHEET_ID")
+        self.sheet_id = self.sheet_id or os.getenv("GOOGLE_SHEET_ID")
         if not self.sheet_id:
             raise ValueError("GOOGLE_SHEET_ID must be set in environment variables")
+        if "incremental" not in kwargs:
+            self.incremental = os.getenv("SHEETS_INCREMENTAL", "true").lower() not in ("0", "false", "no")
+
+        if self.service is not None:
+            # An injected backend (e.g. fakes.sheets.FakeSheetsService) needs no credentials.
+            return
 
         # Load service account credentials
         try:
             # Get the project root directory
             project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
             creds_path = os.path.join(project_root, 'credentials.json')
-            
+
             self.credentials = service_account.Credentials.from_service_account_file(
                 creds_path,
                 scopes=['https://www.googleapis.com/auth/spreadsheets.readonly']
             )
         except Exception as e:
             raise ValueError(f"Failed to load service account credentials from {creds_path}: {str(e)}")
+        self.service = _get_service(self.credentials, creds_path)
+
+    def _get_values(self, range_name: str) -> List[List[str]]:
+        result = self.service.spreadsheets().values().get(
+            spreadsheetId=self.sheet_id,
+            range=range_name
+        ).execute()
+        return result.get('values', [])
+
+    def _load_watermark(self) -> Dict[str, Any]:
+        try:
+            with open(self.watermark_path) as f:
+                watermark = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # A watermark from another sheet means nothing here.
+        return watermark if watermark.get("sheet_id") == self.sheet_id else {}
+
+    def _save_watermark(self, row: int, timestamp: str, last_response: Optional[List[str]]) -> None:
+        os.makedirs(os.path.dirname(self.watermark_path), exist_ok=True)
+        tmp_path = f"{self.watermark_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"sheet_id": self.sheet_id, "row": row, "timestamp": timestamp, "last_response": last_response}, f)
+        os.replace(tmp_path, self.watermark_path)
+
+    def save_watermark(self, watermark: Optional[Dict[str, Any]]) -> None:
+        """Move the watermark to the one fetch_new_rows returned, once its rows are safely stored."""
+        if watermark:
+            self._save_watermark(watermark["row"], watermark["timestamp"], watermark["last_response"])
+
+    def _matches(self, row: List[str]) -> bool:
+        if not row:
+            return False
+        if not self.respondent_email:
+            return True
+        return len(row) > 2 and row[2].strip().lower() == self.respondent_email.strip().lower()
+
+    def iter_rows(self, start_row: int = 2, batch_rows: int = 5000) -> Iterator[Tuple[int, List[List[str]]]]:
+        """
+        Stream the sheet in ranges of `batch_rows` rows from `start_row` (row 1 is the header),
+        yielding (first row number, rows). Empty rows are kept so row numbers stay exact.
+        """
+        while True:
+            values = self._get_values(f"{SHEET_NAME}!A{start_row}:Z{start_row + batch_rows - 1}")
+            if values:
+                yield start_row, values
+            if len(values) < batch_rows:
+                return
+            start_row += batch_rows
+
+    def fetch_new_rows(self) -> Dict[str, Any]:
+        """
+        Return the rows added since the stored watermark, and under "watermark" the position
+        past them; it is not stored until save_watermark is called with it, so rows that fail to
+        be ingested are fetched again. Only rows from the watermark onward are downloaded. The watermark row is fetched again
+        and its timestamp compared, so deleted or reordered rows trigger a full rescan.
+        With respondent_email set, only that respondent's rows are returned.
+        """
+        watermark = self._load_watermark()
+        last_response = watermark.get("last_response")
+        row = watermark.get("row")
+        if row:
+            values = self._get_values(f"{SHEET_NAME}!A{row}:Z")
+            if values and values[0] and values[0][0] == watermark.get("timestamp"):
+                new_rows = [r for r in values[1:] if self._matches(r)]
+                latest = new_rows[-1] if new_rows else last_response
+                moved = None
+                if len(values) > 1:
+                    moved = {"row": row + len(values) - 1, "timestamp": values[-1][0], "last_response": latest}
+                return {"rows": new_rows, "latest": latest, "rows_downloaded": len(values), "watermark": moved}
+
+        # No usable watermark: scan the whole sheet once.
+        values = self._get_values(f"{SHEET_NAME}!A:Z")
+        data = [r for r in values[1:] if r]
+        if not data:
+            return {"rows": [], "latest": None, "rows_downloaded": len(values), "watermark": None}
+        new_rows = data
+        if watermark.get("timestamp"):
+            seen = [i for i, r in enumerate(data) if r[0] == watermark["timestamp"]]
+            if seen:
+                new_rows = data[seen[-1] + 1:]
+            else:
+                cutoff = _parse_timestamp(watermark["timestamp"])
+                if cutoff:
+                    new_rows = [r for r in data if (_parse_timestamp(r[0]) or cutoff) > cutoff]
+        new_rows = [r for r in new_rows if self._matches(r)]
+        matching = [r for r in data if self._matches(r)]
+        latest = matching[-1] if matching else None
+        moved = {"row": len(values), "timestamp": data[-1][0], "last_response": latest}
+        return {"rows": new_rows, "latest": latest, "rows_downloaded": len(values), "watermark": moved}
 
     def _run(self, range_name: str = "Form Responses 1!A:Z") -> Dict[str, Any]:
         """
         Fetch the latest response from the Google Sheet
-        Returns a dictionary with the structured response
+        Returns a dictionary with the structured response. In incremental mode
+        `responses` also lists every response submitted since the previous run.
         """
         try:
+            if self.incremental:
+                with span("sheets", "fetch_new_rows", mode="incremental") as record:
+                    fetched = self.fetch_new_rows()
+                    record.update(rows_downloaded=fetched["rows_downloaded"], new_rows=len(fetched["rows"]))
+                if not self.defer_watermark:
+                    self.save_watermark(fetched["watermark"])
+                if fetched["latest"] is None:
+                    return {
+                        "error": "No responses found in the sheet",
+                        "status": "error"
+                    }
+                return {
+                    "response": structure_response(fetched["latest"]),
+                    "responses": [structure_response(r) for r in fetched["rows"]],
+                    "watermark": fetched["watermark"],
+                    "status": "success"
+                }
+
             # Always use the default range name for Google Forms
-            range_name = "Form Responses 1!A:Z"
-            
-            # Build the Sheets API service
-            service = build('sheets', 'v4', credentials=self.credentials)
-            sheet = service.spreadsheets()
+            range_name = f"{SHEET_NAME}!A:Z"
 
             # Get the values
-            result = sheet.values().get(
-                spreadsheetId=self.sheet_id,
-                range=range_name
-            ).execute()
-            
+            with span("sheets", "fetch_all_rows", mode="latest") as record:
+                values = self._get_values(range_name)
+                record["rows_downloaded"] = len(values)
+
             # Get the latest response (last row)
-            values = result.get('values', [])
             if not values or len(values) < 2:  # Need at least headers and one response
                 return {
                     "error": "No responses found in the sheet",
                     "status": "error"
                 }
-            
-            # Get headers and latest response
-            headers = values[0]
-            latest_response = values[-1]
-            
-            # Print headers for debugging
-            print("Sheet Headers:", headers)
-            print("Latest Response:", latest_response)
-            
-            # Get the column mappings from headers
-            header_to_index = {header.strip().lower(): idx for idx, header in enumerate(headers)}
-            
-            # Create a structured response using actual form column names
-            response_dict = {
-                "timestamp": latest_response[0],  # Timestamp is always first column
-                "user_info": {
-                    "name": latest_response[1] if len(latest_response) > 1 else "",
-                    "email": latest_response[2] if len(latest_response) > 2 else "",
-                },
-                "workout_data": {
-                    "did_workout": latest_response[3] if len(latest_response) > 3 else "No",
-                    "muscles_trained": latest_response[4] if len(latest_response) > 4 else "",
-                    "did_cardio": latest_response[5] if len(latest_response) > 5 else "No",
-                    "exercises": latest_response[6] if len(latest_response) > 6 else "",
-                    "experienced_pain": latest_response[7] if len(latest_response) > 7 else "No",
-                    "pain_details": latest_response[8] if len(latest_response) > 8 else ""
+
+            matching = [r for r in values[1:] if self._matches(r)]
+            if not matching:
+                return {
+                    "error": f"No responses found in the sheet for {self.respondent_email}",
+                    "status": "error"
                 }
-            }
-            
+            latest_response = matching[-1]
+
             return {
-                "response": response_dict,
+                "response": structure_response(latest_response),
                 "status": "success"
             }
-            
+
         except Exception as e:
             return {
                 "error": f"Failed to fetch sheet data: {str(e)}",
@@ -1,13 +1,18 @@
-def get_survey_email():
-    """
-    Returns the HTML email body for the daily gym survey.
-    Replace the link with your actual Google Form URL.
-    """
-    gform_url = "https://forms.gle/v3H9sYgAV5pmfPGb6"
+import os
+from functools import lru_cache
+from html import escape
+from typing import Optional
+from urllib.parse import quote
 
-    return f"""
+# Set SURVEY_FORM_URL to your Google Form. With SURVEY_EMAIL_ENTRY set to the form's email
+# question id (e.g. "entry.1234567", from "Get pre-filled link"), each member's link comes
+# with their address filled in.
+GFORM_URL = os.getenv("SURVEY_FORM_URL", "https://forms.gle/v3H9sYgAV5pmfPGb6")
+EMAIL_ENTRY = os.getenv("SURVEY_EMAIL_ENTRY", "")
+
+_TEMPLATE = """
     <h2>Daily Gym Check-in 🏋️‍♂️</h2>
-    <p>Please fill out today’s gym log:</p>
+    <p>{greeting}Please fill out today’s gym log:</p>
     <p><a href="{gform_url}" target="_blank">Click here to open the form</a></p>
     <br/>
     <p>Questions include:</p>
@@ -20,3 +25,30 @@ def get_survey_email():
       <li>If yes, describe when and where it occurred</li>
     </ul>
     """
+
+
+def survey_form_link(email: Optional[str] = None, form_url: str = GFORM_URL, email_entry: str = EMAIL_ENTRY) -> str:
+    """The form link for one member, pre-filled with their email when the form supports it."""
+    if not email or not email_entry:
+        return form_url
+    separator = "&" if "?" in form_url else "?"
+    prefill = "" if "usp=pp_url" in form_url else "usp=pp_url&"
+    return f"{form_url}{separator}{prefill}{email_entry}={quote(email)}"
+
+
+def render_survey_email(email: Optional[str] = None, name: Optional[str] = None,
+                        form_url: str = GFORM_URL, email_entry: str = EMAIL_ENTRY) -> str:
+    """HTML survey email for one member."""
+    return _TEMPLATE.format(
+        greeting=f"Hi {escape(name)}! " if name else "",
+        gform_url=escape(survey_form_link(email, form_url, email_entry), quote=True),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_survey_email():
+    """
+    Returns the HTML email body for the daily gym survey.
+    Rendered once per process; see render_survey_email for per-member bodies.
+    """
+    return render_survey_email()
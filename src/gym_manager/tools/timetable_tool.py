@@ -0,0 +1,26 @@
+import json
+
+from crewai.tools import tool
+
+from ..timetable import get_timetable_index
+from ..tool_memo import memo_policy
+
+
+@memo_policy(safe=True)
+@tool("GymTimetableLookup")
+def timetable_lookup_tool(day: str = "") -> str:
+    """
+    Look up the weekly gym timetable from ./knowledge/gym_timetable.pdf.
+    Leave `day` empty for the whole week as weekly_timetable rows ([day, session]),
+    or pass a weekday, 'today' or 'tomorrow' for that day's session and muscle groups.
+    Also returns the timetable notes (sets, reps, progression).
+    """
+    try:
+        index = get_timetable_index()
+        if day.strip():
+            result = {"day": index.day(day), "notes": index.notes}
+        else:
+            result = {"weekly_timetable": index.weekly_timetable(), "notes": index.notes}
+        return json.dumps(result)
+    except Exception as e:
+        return f"Error reading the gym timetable: {e}"
@@ -0,0 +1,27 @@
+import json
+from datetime import date, timedelta
+
+from crewai.tools import tool
+
+from ..tool_memo import memo_policy
+from ..training_log import TrainingAnalytics, log_table
+from .pg_tool import fetch_exercise_log
+
+
+@memo_policy(safe=True)
+@tool("training_analytics_tool")
+def training_analytics_tool(weeks: int = 4, end_date: str = "") -> str:
+    """
+    Training numbers from the logged exercises of the last `weeks` weeks (up to end_date,
+    YYYY-MM-DD, default today) as JSON: hard sets and tonnage (kg) per muscle group per week,
+    the weekly tonnage trend (% per week), estimated 1RM per exercise (best, first, latest,
+    % change) and imbalance flags (push:pull, muscle groups not trained, volume jumps).
+    Base progress comments on these numbers.
+    """
+    try:
+        end = date.fromisoformat(end_date) if end_date else date.today()
+        start = end - timedelta(days=max(1, weeks) * 7 - 1)
+        report = TrainingAnalytics(log_table(fetch_exercise_log(start.isoformat(), end.isoformat()))).report()
+        return json.dumps({"from": start.isoformat(), "to": end.isoformat(), **report})
+    except Exception as e:
+        return f"Error computing training analytics: {e}"
@@ -1,28 +1,113 @@
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Union
+
 import requests
+from requests.adapters import HTTPAdapter
 from crewai.tools import tool
 
+from ..resources import lazy_resource
+from ..tool_memo import memo_policy
+from ..ttl_cache import SQLiteTTLCache
+
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
+SERPER_URL = os.getenv("SERPER_URL", "https://google.serper.dev/search")
+SEARCH_TIMEOUT = float(os.getenv("YOUTUBE_SEARCH_TIMEOUT", "10"))
+MAX_PARALLEL_SEARCHES = 8
+STORAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "storage")
+
+
+@lazy_resource("serper_session")
+def get_session() -> requests.Session:
+    """Keep-alive session shared by every search, sized for the batch tool's parallelism."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_PARALLEL_SEARCHES)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@lazy_resource("youtube_cache")
+def get_search_cache() -> SQLiteTTLCache:
+    """Search results are reused for YOUTUBE_CACHE_TTL seconds (one day by default)."""
+    return SQLiteTTLCache(
+        path=os.getenv("YOUTUBE_CACHE_PATH", os.path.join(STORAGE_DIR, "youtube_cache.db")),
+        table="youtube_search",
+        ttl_seconds=float(os.getenv("YOUTUBE_CACHE_TTL", str(24 * 3600))),
+    )
+
+
+def search_youtube(query: str) -> List[str]:
+    """Return the top 3 YouTube links for `query`, raising on HTTP or API errors."""
+    api_key = SERPER_API_KEY or os.getenv("SERPER_API_KEY")
+    if not api_key:
+        raise ValueError("SERPER_API_KEY not set in environment.")
+
+    cache = get_search_cache()
+    key = " ".join(query.lower().split())
+    cached = cache.get(key)
+    if cached is not None:
+        return json.loads(cached)
+
+    headers = {"X-API-KEY": api_key, "Content-Type": "application/json"}
+    payload = {"q": f"site:youtube.com {query}"}
+    resp = get_session().post(SERPER_URL, headers=headers, json=payload, timeout=SEARCH_TIMEOUT)
+    resp.raise_for_status()
+    links = [item["link"] for item in resp.json().get("organic", [])[:3]]
+    if links:
+        cache.put(key, json.dumps(links), label=query)
+    return links
+
 
+def search_youtube_many(queries: List[str]) -> Dict[str, Union[List[str], str]]:
+    """Run several searches concurrently. Each query maps to its links or to an error message."""
+    unique = list(dict.fromkeys(q for q in queries if q and q.strip()))
+
+    def one(query):
+        try:
+            return query, search_youtube(query)
+        except Exception as e:
+            return query, f"Error during YouTube search: {e}"
+
+    if not unique:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_SEARCHES, len(unique))) as pool:
+        return dict(pool.map(one, unique))
+
+
+@memo_policy(safe=True)
 @tool("YouTubeSearchTool")
 def youtube_search_tool(query: str) -> str:
     """
     Search YouTube for exercise or recipe videos using Serper API.
     Returns top 2-3 video links.
     """
-    if not SERPER_API_KEY:
-        return "Error: SERPER_API_KEY not set in environment."
-
-    url = "https://google.serper.dev/search"
-    headers = {"X-API-KEY": SERPER_API_KEY, "Content-Type": "application/json"}
-    payload = {"q": f"site:youtube.com {query}"}
-
     try:
-        resp = requests.post(url, headers=headers, json=payload)
-        results = resp.json()
-        links = [item["link"] for item in results.get("organic", [])[:3]]
+        links = search_youtube(query)
         if not links:
             return "No YouTube results found."
         return "\n".join(links)
     except Exception as e:
         return f"Error during YouTube search: {e}"
+
+
+@memo_policy(safe=True)
+@tool("YouTubeBatchSearchTool")
+def youtube_batch_search_tool(queries: list[str]) -> str:
+    """
+    Search YouTube for several exercises or recipes at once using Serper API.
+    Pass every query in one call, e.g. all dishes of a meal plan.
+    Returns the top 2-3 video links for each query.
+    """
+    results = search_youtube_many(queries)
+    if not results:
+        return "No queries given."
+    sections = []
+    for query, links in results.items():
+        if isinstance(links, str):
+            body = links
+        else:
+            body = "\n".join(links) if links else "No YouTube results found."
+        sections.append(f"{query}:\n{body}")
+    return "\n\n".join(sections)
@@ -0,0 +1,237 @@
+"""
+Structured exercise logs and training-volume analytics.
+
+Members log exercises as free text ("Bench 4x8 @60kg, Row 3x10 @50kg") in the form's exercises
+answer. When a response is ingested, log_entries turns the raw answer into entries of sets, reps
+and load, stored in the exercise_log table (pg_tool.refresh_exercise_log), so nothing is lost to
+the summary's length limit or the model's condensing. log_table puts a span of that table into
+one typed NumPy table (LOG_DTYPE), one row per exercise.
+TrainingAnalytics computes over the whole table at once, without Python loops over rows:
+
+- weekly volume per muscle group: hard sets and tonnage (sets x reps x load),
+- the weekly tonnage trend: a least-squares slope, as a percentage of the mean week,
+- estimated 1RM per exercise (Epley: load x (1 + reps / 30)), best per week and overall,
+- imbalance flags: push sets far above or below pull sets, muscle groups not trained in the
+  window, and week-over-week volume jumps that risk overreaching.
+
+Loads in lb are converted to kg. Exercises without a load (pull-ups, planks) count towards
+sets but not tonnage or 1RM.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+LOG_DTYPE = np.dtype([
+    ("date", "datetime64[D]"),
+    ("exercise", "U48"),
+    ("muscle", "U16"),
+    ("sets", "i4"),
+    ("reps", "i4"),
+    ("load_kg", "f8"),
+])
+
+MUSCLES = ("Chest", "Back", "Legs", "Shoulders", "Arms", "Core")
+LB_TO_KG = 0.45359237
+# Push sets above this multiple of pull sets (or below its inverse) are flagged.
+IMBALANCE_RATIO = 1.5
+# A muscle group's weekly sets rising by more than this fraction over the week before is flagged.
+VOLUME_JUMP = 0.5
+PUSH = ("Chest", "Shoulders")
+PULL = ("Back",)
+
+_ENTRY = re.compile(
+    r"^(?P<name>[A-Za-z][\w' ./()-]*?)\s*[:-]?\s*(?P<sets>\d+)\s*[x×*]\s*(?P<reps>\d+)"
+    r"(?:\s*(?:@|at)\s*(?P<load>\d+(?:\.\d+)?)\s*(?P<unit>kgs?|lbs?)?)?\.?$",
+    re.IGNORECASE,
+)
+_SEPARATOR = re.compile(r"[,;\n]|\.(?:\s+|$)")
+_SESSION_PREFIX = re.compile(r"^[^:]*\bsession:\s*", re.IGNORECASE)
+
+# Checked in order, so phrases ("leg raise", "leg curl") win over the words they contain.
+EXERCISE_MUSCLES: List[Tuple[str, str]] = [
+    (r"leg raise|plank|crunch|sit-?up|\bab\b|abs|core|russian twist", "Core"),
+    (r"squat|lunge|leg|calf|calves|hamstring|\brdl\b|hip thrust|glute|step-?up", "Legs"),
+    (r"overhead|\bohp\b|military|shoulder|lateral raise|delt|face pull|arnold|upright row", "Shoulders"),
+    (r"bench|chest|fly|flye|push-?up|\bdips?\b|pec", "Chest"),
+    (r"row|pull-?up|chin|lat\b|pulldown|deadlift|shrug", "Back"),
+    (r"curl|tricep|bicep|skull|pushdown|extension|hammer", "Arms"),
+]
+_EXERCISE_MUSCLES = [(re.compile(pattern, re.IGNORECASE), muscle) for pattern, muscle in EXERCISE_MUSCLES]
+
+
+def parse_entry(text: str) -> Optional[Tuple[str, int, int, float]]:
+    """
+    One logged exercise as (exercise, sets, reps, load in kg), e.g. "Bench 4x8 @60kg" gives
+    ("bench", 4, 8, 60.0), or None when `text` is not an exercise entry. A load without a
+    unit is taken as kg; a missing load is 0.
+    """
+    match = _ENTRY.match(text.strip())
+    if not match:
+        return None
+    name = " ".join(match["name"].lower().split())
+    load = float(match["load"] or 0)
+    if (match["unit"] or "").lower().startswith("lb"):
+        load *= LB_TO_KG
+    return name, int(match["sets"]), int(match["reps"]), round(load, 2)
+
+
+def parse_session(text: str) -> Tuple[List[Tuple[str, int, int, float]], List[str]]:
+    """The exercise entries in a summary or exercise list, and the parts that were not entries."""
+    entries, unparsed = [], []
+    for part in _SEPARATOR.split(_SESSION_PREFIX.sub("", (text or "").strip())):
+        part = part.strip()
+        if not part:
+            continue
+        entry = parse_entry(part)
+        if entry is None:
+            unparsed.append(part)
+        else:
+            entries.append(entry)
+    return entries, unparsed
+
+
+def muscle_for(exercise: str, session_muscle: Optional[str] = None) -> str:
+    """The muscle group `exercise` works, else the session's muscle group, else "Other"."""
+    for pattern, muscle in _EXERCISE_MUSCLES:
+        if pattern.search(exercise):
+            return muscle
+    session_muscle = (session_muscle or "").strip().title()
+    return session_muscle if session_muscle in MUSCLES else "Other"
+
+
+def log_entries(exercises: str, session_muscle: Optional[str] = None) -> List[Tuple[str, str, int, int, float]]:
+    """A day's exercise list as (exercise, muscle, sets, reps, load in kg) entries, for exercise_log."""
+    entries, _ = parse_session(exercises)
+    return [(exercise[:48], muscle_for(exercise, session_muscle), sets, reps, load)
+            for exercise, sets, reps, load in entries]
+
+
+def log_table(rows: Iterable[Dict[str, Any]]) -> np.ndarray:
+    """
+    exercise_log rows (date, exercise, muscle, sets, reps, load_kg) as a LOG_DTYPE table, in
+    date order.
+    """
+    table = np.array([(np.datetime64(str(row["date"])[:10], "D"), row["exercise"][:48], row["muscle"],
+                       row["sets"], row["reps"], row["load_kg"]) for row in rows], dtype=LOG_DTYPE)
+    return table[np.argsort(table["date"], kind="stable")]
+
+
+def week_starts(dates: np.ndarray) -> np.ndarray:
+    """The Monday of each date's ISO week (1970-01-01 was a Thursday)."""
+    days = dates.astype("datetime64[D]").astype(np.int64)
+    return (days - (days + 3) % 7).astype("datetime64[D]")
+
+
+def epley(load: np.ndarray, reps: np.ndarray) -> np.ndarray:
+    """Estimated one-rep max; a single is its own load."""
+    return np.where(reps <= 1, load, load * (1 + reps / 30.0))
+
+
+class TrainingAnalytics:
+    """Vectorized volume, trend, 1RM and imbalance figures over a LOG_DTYPE table."""
+
+    def __init__(self, table: np.ndarray):
+        self.table = table
+        self.weeks, week_index = np.unique(week_starts(table["date"]), return_inverse=True)
+        self.muscles, muscle_index = np.unique(table["muscle"], return_inverse=True)
+        self.exercises, exercise_index = np.unique(table["exercise"], return_inverse=True)
+        self._week = week_index.ravel()
+        self._muscle = muscle_index.ravel()
+        self._exercise = exercise_index.ravel()
+        self.tonnage = table["sets"] * table["reps"] * table["load_kg"]
+        self.e1rm = epley(table["load_kg"], table["reps"])
+
+    def _grid(self, index: np.ndarray, columns: int, weights: np.ndarray) -> np.ndarray:
+        """Sum of `weights` per (week, column) as a weeks x columns array."""
+        flat = self._week * columns + index
+        return np.bincount(flat, weights=weights, minlength=len(self.weeks) * columns).reshape(len(self.weeks), columns)
+
+    def weekly_volume(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Hard sets and tonnage per week (rows) and muscle group (columns)."""
+        columns = len(self.muscles)
+        return (self._grid(self._muscle, columns, self.table["sets"].astype(float)),
+                self._grid(self._muscle, columns, self.tonnage))
+
+    def tonnage_trend(self) -> Dict[str, Any]:
+        weekly = self.tonnage_by_week()
+        trend: Dict[str, Any] = {"weekly_kg": [round(float(v), 1) for v in weekly]}
+        if len(weekly) >= 2 and weekly.mean() > 0:
+            slope = np.polyfit(np.arange(len(weekly), dtype=float), weekly, 1)[0]
+            trend["slope_pct_per_week"] = round(float(slope / weekly.mean() * 100), 1)
+            if weekly[-2] > 0:
+                trend["last_week_change_pct"] = round(float((weekly[-1] / weekly[-2] - 1) * 100), 1)
+        return trend
+
+    def tonnage_by_week(self) -> np.ndarray:
+        return np.bincount(self._week, weights=self.tonnage, minlength=len(self.weeks))
+
+    def e1rm_by_week(self) -> np.ndarray:
+        """Best estimated 1RM per week (rows) and exercise (columns); NaN where not performed loaded."""
+        best = np.full((len(self.weeks), len(self.exercises)), -np.inf)
+        loaded = self.table["load_kg"] > 0
+        np.maximum.at(best, (self._week[loaded], self._exercise[loaded]), self.e1rm[loaded])
+        best[np.isneginf(best)] = np.nan
+        return best
+
+    def e1rm_summary(self) -> Dict[str, Dict[str, float]]:
+        """Per loaded exercise: best, first and latest weekly e1RM and the change between them."""
+        best = self.e1rm_by_week()
+        performed = ~np.isnan(best)
+        has_any = performed.any(axis=0)
+        if not has_any.any():
+            return {}
+        first = best[performed.argmax(axis=0), np.arange(best.shape[1])]
+        last = best[best.shape[0] - 1 - performed[::-1].argmax(axis=0), np.arange(best.shape[1])]
+        overall = np.nanmax(np.where(performed, best, -np.inf), axis=0)
+        summary = {}
+        for i in np.flatnonzero(has_any):
+            summary[str(self.exercises[i])] = {
+                "e1rm_kg": round(float(overall[i]), 1),
+                "first_kg": round(float(first[i]), 1),
+                "latest_kg": round(float(last[i]), 1),
+                "change_pct": round(float((last[i] / first[i] - 1) * 100), 1),
+            }
+        return summary
+
+    def imbalance_flags(self) -> List[str]:
+        flags = []
+        sets, _ = self.weekly_volume()
+        totals = dict(zip(self.muscles.tolist(), sets.sum(axis=0)))
+        push = sum(totals.get(m, 0.0) for m in PUSH)
+        pull = sum(totals.get(m, 0.0) for m in PULL)
+        if push and pull:
+            ratio = push / pull
+            if ratio > IMBALANCE_RATIO or ratio < 1 / IMBALANCE_RATIO:
+                flags.append(f"push:pull sets {ratio:.2f} ({push:.0f} push vs {pull:.0f} pull)")
+        elif push or pull:
+            flags.append(f"{'pull' if push else 'push'} work missing ({push:.0f} push vs {pull:.0f} pull sets)")
+        missing = [m for m in MUSCLES if not totals.get(m)]
+        if missing:
+            flags.append(f"not trained: {', '.join(missing)}")
+        if len(self.weeks) >= 2:
+            before, latest = sets[-2], sets[-1]
+            jumped = (before > 0) & (latest > before * (1 + VOLUME_JUMP))
+            for i in np.flatnonzero(jumped):
+                flags.append(f"{self.muscles[i]} sets up {(latest[i] / before[i] - 1) * 100:.0f}% "
+                             f"week over week ({before[i]:.0f} -> {latest[i]:.0f})")
+        return flags
+
+    def report(self) -> Dict[str, Any]:
+        """Everything above as JSON-ready figures."""
+        if not len(self.table):
+            return {"entries": 0, "weeks": [], "flags": ["no parsed exercise entries in this window"]}
+        sets, tonnage = self.weekly_volume()
+        muscles = self.muscles.tolist()
+        return {
+            "entries": int(len(self.table)),
+            "weeks": [{
+                "week_start": str(week),
+                "sets": {m: int(s) for m, s in zip(muscles, sets[w]) if s},
+                "tonnage_kg": {m: round(float(t), 1) for m, t in zip(muscles, tonnage[w]) if t},
+            } for w, week in enumerate(self.weeks)],
+            "tonnage_trend": self.tonnage_trend(),
+            "e1rm": self.e1rm_summary(),
+            "flags": self.imbalance_flags(),
+        }
+
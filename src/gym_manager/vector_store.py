@@ -0,0 +1,346 @@
+"""
+One vector store for the crew's knowledge and memories.
+
+The timetable PDF's chunks used to live in ./db (embedchain), short-term memories in ./memory
+and entity memories under crewai's app-data directory: three Chroma databases, each with its
+own SQLite file, segment cache and HNSW indexes to open and load. They are now namespaces
+(collections) of one Chroma database in storage/vectors/, opened once per process through
+get_vector_store() and shared by every reader and writer:
+
+- knowledge:  PDF chunks behind the semantic timetable search (PDFSearchTool)
+- short_term: crewai short-term memory (SharedRAGStorage)
+- entities:   crewai entity memory (SharedRAGStorage)
+
+Memories of a batch member live in that member's own collection of the namespace,
+"short_term.<member hash>" (member_namespace), so members never recall each other's notes.
+
+An item's id is the hash of its text (whitespace collapsed), so writing text a namespace
+already holds is a no-op, counted as a duplicate, rather than another vector to search.
+
+    python -m src.gym_manager.vector_store migrate [--dry-run]
+    python -m src.gym_manager.vector_store stats
+
+`migrate` copies the old stores into the shared one with their stored vectors, so nothing is
+re-embedded; running it again adds nothing. VECTOR_STORE_DIR moves the store.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from chromadb.config import Settings
+from crewai.memory.storage.rag_storage import RAGStorage
+
+from .members import member_hash
+from .resources import is_built, lazy_resource
+from .telemetry import record
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+STORAGE_DIR = os.path.join(os.path.dirname(__file__), "storage")
+VECTOR_DIR = os.getenv("VECTOR_STORE_DIR", os.path.join(STORAGE_DIR, "vectors"))
+
+KNOWLEDGE = "knowledge"
+SHORT_TERM = "short_term"
+ENTITIES = "entities"
+NAMESPACES = (KNOWLEDGE, SHORT_TERM, ENTITIES)
+BATCH_SIZE = 500
+# Chroma writes a collection's HNSW index to disk every `hnsw:sync_threshold` additions (1000 by
+# default) and replays the additions since then on the first query of each process. Memories
+# arrive a few at a time, so sync more often and keep that replay short.
+COLLECTION_METADATA = {"hnsw:sync_threshold": 100, "hnsw:batch_size": 100}
+
+
+def member_namespace(namespace: str, member: str) -> str:
+    """The member's collection of `namespace`; the "" member (single-member setup) uses the namespace itself."""
+    return f"{namespace}.{member_hash(member)}" if member else namespace
+
+
+def content_id(text: str) -> str:
+    return hashlib.sha256(" ".join((text or "").split()).encode()).hexdigest()
+
+
+def chroma_settings() -> Settings:
+    """
+    Settings every client of the store must open it with: Chroma keeps one system per path and
+    process and refuses a second client with different settings. These match what embedchain
+    builds from ChromaDbConfig(dir=..., allow_reset=True), so the PDF tool shares the system too.
+    """
+    return Settings(anonymized_telemetry=False, allow_reset=True)
+
+
+class VectorStore:
+    """Namespaced, content-deduplicated collections in one persistent Chroma database."""
+
+    def __init__(self, path: str = VECTOR_DIR, embedding_function=None):
+        import chromadb
+
+        if embedding_function is None:
+            from .embeddings import CachedEmbeddingFunction
+
+            embedding_function = CachedEmbeddingFunction()
+        self.path = path
+        self.embedding_function = embedding_function
+        os.makedirs(path, exist_ok=True)
+        self.client = chromadb.PersistentClient(path=path, settings=chroma_settings())
+        self._collections: Dict[str, Any] = {}
+        # embedchain dbs holding a knowledge handle (use_shared_store); re-pointed when it is replaced.
+        self._bound: "weakref.WeakSet" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._write_locks: Dict[str, threading.Lock] = {}  # namespace -> lock around its id check and insert
+        self._counts = {namespace: {"written": 0, "added": 0, "duplicates": 0} for namespace in NAMESPACES}
+
+    def collection(self, namespace: str):
+        if namespace.partition(".")[0] not in NAMESPACES:
+            raise ValueError(f"unknown namespace {namespace!r}; expected one of {', '.join(NAMESPACES)}")
+        with self._lock:
+            if namespace not in self._collections:
+                self._collections[namespace] = self.client.get_or_create_collection(
+                    namespace, metadata=COLLECTION_METADATA, embedding_function=self.embedding_function)
+            return self._collections[namespace]
+
+    def add(self, namespace: str, documents: Sequence[str], metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+            embeddings: Optional[Sequence[Sequence[float]]] = None) -> int:
+        """
+        Store the documents not already in `namespace`; returns how many were added. Vectors
+        are computed by the store's embedding function unless `embeddings` are given.
+        """
+        collection = self.collection(namespace)
+        fresh: Dict[str, int] = {}
+        for i, document in enumerate(documents):
+            fresh.setdefault(content_id(document), i)
+        # Only the new documents are embedded, and outside any lock: an embedding call can take
+        # seconds, and other namespaces' writes and every query would otherwise wait for it.
+        stored = self._existing(collection, list(fresh))
+        new = [(key, i) for key, i in fresh.items() if key not in stored]
+        vectors: Dict[str, Any] = {}
+        if embeddings is not None:
+            vectors = {key: list(embeddings[i]) for key, i in new}
+        elif new:
+            vectors = dict(zip([key for key, _ in new], self.embedding_function([documents[i] for _, i in new])))
+        with self._namespace_lock(namespace):
+            # Another writer may have added some of them while we were embedding.
+            existing = self._existing(collection, [key for key, _ in new])
+            keep = [(key, i) for key, i in new if key not in existing]
+            for start in range(0, len(keep), BATCH_SIZE):
+                batch = keep[start:start + BATCH_SIZE]
+                collection.add(
+                    ids=[key for key, _ in batch],
+                    documents=[documents[i] for _, i in batch],
+                    # Chroma rejects empty metadata dicts.
+                    metadatas=[(metadatas[i] if metadatas else None) or {"namespace": namespace} for _, i in batch],
+                    embeddings=[vectors[key] for key, _ in batch],
+                )
+        with self._lock:
+            counts = self._counts.setdefault(namespace, {"written": 0, "added": 0, "duplicates": 0})
+            counts["written"] += len(documents)
+            counts["added"] += len(keep)
+            counts["duplicates"] += len(documents) - len(keep)
+        return len(keep)
+
+    def _namespace_lock(self, namespace: str) -> threading.Lock:
+        with self._lock:
+            return self._write_locks.setdefault(namespace, threading.Lock())
+
+    @staticmethod
+    def _existing(collection, ids: List[str]) -> set:
+        existing = set()
+        for start in range(0, len(ids), BATCH_SIZE):
+            existing.update(collection.get(ids=ids[start:start + BATCH_SIZE], include=[])["ids"])
+        return existing
+
+    def query(self, namespace: str, text: str, limit: int = 3, where: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """The `limit` items nearest to `text`, closest first."""
+        collection = self.collection(namespace)
+        count = collection.count()
+        if not count:
+            return []
+        response = collection.query(query_texts=[text], n_results=min(limit, count), where=where)
+        return [{"id": i, "document": doc, "metadata": meta, "distance": dist} for i, doc, meta, dist in zip(
+            response["ids"][0], response["documents"][0], response["metadatas"][0], response["distances"][0])]
+
+    def clear(self, namespace: str) -> None:
+        """Empty one namespace; the others are untouched."""
+        self.collection(namespace)
+        with self._lock:
+            self.client.delete_collection(namespace)
+            self._collections[namespace] = self.client.create_collection(
+                namespace, metadata=COLLECTION_METADATA, embedding_function=self.embedding_function)
+        self._rebind()
+
+    def refresh(self) -> None:
+        """Forget the cached collection handles, after something else re-created the collections."""
+        with self._lock:
+            self._collections.clear()
+        self._rebind()
+
+    def _rebind(self) -> None:
+        for db in list(self._bound):
+            db.collection = self.collection(KNOWLEDGE)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Rows per namespace, and what this process wrote to each (`duplicates` were skipped)."""
+        rows = {namespace: self.collection(namespace).count() for namespace in NAMESPACES}
+        with self._lock:
+            return {namespace: {"rows": rows[namespace], **self._counts[namespace]} for namespace in NAMESPACES}
+
+
+@lazy_resource("vector_store")
+def get_vector_store() -> VectorStore:
+    return VectorStore()
+
+
+class SharedRAGStorage(RAGStorage):
+    """
+    crewai RAGStorage (for ShortTermMemory or EntityMemory) kept in the shared store's namespace
+    named after its `type`, with content-hash ids instead of a fresh uuid per save.
+    """
+
+    def __init__(self, type: str, store: Optional[VectorStore] = None, crew=None):
+        self.store = store
+        super().__init__(type, allow_reset=True, crew=crew)
+
+    def _store(self) -> VectorStore:
+        return self.store or get_vector_store()
+
+    def _initialize_app(self):
+        store = self._store()
+        self.app = store.client
+        self.collection = store.collection(self.type)
+
+    def _generate_embedding(self, text: str, metadata: Dict[str, Any]) -> None:
+        self._store().add(self.type, [text], [metadata or {}])
+
+    def search(self, query: str, limit: int = 3, filter: Optional[dict] = None,
+               score_threshold: float = 0.35) -> List[Any]:
+        self.collection = self._store().collection(self.type)  # cleared namespaces are re-created
+        return super().search(query, limit=limit, filter=filter, score_threshold=score_threshold)
+
+    def reset(self) -> None:
+        # RAGStorage.reset resets the whole client, which would empty every namespace.
+        self._store().clear(self.type)
+        self.collection = self._store().collection(self.type)
+
+
+def collections_replaced(path: str) -> None:
+    """
+    Tell the process's shared store that the collections at `path` were re-created outside it
+    (maintenance rebuilds), so its cached handles, which point at the dropped ones, are replaced.
+    """
+    if is_built("vector_store"):
+        store = get_vector_store()
+        if os.path.realpath(store.path) == os.path.realpath(path):
+            store.refresh()
+
+
+def embedchain_config(store: Optional[VectorStore] = None) -> Dict[str, Any]:
+    """embedchain `vectordb` config that puts an App's chunks in the knowledge namespace."""
+    store = store or get_vector_store()
+    store.collection(KNOWLEDGE)  # created by the store, with its metadata, before embedchain opens it
+    return {"provider": "chroma", "config": {"collection_name": KNOWLEDGE, "dir": store.path, "allow_reset": True}}
+
+
+def use_shared_store(app, store: Optional[VectorStore] = None) -> None:
+    """
+    Point an embedchain App built with `embedchain_config()` at the shared knowledge namespace:
+    its writes go through VectorStore.add, so a chunk already stored is not embedded again.
+    """
+    store = store or get_vector_store()
+    app.db.client = store.client
+    app.db.collection = store.collection(KNOWLEDGE)
+    store._bound.add(app.db)
+    app.db.add = lambda documents, metadatas, ids, **kwargs: store.add(KNOWLEDGE, documents, metadatas)
+
+
+def legacy_sources() -> List[Tuple[str, str, str]]:
+    """(path, collection, namespace) of every pre-consolidation store that may exist."""
+    from crewai.utilities.paths import db_storage_path
+
+    sources = [
+        (os.path.join(ROOT_DIR, "db"), "embedchain_store", KNOWLEDGE),
+        (os.path.join(ROOT_DIR, "memory"), "short_term", SHORT_TERM),
+    ]
+    # crewai's defaults: <app data>/<type>/<agent roles>/ for the crew-level memories.
+    for namespace in (SHORT_TERM, ENTITIES):
+        for path in sorted(glob.glob(os.path.join(db_storage_path(), namespace, "*", "chroma.sqlite3"))):
+            sources.append((os.path.dirname(path), namespace, namespace))
+    return sources
+
+
+def migrate(store: Optional[VectorStore] = None, sources: Optional[List[Tuple[str, str, str]]] = None,
+            dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Copy every legacy store's items, with their vectors, into the shared store. Content already
+    in the namespace is skipped. The legacy directories are left in place.
+    """
+    import chromadb
+    from chromadb.api.shared_system_client import SharedSystemClient
+
+    store = store or get_vector_store()
+    sources = legacy_sources() if sources is None else sources
+    report = {"dry_run": dry_run, "sources": []}
+    for path, name, namespace in sources:
+        entry: Dict[str, Any] = {"path": path, "collection": name, "namespace": namespace}
+        if not os.path.exists(os.path.join(path, "chroma.sqlite3")):
+            entry["status"] = "missing"
+            report["sources"].append(entry)
+            continue
+        started = time.perf_counter()
+        try:
+            existing = SharedSystemClient._identifier_to_system.get(path)
+            client = chromadb.PersistentClient(path=path, **({"settings": existing.settings} if existing else {}))
+            try:
+                collection = client.get_collection(name, embedding_function=None)
+            except Exception:
+                collection = None
+            read = added = 0
+            total = collection.count() if collection is not None else 0
+            for offset in range(0, total, BATCH_SIZE):
+                items = collection.get(limit=BATCH_SIZE, offset=offset, include=["embeddings", "documents", "metadatas"])
+                docs = [doc or "" for doc in items["documents"]]
+                read += len(docs)
+                if dry_run:
+                    ids = {content_id(doc) for doc in docs}
+                    added += len(ids - set(store.collection(namespace).get(ids=sorted(ids), include=[])["ids"]))
+                else:
+                    added += store.add(namespace, docs, items["metadatas"], embeddings=items["embeddings"])
+            entry.update(status="ok", read=read, added=added, duplicates=read - added)
+        except Exception as e:
+            entry.update(status="error", error=str(e))
+        entry["seconds"] = round(time.perf_counter() - started, 3)
+        record("vector_migrate", namespace, entry["seconds"], "error" if entry["status"] == "error" else "ok",
+               path=path, read=entry.get("read"), added=entry.get("added"))
+        report["sources"].append(entry)
+    return report
+
+
+def format_migration(report: Dict[str, Any]) -> str:
+    lines = []
+    for entry in report["sources"]:
+        where = f"{entry['path']} ({entry['collection']}) -> {entry['namespace']}"
+        if entry["status"] != "ok":
+            lines.append(f"{where}: {entry['status']}{': ' + entry['error'] if 'error' in entry else ''}")
+        else:
+            lines.append(f"{where}: {entry['read']} read, {entry['added']} added, {entry['duplicates']} duplicates")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="The shared vector store for knowledge and memories.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = sub.add_parser("migrate", help="copy the legacy Chroma stores into the shared one")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="only report what would be added")
+    sub.add_parser("stats", help="print rows per namespace")
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        print(format_migration(migrate(dry_run=args.dry_run)))
+    else:
+        print(json.dumps(get_vector_store().stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Shared fixtures. Tests never write to the app's storage/ directory: telemetry is off, and the
+caches, indexes and stores the app keeps there are pointed at each test's tmp_path. Tests that
+take `pool` get a SQLite stand-in for Postgres as the shared pool.
+"""
+import os
+import tempfile
+
+import pytest
+
+# Read once at import, so set before any test module imports the app.
+os.environ["VECTOR_STORE_DIR"] = os.path.join(tempfile.mkdtemp(prefix="gym_manager_tests_"), "vectors")
+
+
+@pytest.fixture(autouse=True)
+def isolated_storage(tmp_path, monkeypatch):
+    monkeypatch.setenv("TELEMETRY", "false")
+    monkeypatch.setenv("TELEMETRY_PATH", str(tmp_path / "telemetry.jsonl"))
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm_cache.db"))
+    monkeypatch.setenv("YOUTUBE_CACHE_PATH", str(tmp_path / "youtube_cache.db"))
+    monkeypatch.setenv("EMBEDDING_CACHE_DIR", str(tmp_path / "embeddings"))
+    monkeypatch.setenv("TIMETABLE_INDEX", str(tmp_path / "timetable_index.json"))
+
+
+@pytest.fixture
+def pool(tmp_path):
+    from src.gym_manager.fakes.postgres import SQLitePool
+    from src.gym_manager.tools import pg_pool
+
+    pool = SQLitePool(str(tmp_path / "db.sqlite"))
+    pg_pool.get_pool.override(pool)
+    yield pool
+    pg_pool.get_pool.reset()
+    pool.close()
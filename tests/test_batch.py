@@ -0,0 +1,113 @@
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.gym_manager.batch import BatchRunner, Member, load_roster, run_member
+from src.gym_manager.rate_limit import TokenBucket
+
+
+def _members(n):
+    return [Member(email=f"member{i}@example.com", goal="bulking") for i in range(n)]
+
+
+def test_runner_bounds_concurrency_and_isolates_failures(tmp_path):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def run_member(member, output_dir):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        if member.email.startswith("member3"):
+            raise RuntimeError("sheet unavailable")
+        Path(output_dir, "plan.md").write_text(member.goal)
+
+    report = BatchRunner(_members(8), run_member=run_member, max_concurrency=3,
+                         output_root=str(tmp_path), run_id="r1").run()
+
+    assert peak[0] <= 3
+    assert report["succeeded"] == 7 and report["failed"] == 1
+    assert report["members_per_minute"] > 0
+    assert (tmp_path / "member0_example_com" / "plan.md").read_text() == "bulking"
+
+
+def test_runner_resumes_after_crash(tmp_path):
+    calls = []
+    BatchRunner(_members(3), run_member=lambda m, d: calls.append(m.email),
+                output_root=str(tmp_path), run_id="r2").run()
+    # A torn final line (crash mid-write) is ignored.
+    with open(tmp_path / "batch" / "r2.jsonl", "a") as f:
+        f.write('{"member": "member9@exa')
+
+    calls.clear()
+    report = BatchRunner(_members(5), run_member=lambda m, d: calls.append(m.email),
+                         output_root=str(tmp_path), run_id="r2").run()
+    assert sorted(calls) == ["member3@example.com", "member4@example.com"]
+    assert report["skipped"] == 3
+
+
+def test_failed_members_are_retried_after_a_backoff(tmp_path, monkeypatch):
+    attempts, waits = [], []
+    monkeypatch.setattr(time, "sleep", waits.append)
+
+    def run_member(member, output_dir):
+        attempts.append(member.email)
+        if len(attempts) < 3:
+            raise ConnectionError("provider overloaded")
+
+    runner = BatchRunner(_members(1), run_member=run_member, output_root=str(tmp_path), run_id="r3",
+                         max_attempts=4, backoff=10.0)
+    report = runner.run()
+    assert report["succeeded"] == 1 and len(attempts) == 3
+    # Jittered between half and all of 10s, then 20s; no wait after the last attempt.
+    assert len(waits) == 2 and 5.0 <= waits[0] <= 10.0 and 10.0 <= waits[1] <= 20.0
+
+    waits.clear()
+    attempts.clear()
+    BatchRunner(_members(1), run_member=lambda m, d: 1 / 0, output_root=str(tmp_path), run_id="r4",
+                max_attempts=2, backoff=10.0).run()
+    assert len(waits) == 1
+
+
+def test_load_roster_csv(tmp_path):
+    roster = tmp_path / "roster.csv"
+    roster.write_text("email,goal,sheet_email\na@example.com,cutting,\nb@example.com,bulking,b@gmail.com\n")
+    members = load_roster(str(roster))
+    assert members[0].sheet_email is None
+    assert members[1].sheet_email == "b@gmail.com"
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    # One token up front, then five more at 50/s.
+    assert time.monotonic() - started >= 0.09
+
+
+def test_member_state_stays_out_of_the_reports_directory(tmp_path, monkeypatch):
+    from src.gym_manager import crew as crew_module
+
+    built = []
+
+    class FakeCrew:
+        tasks = []
+
+        def kickoff(self):
+            return "done"
+
+    def record(self):
+        built.append(self)
+        return FakeCrew()
+
+    monkeypatch.setenv("GOOGLE_SHEET_ID", "test-sheet")
+    monkeypatch.setattr(crew_module, "STORAGE_DIR", str(tmp_path / "storage"))
+    monkeypatch.setattr(crew_module.GymManagerCrew, "crew", record)
+    assert run_member(Member(email="A.B@example.com", goal="cutting"), str(tmp_path / "outputs" / "a_b_example_com")) == "done"
+    assert built[0].state_dir == str(tmp_path / "storage" / "members" / "a_b_example_com")
@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / "benchmarks"))
+
+from bench_pipeline import run_pipeline, summarize
+
+
+def test_pipeline_runs_offline_against_stand_ins():
+    report = run_pipeline(llm_latency=0, tool_latency=0, rows=20)
+
+    assert list(report["tasks"]) == [
+        "send_daily_survey_task", "summarize_responses_task", "review_pain_task",
+        "generate_workout_plan_task", "nutrition_plan_task", "chef_meal_plan_task",
+    ]
+    assert all(task["seconds"] is not None and not task.get("error") for task in report["tasks"].values())
+    # Form rows are ingested without the LLM: every new response becomes a row.
+    assert report["tasks"]["summarize_responses_task"]["tool_calls"] == {}
+    assert report["tasks"]["summarize_responses_task"]["llm_calls"] == 0
+    assert report["tool_calls"] == 8 and sum(t["tool_errors"] for t in report["tasks"].values()) == 0
+    assert report["stand_ins"]["emails_sent"] == 1
+    assert report["stand_ins"]["summary_rows"] == 20
+    assert report["stand_ins"]["serper_requests"] == 6
+    # The doctor and the trainer read the same latest summary; the second read is shared.
+    assert report["tool_memo"]["fetch_latest_summary_tool"] == {"calls": 2, "executed": 1, "deduped": 1, "shared": 0}
+
+    summary = summarize([report])
+    assert summary["total_seconds"] == report["total_seconds"]
+    assert summary["llm_calls"] == report["llm"]["calls"]
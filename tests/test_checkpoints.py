@@ -0,0 +1,129 @@
+import json
+import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+import pytest
+from crewai import Agent, Crew
+from pydantic import BaseModel
+
+from src.gym_manager.checkpoints import CheckpointStore, CheckpointedTask
+from src.gym_manager.fakes.llm import ScriptedLLM
+
+NAMES = ["summarize", "plan", "meals"]
+
+
+class Plan(BaseModel):
+    workout: str
+
+
+def build(store, llm, trainer_goal="plan workouts", summary_checkpoint=True, output_dir=None):
+    summarizer = Agent(role="Summarizer", goal="summarize", backstory="logs", llm=llm, verbose=False)
+    trainer = Agent(role="Gym Trainer", goal=trainer_goal, backstory="coach", llm=llm, verbose=False)
+    chef = Agent(role="Chef", goal="cook", backstory="chef", llm=llm, verbose=False)
+    summarize = CheckpointedTask(name="summarize", description="Summarize today.", expected_output="a summary",
+                                 agent=summarizer, checkpoint=summary_checkpoint)
+    plan = CheckpointedTask(name="plan", description="Plan tomorrow.", expected_output="a plan", agent=trainer,
+                            output_pydantic=Plan)
+    if output_dir:
+        plan.output_file = str(output_dir / "plan.json")  # as outputs.assign_output_files does
+    meals = CheckpointedTask(name="meals", description="Plan meals.", expected_output="meals", agent=chef)
+    tasks = [t.use_checkpoints(store) for t in (summarize, plan, meals)]
+    store.plan(NAMES)
+    return Crew(agents=[summarizer, trainer, chef], tasks=tasks)
+
+
+def scripts(summary="Chest day, bench 4x8."):
+    return {"summarize": ([], summary), "plan": ([], json.dumps({"workout": "Back and biceps"})),
+            "meals": ([], "Oats and eggs.")}
+
+
+def test_rerun_reuses_every_task_with_unchanged_inputs(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+    first = ScriptedLLM(scripts())
+    result = build(store, first).kickoff()
+    assert store.stats == {"reused": [], "ran": NAMES}
+
+    again = ScriptedLLM(scripts())
+    crew = build(store, again, output_dir=tmp_path)
+    rerun = crew.kickoff()
+    assert again.calls == 0 and store.stats == {"reused": NAMES, "ran": []}
+    assert rerun.raw == result.raw
+    # Restored outputs are the same typed outputs, and are still written to the task's file.
+    assert crew.tasks[1].output.pydantic == Plan(workout="Back and biceps")
+    assert json.loads((tmp_path / "plan.json").read_text()) == {"workout": "Back and biceps"}
+
+
+def test_changed_stage_reruns_itself_and_what_its_output_feeds(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+    build(store, ScriptedLLM(scripts())).kickoff()
+
+    # Editing the trainer's prompt reruns the plan; meals reruns because its context changed.
+    llm = ScriptedLLM({**scripts(), "plan": ([], json.dumps({"workout": "Legs"}))})
+    build(store, llm, trainer_goal="plan leg-focused workouts").kickoff()
+    assert store.stats == {"reused": ["summarize"], "ran": ["plan", "meals"]}
+
+    # A new summary (an uncheckpointed stage producing new input) invalidates everything after it.
+    llm = ScriptedLLM({**scripts("Rest day."), "plan": ([], json.dumps({"workout": "Legs"}))})
+    build(store, llm, trainer_goal="plan leg-focused workouts", summary_checkpoint=False).kickoff()
+    assert store.stats == {"reused": [], "ran": ["plan", "meals"]}
+    assert llm.calls_by_task == {"summarize": 1, "plan": 1, "meals": 1}
+
+
+def test_failed_run_resumes_at_the_failed_task(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+
+    class Flaky(ScriptedLLM):
+        def call(self, messages, *args, from_task=None, **kwargs):
+            if getattr(from_task, "name", None) == "meals":
+                raise RuntimeError("quota exceeded")
+            return super().call(messages, *args, from_task=from_task, **kwargs)
+
+    with pytest.raises(RuntimeError):
+        build(store, Flaky(scripts())).kickoff()
+    assert sorted(p.stem for p in (tmp_path / "checkpoints").glob("*.json")) == ["plan", "summarize"]
+
+    llm = ScriptedLLM(scripts())
+    build(store, llm).kickoff()
+    assert store.stats == {"reused": ["summarize", "plan"], "ran": ["meals"]}
+    assert llm.calls_by_task == {"meals": 1}
+
+
+def test_from_task_and_force_override_valid_checkpoints(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+    build(store, ScriptedLLM(scripts())).kickoff()
+
+    crew = build(store, ScriptedLLM(scripts()))
+    store.plan(NAMES, from_task="plan")
+    crew.kickoff()
+    assert store.stats == {"reused": ["summarize"], "ran": ["plan", "meals"]}
+
+    crew = build(store, ScriptedLLM(scripts()))
+    store.plan(NAMES, force=True)
+    crew.kickoff()
+    assert store.stats == {"reused": [], "ran": NAMES}
+
+    with pytest.raises(ValueError, match="Unknown task"):
+        store.plan(NAMES, from_task="nope")
+
+
+@pytest.mark.parametrize("fast_path", ["true", "false"])
+def test_the_summarizer_is_never_checkpointed(fast_path, monkeypatch):
+    # Its tools read new form responses, which the checkpoint key does not see.
+    from src.gym_manager import resources
+    from src.gym_manager.crew import GymManagerCrew
+
+    monkeypatch.setenv("SUMMARIZER_FAST_PATH", fast_path)
+    monkeypatch.setenv("GOOGLE_SHEET_ID", "test-sheet")
+    already_built = {name for name in resources._RESOURCES if resources.is_built(name)}
+    try:
+        crew = GymManagerCrew(goal="bulking", recipient_email="a@example.com")
+        assert crew.summarize_responses_task().checkpoint is False
+    finally:
+        # Building the task builds its agent's memories; undo that for the other tests.
+        for name, getter in list(resources._RESOURCES.items()):
+            if name not in already_built:
+                getter.reset()
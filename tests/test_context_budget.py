@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from crewai import Agent, Crew, Task
+
+from src.gym_manager.context_budget import (
+    DIVIDER, BudgetedAgent, ContextAssembler, MemoryItem, compact_output, estimate_tokens, recall,
+)
+from src.gym_manager.fakes.llm import ScriptedLLM
+
+
+NUTRITION = json.dumps({
+    "date": "2026-10-18T00:00:00",
+    "dietary_restrictions": "Vegetarian. " * 40,
+    "nutrition_plan": "Eat 160g protein across four meals. " * 60,
+    "youtube_links": ["https://youtube.com/watch?v=a", "https://youtube.com/watch?v=b"],
+})
+
+
+def test_structured_outputs_keep_their_keys_when_compacted():
+    compact = json.loads(compact_output(NUTRITION, 120))
+    assert set(compact) == {"date", "dietary_restrictions", "nutrition_plan"}  # links dropped
+    assert compact["nutrition_plan"].startswith("Eat 160g protein") and compact["nutrition_plan"].endswith("…")
+    assert estimate_tokens(json.dumps(compact)) <= 140
+    assert compact_output("short", 120) == "short"
+
+
+def test_memory_is_ranked_clipped_and_fitted_to_the_budget():
+    now = datetime.now()
+    memory = [
+        MemoryItem("Paneer tikka with mint chutney, 2 rotis. " * 10, "long_term", 1.0, now - timedelta(days=1)),
+        MemoryItem("Rajma chawal with curd.", "long_term", 1.0, now - timedelta(days=6), row=1),
+        MemoryItem("Member dislikes mushrooms.", "entity", 0.9),
+        MemoryItem("Rajma chawal with curd.", "short_term", 0.8, now - timedelta(days=6)),
+        MemoryItem("Unrelated squat cue.", "short_term", 0.1, now - timedelta(days=20)),
+    ]
+    assembler = ContextAssembler()
+    context = assembler.assemble(300, "Avoid repeating dishes.", NUTRITION, memory, agent="Chef")
+
+    parts = context.split(DIVIDER)
+    assert parts[0] == "Avoid repeating dishes." and json.loads(parts[1])["nutrition_plan"]
+    lines = parts[-1].splitlines()[1:]
+    # Most relevant and recent first, one clipped line each, duplicates once.
+    assert lines[0].startswith("- Paneer tikka") and lines[0].endswith("…") and estimate_tokens(lines[0]) <= 62
+    assert lines[1:] == ["- Member dislikes mushrooms.", "- Rajma chawal with curd.", "- Unrelated squat cue."]
+    assert estimate_tokens(context) <= 300
+
+    # With less room, items that do not fit are dropped and smaller ones fill what is left.
+    tight = assembler.assemble(20, None, None, memory, agent="Chef")
+    assert tight.splitlines()[1:] == ["- Member dislikes mushrooms.", "- Unrelated squat cue."]
+
+    stats = assembler.stats()
+    assert stats["assemblies"] == 2 and stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"] > 500
+
+
+def test_recall_reads_every_crew_store():
+    stored = datetime(2026, 10, 17, 9, 0).timestamp()
+    crew = SimpleNamespace(
+        _short_term_memory=SimpleNamespace(search=lambda q, limit: [{"context": "Dal makhani", "score": 0.2, "metadata": {}}]),
+        _long_term_memory=SimpleNamespace(search=lambda q, latest_n: [
+            {"metadata": {"suggestions": ["Vary dals", "More greens"]}, "datetime": str(stored), "score": 8}]),
+        _entity_memory=None,
+    )
+    items = recall(crew, SimpleNamespace(description="Plan meals."), "Plan meals.")
+    assert [(i.text, i.source) for i in items] == [
+        ("Dal makhani", "short_term"), ("Vary dals", "long_term"), ("More greens", "long_term")]
+    assert items[1].when == datetime(2026, 10, 17, 9, 0)
+
+
+class RecordingLLM(ScriptedLLM):
+    def call(self, messages, *args, from_task=None, **kwargs):
+        self.prompts = {**getattr(self, "prompts", {}), getattr(from_task, "name", None): str(messages)}
+        return super().call(messages, *args, from_task=from_task, **kwargs)
+
+
+def test_budgeted_agent_sends_a_smaller_prompt():
+    def run(agent_class, **extra):
+        llm = RecordingLLM({"nutrition": ([], NUTRITION), "meals": ([], "Oats, dal, paneer.")})
+        nutritionist = Agent(role="Nutritionist", goal="plan", backstory="rd", llm=llm, verbose=False)
+        chef = agent_class(role="Chef", goal="cook", backstory="chef", llm=llm, verbose=False, **extra)
+        nutrition = Task(name="nutrition", description="Plan nutrition.", expected_output="plan", agent=nutritionist)
+        meals = Task(name="meals", description="Plan meals.", expected_output="meals", agent=chef, context=[nutrition])
+        Crew(agents=[nutritionist, chef], tasks=[nutrition, meals]).kickoff()
+        return llm
+
+    full = run(Agent)
+    budgeted = run(BudgetedAgent, context_budget=200, guidance="Avoid repeating dishes.")
+    assert budgeted.calls == full.calls
+    assert budgeted.prompt_tokens < full.prompt_tokens - 400
+    assert "Avoid repeating dishes." in budgeted.prompts["meals"] and "youtube" not in budgeted.prompts["meals"]
+    assert "youtube" in full.prompts["meals"]
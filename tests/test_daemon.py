@@ -0,0 +1,126 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.gym_manager.daemon import Daemon, request
+
+
+def serve_in_background(daemon):
+    loop = asyncio.new_event_loop()
+    stop = asyncio.Event()
+    thread = threading.Thread(target=lambda: loop.run_until_complete(daemon.serve(stop)), daemon=True)
+    thread.start()
+    deadline = time.time() + 5
+    while not Path(daemon.socket_path).exists() and time.time() < deadline:
+        time.sleep(0.01)
+
+    def shutdown():
+        loop.call_soon_threadsafe(stop.set)
+        thread.join(5)
+    return shutdown
+
+
+def wait_for(sock, run, status="ok"):
+    deadline = time.time() + 5
+    while request("GET", f"/runs/{run['id']}", socket_path=sock)[1]["status"] != status:
+        assert time.time() < deadline
+        time.sleep(0.02)
+
+
+def test_jobs_run_side_by_side_but_never_overlap_themselves(tmp_path):
+    active = {"pipeline": 0, "maintenance": 0, "survey": 0}
+    overlaps = dict(active)
+    release = {job: threading.Event() for job in active}
+    lock = threading.Lock()
+
+    def job(name):
+        def run():
+            with lock:
+                active[name] += 1
+                overlaps[name] = max(overlaps[name], active[name])
+            release[name].wait(5)
+            with lock:
+                active[name] -= 1
+        return run
+
+    sock = str(tmp_path / "d.sock")
+    daemon = Daemon({name: job(name) for name in active}, socket_path=sock, exclusive=[("pipeline", "maintenance")])
+    shutdown = serve_in_background(daemon)
+    try:
+        status, first = request("POST", "/run/pipeline", socket_path=sock)
+        assert status == 202
+        wait_for(sock, first, "running")
+        # While the pipeline runs, the endpoint answers and the survey starts at once.
+        survey = request("POST", "/run/survey", socket_path=sock)[1]
+        wait_for(sock, survey, "running")
+        # Maintenance is exclusive of the pipeline, and a second pipeline run waits for the first.
+        second = request("POST", "/run/maintenance", socket_path=sock)[1]
+        third = request("POST", "/run/pipeline", socket_path=sock)[1]
+        again = request("POST", "/run/pipeline", socket_path=sock)[1]
+        assert again["id"] == third["id"]  # already queued, not queued twice
+
+        status = request("GET", "/status", socket_path=sock)[1]
+        assert sorted(r["job"] for r in status["running"]) == ["pipeline", "survey"] and status["queue_depth"] == 2
+        assert [r["job"] for r in status["queued"]] == ["maintenance", "pipeline"]
+
+        release["survey"].set()
+        wait_for(sock, survey)
+        release["pipeline"].set()
+        wait_for(sock, first)
+        release["maintenance"].set()
+        wait_for(sock, second)
+        wait_for(sock, third)
+        status = request("GET", "/status", socket_path=sock)[1]
+        assert overlaps == {"pipeline": 1, "maintenance": 1, "survey": 1}
+        assert status["queue_depth"] == 0 and status["max_queue_depth"] == 2 and status["running"] == []
+        assert status["jobs"]["pipeline"]["runs"] == 2 and status["jobs"]["pipeline"]["wait_p95"] > 0
+        assert request("GET", f"/runs/{second['id']}", socket_path=sock)[1]["wait_seconds"] > 0
+        assert request("POST", "/run/nope", socket_path=sock)[0] == 404
+    finally:
+        for event in release.values():
+            event.set()
+        shutdown()
+    assert not Path(sock).exists()
+
+
+def test_failed_jobs_are_reported_and_scheduled_jobs_enqueue(tmp_path):
+    def broken():
+        raise RuntimeError("sheet unavailable")
+
+    daemon = Daemon({"survey": broken}, schedule_at={"survey": "18:00"}, socket_path=str(tmp_path / "d.sock"))
+    assert list(daemon.status()["next_scheduled"]) == ["survey"]
+    daemon.scheduler.jobs[0].run()  # what the scheduler does at 18:00
+    assert daemon.status()["queue_depth"] == 1
+
+    async def drain():
+        stop = asyncio.Event()
+        server = asyncio.create_task(daemon.serve(stop))
+        while not daemon.finished:
+            await asyncio.sleep(0.01)
+        stop.set()
+        await server
+
+    asyncio.run(drain())
+    (run,) = daemon.finished
+    assert run.status == "error" and run.error == "sheet unavailable" and run.source == "schedule"
+    assert daemon.status()["jobs"]["survey"]["errors"] == 1
+
+
+def test_pipeline_crew_leaves_the_survey_to_the_survey_queue(monkeypatch):
+    from src.gym_manager import main
+
+    class RecordingCrew:
+        built = []
+
+        def __init__(self, **kwargs):
+            self.built.append(kwargs)
+
+        def crew(self):
+            return "crew"
+
+    monkeypatch.setattr(main, "GymManagerCrew", RecordingCrew)
+    assert main.get_crew.__wrapped__() == "crew"
+    assert RecordingCrew.built[0]["include_survey"] is False
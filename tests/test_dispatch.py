@@ -0,0 +1,80 @@
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.gym_manager.dispatch import SurveyDispatcher, SurveyQueue, dispatch_surveys
+from src.gym_manager.fakes.gmail import FakeGmailSender
+from src.gym_manager.tools.survey_email_template import render_survey_email
+
+
+def roster(n):
+    return [(f"member{i}@example.com", None, None) for i in range(n)]
+
+
+def test_each_member_gets_one_survey_per_day(tmp_path):
+    sender = FakeGmailSender()
+    queue_path = str(tmp_path / "queue.db")
+    first = dispatch_surveys(roster(5), sender, day="2026-10-18", queue_path=queue_path)
+    assert first["queued"] == 5 and first["sent"] == 5
+
+    # A second dispatch the same day (a daemon restart, a manual trigger) sends nothing.
+    again = dispatch_surveys(roster(5) + [("Member0@example.com", None, None)], sender,
+                             day="2026-10-18", queue_path=queue_path)
+    assert again["queued"] == 0 and again["duplicates"] == 6 and again["sent"] == 0
+    assert len(sender.sent) == 5
+
+    tomorrow = dispatch_surveys(roster(5), sender, day="2026-10-19", queue_path=queue_path)
+    assert tomorrow["sent"] == 5
+
+
+def test_bodies_are_rendered_per_member(tmp_path, monkeypatch):
+    import src.gym_manager.dispatch as dispatch
+
+    monkeypatch.setattr(dispatch, "render_survey_email",
+                        lambda email, name=None: render_survey_email(email, name, "https://f.example/form", "entry.1"))
+    sender = FakeGmailSender()
+    dispatch_surveys([("a@example.com", "a.sheet@example.com", "Ann"), ("b@example.com", None, None)],
+                     sender, day="2026-10-18", queue_path=str(tmp_path / "queue.db"))
+    bodies = {m["recipient_email"]: m["body"] for m in sender.sent}
+    assert "entry.1=a.sheet%40example.com" in bodies["a@example.com"] and "Hi Ann!" in bodies["a@example.com"]
+    assert "entry.1=b%40example.com" in bodies["b@example.com"]
+    assert all(m["is_html"] for m in sender.sent)
+
+
+def test_failed_sends_are_retried_then_given_up(tmp_path):
+    sender = FakeGmailSender(fail_times={"member0@example.com": 2, "member1@example.com": 10})
+    report = dispatch_surveys(roster(3), sender, day="2026-10-18", queue_path=str(tmp_path / "queue.db"),
+                              max_attempts=3, backoff=0.01)
+    assert report["sent"] == 2 and report["failed"] == 1
+    assert report["retries"] == 4  # member0 twice, member1 twice before its third and last failure
+    assert report["status"] == {"sent": 2, "failed": 1}
+
+    queue = SurveyQueue(str(tmp_path / "queue.db"))
+    failed = queue._conn.execute("SELECT email, attempts, last_error FROM survey_outbox WHERE status = 'failed'").fetchall()
+    assert [tuple(r) for r in failed] == [("member1@example.com", 3, "429 Too Many Requests")]
+
+
+def test_expired_leases_are_reclaimed(tmp_path):
+    queue = SurveyQueue(str(tmp_path / "queue.db"))
+    queue.enqueue(roster(2), day="2026-10-18")
+    assert len(queue.claim(10, lease=0.05)) == 2  # a dispatcher that died mid-send
+    assert queue.claim(10) == []
+    time.sleep(0.1)
+    report = SurveyDispatcher(queue, FakeGmailSender()).run()
+    assert report["sent"] == 2
+
+
+def test_concurrency_and_rate_bound_throughput(tmp_path):
+    sender = FakeGmailSender(latency=0.05)
+    # 40 sends of 50ms each: about 2s one at a time, about 0.25s with 8 workers.
+    report = dispatch_surveys(roster(40), sender, day="2026-10-18", queue_path=str(tmp_path / "a.db"),
+                              rate_per_second=1000, concurrency=8)
+    assert report["sent"] == 40 and report["seconds"] < 1.0
+
+    # The token bucket caps the send rate whatever the concurrency: after a burst of one send per
+    # worker, the other 32 go out at 50/s.
+    report = dispatch_surveys(roster(40), FakeGmailSender(), day="2026-10-18", queue_path=str(tmp_path / "b.db"),
+                              rate_per_second=50, concurrency=8)
+    assert report["sent"] == 40 and report["seconds"] >= 32 / 50 * 0.95
+    assert report["rate_limited_seconds"] > 0
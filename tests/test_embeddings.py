@@ -0,0 +1,112 @@
+import sys
+import threading
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.gym_manager.embeddings import CachedEmbeddingFunction, EmbeddingService, EmbeddingStore
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+
+def _service(tmp_path, embedder, **kwargs):
+    return EmbeddingService(embedder, EmbeddingStore(str(tmp_path / "store")), model="test-model", **kwargs)
+
+
+def test_repeated_texts_are_served_from_disk(tmp_path):
+    embedder = FakeEmbedder()
+    service = _service(tmp_path, embedder)
+    first = service.embed(["squat", "bench", "squat"])
+    assert first[0] == first[2]
+    assert embedder.calls == [["squat", "bench"]]
+
+    # A new process reuses the memory-mapped vectors without calling the model.
+    fresh = _service(tmp_path, embedder)
+    assert fresh.embed(["bench", "squat"]) == [first[1], first[0]]
+    assert len(embedder.calls) == 1
+    assert fresh.stats()["cache_hits"] == 2 and fresh.stats()["calls_saved"] == 2
+
+
+def test_concurrent_requests_share_one_call(tmp_path):
+    embedder = FakeEmbedder()
+    service = _service(tmp_path, embedder, batch_window=0.1)
+    barrier = threading.Barrier(5)
+
+    def worker(i):
+        barrier.wait()
+        service.embed([f"memory {i}", "shared text"])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(embedder.calls) == 1
+    assert sorted(embedder.calls[0]) == sorted([f"memory {i}" for i in range(5)] + ["shared text"])
+    assert service.stats()["calls_saved"] == 9
+
+
+def test_batches_are_split_by_size_and_errors_propagate(tmp_path):
+    embedder = FakeEmbedder()
+    service = _service(tmp_path, embedder, batch_size=2)
+    service.embed(["a", "b", "c", "d", "e"])
+    assert [len(c) for c in embedder.calls] == [2, 2, 1]
+
+    def broken(texts):
+        raise RuntimeError("quota exceeded")
+
+    failing = _service(tmp_path, broken)
+    with pytest.raises(RuntimeError):
+        failing.embed(["never seen"])
+    assert failing.embed(["a"]) == service.embed(["a"])
+
+
+def test_torn_write_is_trimmed_on_load(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store"))
+    store.put_many({"k1": [1.0, 2.0], "k2": [3.0, 4.0]})
+    with open(store.vectors_path, "ab") as f:
+        f.write(b"\x00\x00")
+    reloaded = EmbeddingStore(str(tmp_path / "store"))
+    assert reloaded.get_many(["k1", "k2"]) == {"k1": [1.0, 2.0], "k2": [3.0, 4.0]}
+
+
+def test_handles_on_one_directory_agree_on_rows(tmp_path):
+    # E.g. the daemon and a batch run appending to the same store.
+    a = EmbeddingStore(str(tmp_path / "store"))
+    b = EmbeddingStore(str(tmp_path / "store"))
+    a.put_many({"ka": [1.0, 1.0]})
+    b.put_many({"kb": [2.0, 2.0]})
+    a.put_many({"kc": [3.0, 3.0]})
+    b.put_many({"ka": [9.0, 9.0]})  # already stored by the other handle
+
+    expected = {"ka": [1.0, 1.0], "kb": [2.0, 2.0], "kc": [3.0, 3.0]}
+    assert a.get_many(["ka", "kb", "kc"]) == expected
+    assert b.get_many(["ka", "kb", "kc"]) == expected
+    assert EmbeddingStore(str(tmp_path / "store")).get_many(["ka", "kb", "kc"]) == expected
+    assert len(b) == 3
+
+
+def test_crewai_rag_storage_accepts_the_cached_embedder(tmp_path, monkeypatch):
+    from crewai.memory.storage.rag_storage import RAGStorage
+
+    monkeypatch.chdir(tmp_path)
+    embedder = FakeEmbedder()
+    service = _service(tmp_path, embedder)
+    storage = RAGStorage(
+        type="short_term",
+        embedder_config={"provider": "custom", "config": {"embedder": CachedEmbeddingFunction(service)}},
+        path=str(tmp_path / "memory"),
+    )
+    storage.save("Knee ache after squats", {"agent": "doctor"})
+    storage.save("Knee ache after squats", {"agent": "doctor"})
+    assert storage.search("knee pain", score_threshold=0)
+    assert sum(len(c) for c in embedder.calls) == 2
@@ -0,0 +1,184 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.gym_manager.fakes.llm_endpoint import FakeLLMEndpoint
+from src.gym_manager.gateway import BATCH, INTERACTIVE, GatewayTimeout, LLMGateway, Quota, format_metrics, get_gateway
+from src.gym_manager.llm import GymLLM, use_gateway_llm
+
+MESSAGES = [{"role": "user", "content": "Plan tomorrow's leg day."}]
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+def gym_llm(endpoint, **kwargs):
+    return GymLLM(model="openai/fake", base_url=endpoint.base_url, api_key="test", stream=False, **kwargs)
+
+
+@pytest.fixture
+def gateway():
+    gateway = LLMGateway(base_delay=0.01, max_delay=0.05)
+    get_gateway.override(gateway)
+    yield gateway
+    get_gateway.reset()
+
+
+def test_gym_llm_retries_429s_until_the_endpoint_answers(gateway):
+    with FakeLLMEndpoint(rpm=3, window=0.5, retry_after=0.1) as endpoint:
+        llm = gym_llm(endpoint)
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            answers = list(pool.map(lambda _: llm.call(MESSAGES), range(6)))
+
+    assert answers == ["Final Answer: ok"] * 6 and endpoint.served == 6 and endpoint.throttled > 0
+    m = gateway.metrics()["openai/fake"]
+    assert m["succeeded"] == 6 and m["failed"] == 0
+    assert m["throttled"] == endpoint.throttled and m["retries"] == m["throttled"]
+    assert m["limit_decreases"] >= 1 and m["concurrency_limit"] < 4
+
+
+def test_configured_quota_paces_requests_without_429s():
+    gateway = LLMGateway({"openai/fake": Quota(rpm=60)})  # one a second
+    get_gateway.override(gateway)
+    try:
+        with FakeLLMEndpoint(rpm=2, window=1.0) as endpoint:
+            llm = gym_llm(endpoint)
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=3) as pool:
+                list(pool.map(lambda _: llm.call(MESSAGES), range(3)))
+            elapsed = time.monotonic() - started
+    finally:
+        get_gateway.reset()
+
+    assert endpoint.throttled == 0 and elapsed >= 1.9
+    m = gateway.metrics()["openai/fake"]
+    assert m["achieved_rpm"] > 0 and m["rpm_utilization"] == pytest.approx(m["achieved_rpm"] / 60, abs=0.01)
+    assert m["tokens"] > 0 and m["quota"]["rpm"] == 60
+    assert format_metrics(gateway.metrics()).startswith("openai/fake: 3/3 calls")
+
+
+def test_concurrency_grows_on_fast_successes_and_halves_on_429s():
+    gateway = LLMGateway(initial_concurrency=2, base_delay=0.01)
+    lane = gateway.lane("m")
+    for _ in range(4):
+        gateway.call("m", lambda: "ok")
+    assert lane.limit > 3
+
+    answers = iter([Throttled("slow down"), "ok"])
+
+    def flaky():
+        answer = next(answers)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    before = lane.limit
+    assert gateway.call("m", flaky) == "ok"
+    assert lane.limit < before * 0.6 + 1
+    assert lane.stats["limit_decreases"] == 1 and lane.stats["retries"] == 1
+
+
+def test_slow_answers_count_as_congestion():
+    gateway = LLMGateway(initial_concurrency=4, latency_target=0.01)
+    gateway.call("m", lambda: time.sleep(0.03))
+    assert gateway.lane("m").limit == 2
+
+
+def test_interactive_calls_go_before_queued_batch_calls():
+    gateway = LLMGateway(initial_concurrency=1)
+    gate = threading.Event()
+    order = []
+
+    def call(priority, label, wait=False):
+        def fn():
+            if wait:
+                gate.wait(2)
+            order.append(label)
+        gateway.call("m", fn, priority=priority)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        pool.submit(call, BATCH, "first", True)
+        time.sleep(0.05)
+        pool.submit(call, BATCH, "batch")
+        time.sleep(0.05)
+        pool.submit(call, INTERACTIVE, "interactive")
+        time.sleep(0.05)
+        gate.set()
+
+    assert order == ["first", "interactive", "batch"]
+
+
+def test_calls_that_cannot_start_before_their_deadline_time_out():
+    gateway = LLMGateway(initial_concurrency=1)
+    gate = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(gateway.call, "m", lambda: gate.wait(2))
+        time.sleep(0.05)
+        with pytest.raises(GatewayTimeout):
+            gateway.call("m", lambda: "late", deadline=0.1)
+        gate.set()
+    assert gateway.lane("m").stats["timeouts"] == 1
+
+    def always_throttled():
+        raise Throttled("quota exhausted")
+
+    with pytest.raises(GatewayTimeout):
+        LLMGateway(base_delay=0.05).call("m", always_throttled, deadline=0.2)
+
+
+def test_other_errors_are_raised_at_once():
+    gateway = LLMGateway()
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        gateway.call("m", broken)
+    assert calls == [1] and gateway.metrics()["m"]["failed"] == 1
+
+
+def test_provider_limit_is_shared_by_its_models_and_not_counted_as_latency():
+    gateway = LLMGateway(provider_limits={"gemini": 120})  # two a second, across models
+    started = time.monotonic()
+    for model in ["gemini/flash", "gemini/pro", "gemini/flash", "gemini/pro", "other/model"]:
+        gateway.call(model, lambda: "ok")
+    elapsed = time.monotonic() - started
+
+    assert 0.9 <= elapsed < 2.0  # four gemini calls: two from the burst, then one per half second
+    m = gateway.metrics()
+    assert m["gemini/flash"]["latency_p95"] < 0.1 and m["gemini/pro"]["latency_p95"] < 0.1
+    assert m["gemini/pro"]["queue_seconds_p95"] > 0.3
+
+    gateway.set_provider_limit("gemini", None)
+    started = time.monotonic()
+    for _ in range(5):
+        gateway.call("gemini/flash", lambda: "ok")
+    assert time.monotonic() - started < 0.5
+
+
+def test_pdf_search_and_embedding_calls_go_through_the_gateway(gateway, monkeypatch):
+    import google.generativeai as genai
+    from src.gym_manager.embeddings import google_embed_batch
+
+    class FakeEmbedchainLlm:
+        def get_llm_model_answer(self, prompt):
+            return f"answer to {prompt}"
+
+    app = type("App", (), {"llm": FakeEmbedchainLlm()})()
+    use_gateway_llm(app, "gemini/gemini-2.5-flash")
+    assert app.llm.get_llm_model_answer("when is yoga?") == "answer to when is yoga?"
+
+    monkeypatch.setattr(genai, "configure", lambda **kwargs: None)
+    monkeypatch.setattr(genai, "embed_content", lambda model, content, task_type: {"embedding": [[1.0]] * len(content)})
+    assert google_embed_batch()(["squat", "bench"]) == [[1.0], [1.0]]
+
+    m = gateway.metrics()
+    assert m["gemini/gemini-2.5-flash"]["succeeded"] == 1 and m["gemini/gemini-embedding-001"]["succeeded"] == 1
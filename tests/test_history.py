@@ -0,0 +1,76 @@
+import json
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.gym_manager.fakes.sheets import make_form_rows
+from src.gym_manager.ingest import summary_from_response, to_db_row
+from src.gym_manager.members import member_scope
+from src.gym_manager.tools import pg_tool
+from src.gym_manager.tools.sheets_fetch import structure_response
+
+
+def load_days(count):
+    # 2024-01-01 is a Monday; every 7th day is a rest day and every 5th training day has pain.
+    rows = [to_db_row(summary_from_response(structure_response(r))) for r in make_form_rows(count)[1:]]
+    return pg_tool.upsert_summaries(rows)
+
+
+def test_window_returns_days_and_weekly_rollups(pool):
+    load_days(21)
+
+    history = pg_tool.fetch_history(days=7, end_date="2024-01-21")
+    assert [d["date"] for d in history["days"]] == [f"2024-01-{d}" for d in range(15, 22)]
+    assert history["days"][-1] == {"date": "2024-01-21", "gym": False}
+    assert history["weeks"] == [{
+        "week_start": "2024-01-15", "days_logged": 7, "sessions": 6, "pain_days": 1,
+        "muscle_groups": {m: 1 for m in ["Chest", "Back", "Legs", "Shoulders", "Arms", "Core"]},
+        "pain": "2024-01-16: Mild ache in the left knee after squats",
+    }]
+
+    ranged = pg_tool.fetch_history(start_date="2024-01-03", end_date="2024-01-09", include_days=False)
+    assert "days" not in ranged and [w["week_start"] for w in ranged["weeks"]] == ["2024-01-01", "2024-01-08"]
+
+
+def test_rollups_follow_each_upsert(pool):
+    load_days(3)
+    assert pg_tool.fetch_history(end_date="2024-01-07")["weeks"][0]["sessions"] == 3
+
+    pg_tool.upsert_summaries([{"date": "2024-01-02", "gym": False, "muscle_trained": "None",
+                               "summary": "Rest day.", "pain_experienced": False, "pain_details": ""}])
+    (week,) = pg_tool.fetch_history(end_date="2024-01-07")["weeks"]
+    assert week["sessions"] == 2 and week["days_logged"] == 3 and week["muscle_groups"] == {"Chest": 1, "Legs": 1}
+
+
+def test_history_tool_is_compact_json(pool):
+    load_days(14)
+    out = json.loads(pg_tool.fetch_workout_history_tool.run(days=14, end_date="2024-01-14", weeks_only=True))
+    assert [w["sessions"] for w in out["weeks"]] == [6, 6] and "days" not in out
+
+
+def test_latest_summary_prepares_the_schema_first(pool):
+    # The first tool a run calls may be this one, on a database the member migration has not touched.
+    assert pg_tool.fetch_latest_summary_tool.run() == "No summaries found."
+    assert pool in pg_tool._SCHEMA_READY
+
+
+def test_members_keep_separate_histories(pool):
+    legs = {"date": "2024-01-02", "gym": True, "muscle_trained": "Legs", "summary": "Squats",
+            "pain_experienced": True, "pain_details": "Left knee sore on squats"}
+    rest = {"date": "2024-01-02", "gym": False, "muscle_trained": "None", "summary": "Rest day.",
+            "pain_experienced": False, "pain_details": ""}
+    with member_scope("A@example.com "):
+        pg_tool.upsert_summaries([legs])
+    with member_scope("b@example.com"):
+        pg_tool.upsert_summaries([rest])
+        assert pg_tool.fetch_latest_summary_tool.run()["summary"] == "Rest day."
+        assert pg_tool.fetch_pain_history()["trends"] == []
+
+    assert len(pool.rows()) == 2  # the same day, once per member
+    a = pg_tool.fetch_history(end_date="2024-01-07", member="a@example.com")
+    b = pg_tool.fetch_history(end_date="2024-01-07", member="b@example.com")
+    assert a["weeks"][0]["sessions"] == 1 and b["weeks"][0]["sessions"] == 0
+    assert [d.get("pain") for d in b["days"]] == [None]
+    assert [t["location"] for t in pg_tool.fetch_pain_history(member="a@example.com")["trends"]] == ["left knee"]
+    assert pg_tool.fetch_history(end_date="2024-01-07")["days"] == []  # nothing under the single-member key
+    assert sorted(pg_tool.fetch_members()) == ["a@example.com", "b@example.com"]
@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.gym_manager.crew import summary
+from src.gym_manager.fakes.sheets import FakeSheetsService, make_form_rows
+from src.gym_manager.ingest import SUMMARY_TEXT_LIMIT, ingest_responses, summary_from_response
+from src.gym_manager.tools.form_response import FormResponseFetchTool
+from src.gym_manager.tools.sheets_fetch import GoogleSheetsFetchTool, structure_response
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def call(self, messages, **kwargs):
+        self.calls += 1
+        return "Long push session, bench and dips."
+
+
+def fetch_tool(service, tmp_path):
+    return FormResponseFetchTool(sheets_tool=GoogleSheetsFetchTool(
+        service=service, sheet_id="s", watermark_path=str(tmp_path / "wm.json"), incremental=True,
+        defer_watermark=True,
+    ))
+
+
+def test_form_row_maps_onto_the_summary_model():
+    rows = make_form_rows(7)
+    trained = summary_from_response(structure_response(rows[1]))
+    assert summary.model_validate(trained)
+    assert trained["went_to_gym"] and trained["pain_experienced"]
+    assert trained["muscle_trained"] == "Chest"
+    assert trained["summary"] == "Chest session: Bench 4x8 @60kg, Row 3x10 @50kg. Cardio done."
+    assert trained["pain_details"] == "Mild ache in the left knee after squats"
+
+    rest = summary_from_response(structure_response(rows[7]))
+    assert not rest["went_to_gym"] and rest["summary"] == "Rest day, with cardio."
+    assert summary_from_response({"timestamp": "not a date"}) is None
+
+
+def test_new_responses_are_upserted_once_per_day_without_the_llm(tmp_path, pool):
+    service = FakeSheetsService(make_form_rows(10))
+    tool = fetch_tool(service, tmp_path)
+    llm = CountingLLM()
+
+    result = ingest_responses(tool, llm=llm)
+    assert result["rows_written"] == 10 and llm.calls == 0
+    assert result["summary"]["date"].date().isoformat() == "2024-01-10"
+
+    # Only rows after the watermark are fetched again; the latest is rewritten idempotently.
+    service.append(make_form_rows(11)[-1])
+    assert ingest_responses(tool)["rows_written"] == 1
+    assert len(pool.rows()) == 11
+
+
+def test_watermark_moves_only_after_the_upsert_commits(tmp_path):
+    rows = make_form_rows(5)
+    service = FakeSheetsService(rows[:4])
+    tool = fetch_tool(service, tmp_path)
+    ingest_responses(tool, upsert=len)
+    service.append(rows[4])
+    service.append(rows[5])
+
+    def failing(rows):
+        raise RuntimeError("database down")
+
+    with pytest.raises(RuntimeError):
+        ingest_responses(tool, upsert=failing)
+    written = []
+    ingest_responses(tool, upsert=lambda rows: written.extend(rows) or len(rows))
+    assert [row["date"] for row in written] == ["2024-01-04", "2024-01-05"]
+
+
+def test_long_exercise_lists_are_condensed_by_the_llm(tmp_path):
+    rows = make_form_rows(1)
+    rows[1][6] = ", ".join(["Bench press 4x8 @60kg"] * 20)
+    written = []
+    llm = CountingLLM()
+
+    result = ingest_responses(fetch_tool(FakeSheetsService(rows), tmp_path), llm=llm,
+                              upsert=lambda batch: written.extend(batch) or len(batch))
+    assert llm.calls == 1 and result["llm_summaries"] == 1
+    assert written[0]["summary"] == "Long push session, bench and dips."
+
+    offline = summary_from_response(structure_response(rows[1]))
+    assert len(offline["summary"]) <= SUMMARY_TEXT_LIMIT and offline["summary"].endswith("...")
@@ -0,0 +1,63 @@
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from crewai import LLM
+from src.gym_manager.llm import GymLLM
+from src.gym_manager.llm_cache import LLMResponseCache, cache_key
+
+MESSAGES = [{"role": "user", "content": "Plan tomorrow's leg day."}]
+
+
+def test_gym_llm_serves_repeated_prompts_from_cache(tmp_path, monkeypatch):
+    calls = []
+
+    def fake_call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        calls.append(messages)
+        return f"answer {len(calls)}"
+
+    monkeypatch.setattr(LLM, "call", fake_call)
+    cache = LLMResponseCache(path=str(tmp_path / "cache.db"))
+    llm = GymLLM(model="gemini/gemini-2.5-flash", cache=cache)
+
+    assert llm.call(MESSAGES) == "answer 1"
+    assert llm.call(MESSAGES) == "answer 1"
+    assert llm.call(MESSAGES + [{"role": "user", "content": "More cardio."}]) == "answer 2"
+    assert len(calls) == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+    # A new process with the same cache file costs nothing either.
+    fresh = GymLLM(model="gemini/gemini-2.5-flash", cache=LLMResponseCache(path=str(tmp_path / "cache.db")))
+    assert fresh.call(MESSAGES) == "answer 1"
+    assert len(calls) == 2
+
+
+def test_key_depends_on_model_tools_and_temperature():
+    base = cache_key("gemini/a", MESSAGES, None, 0.2)
+    assert base == cache_key("gemini/a", MESSAGES, None, 0.2)
+    assert base != cache_key("gemini/b", MESSAGES, None, 0.2)
+    assert base != cache_key("gemini/a", MESSAGES, [{"name": "search"}], 0.2)
+    assert base != cache_key("gemini/a", MESSAGES, None, 0.7)
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "cache.db"), ttl_seconds=0.05)
+    cache.put("k", "v")
+    assert cache.get("k") == "v"
+    time.sleep(0.1)
+    assert cache.get("k") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = LLMResponseCache(path=str(tmp_path / "cache.db"), max_entries=2)
+    cache.put("a", "1")
+    time.sleep(0.01)
+    cache.put("b", "2")
+    time.sleep(0.01)
+    cache.get("a")
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["entries"] == 2
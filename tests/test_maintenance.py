@@ -0,0 +1,107 @@
+import json
+import sqlite3
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
+
+from src.gym_manager.maintenance import (
+    ChromaStore, LTMStore, body_parts, format_report, resolved_injury_filter, run_maintenance,
+)
+
+DAY = 86400
+
+
+def ltm_store(tmp_path, ages_days):
+    path = str(tmp_path / "week_memory.db")
+    storage = LTMSQLiteStorage(db_path=path)
+    now = time.time()
+    for i, age in enumerate(ages_days):
+        storage.save(f"plan task {i % 2}", {"quality": 8}, str(now - age * DAY), 8.0)
+    return path, now
+
+
+def test_ltm_retention_keeps_the_window_and_compacts(tmp_path):
+    path, now = ltm_store(tmp_path, [0, 1, 3, 6, 8, 10, 30, 45])
+    store = LTMStore("week_memory", path, max_age_days=7, max_rows=3)
+
+    report = run_maintenance([store], now=now, report_path=str(tmp_path / "report.json"))
+    (entry,) = report["stores"]
+    assert entry["status"] == "ok" and entry["removed"] == 5
+    assert entry["before"]["rows"] == 8 and entry["after"]["rows"] == 3
+    assert entry["after"]["recall_ms"] is not None
+    with sqlite3.connect(path) as conn:
+        indexes = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    assert "long_term_memories_recall_idx" in indexes
+    assert json.load(open(tmp_path / "report.json"))["stores"][0]["removed"] == 5
+    assert "week_memory" in format_report(report)
+
+
+def test_dry_run_changes_nothing(tmp_path):
+    path, now = ltm_store(tmp_path, [0, 30])
+    report = run_maintenance([LTMStore("w", path, max_age_days=7)], now=now, dry_run=True, report_path=None)
+    assert report["stores"][0]["removed"] == 1 and report["stores"][0]["after"]["rows"] == 2
+
+
+def test_resolved_injury_notes_are_pruned_and_the_index_rebuilt(tmp_path):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=str(tmp_path / "memory"))
+    collection = client.create_collection("short_term", embedding_function=None)
+    notes = [
+        "Member reported a sharp pain in the left knee during squats.",
+        "Lower back soreness after deadlifts, advised rest.",
+        "Prefers morning sessions and high-protein breakfasts.",
+    ]
+    collection.add(ids=["knee", "back", "pref"], documents=notes,
+                   embeddings=[[1.0, 0.0], [0.0, 1.0], [0.5, 0.5]])
+    del client
+
+    # Only the back still hurts, so the knee note is resolved.
+    prune = resolved_injury_filter(["Lower back still tight this morning"])
+    store = ChromaStore("short_term_rag", str(tmp_path / "memory"), "short_term", prune=prune)
+    (entry,) = run_maintenance([store], report_path=None)["stores"]
+    assert entry["status"] == "ok" and entry["removed"] == 1
+    assert entry["before"]["rows"] == 3 and entry["after"]["rows"] == 2
+    assert sorted(store._get_collection().get()["ids"]) == ["back", "pref"]
+    # The rebuild replaced the HNSW segment and the old directory was removed.
+    assert len([p for p in (tmp_path / "memory").iterdir() if p.is_dir()]) == 1
+
+    # Everything is older than the window a month from now.
+    aged = ChromaStore("short_term_rag", str(tmp_path / "memory"), "short_term", max_age_days=14)
+    (entry,) = run_maintenance([aged], now=time.time() + 30 * DAY, report_path=None)["stores"]
+    assert entry["removed"] == 2 and entry["after"]["rows"] == 0
+
+
+def test_failed_rebuild_keeps_the_collection(tmp_path, monkeypatch):
+    import chromadb
+    from chromadb.api.models.Collection import Collection
+
+    client = chromadb.PersistentClient(path=str(tmp_path / "memory"))
+    client.create_collection("short_term", embedding_function=None).add(
+        ids=["knee", "back"], documents=["Knee ache", "Back tight"], embeddings=[[1.0, 0.0], [0.0, 1.0]])
+    store = ChromaStore("short_term_rag", str(tmp_path / "memory"), "short_term")
+
+    def broken_add(self, *args, **kwargs):
+        raise RuntimeError("disk full")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(Collection, "add", broken_add)
+        (entry,) = run_maintenance([store], rebuild=True, report_path=None)["stores"]
+    assert entry["status"] == "error" and "disk full" in entry["error"]
+    assert sorted(store._get_collection().get()["ids"]) == ["back", "knee"]
+    assert [c.name for c in client.list_collections()] == ["short_term"]
+
+    # A rebuild cut off after dropping the old collection is finished on the next open.
+    copy = client.create_collection("short_term__rebuild", embedding_function=None)
+    copy.add(ids=["knee"], documents=["Knee ache"], embeddings=[[1.0, 0.0]])
+    client.delete_collection("short_term")
+    assert ChromaStore("short_term_rag", str(tmp_path / "memory"), "short_term")._get_collection().count() == 1
+
+
+def test_body_parts_and_missing_stores(tmp_path):
+    assert body_parts("Ache in both knees and the lower back") == {"knee", "lower back"}
+    report = run_maintenance([LTMStore("gone", str(tmp_path / "nope.db"))], report_path=None)
+    assert report["stores"][0]["status"] == "missing"
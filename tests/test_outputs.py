@@ -0,0 +1,88 @@
+import json
+import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+import pytest
+from crewai import Agent, Crew, Task
+from crewai.utilities.events import crewai_event_bus
+from pydantic import BaseModel
+
+from src.gym_manager.fakes.llm import ScriptedLLM
+from src.gym_manager.outputs import OutputStream, partial_json
+
+
+class Plan(BaseModel):
+    muscle_to_train: str
+    workout_plan: str
+
+
+@pytest.mark.parametrize("text, fields", [
+    ('{"muscle_to_train": "Back", "workout_plan": "Rows 4x8, pull', {"muscle_to_train": "Back", "workout_plan": "Rows 4x8, pull"}),
+    ('{"muscle_to_train": "Back", "workout_pl', {"muscle_to_train": "Back"}),
+    ('{"a": 1, "b": [1, 2', {"a": 1, "b": [1, 2]}),
+    ('{"a": "say \\"hi', {"a": 'say "hi'}),
+    ('```json\n{"a": {"b": true}}\n```', {"a": {"b": True}}),
+    ("Squat 5x5", None),
+])
+def test_partial_json(text, fields):
+    assert partial_json(text) == fields
+
+
+def read_feed(path):
+    return [json.loads(line) for line in Path(path).read_text().splitlines()]
+
+
+def test_answers_stream_into_outputs_before_tasks_finish(tmp_path):
+    plan = {"muscle_to_train": "Back", "workout_plan": "Rows 4x8, pull-ups 3x10, face pulls 3x15."}
+    llm = ScriptedLLM({"generate_workout_plan_task": ([], json.dumps(plan)), "chef_meal_plan_task": ([], "Oats.")},
+                      stream=True, chunk_latency=0.005)
+    trainer = Agent(role="Gym Trainer", goal="plan", backstory="coach", llm=llm, verbose=False)
+    chef = Agent(role="Chef", goal="cook", backstory="chef", llm=llm, verbose=False)
+    tasks = [
+        Task(name="generate_workout_plan_task", description="Plan tomorrow.", expected_output="a plan",
+             agent=trainer, output_pydantic=Plan),
+        Task(name="chef_meal_plan_task", description="Plan meals.", expected_output="meals", agent=chef),
+    ]
+    crew = Crew(agents=[trainer, chef], tasks=tasks)
+    stream = OutputStream(str(tmp_path), flush_seconds=0.0, today=lambda: "2026-10-18")
+    with crewai_event_bus.scoped_handlers():
+        stream.install()
+        stream.attach(crew)
+        crew.kickoff()
+
+    feed = read_feed(tmp_path / "progress_2026-10-18.jsonl")
+    events = [(e["event"], e.get("task")) for e in feed]
+    assert events[0] == ("run_started", None) and events[-1] == ("run_completed", None)
+    plan_events = [e for e in feed if e.get("task") == "generate_workout_plan_task"]
+    assert plan_events[0]["event"] == "task_started" and plan_events[-1]["event"] == "task_completed"
+    # The plan is readable field by field while it is still being generated.
+    deltas = [e for e in plan_events if e["event"] == "delta"]
+    assert len(deltas) > 5 and "".join(e["text"] for e in deltas) == json.dumps(plan)
+    partials = [e["fields"] for e in plan_events if e["event"] == "partial"]
+    assert set(partials[0]) == {"muscle_to_train"}
+    assert partials[-1] == plan
+    assert plan_events[-1]["output"] == plan
+    assert feed.index(plan_events[-1]) < next(i for i, e in enumerate(feed) if e.get("task") == "chef_meal_plan_task")
+
+    # Final files replace the partial ones; crewai itself no longer writes them.
+    assert json.loads((tmp_path / "trainer_plan_2026-10-18.json").read_text()) == plan
+    assert (tmp_path / "chef_meals_2026-10-18.md").read_text() == "Oats."
+    assert not (tmp_path / "chef_meals_2026-10-18.json").exists()
+    assert not list(tmp_path.glob("*.partial.*")) and not list(tmp_path.glob("*.tmp"))
+    assert all(task.output_file is None for task in tasks)
+    assert os.readlink(tmp_path / "progress.jsonl") == "progress_2026-10-18.jsonl"
+
+
+def test_feed_rotates_daily(tmp_path):
+    days = iter(["2026-10-18", "2026-10-18", "2026-10-19"])
+    stream = OutputStream(str(tmp_path), today=lambda: next(days))
+    stream.emit("run_started")
+    stream.emit("run_completed")
+    stream.emit("run_started")
+    assert [e["event"] for e in read_feed(tmp_path / "progress_2026-10-18.jsonl")] == ["run_started", "run_completed"]
+    assert [e["event"] for e in read_feed(tmp_path / "progress_2026-10-19.jsonl")] == ["run_started"]
+    assert os.readlink(tmp_path / "progress.jsonl") == "progress_2026-10-19.jsonl"
@@ -0,0 +1,102 @@
+import json
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.gym_manager.backfill import load_batch
+from src.gym_manager.fakes.sheets import make_form_rows
+from src.gym_manager.ingest import summary_from_response, to_db_row
+from src.gym_manager.pain_index import extract_events, terms
+from src.gym_manager.tools import pg_tool
+from src.gym_manager.tools.pain_tool import pain_history_tool
+from src.gym_manager.tools.sheets_fetch import structure_response
+
+KNEE_WEEK = ["", "Mild ache in the left knee after squats", "", "Left knee sore on lunges",
+             "Sharp pain in the left knee, lower back a bit stiff", "Left knee 7/10 on squats, can't bend it fully"]
+
+
+def day(n, pain=""):
+    return {"date": (date(2024, 1, 1) + timedelta(days=n)).isoformat(), "gym": True, "muscle_trained": "Legs",
+            "summary": "Squats 4x8 @80kg", "pain_experienced": bool(pain), "pain_details": pain}
+
+
+def trends():
+    return {t["location"]: t for t in pg_tool.fetch_pain_history()["trends"]}
+
+
+def test_events_and_terms_from_pain_reports():
+    assert extract_events("Sharp pain in the left knee, lower back a bit stiff") == {"left knee": 6, "lower back": 2}
+    assert extract_events("Shoulder pain 7/10 on bench") == {"shoulder": 7}
+    assert extract_events("Both knees sore") == {"left knee": 4, "right knee": 4}
+    assert extract_events("left knee swollen and the knee clicks") == {"left knee": 8}
+    assert extract_events("Felt great") == {}
+    assert terms("Mild ache in the left knee after squats") == {"mild", "ache", "left", "knee", "squat"}
+
+
+def test_counters_follow_each_upsert(pool):
+    for n, pain in enumerate(KNEE_WEEK):
+        pg_tool.upsert_summaries([day(n, pain)])
+
+    history = pg_tool.fetch_pain_history("left knee")
+    assert history["summary"] == "left knee: 4 of last 6 logged days, worsening (3 in a row)"
+    (knee,) = history["trends"]
+    assert knee["recent_severity"] == [0, 2, 0, 4, 6, 7] and knee["first_seen"] == "2024-01-02"
+    assert [e["severity"] for e in history["events"]] == [7, 6, 4, 2]
+    # Lower back showed up on the 5th day; its window counts the pain-free days before it.
+    assert trends()["lower back"]["summary"] == "lower back: 1 of last 6 logged days, new"
+    assert trends()["lower back"]["recent_severity"] == [0, 0, 0, 0, 2, 0]
+
+    pg_tool.upsert_summaries([day(6), day(7), day(8)])
+    assert trends()["left knee"]["summary"] == "left knee: 3 of last 6 logged days, improving"
+    assert trends()["left knee"]["longest_streak"] == 3 and trends()["left knee"]["streak"] == 0
+
+
+def test_editing_an_old_day_rebuilds_the_counters(pool):
+    pg_tool.upsert_summaries([day(n, pain) for n, pain in enumerate(KNEE_WEEK)])
+    incremental = trends()
+    pg_tool.upsert_summaries([day(n, pain) for n, pain in enumerate(KNEE_WEEK)][::-1])
+    assert trends() == incremental
+
+    pg_tool.upsert_summaries([day(1), day(3)])
+    knee = trends()["left knee"]
+    assert knee["summary"] == "left knee: 2 of last 6 logged days, worsening (2 in a row)"
+    assert knee["first_seen"] == "2024-01-05" and knee["occurrences"] == 2
+    assert pg_tool.fetch_pain_history("knee")["events"][-1]["date"] == "2024-01-05"
+
+    pg_tool.upsert_summaries([day(n) for n in range(6)])
+    assert trends() == {} and pg_tool.fetch_pain_history("left knee")["summary"] == "left knee: no pain logged"
+
+
+def test_full_text_search_over_pain_reports(pool):
+    pg_tool.upsert_summaries([day(n, pain) for n, pain in enumerate(KNEE_WEEK)])
+    assert [d["date"] for d in pg_tool.fetch_pain_history(query="squats")["days"]] == ["2024-01-06", "2024-01-02"]
+    assert pg_tool.fetch_pain_history(query="sharp knee")["days"] == [
+        {"date": "2024-01-05", "pain": "Sharp pain in the left knee, lower back a bit stiff"}]
+    assert pg_tool.fetch_pain_history(query="shoulder")["days"] == []
+
+
+def test_tool_answers_with_json(pool):
+    pg_tool.upsert_summaries([day(n, pain) for n, pain in enumerate(KNEE_WEEK)])
+    out = json.loads(pain_history_tool.run(location="right knee"))
+    assert out["summary"] == "right knee: no pain logged" and out["events"] == []
+    out = json.loads(pain_history_tool.run())
+    assert [t["location"] for t in out["trends"]] == ["left knee", "lower back"]
+    assert "error" in json.loads(pain_history_tool.run(location="mood"))
+
+
+def test_backfill_batches_keep_the_index(pool):
+    pg_tool.create_history_schema(pool)
+    # 2024-01-01 is a Monday; every 7th day is a rest day and every 5th training day has pain.
+    rows = [to_db_row(summary_from_response(structure_response(r))) for r in make_form_rows(28)[1:]]
+    for start in range(0, len(rows), 10):
+        load_batch(pool, rows[start:start + 10])
+    knee = pg_tool.fetch_pain_history("left knee")
+    assert [e["date"] for e in knee["events"]] == ["2024-01-26", "2024-01-16", "2024-01-11", "2024-01-06", "2024-01-01"]
+    assert knee["summary"] == "left knee: 1 of last 6 logged days, steady"
+    assert knee["trends"][0]["occurrences"] == 5 and knee["trends"][0]["as_of"] == "2024-01-28"
+
+    # Counters advanced batch by batch match a replay of the whole history.
+    incremental = trends()
+    load_batch(pool, rows[:1])
+    assert trends() == incremental
@@ -0,0 +1,126 @@
+import sys
+import threading
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from src.gym_manager.tools.pg_pool import PgPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.connection = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if self.connection.fail_next:
+            self.connection.fail_next = False
+            raise RuntimeError("server closed the connection unexpectedly")
+        self.connection.executed.append((sql, params))
+
+    def fetchone(self):
+        return {"date": "2025-09-06", "gym": True}
+
+
+class FakeConnection:
+    """In-process stand-in for a psycopg2 connection."""
+
+    def __init__(self):
+        self.executed = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = 0
+        self.fail_next = False
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+def _pool(**kwargs):
+    created = []
+
+    def connect():
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    return PgPool(connect, **kwargs), created
+
+
+def test_connections_and_prepared_statements_are_reused():
+    pool, created = _pool(min_size=1, max_size=2)
+    for _ in range(5):
+        with pool.connection() as conn:
+            with conn.cursor() as cur:
+                pool.execute(cur, "upsert_summary", ("", "2025-09-06", True, "Legs", "s", False, ""))
+
+    assert len(created) == 1
+    sql = [s for s, _ in created[0].executed]
+    assert sum(s.startswith("PREPARE upsert_summary") for s in sql) == 1
+    assert sum(s.startswith("EXECUTE upsert_summary (%s, %s, %s, %s, %s, %s, %s)") for s in sql) == 5
+    metrics = pool.metrics()
+    assert metrics["checkouts"] == 5 and metrics["in_use"] == 0 and metrics["statements_prepared"] == 1
+
+
+def test_pool_never_exceeds_max_size():
+    pool, created = _pool(min_size=0, max_size=2, timeout=5)
+    peak = []
+    lock = threading.Lock()
+
+    def work():
+        with pool.connection():
+            with lock:
+                peak.append(pool.metrics()["in_use"])
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(created) == 2
+    assert max(peak) <= 2
+    assert pool.metrics()["wait_seconds_max"] > 0
+
+
+def test_checkout_times_out_when_exhausted():
+    pool, _ = _pool(min_size=0, max_size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(PoolTimeout):
+            with pool.connection():
+                pass
+    assert pool.metrics()["timeouts"] == 1
+
+
+def test_failed_health_check_replaces_connection():
+    pool, created = _pool(min_size=1, max_size=1, health_check_interval=0)
+    created[0].fail_next = True
+    with pool.connection() as conn:
+        assert conn is not created[0]
+    assert created[0].closed
+    assert pool.metrics()["connections_discarded"] == 1
+
+
+def test_error_rolls_back_and_keeps_connection():
+    pool, created = _pool(min_size=1, max_size=1)
+    with pytest.raises(ValueError):
+        with pool.connection():
+            raise ValueError("bad row")
+    assert created[0].rollbacks == 1 and created[0].commits == 0
+    assert pool.metrics()["idle"] == 1
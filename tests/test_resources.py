@@ -0,0 +1,85 @@
+import sys
+import threading
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.gym_manager import resources
+from src.gym_manager.resources import LazyTool, lazy_resource, startup_profile
+
+
+def test_lazy_resource_builds_once_across_threads():
+    calls = []
+
+    @lazy_resource("test_counter")
+    def get_counter():
+        calls.append(1)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_counter())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert resources.is_built("test_counter")
+
+
+def test_startup_profile_reports_failures():
+    @lazy_resource("test_broken")
+    def get_broken():
+        raise RuntimeError("no credentials")
+
+    already_built = {name for name in resources._RESOURCES if resources.is_built(name)}
+    try:
+        entry = next(e for e in startup_profile() if e["resource"] == "test_broken")
+    finally:
+        # startup_profile builds every registered resource; undo that for the other tests.
+        for name, getter in resources._RESOURCES.items():
+            if name not in already_built:
+                getter.reset()
+    assert entry["seconds"] is None
+    assert "no credentials" in entry["error"]
+
+
+def test_lazy_tool_defers_construction():
+    built = []
+
+    class Echo:
+        def _run(self, query):
+            return f"echo {query}"
+
+    def factory():
+        built.append(1)
+        return Echo()
+
+    tool = LazyTool(name="echo", description="Echo the query.", factory=factory)
+    assert not built
+    assert tool.run(query="legs") == "echo legs"
+    assert len(built) == 1
+
+
+def test_importing_crew_builds_nothing():
+    from src.gym_manager import crew  # noqa: F401
+
+    for name in ("llm", "pdf_search_tool", "gmail_send_tool", "week_memory", "short_term_memory"):
+        assert not resources.is_built(name)
+
+
+def test_reset_forgets_the_build_time():
+    builds = iter([0.0, 1.0])
+
+    @lazy_resource("test_rebuilt")
+    def get_rebuilt():
+        return next(builds)
+
+    assert get_rebuilt() == 0.0 and resources.is_built("test_rebuilt")
+    resources._BUILD_SECONDS["test_rebuilt"] = 42.0  # a slow first build
+    get_rebuilt.reset()
+    assert not resources.is_built("test_rebuilt")
+    assert next(e for e in startup_profile(build=False) if e["resource"] == "test_rebuilt")["seconds"] is None
+
+    assert get_rebuilt() == 1.0 and resources._BUILD_SECONDS["test_rebuilt"] < 42.0
+    get_rebuilt.reset()
@@ -0,0 +1,76 @@
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.gym_manager.fakes.sheets import FakeSheetsService, make_form_rows
+from src.gym_manager.tools.sheets_fetch import GoogleSheetsFetchTool
+
+
+def _tool(service, tmp_path, **kwargs):
+    return GoogleSheetsFetchTool(
+        service=service,
+        sheet_id="sheet-1",
+        watermark_path=str(tmp_path / "watermark.json"),
+        **kwargs,
+    )
+
+
+def test_incremental_fetch_returns_every_new_response(tmp_path):
+    rows = make_form_rows(10)
+    service = FakeSheetsService(rows[:4])
+    tool = _tool(service, tmp_path)
+
+    first = tool._run()
+    assert first["status"] == "success"
+    assert len(first["responses"]) == 3
+
+    for row in rows[4:7]:
+        service.append(row)
+    second = tool._run()
+    assert [r["timestamp"] for r in second["responses"]] == [r[0] for r in rows[4:7]]
+    assert second["response"]["timestamp"] == rows[6][0]
+
+    # Nothing new: no responses, but the latest one is still reported.
+    third = tool._run()
+    assert third["responses"] == []
+    assert third["response"]["timestamp"] == rows[6][0]
+
+
+def test_deleted_rows_trigger_rescan(tmp_path):
+    rows = make_form_rows(6)
+    service = FakeSheetsService(list(rows))
+    tool = _tool(service, tmp_path)
+    tool._run()
+
+    del service.rows[2]
+    service.append(make_form_rows(7)[-1])
+    result = tool._run()
+    assert [r["timestamp"] for r in result["responses"]] == [make_form_rows(7)[-1][0]]
+
+
+def test_latest_mode_matches_original_behaviour(tmp_path):
+    rows = make_form_rows(3)
+    tool = _tool(FakeSheetsService(rows), tmp_path, incremental=False)
+    result = tool._run()
+    assert result["response"]["timestamp"] == rows[-1][0]
+    assert "responses" not in result
+
+
+def test_incremental_fetch_on_100k_row_sheet(tmp_path):
+    rows = make_form_rows(100_000)
+    service = FakeSheetsService(rows[:-5])
+    tool = _tool(service, tmp_path)
+    tool.save_watermark(tool.fetch_new_rows()["watermark"])
+
+    for row in rows[-5:]:
+        service.append(row)
+    service.rows_served = 0
+    started = time.perf_counter()
+    fetched = tool.fetch_new_rows()
+    elapsed = time.perf_counter() - started
+
+    assert len(fetched["rows"]) == 5
+    # The watermark row plus the five new ones, instead of all 100k rows.
+    assert service.rows_served == 6
+    assert elapsed < 0.5
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from crewai import Agent, Process, Task
+from crewai.llms.base_llm import BaseLLM
+from src.gym_manager.task_graph import ParallelCrew, TaskGraph
+
+
+class SlowLLM(BaseLLM):
+    """Answers every prompt after a fixed delay, echoing the context it was given."""
+
+    def __init__(self, delay: float):
+        super().__init__(model="scripted")
+        self.delay = delay
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, from_task=None, from_agent=None):
+        time.sleep(self.delay)
+        prompt = messages[-1]["content"] if isinstance(messages, list) else messages
+        seen = [word for word in ("alpha", "beta", "gamma") if f"{word}-output" in prompt]
+        return f"Thought: done\nFinal Answer: {from_task.name}-output saw {','.join(seen) or 'nothing'}"
+
+
+def _agent(name, llm):
+    return Agent(role=name, goal=name, backstory=name, llm=llm, verbose=False)
+
+
+def _diamond(delay):
+    llm = SlowLLM(delay)
+    alpha = Task(name="alpha", description="alpha", expected_output="text", agent=_agent("a", llm))
+    beta = Task(name="beta", description="beta", expected_output="text", agent=_agent("b", llm), context=[alpha])
+    gamma = Task(name="gamma", description="gamma", expected_output="text", agent=_agent("c", llm), context=[alpha])
+    omega = Task(name="omega", description="omega", expected_output="text", agent=_agent("d", llm), context=[beta, gamma])
+    return [alpha, beta, gamma, omega]
+
+
+def test_graph_orders_and_finds_critical_path():
+    tasks = _diamond(0)
+    graph = TaskGraph(tasks)
+    assert graph.order[0] == 0 and graph.order[-1] == 3
+    path, seconds = graph.critical_path({0: 1.0, 1: 5.0, 2: 2.0, 3: 1.0})
+    assert path == [0, 1, 3]
+    assert seconds == 7.0
+
+
+def test_graph_without_context_is_sequential():
+    llm = SlowLLM(0)
+    tasks = [Task(description=f"t{i}", expected_output="x", agent=_agent(f"r{i}", llm)) for i in range(3)]
+    assert TaskGraph(tasks).upstream == {0: [], 1: [0], 2: [0, 1]}
+
+
+def test_graph_ignores_dependencies_outside_the_crew():
+    tasks = _diamond(0)
+    assert TaskGraph(tasks[1:]).upstream == {0: [], 1: [], 2: [0, 1]}
+
+
+def test_parallel_crew_runs_independent_tasks_together():
+    tasks = _diamond(0.3)
+    crew = ParallelCrew(
+        agents=[task.agent for task in tasks],
+        tasks=tasks,
+        process=Process.sequential,
+        max_workers=2,
+    )
+    result = crew.kickoff()
+    report = crew.execution_report
+
+    assert result.raw == "omega-output saw beta,gamma"
+    assert tasks[1].output.raw.endswith("saw alpha")
+    assert report["critical_path"][0] == "alpha" and report["critical_path"][-1] == "omega"
+    # beta and gamma overlap, so the run takes three steps rather than four.
+    assert report["wall_seconds"] < report["sequential_seconds"] - 0.2
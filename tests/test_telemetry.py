@@ -0,0 +1,86 @@
+import os
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from crewai import Agent, Crew, Task
+from crewai.tools import tool
+from crewai.utilities.events import crewai_event_bus
+
+from src.gym_manager import telemetry
+from src.gym_manager.fakes.llm import ScriptedLLM
+from src.gym_manager.fakes.sheets import FakeSheetsService, make_form_rows
+from src.gym_manager.telemetry import Telemetry, load, percentile, summarize
+from src.gym_manager.tools.sheets_fetch import GoogleSheetsFetchTool
+
+
+@tool("lookup_pr")
+def lookup_pr(exercise: str) -> str:
+    """Personal record for an exercise."""
+    return f"{exercise}: 100kg"
+
+
+def test_crew_run_is_recorded_per_stage(tmp_path):
+    path = tmp_path / "telemetry.jsonl"
+    llm = ScriptedLLM({"plan": ([("lookup_pr", {"exercise": "squat"})], "Squat 5x5 @80kg")})
+    agent = Agent(role="Gym Trainer", goal="plan", backstory="coach", llm=llm, tools=[lookup_pr], verbose=False)
+    task = Task(name="plan", description="Plan a squat session.", expected_output="a plan", agent=agent)
+
+    with crewai_event_bus.scoped_handlers():
+        stream = Telemetry(str(path)).install()
+        Crew(agents=[agent], tasks=[task]).kickoff()
+    assert stream._task_runs == {}  # finished runs are forgotten
+
+    records = load(str(path))
+    by_kind = {r["kind"]: r for r in records}
+    assert set(by_kind) >= {"crew", "task", "agent", "llm", "tool"}
+    assert len({r["run"] for r in records}) == 1
+    assert by_kind["task"]["name"] == "plan" and by_kind["task"]["agent"] == "Gym Trainer"
+    assert by_kind["tool"]["name"] == "lookup_pr" and by_kind["tool"]["task"] == "plan"
+    assert by_kind["agent"]["llm_requests"] == 2
+    assert by_kind["agent"]["prompt_tokens"] == llm.prompt_tokens
+    assert by_kind["agent"]["completion_tokens"] == llm.completion_tokens
+    assert sum(1 for r in records if r["kind"] == "llm") == 2
+
+
+def test_sheets_fetch_writes_a_span(tmp_path, monkeypatch):
+    monkeypatch.setenv("TELEMETRY", "true")
+    telemetry.get_telemetry.reset()
+    try:
+        GoogleSheetsFetchTool(
+            service=FakeSheetsService(make_form_rows(5)), sheet_id="s",
+            watermark_path=str(tmp_path / "wm.json"), incremental=True,
+        )._run()
+    finally:
+        telemetry.get_telemetry.reset()
+    (entry,) = load(str(tmp_path / "telemetry.jsonl"))
+    assert entry["kind"] == "sheets" and entry["rows_downloaded"] == 6 and entry["new_rows"] == 5
+
+
+def test_stream_is_rotated_past_max_bytes(tmp_path):
+    path = tmp_path / "telemetry.jsonl"
+    stream = Telemetry(str(path), max_bytes=1000, backups=2)
+    for i in range(60):
+        stream.write("tool", f"t{i}", 0.0, 1.0)
+
+    assert path.stat().st_size <= 1000 and (tmp_path / "telemetry.jsonl.2").exists()
+    assert not (tmp_path / "telemetry.jsonl.3").exists()
+    names = [r["name"] for r in load(str(path))]
+    assert names[-1] == "t59" and names == sorted(names, key=lambda n: int(n[1:])) and len(names) < 60
+
+
+def test_summary_reports_percentiles_per_stage():
+    records = [{"run": f"r{i}", "kind": "tool", "name": "search", "seconds": float(i), "status": "ok"}
+               for i in range(1, 21)]
+    records.append({"run": "r20", "kind": "tool", "name": "search", "seconds": 0.5, "status": "error"})
+    records.append({"run": "r20", "kind": "agent", "name": "Chef", "seconds": 2.0, "status": "ok",
+                    "prompt_tokens": 90, "completion_tokens": 10})
+
+    (agent, tool_row) = summarize(records)
+    assert agent["stage"] == "agent:Chef" and agent["tokens_avg"] == 100
+    assert tool_row["count"] == 21 and tool_row["errors"] == 1
+    assert tool_row["p50"] == 10.0 and tool_row["p95"] == 19.0
+    assert summarize(records, kinds=["tool"], last_runs=1)[0]["count"] == 2
+    assert percentile([3.0], 95) == 3.0
@@ -0,0 +1,67 @@
+import json
+import shutil
+import sys
+from datetime import date
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.gym_manager import timetable
+from src.gym_manager.timetable import TIMETABLE_PDF, build_index, parse_timetable
+
+
+def test_parses_the_bundled_timetable(tmp_path):
+    index = build_index(TIMETABLE_PDF, str(tmp_path / "index.json"))
+    rows = index.weekly_timetable()
+    assert rows[0] == ["Monday", "Chest + Biceps"]
+    assert rows[6] == ["Sunday", "Rest"]
+    saturday = index.day("saturday")
+    assert saturday["muscle_groups"] == ["Legs", "Abs"]
+    assert saturday["focus"] == ["Quads/Hamstrings"]
+    assert index.notes[0].startswith("Each session")
+    # 2024-01-02 was a Tuesday.
+    assert index.day("tomorrow", today=date(2024, 1, 2))["session"] == "Legs + Abs"
+
+
+def test_index_is_rebuilt_only_when_the_pdf_changes(tmp_path, monkeypatch):
+    pdf = tmp_path / "timetable.pdf"
+    shutil.copy(TIMETABLE_PDF, pdf)
+    index_path = str(tmp_path / "index.json")
+    parses = []
+    real_extract = timetable.extract_text
+    monkeypatch.setattr(timetable, "extract_text", lambda path: parses.append(path) or real_extract(path))
+
+    build_index(str(pdf), index_path)
+    build_index(str(pdf), index_path)
+    assert len(parses) == 1
+
+    pdf.write_bytes(pdf.read_bytes() + b"\n%changed")
+    build_index(str(pdf), index_path)
+    assert len(parses) == 2
+    assert json.loads(Path(index_path).read_text())["pdf_sha256"] == timetable.pdf_hash(str(pdf))
+
+
+def test_session_times_are_split_out():
+    data = parse_timetable("Week\nMonday: Chest + Triceps 6:00 AM - 7:30 AM\nTuesday - Back (18:00)\n")
+    monday, tuesday = data["days"][:2]
+    assert monday["session"] == "Chest + Triceps" and monday["time"] == "6:00 AM - 7:30 AM"
+    assert tuesday["session"] == "Back" and tuesday["time"] == "18:00"
+    assert data["title"] == "Week"
+
+
+def test_pdf_search_belongs_to_an_agent_the_crew_runs(tmp_path, monkeypatch):
+    from src.gym_manager.crew import GymManagerCrew, rag_tool
+    from src.gym_manager.fakes.llm import ScriptedLLM
+    from src.gym_manager.fakes.sheets import FakeSheetsService
+
+    from src.gym_manager.vector_store import VectorStore, get_vector_store
+
+    monkeypatch.setenv("GOOGLE_SHEET_ID", "test-sheet")
+    get_vector_store.override(VectorStore(str(tmp_path / "vectors")))
+    try:
+        crew = GymManagerCrew(goal="bulking", recipient_email="a@example.com", member="a@example.com",
+                              include_survey=False, state_dir=str(tmp_path), llm=ScriptedLLM({}),
+                              sheets_service=FakeSheetsService([])).crew()
+    finally:
+        get_vector_store.reset()
+    owners = [task.name for task in crew.tasks if any(tool.name == rag_tool.name for tool in task.agent.tools)]
+    assert owners == ["generate_workout_plan_task"]
@@ -0,0 +1,116 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from crewai import Agent, Crew, Task
+from crewai.tools import tool
+
+from src.gym_manager.fakes.llm import ScriptedLLM
+from src.gym_manager.tool_memo import MemoizedTool, ToolMemo, format_stats, memo_policy
+
+CALLS = []
+
+
+@memo_policy(safe=True)
+@tool("memo_lookup_tool")
+def lookup_tool(query: str, days: int = 7) -> str:
+    """Look something up."""
+    CALLS.append((query, days))
+    time.sleep(0.05)
+    return f"{query} over {days} days"
+
+
+@memo_policy(safe=False)
+@tool("memo_write_tool")
+def write_tool(value: str) -> str:
+    """Write something."""
+    CALLS.append(("write", value))
+    return "written"
+
+
+@tool("memo_undeclared_tool")
+def undeclared_tool(value: str) -> str:
+    """Not declared either way."""
+    return value
+
+
+@pytest.fixture
+def memo():
+    CALLS.clear()
+    memo = ToolMemo()
+    memo.start_run()
+    return memo
+
+
+def test_identical_calls_run_once_per_run(memo):
+    lookup, _, undeclared = memo.wrap([lookup_tool, write_tool, undeclared_tool])
+    assert isinstance(lookup, MemoizedTool) and undeclared is undeclared_tool
+    assert lookup.name == lookup_tool.name and lookup.description == lookup_tool.description
+
+    assert lookup.run(query="Knee  pain") == "Knee  pain over 7 days"
+    # Defaults are filled in and whitespace/case are ignored.
+    assert lookup.run(query="knee pain", days=7) == "Knee  pain over 7 days"
+    lookup.run(query="knee pain", days=14)
+    assert CALLS == [("Knee  pain", 7), ("knee pain", 14)]
+    assert memo.stats()["memo_lookup_tool"] == {"calls": 3, "executed": 2, "deduped": 1, "shared": 0}
+
+    memo.finish_run()
+    lookup.run(query="knee pain")  # outside a run every call runs
+    memo.start_run()
+    lookup.run(query="knee pain")
+    assert len(CALLS) == 4 and memo.stats()["memo_lookup_tool"]["executed"] == 1
+
+
+def test_concurrent_identical_calls_share_one_flight(memo):
+    (lookup,) = memo.wrap([lookup_tool])
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: lookup.run(query="squat form"), range(8)))
+
+    assert set(results) == {"squat form over 7 days"} and len(CALLS) == 1
+    counts = memo.stats()["memo_lookup_tool"]
+    assert counts["executed"] == 1 and counts["shared"] + counts["deduped"] == 7 and counts["shared"] > 0
+    assert format_stats(memo.stats()) == "7 of 8 tool calls deduplicated (memo_lookup_tool: 7)"
+
+
+def test_writes_always_run_and_clear_the_run(memo):
+    lookup, write = memo.wrap([lookup_tool, write_tool])
+    lookup.run(query="latest")
+    write.run(value="a")
+    write.run(value="a")
+    lookup.run(query="latest")
+    assert CALLS == [("latest", 7), ("write", "a"), ("write", "a"), ("latest", 7)]
+
+
+def test_failures_are_not_kept(memo):
+    results = iter([RuntimeError("down"), "Error during search: timeout", "ok"])
+
+    def run():
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    with pytest.raises(RuntimeError):
+        memo.call("flaky", {}, run)
+    assert memo.call("flaky", {}, run).startswith("Error")
+    assert memo.call("flaky", {}, run) == "ok" and memo.call("flaky", {}, run) == "ok"
+    assert memo.stats()["flaky"] == {"calls": 4, "executed": 3, "deduped": 1, "shared": 0}
+
+
+def test_attach_scopes_memo_to_each_kickoff():
+    agent = Agent(role="Trainer", goal="Plan", backstory="Coach", llm=ScriptedLLM({}), tools=[lookup_tool, write_tool])
+    task = Task(description="Plan tomorrow", expected_output="A plan", agent=agent)
+    assert ToolMemo.of(Crew(agents=[agent], tasks=[task])) is None
+    crew = ToolMemo().attach(Crew(agents=[agent], tasks=[task]))
+
+    memo = ToolMemo.of(crew)
+    assert memo is not None and crew.before_kickoff_callbacks == [memo.start_run]
+    assert all(isinstance(t, MemoizedTool) for t in agent.tools + task.tools)
+    assert agent.tools_handler.cache is None
+
+    # Kickoff callbacks pass inputs and outputs through.
+    assert memo.start_run({"goal": "bulk"}) == {"goal": "bulk"} and memo.active
+    assert memo.finish_run("output") == "output" and not memo.active
@@ -0,0 +1,106 @@
+import json
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np
+import pytest
+
+from src.gym_manager.fakes.sheets import make_form_rows
+from src.gym_manager.ingest import summary_from_response, to_db_row
+from src.gym_manager.tools import pg_tool
+from src.gym_manager.tools.sheets_fetch import structure_response
+from src.gym_manager.tools.training_tool import training_analytics_tool
+from src.gym_manager.training_log import (
+    TrainingAnalytics, log_entries, log_table, muscle_for, parse_entry, parse_session,
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Bench 4x8 @60kg", ("bench", 4, 8, 60.0)),
+    ("Bench press 4 x 8 @ 62.5 kg", ("bench press", 4, 8, 62.5)),
+    ("Squat: 5x5 at 100", ("squat", 5, 5, 100.0)),
+    ("Deadlift 3x5 @225lb", ("deadlift", 3, 5, 102.06)),
+    ("Pull-ups 3x10", ("pull-ups", 3, 10, 0.0)),
+    ("Cardio done", None),
+])
+def test_parse_entry(text, expected):
+    assert parse_entry(text) == expected
+
+
+def test_parse_session_reads_ingested_summaries():
+    entries, unparsed = parse_session("Chest session: Bench 4x8 @60kg, Row 3x10 @50kg. Cardio done.")
+    assert entries == [("bench", 4, 8, 60.0), ("row", 3, 10, 50.0)] and unparsed == ["Cardio done"]
+    assert [muscle_for(e[0], "Chest") for e in entries] == ["Chest", "Back"]
+    assert muscle_for("leg raise") == "Core" and muscle_for("zercher carry", "legs") == "Legs"
+
+
+def day(d, exercises, muscle="Legs"):
+    """exercise_log rows of one day's exercise list."""
+    return [{"date": f"2024-01-{d:02d}", "exercise": exercise, "muscle": m, "sets": sets, "reps": reps, "load_kg": load}
+            for exercise, m, sets, reps, load in log_entries(exercises, muscle)]
+
+
+def test_volume_trend_and_e1rm():
+    days = [row for d in range(1, 22) for row in day(d, f"Squat 4x5 @{100 + d}kg, Bench {3 + d // 8}x8 @60kg, Plank 3x1")]
+    table = log_table(days[::-1])
+    assert table.dtype.names == ("date", "exercise", "muscle", "sets", "reps", "load_kg") and len(table) == 63
+
+    analytics = TrainingAnalytics(table)
+    sets, tonnage = analytics.weekly_volume()
+    muscles = analytics.muscles.tolist()
+    # Mondays 1, 8 and 15 January; the first week has seven days logged.
+    assert sets[:, muscles.index("Chest")].tolist() == [21, 28, 34]
+    assert sets[:, muscles.index("Core")].tolist() == [21, 21, 21]
+    assert tonnage[0, muscles.index("Legs")] == sum(4 * 5 * (100 + d) for d in range(1, 8))
+
+    squat = analytics.e1rm_summary()["squat"]
+    assert squat["first_kg"] == round(107 * (1 + 5 / 30), 1) and squat["latest_kg"] == round(121 * (1 + 5 / 30), 1)
+    assert "plank" not in analytics.e1rm_summary()
+    assert analytics.tonnage_trend()["slope_pct_per_week"] > 0
+
+
+def test_imbalance_flags():
+    days = [row for d in (1, 2) for row in day(d, "Bench 5x8 @60kg, Overhead press 4x8 @40kg, Row 2x10 @50kg", "Chest")]
+    days += [row for d in (8, 9, 10) for row in day(d, "Bench 5x8 @60kg, Row 2x10 @50kg, Squat 5x5 @100kg", "Chest")]
+    flags = TrainingAnalytics(log_table(days)).imbalance_flags()
+    assert flags[0].startswith("push:pull sets 3.30") and flags[1] == "not trained: Arms, Core"
+    assert flags[2:] == []
+
+    days += day(11, "Row 10x10 @50kg")
+    assert TrainingAnalytics(log_table(days)).imbalance_flags()[-1] == "Back sets up 300% week over week (4 -> 16)"
+
+
+def test_empty_window():
+    report = TrainingAnalytics(log_table([])).report()
+    assert report["entries"] == 0 and report["weeks"] == []
+
+
+def test_tool_reports_from_history(pool):
+    rows = [to_db_row(summary_from_response(structure_response(r))) for r in make_form_rows(14)[1:]]
+    pg_tool.upsert_summaries(rows)
+
+    out = json.loads(training_analytics_tool.run(weeks=2, end_date="2024-01-14"))
+    assert out["from"] == "2024-01-01" and out["entries"] == 24
+    # Six sessions a week of "Bench 4x8 @60kg, Row 3x10 @50kg".
+    assert out["weeks"][0] == {"week_start": "2024-01-01", "sets": {"Back": 18, "Chest": 24},
+                               "tonnage_kg": {"Back": 9000.0, "Chest": 11520.0}}
+    assert out["e1rm"]["bench"]["e1rm_kg"] == 76.0 and out["tonnage_trend"]["last_week_change_pct"] == 0.0
+    assert out["flags"] == ["not trained: Legs, Shoulders, Arms, Core"]
+    assert np.isclose(out["tonnage_trend"]["slope_pct_per_week"], 0.0)
+
+
+def test_log_keeps_exercises_the_summary_cut_off(pool):
+    exercises = ", ".join(f"Curl variation {i} 3x12 @{10 + i}kg" for i in range(20))
+    response = {"timestamp": "01/02/2024 19:00:00", "workout_data": {
+        "did_workout": "Yes", "muscles_trained": "Arms", "exercises": exercises}}
+    row = to_db_row(summary_from_response(response))
+    assert row["summary"].endswith("...")  # past SUMMARY_TEXT_LIMIT
+    pg_tool.upsert_summaries([row])
+
+    out = json.loads(training_analytics_tool.run(weeks=1, end_date="2024-01-07"))
+    assert out["entries"] == 20 and out["weeks"][0]["sets"] == {"Arms": 60}
+
+    # A day re-ingested as a rest day drops its entries.
+    pg_tool.upsert_summaries([{**row, "gym": False, "exercises": ""}])
+    assert pg_tool.fetch_exercise_log("2024-01-01", "2024-01-07") == []
@@ -0,0 +1,179 @@
+import sys
+import threading
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+from crewai.memory import EntityMemory, ShortTermMemory
+
+from src.gym_manager.embeddings import CachedEmbeddingFunction, EmbeddingService, EmbeddingStore
+from src.gym_manager.maintenance import ChromaStore, run_maintenance
+from src.gym_manager.vector_store import (
+    ENTITIES, KNOWLEDGE, SHORT_TERM, SharedRAGStorage, VectorStore, chroma_settings, content_id,
+    embedchain_config, format_migration, get_vector_store, member_namespace, migrate, use_shared_store,
+)
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+
+@pytest.fixture
+def embedder():
+    return FakeEmbedder()
+
+
+@pytest.fixture
+def store(tmp_path, embedder):
+    service = EmbeddingService(embedder, EmbeddingStore(str(tmp_path / "embeddings")), model="test-model")
+    return VectorStore(str(tmp_path / "vectors"), CachedEmbeddingFunction(service))
+
+
+def test_writes_are_deduplicated_by_content_per_namespace(store, embedder):
+    assert store.add(SHORT_TERM, ["Left knee pain on squats", "Left knee  pain on squats\n", "Shoulder fine"]) == 2
+    assert store.add(SHORT_TERM, ["Shoulder fine"], [{"agent": "doctor"}]) == 0
+    assert store.add(ENTITIES, ["Shoulder fine"]) == 1  # namespaces are separate collections
+
+    stats = store.stats()
+    assert stats[SHORT_TERM] == {"rows": 2, "written": 4, "added": 2, "duplicates": 2}
+    assert stats[ENTITIES]["rows"] == 1 and stats[KNOWLEDGE]["rows"] == 0
+    assert store.collection(SHORT_TERM).get(ids=[content_id("Shoulder fine")])["documents"] == ["Shoulder fine"]
+    # Each distinct text is embedded once, whichever namespace it went to.
+    assert sorted(sum(embedder.calls, [])) == ["Left knee pain on squats", "Shoulder fine"]
+
+    (nearest,) = store.query(SHORT_TERM, "Left knee pain on squats", limit=1)
+    assert nearest["document"] == "Left knee pain on squats" and nearest["distance"] == pytest.approx(0)
+    with pytest.raises(ValueError):
+        store.collection("long_term")
+
+
+def test_embedding_runs_outside_the_store_lock(tmp_path):
+    started, release = threading.Event(), threading.Event()
+
+    def slow_embedder(texts):
+        if "Knee ache after squats" in texts:
+            started.set()
+            release.wait(5)
+        return [[float(len(text)), 1.0, 0.0] for text in texts]
+
+    service = EmbeddingService(slow_embedder, EmbeddingStore(str(tmp_path / "embeddings")), model="test-model")
+    store = VectorStore(str(tmp_path / "vectors"), CachedEmbeddingFunction(service))
+    writer = threading.Thread(target=store.add, args=(SHORT_TERM, ["Knee ache after squats"]))
+    writer.start()
+    assert started.wait(5)
+    try:
+        # While the short-term write is embedding, other namespaces and readers are not held up.
+        done = threading.Event()
+        threading.Thread(target=lambda: (store.add(ENTITIES, ["Member"], embeddings=[[1.0, 0.0, 0.0]]),
+                                         store.query(ENTITIES, "Member"), done.set())).start()
+        assert done.wait(2)
+    finally:
+        release.set()
+        writer.join(5)
+    assert store.stats()[SHORT_TERM]["rows"] == 1 and store.stats()[ENTITIES]["rows"] == 1
+
+
+def test_crewai_memories_share_the_store(store):
+    short_term = ShortTermMemory(storage=SharedRAGStorage(SHORT_TERM, store=store))
+    entities = EntityMemory(storage=SharedRAGStorage(ENTITIES, store=store))
+    assert short_term.storage.app is entities.storage.app is store.client
+
+    short_term.storage.save("Knee ache after squats", {"agent": "doctor"})
+    short_term.storage.save("Knee ache after squats", {"agent": "doctor"})
+    entities.storage.save("Member: prefers morning sessions", {"entity_type": "person"})
+    assert store.stats()[SHORT_TERM]["rows"] == 1
+    assert [r["context"] for r in short_term.storage.search("knee", score_threshold=0)] == ["Knee ache after squats"]
+
+    # Resetting one memory empties only its namespace.
+    short_term.storage.reset()
+    assert short_term.storage.search("knee", score_threshold=0) == []
+    assert store.stats()[ENTITIES]["rows"] == 1
+
+
+def test_members_recall_only_their_own_memories(store):
+    mine = ShortTermMemory(storage=SharedRAGStorage(member_namespace(SHORT_TERM, "a@example.com"), store=store))
+    theirs = ShortTermMemory(storage=SharedRAGStorage(member_namespace(SHORT_TERM, "b@example.com"), store=store))
+    assert member_namespace(SHORT_TERM, "") == SHORT_TERM
+
+    mine.storage.save("Knee ache after squats", {"agent": "doctor"})
+    assert [r["context"] for r in mine.storage.search("knee", score_threshold=0)] == ["Knee ache after squats"]
+    assert theirs.storage.search("knee", score_threshold=0) == []
+    assert store.stats()[SHORT_TERM]["rows"] == 0
+
+
+def test_embedchain_chunks_go_to_the_knowledge_namespace(store):
+    from embedchain.config.vector_db.chroma import ChromaDbConfig
+    from embedchain.vectordb.chroma import ChromaDB
+
+    # Opening the store's directory from embedchain reuses the process's Chroma system.
+    db = ChromaDB(ChromaDbConfig(**embedchain_config(store)["config"]))
+    assert db.client._system is store.client._system
+
+    class App:
+        pass
+
+    app = App()
+    app.db = db
+    use_shared_store(app, store)
+    app.db.add(documents=["Mon 6am spin", "Mon 6am spin"], metadatas=[{"app_id": "pdf"}] * 2, ids=["a", "b"])
+    assert app.db.collection.count() == 1 and store.stats()[KNOWLEDGE]["rows"] == 1
+
+
+def test_migration_copies_legacy_vectors_once(tmp_path, store, embedder):
+    import chromadb
+
+    legacy = chromadb.PersistentClient(path=str(tmp_path / "memory"))
+    collection = legacy.create_collection("short_term", embedding_function=None)
+    collection.add(ids=["1", "2", "3"], embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [1.0, 0.0, 0.0]],
+                   documents=["Sore lower back", "Hamstring tight", "Sore lower back"],
+                   metadatas=[{"agent": "doctor"}] * 3)
+    sources = [(str(tmp_path / "memory"), "short_term", SHORT_TERM), (str(tmp_path / "db"), "embedchain_store", KNOWLEDGE)]
+
+    dry = migrate(store, sources, dry_run=True)
+    assert dry["sources"][0]["added"] == 2 and store.stats()[SHORT_TERM]["rows"] == 0
+
+    report = migrate(store, sources)
+    moved, missing = report["sources"]
+    assert moved == {**moved, "status": "ok", "read": 3, "added": 2, "duplicates": 1}
+    assert missing["status"] == "missing"
+    assert "3 read, 2 added, 1 duplicates" in format_migration(report)
+    # Stored vectors are copied as they are; nothing is re-embedded.
+    assert embedder.calls == []
+    assert store.collection(SHORT_TERM).get(ids=[content_id("Hamstring tight")], include=["embeddings"])[
+        "embeddings"][0].tolist() == [0.0, 1.0, 0.0]
+
+    assert migrate(store, sources)["sources"][0]["added"] == 0
+
+
+def test_memory_writes_work_after_maintenance_rebuilds(store):
+    get_vector_store.override(store)
+    try:
+        short_term = ShortTermMemory(storage=SharedRAGStorage(SHORT_TERM))
+        short_term.storage.save("Knee ache after squats", {"agent": "doctor"})
+
+        class DB:
+            pass
+
+        class App:
+            db = DB()
+
+        app = App()
+        use_shared_store(app, store)
+        store.add(KNOWLEDGE, ["Mon 6am spin"])
+
+        stores = [ChromaStore(name, store.path, namespace, settings=chroma_settings())
+                  for name, namespace in (("short_term_rag", SHORT_TERM), ("knowledge_rag", KNOWLEDGE))]
+        assert [e["status"] for e in run_maintenance(stores, rebuild=True, report_path=None)["stores"]] == ["ok", "ok"]
+
+        short_term.storage.save("Shoulder fine on bench", {"agent": "doctor"})
+        assert store.stats()[SHORT_TERM]["rows"] == 2
+        assert [r["context"] for r in short_term.storage.search("Shoulder fine on bench", score_threshold=0)][0] == (
+            "Shoulder fine on bench")
+        assert app.db.collection.count() == 1 and app.db.collection.id == store.collection(KNOWLEDGE).id
+    finally:
+        get_vector_store.reset()
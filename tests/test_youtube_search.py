@@ -0,0 +1,54 @@
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest
+
+from src.gym_manager.fakes.serper import FakeSerperServer
+from src.gym_manager.tools import youtube_search_tool as yt
+from src.gym_manager.ttl_cache import SQLiteTTLCache
+
+
+@pytest.fixture
+def serper(tmp_path, monkeypatch):
+    with FakeSerperServer(latency=0.2, fail_queries={"broken query"}) as server:
+        monkeypatch.setattr(yt, "SERPER_URL", server.url)
+        monkeypatch.setattr(yt, "SERPER_API_KEY", "test-key")
+        yt.get_session.reset()
+        cache = SQLiteTTLCache(str(tmp_path / "youtube.db"), table="youtube_search")
+        monkeypatch.setattr(yt, "get_search_cache", lambda: cache)
+        yield server
+        yt.get_session.reset()
+
+
+def test_batch_runs_queries_concurrently(serper):
+    queries = [f"exercise {i}" for i in range(6)]
+    started = time.perf_counter()
+    results = yt.search_youtube_many(queries)
+    elapsed = time.perf_counter() - started
+
+    assert list(results) == queries
+    assert all(len(links) == 3 for links in results.values())
+    assert serper.requests == 6
+    assert elapsed < 6 * 0.2 / 2
+
+
+def test_repeated_queries_are_served_from_cache(serper):
+    yt.search_youtube("Goblet Squat")
+    assert yt.search_youtube("goblet  squat") == yt.search_youtube("Goblet Squat")
+    assert serper.requests == 1
+
+
+def test_sequential_searches_reuse_one_connection(serper):
+    for i in range(4):
+        yt.search_youtube(f"lunge variation {i}")
+    assert serper.requests == 4
+    assert len(serper.connections) == 1
+
+
+def test_batch_reports_errors_per_query(serper):
+    out = yt.youtube_batch_search_tool.run(queries=["broken query", "deadlift"])
+    broken, deadlift = out.split("\n\n")
+    assert broken.startswith("broken query:\nError during YouTube search")
+    assert "watch?v=deadlift-1" in deadlift